@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Bulk ingestion benchmark.
+
+Ingests the same synthetic documents into the native vector store twice:
+once with one VectorStoreService.ingest_text call per document (what
+POST /api/documents/ingest does) and once through BulkIngestPipeline. The
+pipeline then re-ingests the set with a fraction of the documents edited,
+which only embeds the changed chunks (see services/ingest_manifest.py).
+
+By default the embedding model is simulated with a fixed cost per call plus
+a cost per text, roughly the shape of a GPU forward pass, so the benchmark
+shows the effect of batching across documents without a model installed.
+--real uses the configured vector store embedding model instead.
+
+Usage:
+    python scripts/bench_bulk_ingest.py                          # 2000 docs, simulated model
+    python scripts/bench_bulk_ingest.py --docs 500 --real
+    python scripts/bench_bulk_ingest.py --call-ms 20 --text-ms 0.2
+    python scripts/bench_bulk_ingest.py --edited 0.1
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.bulk_ingest import BulkIngestPipeline, IngestDocument
+from src.services.vector_store import VectorStoreService
+
+
+def make_documents(n: int, paragraphs: int, seed: int = 0) -> list[IngestDocument]:
+    rng = np.random.default_rng(seed)
+    words = [f"word{i}" for i in range(2000)]
+    return [
+        IngestDocument(
+            source=f"doc-{i}.md",
+            text="\n\n".join(" ".join(rng.choice(words, size=80)) for _ in range(paragraphs)),
+        )
+        for i in range(n)
+    ]
+
+
+def make_service(root: Path, args) -> VectorStoreService:
+    service = VectorStoreService(persist_dir=str(root), backend="native")
+    if not args.real:
+        def simulated(texts):
+            time.sleep((args.call_ms + args.text_ms * len(texts)) / 1000)
+            return np.random.default_rng(len(texts)).standard_normal((len(texts), 384)).astype(np.float32)
+
+        service._embedding_fn = simulated
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk ingestion benchmark")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--paragraphs", type=int, default=3, help="Paragraphs (~1 chunk each) per document")
+    parser.add_argument("--call-ms", type=float, default=10.0, help="Simulated cost per embedding call")
+    parser.add_argument("--text-ms", type=float, default=0.1, help="Simulated cost per embedded text")
+    parser.add_argument("--edited", type=float, default=0.01, help="Fraction of documents edited for re-ingestion")
+    parser.add_argument("--real", action="store_true", help="Use the configured embedding model")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    documents = make_documents(args.docs, args.paragraphs)
+
+    with tempfile.TemporaryDirectory(prefix="impetus-ingest-bench-") as tmp:
+        service = make_service(Path(tmp) / "single", args)
+        started = time.perf_counter()
+        chunks = 0
+        for document in documents:
+            chunks += service.ingest_text(document.text, source=document.source, collection_name="bench")[
+                "chunks_stored"
+            ]
+        single_seconds = time.perf_counter() - started
+
+        service = make_service(Path(tmp) / "bulk", args)
+        started = time.perf_counter()
+        summary = list(BulkIngestPipeline(service, collection_name="bench").run(documents))[-1]
+        bulk_seconds = time.perf_counter() - started
+
+        edited = list(documents)
+        if args.edited > 0:
+            for i in range(0, len(edited), max(1, round(1 / args.edited))):
+                edited[i] = IngestDocument(source=edited[i].source, text=edited[i].text + "\n\nAn added paragraph.")
+        started = time.perf_counter()
+        resync = list(BulkIngestPipeline(service, collection_name="bench").run(edited))[-1]
+        resync_seconds = time.perf_counter() - started
+
+    model = "configured model" if args.real else f"simulated model ({args.call_ms} ms/call + {args.text_ms} ms/text)"
+    print(f"{args.docs} documents, {chunks} chunks, {model}")
+    print(f"{'mode':<22} {'seconds':>8} {'chunks/s':>9}")
+    print(f"{'ingest_text per doc':<22} {single_seconds:>8.2f} {chunks / single_seconds:>9.0f}")
+    print(f"{'bulk pipeline':<22} {bulk_seconds:>8.2f} {summary['chunks_written'] / bulk_seconds:>9.0f}")
+    print(f"{'bulk re-ingest':<22} {resync_seconds:>8.2f} {chunks / resync_seconds:>9.0f}"
+          f"   ({args.docs - resync['documents_unchanged']} documents changed, "
+          f"{resync['chunks_written']} chunks embedded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Embedding batching benchmark.
+
+Embeds a mix of short queries and long document chunks through the compute
+dispatcher twice, once with batches sliced in input order and once with
+length-bucketed batches, and reports forward passes, padded tokens and wall
+time for each.
+
+By default a synthetic encoder stands in for the model: each pass runs
+self-attention over the batch padded to its longest member in NumPy, so
+its cost tracks padding the way a real encoder's does.
+
+Usage:
+    python scripts/bench_embedding_batching.py                     # synthetic encoder
+    python scripts/bench_embedding_batching.py --texts 1024 --long-fraction 0.1
+    python scripts/bench_embedding_batching.py --model all-MiniLM-L6-v2   # real backend
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config.settings import ComputeSettings
+from src.model_loaders.base import BaseEmbeddingModel, BaseEmbeddingModelLoader
+from src.model_loaders.compute_dispatcher import ComputeDispatcher, padded_tokens, plan_length_buckets
+from src.model_loaders.embedding_converter import EMBEDDING_MODEL_REGISTRY
+
+SYNTHETIC_MODEL = "all-MiniLM-L6-v2"
+
+
+class SyntheticEncoder(BaseEmbeddingModel):
+    """Single attention layer over whitespace tokens, padded to the longest text in the batch."""
+
+    def __init__(self, hidden: int, max_tokens: int):
+        super().__init__(SYNTHETIC_MODEL, "synthetic", hidden, max_tokens, "cpu")
+        self._rng = np.random.default_rng(0)
+        self._loaded = True
+
+    def load(self) -> None:
+        self._loaded = True
+
+    def unload(self) -> None:
+        self._loaded = False
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        return [min(self.max_tokens, len(text.split()) + 2) for text in texts]
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        lengths = self.token_lengths(texts)
+        seq_len = max(lengths)
+        hidden = self._rng.standard_normal((len(texts), seq_len, self.dimensions), dtype=np.float32)
+        scores = hidden @ hidden.transpose(0, 2, 1) / np.sqrt(self.dimensions)
+        scores -= scores.max(axis=-1, keepdims=True)
+        weights = np.exp(scores)
+        weights /= weights.sum(axis=-1, keepdims=True)
+        out = weights @ hidden
+        mask = (np.arange(seq_len) < np.array(lengths)[:, None]).astype(np.float32)[..., None]
+        pooled = (out * mask).sum(axis=1) / mask.sum(axis=1)
+        return (pooled / np.linalg.norm(pooled, axis=-1, keepdims=True)).tolist()
+
+
+class SyntheticLoader(BaseEmbeddingModelLoader):
+    def __init__(self, hidden: int, max_tokens: int):
+        super().__init__()
+        self._loaded_models[SYNTHETIC_MODEL] = SyntheticEncoder(hidden, max_tokens)
+
+    def load_model(self, name: str) -> BaseEmbeddingModel:
+        return self._loaded_models[name]
+
+    def unload_model(self, name: str) -> None:
+        pass
+
+    def list_available_models(self) -> list[dict[str, Any]]:
+        return [{"name": SYNTHETIC_MODEL, "loaded": True}]
+
+
+def make_texts(count: int, long_fraction: float, long_tokens: int) -> list[str]:
+    rng = random.Random(0)
+    words = ["vector", "memory", "kernel", "apple", "silicon", "cache", "query", "model", "token", "batch"]
+    texts = []
+    for i in range(count):
+        n = rng.randint(long_tokens // 2, long_tokens) if rng.random() < long_fraction else rng.randint(4, 16)
+        texts.append(f"{i} " + " ".join(rng.choice(words) for _ in range(n)))
+    return texts
+
+
+def run(texts: list[str], model_name: str, bucketing: bool, loader, batch_size: int, cache_dir: Path) -> dict:
+    compute_settings = ComputeSettings(
+        embedding_cache_dir=cache_dir,
+        max_batch_size_embedding=batch_size,
+        embedding_length_bucketing=bucketing,
+        embedding_micro_batching=False,
+        embedding_vector_cache=False,
+    )
+    dispatcher = ComputeDispatcher(compute_settings, embedding_loader=loader)
+    model = dispatcher.load_embedding_model(model_name)
+    dispatcher.embed(texts[:2], model_name)  # warm up
+
+    started = time.perf_counter()
+    dispatcher.embed(texts, model_name)
+    elapsed = time.perf_counter() - started
+
+    lengths = model.token_lengths(texts)
+    if bucketing:
+        batches = plan_length_buckets(lengths, batch_size, compute_settings.embedding_bucket_max_padding)
+    else:
+        batches = [list(range(i, min(i + batch_size, len(texts)))) for i in range(0, len(texts), batch_size)]
+    return {"mode": "bucketed" if bucketing else "input order", "seconds": elapsed, "passes": len(batches),
+            "padded_tokens": padded_tokens(lengths, batches)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding batching benchmark")
+    parser.add_argument("--model", help="Embedding model on the installed backend (default: synthetic encoder)")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--long-fraction", type=float, default=0.15, help="Share of long document chunks")
+    parser.add_argument("--long-tokens", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--hidden", type=int, default=128, help="Synthetic encoder width")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    if args.model and args.model not in EMBEDDING_MODEL_REGISTRY:
+        parser.error(f"unknown model; choose from {list(EMBEDDING_MODEL_REGISTRY)}")
+    model_name = args.model or SYNTHETIC_MODEL
+    loader = None if args.model else SyntheticLoader(args.hidden, max_tokens=args.long_tokens + 2)
+    texts = make_texts(args.texts, args.long_fraction, args.long_tokens)
+
+    with tempfile.TemporaryDirectory(prefix="impetus-embed-bench-") as tmp:
+        results = [run(texts, model_name, bucketing, loader, args.batch_size, Path(tmp)) for bucketing in (False, True)]
+
+    print(f"Model: {model_name}{'' if args.model else ' (synthetic)'}, {len(texts)} texts, "
+          f"{args.long_fraction:.0%} long, batch size {args.batch_size}")
+    print(f"{'mode':<12} {'passes':>7} {'padded tokens':>14} {'seconds':>9} {'texts/s':>9}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['passes']:>7} {r['padded_tokens']:>14} {r['seconds']:>9.3f} "
+              f"{len(texts) / r['seconds']:>9.1f}")
+    baseline, bucketed = results
+    print(f"Padded tokens: {1 - bucketed['padded_tokens'] / baseline['padded_tokens']:.0%} fewer; "
+          f"speedup {baseline['seconds'] / bucketed['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Embedding replica scaling benchmark.
+
+Embeds the same corpus through the compute dispatcher with 1 to N model
+replicas and reports throughput and speedup over a single instance. Client
+threads submit batches concurrently, the way parallel ingestion does.
+
+By default a synthetic encoder stands in for the model: tokenization and
+pooling are pure Python (they hold the GIL, like a real server's pre- and
+post-processing) and the forward pass is a NumPy matmul stack (releases the
+GIL, like a torch forward pass), so scaling tracks what replicas buy on a
+real CPU backend.
+
+Usage:
+    python scripts/bench_embedding_replicas.py                      # synthetic encoder, 1..cores replicas
+    python scripts/bench_embedding_replicas.py --max-replicas 8 --texts 4096
+    python scripts/bench_embedding_replicas.py --model all-MiniLM-L6-v2    # real backend
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config.settings import ComputeSettings
+from src.model_loaders.base import BaseEmbeddingModel, BaseEmbeddingModelLoader
+from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.model_loaders.embedding_converter import EMBEDDING_MODEL_REGISTRY
+
+SYNTHETIC_MODEL = "all-MiniLM-L6-v2"
+
+
+class SyntheticEncoder(BaseEmbeddingModel):
+    """Python tokenization and pooling around a NumPy forward pass."""
+
+    def __init__(self, hidden: int, layers: int):
+        super().__init__(SYNTHETIC_MODEL, "synthetic", hidden, 128, "cpu")
+        rng = np.random.default_rng(0)
+        self._weights = [rng.standard_normal((hidden, hidden), dtype=np.float32) / np.sqrt(hidden)
+                         for _ in range(layers)]
+        self._embedding = rng.standard_normal((4096, hidden), dtype=np.float32)
+        self._loaded = True
+
+    def load(self) -> None:
+        self._loaded = True
+
+    def unload(self) -> None:
+        self._loaded = False
+
+    def _tokenize(self, text: str) -> list[int]:
+        return [sum(map(ord, word)) % 4096 for word in text.split()][: self.max_tokens]
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        ids = [self._tokenize(text) for text in texts]
+        seq_len = max(len(row) for row in ids)
+        padded = np.zeros((len(texts), seq_len), dtype=np.int64)
+        for i, row in enumerate(ids):
+            padded[i, : len(row)] = row
+        hidden = self._embedding[padded]
+        for weight in self._weights:
+            hidden = np.tanh(hidden @ weight)
+        pooled = [hidden[i, : len(row)].mean(axis=0) for i, row in enumerate(ids)]
+        out = np.stack(pooled)
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist()
+
+
+class SyntheticLoader(BaseEmbeddingModelLoader):
+    def __init__(self, hidden: int, layers: int):
+        super().__init__()
+        self.hidden = hidden
+        self.layers = layers
+
+    def load_model(self, name: str) -> BaseEmbeddingModel:
+        if name not in self._loaded_models:
+            self._loaded_models[name] = SyntheticEncoder(self.hidden, self.layers)
+        return self._loaded_models[name]
+
+    def unload_model(self, name: str) -> None:
+        self._loaded_models.pop(name, None)
+
+    def list_available_models(self) -> list[dict[str, Any]]:
+        return [{"name": SYNTHETIC_MODEL, "loaded": SYNTHETIC_MODEL in self._loaded_models}]
+
+    def create_replicas(self, name: str, count: int) -> list[BaseEmbeddingModel]:
+        return [SyntheticEncoder(self.hidden, self.layers) for _ in range(count)]
+
+
+def make_texts(count: int) -> list[str]:
+    rng = random.Random(0)
+    words = ["vector", "memory", "kernel", "apple", "silicon", "cache", "query", "model", "token", "batch"]
+    return [f"{i} " + " ".join(rng.choice(words) for _ in range(rng.randint(16, 96))) for i in range(count)]
+
+
+def run(texts: list[str], model_name: str, replicas: int, loader, batch_size: int, clients: int,
+        cache_dir: Path) -> float:
+    compute_settings = ComputeSettings(
+        embedding_cache_dir=cache_dir,
+        max_batch_size_embedding=batch_size,
+        embedding_replicas=replicas,
+        embedding_micro_batching=False,
+        embedding_vector_cache=False,
+    )
+    dispatcher = ComputeDispatcher(compute_settings, embedding_loader=loader)
+    dispatcher.load_embedding_model(model_name)
+    dispatcher.embed(texts[:2], model_name)  # warm up
+
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(lambda batch: dispatcher.embed_array(batch, model_name), batches))
+    elapsed = time.perf_counter() - started
+    dispatcher.unload_embedding_model(model_name)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding replica scaling benchmark")
+    parser.add_argument("--model", help="Embedding model on the installed backend (default: synthetic encoder)")
+    parser.add_argument("--texts", type=int, default=2048)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-replicas", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=0, help="Concurrent client threads (default: max replicas)")
+    parser.add_argument("--hidden", type=int, default=256, help="Synthetic encoder width")
+    parser.add_argument("--layers", type=int, default=4, help="Synthetic encoder depth")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    if args.model and args.model not in EMBEDDING_MODEL_REGISTRY:
+        parser.error(f"unknown model; choose from {list(EMBEDDING_MODEL_REGISTRY)}")
+    model_name = args.model or SYNTHETIC_MODEL
+    clients = args.clients or args.max_replicas
+    texts = make_texts(args.texts)
+
+    print(f"Model: {model_name}{'' if args.model else ' (synthetic)'}, {len(texts)} texts, "
+          f"batch size {args.batch_size}, {clients} clients, {os.cpu_count()} cores")
+    print(f"{'replicas':>8} {'seconds':>9} {'texts/s':>9} {'speedup':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory(prefix="impetus-replica-bench-") as tmp:
+        for replicas in range(1, args.max_replicas + 1):
+            # Real backends get a fresh dispatcher (and loader) per replica count
+            loader = None if args.model else SyntheticLoader(args.hidden, args.layers)
+            seconds = run(texts, model_name, replicas, loader, args.batch_size, clients, Path(tmp))
+            baseline = baseline or seconds
+            print(f"{replicas:>8} {seconds:>9.3f} {len(texts) / seconds:>9.1f} {baseline / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
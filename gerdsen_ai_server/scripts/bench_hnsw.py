@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+HNSW index benchmark.
+
+Builds the native backend's HNSW index (src/services/vector_backends/hnsw.py)
+over a synthetic dataset and reports build time, mmap reload time, and
+recall@k and query latency against exact search for a sweep of ef_search
+values.
+
+Datasets:
+    clustered  Gaussian clusters on the unit sphere (closer to real embeddings)
+    uniform    random unit vectors (worst case: no structure to exploit)
+
+Usage:
+    python scripts/bench_hnsw.py                                  # 20k x 128, clustered
+    python scripts/bench_hnsw.py --vectors 200000 --dims 384 --workers 8 --segment-size 50000
+    python scripts/bench_hnsw.py --dataset uniform --ef 16,32,64,128,256
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.vector_backends.hnsw import HNSWConfig, HNSWIndex
+
+
+def make_dataset(kind: str, n: int, dims: int, queries: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    if kind == "clustered":
+        centers = rng.standard_normal((max(n // 1000, 10), dims))
+        vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dims))
+        query = centers[rng.integers(0, len(centers), queries)] + 0.6 * rng.standard_normal((queries, dims))
+    else:
+        vectors = rng.standard_normal((n, dims))
+        query = rng.standard_normal((queries, dims))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    query = (query / np.linalg.norm(query, axis=1, keepdims=True)).astype(np.float32)
+    return vectors, query
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW index benchmark")
+    parser.add_argument("--dataset", choices=["clustered", "uniform"], default="clustered")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef", default="16,32,64,128", help="Comma-separated ef_search values")
+    parser.add_argument("--segment-size", type=int, default=250000)
+    parser.add_argument("--workers", type=int, default=0, help="Build processes, 0 = one per core")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    vectors, queries = make_dataset(args.dataset, args.vectors, args.dims, args.queries)
+    alive = np.ones(len(vectors), dtype=bool)
+    config = HNSWConfig(m=args.m, ef_construction=args.ef_construction,
+                        segment_size=args.segment_size, build_workers=args.workers)
+
+    exact_latencies = []
+    truth = []
+    for query in queries:
+        started = time.perf_counter()
+        scores = vectors @ query
+        top = np.argpartition(-scores, args.k)[:args.k]
+        truth.append(set(top.tolist()))
+        exact_latencies.append((time.perf_counter() - started) * 1000)
+
+    with tempfile.TemporaryDirectory(prefix="impetus-hnsw-bench-") as tmp:
+        vector_file = Path(tmp) / "vectors.f32"
+        vector_file.write_bytes(vectors.tobytes())
+
+        started = time.perf_counter()
+        HNSWIndex.build(config, vector_file, len(vectors), args.dims, Path(tmp) / "index")
+        build_seconds = time.perf_counter() - started
+        index_bytes = sum(f.stat().st_size for f in (Path(tmp) / "index").rglob("*") if f.is_file())
+
+        started = time.perf_counter()
+        index = HNSWIndex.load(Path(tmp) / "index", config)
+        reload_ms = (time.perf_counter() - started) * 1000
+
+        print(f"{args.dataset}: {args.vectors} vectors x {args.dims} dims, {args.queries} queries, top-{args.k}")
+        print(f"M={args.m} efConstruction={args.ef_construction}, {len(index.segments)} segment(s), "
+              f"{config.workers} build worker(s)")
+        print(f"build {build_seconds:.1f} s ({args.vectors / build_seconds:.0f} vectors/s), "
+              f"index {index_bytes / 1024 ** 2:.1f} MB, mmap reload {reload_ms:.1f} ms")
+        print()
+
+        p50, p95 = percentiles(exact_latencies)
+        print(f"{'search':<12} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'exact':<12} {1.0:>9.3f} {p50:>8.2f} {p95:>8.2f}")
+        for ef in (int(value) for value in args.ef.split(",")):
+            index.search(vectors, queries[0], args.k, alive, ef)  # warm up
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, truth, strict=True):
+                started = time.perf_counter()
+                rows, _ = index.search(vectors, query, args.k, alive, ef)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += len(expected & set(rows.tolist()))
+            p50, p95 = percentiles(latencies)
+            print(f"{'ef=' + str(ef):<12} {hits / (args.k * len(queries)):>9.3f} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Model load benchmark.
+
+Measures regular, mmap and parallel shard loading end to end with a cold
+page cache (files evicted via posix_fadvise) and a warm one: time to the
+first usable tensor, full materialization time, effective GB/s, peak RSS
+growth and page faults.
+
+Usage:
+    python scripts/bench_model_load.py                         # synthetic 4 x 256 MB shards
+    python scripts/bench_model_load.py --shards 8 --shard-mb 512
+    python scripts/bench_model_load.py --model-path ~/.impetus/models/my-model
+    python scripts/bench_model_load.py --concurrency 8 --store  # save runs to benchmarks.db
+"""
+
+import argparse
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.load_benchmark import STRATEGIES, run_load_benchmark, write_synthetic_checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model load benchmark")
+    parser.add_argument("--model-path", type=Path, help="Existing model directory (default: synthetic shards)")
+    parser.add_argument("--shards", type=int, default=4, help="Synthetic shard count")
+    parser.add_argument("--shard-mb", type=int, default=256, help="Synthetic shard size in MB")
+    parser.add_argument("--concurrency", type=int, default=None, help="Shard pool size for the parallel strategy")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--store", action="store_true", help="Persist results to benchmarks.db")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    with tempfile.TemporaryDirectory(prefix="impetus-load-bench-") as tmp:
+        if args.model_path:
+            model_path = args.model_path.expanduser()
+        else:
+            model_path = Path(tmp)
+            print(f"Writing {args.shards} x {args.shard_mb} MB synthetic shards...")
+            write_synthetic_checkpoint(model_path, args.shards * args.shard_mb, shards=args.shards)
+
+        runs = run_load_benchmark(model_path, strategies=tuple(args.strategies), io_concurrency=args.concurrency)
+
+    print(f"Model: {model_path} ({runs[0].file_count} files, {runs[0].model_size_gb:.2f} GB)")
+    print(f"{'strategy':<10} {'cache':<6} {'first ms':>9} {'full ms':>9} {'GB/s':>7} "
+          f"{'peak RSS MB':>12} {'major flt':>10} {'minor flt':>10}")
+    for run in runs:
+        cache = run.cache_state if run.evicted or run.cache_state == "warm" else "cold*"
+        print(f"{run.strategy:<10} {cache:<6} {run.time_to_first_tensor_ms:>9.1f} "
+              f"{run.full_materialization_ms:>9.1f} {run.throughput_gbps:>7.2f} {run.peak_rss_mb:>12.1f} "
+              f"{run.major_page_faults:>10} {run.minor_page_faults:>10}")
+    if any(run.cache_state == "cold" and not run.evicted for run in runs):
+        print("* posix_fadvise unavailable; cold runs may have hit the page cache")
+
+    if args.store:
+        from src.services.benchmark_service import benchmark_service
+        benchmark_service.store_load_results([asdict(run) for run in runs])
+        print(f"Stored {len(runs)} runs in {benchmark_service.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Vector store backend benchmark.
+
+Ingests the same synthetic collection into the native (NumPy/mmap + SQLite)
+and ChromaDB backends and reports ingest throughput, query latency and how
+often Chroma's approximate top-k agrees with the native exact top-k.
+
+Vectors are random unit vectors, so the benchmark measures the stores, not
+an embedding model.
+
+Usage:
+    python scripts/bench_vector_store.py                       # 20k chunks, 384 dims
+    python scripts/bench_vector_store.py --chunks 100000 --queries 500
+    python scripts/bench_vector_store.py --backends native     # skip Chroma
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.vector_backends.base import VectorStoreBackend
+
+
+def make_backend(name: str, root: Path) -> VectorStoreBackend:
+    if name == "native":
+        from src.services.vector_backends.native import NativeVectorBackend
+
+        return NativeVectorBackend(root / "native")
+
+    import chromadb
+    from src.services.vector_backends.chroma import ChromaVectorBackend
+
+    return ChromaVectorBackend(chromadb.PersistentClient(path=str(root / "chroma")))
+
+
+def run(name: str, vectors: np.ndarray, queries: np.ndarray, k: int, batch_size: int, root: Path) -> dict:
+    started = time.perf_counter()
+    backend = make_backend(name, root)
+    collection = backend.get_or_create_collection("bench")
+    open_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        collection.add(
+            ids=[f"chunk-{i}" for i in range(start, end)],
+            documents=[f"document text {i}" for i in range(start, end)],
+            metadatas=[{"source": f"file-{i % 100}.txt", "chunk_index": i} for i in range(start, end)],
+            embeddings=vectors[start:end],
+        )
+    ingest_seconds = time.perf_counter() - started
+
+    collection.query(queries[0], n_results=k)  # warm up
+    latencies = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        result = collection.query(query, n_results=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(result["ids"])
+
+    filtered = []
+    for query in queries[:50]:
+        started = time.perf_counter()
+        collection.query(query, n_results=k, where={"source": "file-7.txt"})
+        filtered.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "backend": name,
+        "open_s": open_seconds,
+        "ingest_s": ingest_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "filtered_p50_ms": float(np.percentile(filtered, 50)),
+        "ids": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector store backend benchmark")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--backends", default="native,chroma", help="Comma-separated: native, chroma")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, args.dims), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dims), dtype=np.float32)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="impetus-vector-bench-") as tmp:
+        for name in args.backends.split(","):
+            try:
+                results.append(run(name.strip(), vectors, queries, args.k, args.batch_size, Path(tmp)))
+            except ImportError as e:
+                print(f"Skipping {name}: {e}")
+
+    print(f"{args.chunks} chunks x {args.dims} dims, {args.queries} queries, top-{args.k}")
+    print(f"{'backend':<8} {'open s':>7} {'ingest s':>9} {'chunks/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'filter p50':>11}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['open_s']:>7.3f} {r['ingest_s']:>9.2f} {args.chunks / r['ingest_s']:>9.0f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['filtered_p50_ms']:>11.2f}")
+
+    exact = next((r for r in results if r["backend"] == "native"), None)
+    for r in results:
+        if exact is not None and r is not exact:
+            overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(exact["ids"], r["ids"], strict=True)])
+            print(f"{r['backend']} recall@{args.k} vs exact search: {overlap:.3f}")
+
+
+if __name__ == "__main__":
+    main()
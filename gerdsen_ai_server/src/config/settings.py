@@ -36,6 +36,10 @@ class ModelSettings(BaseSettings):
         default=Path.home() / ".impetus" / "cache", env="IMPETUS_CACHE_DIR"
     )
     max_loaded_models: int = Field(default=3, env="IMPETUS_MAX_LOADED_MODELS")
+    adapters_dir: Path = Field(
+        default=Path.home() / ".impetus" / "adapters", env="IMPETUS_ADAPTERS_DIR"
+    )
+    max_loaded_adapters: int = Field(default=8, env="IMPETUS_MAX_LOADED_ADAPTERS")
     default_model: str = Field(
         default="mlx-community/Mistral-7B-Instruct-v0.3-4bit",
         env="IMPETUS_DEFAULT_MODEL",
@@ -47,8 +51,22 @@ class ModelSettings(BaseSettings):
     require_model_for_ready: bool = Field(
         default=False, env="IMPETUS_REQUIRE_MODEL_FOR_READY"
     )
-
-    @field_validator("models_dir", "cache_dir", mode="before")
+    load_io_concurrency: int = Field(default=4, env="IMPETUS_LOAD_IO_CONCURRENCY")
+    load_readahead_mb: int = Field(default=64, env="IMPETUS_LOAD_READAHEAD_MB")
+    model_index_watch: bool = Field(default=False, env="IMPETUS_MODEL_INDEX_WATCH")
+    shared_weight_store: bool = Field(default=False, env="IMPETUS_SHARED_WEIGHT_STORE")
+
+    # Load admission (memory estimated from checkpoint headers + projected KV cache)
+    admission_context_length: int = Field(default=4096, env="IMPETUS_ADMISSION_CONTEXT_LENGTH")
+    admission_concurrency: int = Field(default=4, env="IMPETUS_ADMISSION_CONCURRENCY")
+    admission_headroom_gb: float = Field(default=1.0, env="IMPETUS_ADMISSION_HEADROOM_GB")
+    kv_cache_bytes_per_element: int = Field(default=2, env="IMPETUS_KV_CACHE_BYTES_PER_ELEMENT")
+
+    # Quantization jobs (/api/models/optimize; 0 workers = min(4, CPU count))
+    optimize_workers: int = Field(default=0, env="IMPETUS_OPTIMIZE_WORKERS")
+    optimize_shard_mb: int = Field(default=2048, env="IMPETUS_OPTIMIZE_SHARD_MB")
+
+    @field_validator("models_dir", "cache_dir", "adapters_dir", mode="before")
     @classmethod
     def create_directories(cls, v):
         path = Path(v)
@@ -68,6 +86,21 @@ class InferenceSettings(BaseSettings):
 
     # Batch settings
     max_batch_size: int = Field(default=1, env="IMPETUS_MAX_BATCH_SIZE")
+    max_completion_batch_size: int = Field(
+        default=20, env="IMPETUS_MAX_COMPLETION_BATCH_SIZE"
+    )
+
+    # Tokenization (0 workers = min(4, CPU count))
+    tokenizer_workers: int = Field(default=0, env="IMPETUS_TOKENIZER_WORKERS")
+    tokenizer_cache_size: int = Field(default=4096, env="IMPETUS_TOKENIZER_CACHE_SIZE")
+
+    # Offline batch jobs (/v1/batches)
+    offline_batch_chunk_size: int = Field(
+        default=64, env="IMPETUS_OFFLINE_BATCH_CHUNK_SIZE"
+    )
+    offline_batch_pause_ms: int = Field(
+        default=50, env="IMPETUS_OFFLINE_BATCH_PAUSE_MS"
+    )
 
     # Performance settings
     use_cache: bool = Field(default=True, env="IMPETUS_USE_CACHE")
@@ -117,6 +150,48 @@ class ComputeSettings(BaseSettings):
     max_batch_size_embedding: int = Field(
         default=32, env="IMPETUS_MAX_BATCH_SIZE_EMBEDDING"
     )
+    cpu_embedding_threads: int = Field(
+        default=0, env="IMPETUS_CPU_EMBEDDING_THREADS"
+    )
+    cpu_embedding_quantize: bool = Field(
+        default=False, env="IMPETUS_CPU_EMBEDDING_QUANTIZE"
+    )
+    embedding_replicas: int = Field(
+        default=1, env="IMPETUS_EMBEDDING_REPLICAS"
+    )
+    embedding_micro_batching: bool = Field(
+        default=True, env="IMPETUS_EMBEDDING_MICRO_BATCHING"
+    )
+    embedding_batch_wait_ms: float = Field(
+        default=5.0, env="IMPETUS_EMBEDDING_BATCH_WAIT_MS"
+    )
+    embedding_length_bucketing: bool = Field(
+        default=True, env="IMPETUS_EMBEDDING_LENGTH_BUCKETING"
+    )
+    embedding_bucket_max_padding: float = Field(
+        default=0.25, env="IMPETUS_EMBEDDING_BUCKET_MAX_PADDING"
+    )
+    embedding_multi_backend: bool = Field(
+        default=False, env="IMPETUS_EMBEDDING_MULTI_BACKEND"
+    )
+    embedding_multi_backend_min_texts: int = Field(
+        default=256, env="IMPETUS_EMBEDDING_MULTI_BACKEND_MIN_TEXTS"
+    )
+    embedding_long_window_tokens: int = Field(
+        default=512, env="IMPETUS_EMBEDDING_LONG_WINDOW_TOKENS"
+    )
+    embedding_long_overlap_tokens: int = Field(
+        default=64, env="IMPETUS_EMBEDDING_LONG_OVERLAP_TOKENS"
+    )
+    embedding_vector_cache: bool = Field(
+        default=True, env="IMPETUS_EMBEDDING_VECTOR_CACHE"
+    )
+    embedding_vector_cache_memory_mb: int = Field(
+        default=256, env="IMPETUS_EMBEDDING_VECTOR_CACHE_MEMORY_MB"
+    )
+    embedding_vector_cache_disk: bool = Field(
+        default=True, env="IMPETUS_EMBEDDING_VECTOR_CACHE_DISK"
+    )
 
     @field_validator("embedding_cache_dir", mode="before")
     @classmethod
@@ -132,6 +207,7 @@ class VectorStoreSettings(BaseSettings):
     """Vector store configuration for RAG pipeline"""
 
     enabled: bool = Field(default=True, env="IMPETUS_VECTORSTORE_ENABLED")
+    backend: Literal["chroma", "native"] = Field(default="chroma", env="IMPETUS_VECTORSTORE_BACKEND")
     persist_directory: Path = Field(
         default=Path.home() / ".impetus" / "vectorstore", env="IMPETUS_VECTORSTORE_DIR"
     )
@@ -145,6 +221,24 @@ class VectorStoreSettings(BaseSettings):
     chunk_overlap: int = Field(default=50, env="IMPETUS_CHUNK_OVERLAP")
     max_results: int = Field(default=5, env="IMPETUS_VECTORSTORE_MAX_RESULTS")
 
+    # HNSW index for the native backend (exact search below hnsw_min_vectors live chunks)
+    hnsw_enabled: bool = Field(default=True, env="IMPETUS_VECTORSTORE_HNSW_ENABLED")
+    hnsw_min_vectors: int = Field(default=50000, env="IMPETUS_VECTORSTORE_HNSW_MIN_VECTORS")
+    hnsw_m: int = Field(default=16, env="IMPETUS_VECTORSTORE_HNSW_M")
+    hnsw_ef_construction: int = Field(default=100, env="IMPETUS_VECTORSTORE_HNSW_EF_CONSTRUCTION")
+    hnsw_ef_search: int = Field(default=64, env="IMPETUS_VECTORSTORE_HNSW_EF_SEARCH")
+    hnsw_segment_size: int = Field(default=250000, env="IMPETUS_VECTORSTORE_HNSW_SEGMENT_SIZE")
+    hnsw_build_workers: int = Field(default=0, env="IMPETUS_VECTORSTORE_HNSW_BUILD_WORKERS")  # 0 = one per core
+
+    # Bulk ingestion pipeline (/api/documents/ingest/bulk)
+    ingest_root: Path | None = Field(default=None, env="IMPETUS_INGEST_ROOT")  # path ingestion is off unless set
+    ingest_chunk_workers: int = Field(default=4, env="IMPETUS_INGEST_CHUNK_WORKERS")
+    ingest_embed_workers: int = Field(default=2, env="IMPETUS_INGEST_EMBED_WORKERS")
+    ingest_embed_batch_size: int = Field(default=256, env="IMPETUS_INGEST_EMBED_BATCH_SIZE")
+    ingest_write_batch_size: int = Field(default=2048, env="IMPETUS_INGEST_WRITE_BATCH_SIZE")
+    ingest_queue_size: int = Field(default=64, env="IMPETUS_INGEST_QUEUE_SIZE")
+    ingest_progress_interval_s: float = Field(default=1.0, env="IMPETUS_INGEST_PROGRESS_INTERVAL_S")
+
     @field_validator("persist_directory", mode="before")
     @classmethod
     def create_persist_directory(cls, v):
@@ -0,0 +1,224 @@
+"""
+Batched multi-prompt generation for MLX models
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from loguru import logger
+
+from ..utils.tokenizer_pool import tokenizer_pool
+
+try:
+    import mlx.core as mx
+    from mlx_lm import generate
+    MLX_AVAILABLE = True
+except ImportError:
+    MLX_AVAILABLE = False
+    mx = None
+    generate = None
+    logger.warning("MLX not available for batched generation")
+
+try:
+    from mlx_lm import batch_generate
+except ImportError:
+    batch_generate = None
+
+try:
+    from mlx_lm.sample_utils import make_sampler
+except ImportError:
+    make_sampler = None
+
+try:
+    from mlx_lm.models.cache import BatchKVCache
+except ImportError:
+    BatchKVCache = None
+
+
+@dataclass
+class BatchCompletion:
+    """Result for a single prompt of a batched generation job"""
+    index: int
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    finish_reason: str
+
+
+def length_sorted_batches(lengths: list[int], max_batch_size: int) -> list[list[int]]:
+    """
+    Group prompt indices into batches of similar length
+
+    Sorting by token length keeps left-padding to a minimum so prompts in
+    the same group can share a single prefill pass.
+
+    Args:
+        lengths: Token length of each prompt
+        max_batch_size: Maximum number of prompts per group
+
+    Returns:
+        List of index groups, shortest prompts first
+    """
+    if max_batch_size < 1:
+        max_batch_size = 1
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i + max_batch_size] for i in range(0, len(order), max_batch_size)]
+
+
+def generate_batch(
+    model: Any,
+    tokenizer: Any,
+    prompts: list[str],
+    max_tokens: int = 100,
+    temperature: float = 0.7,
+    top_p: float = 1.0,
+    max_batch_size: int = 20,
+    adapters: list[Any] | None = None,
+    lora_state: Any = None,
+) -> list[BatchCompletion]:
+    """
+    Generate completions for several prompts as one batched job
+
+    Prompts are tokenized once, length-sorted and split into groups that
+    are prefilled together and decoded as a batch. Results are returned in
+    the original prompt order.
+
+    Args:
+        model: MLX model instance
+        tokenizer: Tokenizer instance
+        prompts: Input prompts
+        max_tokens: Maximum tokens to generate per prompt
+        temperature: Sampling temperature
+        top_p: Top-p sampling parameter
+        max_batch_size: Maximum prompts decoded together
+        adapters: Optional LoRA adapter (or None) per prompt
+        lora_state: MultiLoRAState of the model, required with adapters
+
+    Returns:
+        One BatchCompletion per prompt, ordered by prompt index
+    """
+    if not MLX_AVAILABLE:
+        raise RuntimeError("MLX is not available")
+
+    prompt_tokens = [ids.tolist() for ids in tokenizer_pool.encode_prompts(tokenizer, prompts)]
+    sampler = make_sampler(temp=temperature, top_p=top_p) if make_sampler else None
+    lengths = [len(t) for t in prompt_tokens]
+
+    if adapters is None or lora_state is None:
+        adapters = [None] * len(prompts)
+    mixed = len({id(a) for a in adapters}) > 1
+
+    # Each run is (prompt indices, adapter rows, row-stable decode)
+    if not mixed:
+        runs = [(group, [adapters[0]], False) for group in length_sorted_batches(lengths, max_batch_size)]
+    elif BatchKVCache is not None:
+        # Mixed adapters in one batch; rows must stay fixed so each keeps its delta
+        runs = [
+            (group, [adapters[i] for i in group], True)
+            for group in length_sorted_batches(lengths, max_batch_size)
+        ]
+    else:
+        # Without a row-stable batch cache, batch per adapter instead
+        runs = []
+        for adapter_id in dict.fromkeys(id(a) for a in adapters):
+            subset = [i for i, a in enumerate(adapters) if id(a) == adapter_id]
+            for group in length_sorted_batches([lengths[i] for i in subset], max_batch_size):
+                members = [subset[i] for i in group]
+                runs.append((members, [adapters[members[0]]], False))
+
+    texts_by_index: dict[int, str] = {}
+    for group, rows, fixed_rows in runs:
+        group_tokens = [prompt_tokens[i] for i in group]
+        if lora_state is not None:
+            lora_state.set_rows(rows)
+        try:
+            if fixed_rows:
+                texts = _decode_fixed_batch(model, tokenizer, group_tokens, max_tokens, sampler)
+            else:
+                texts = _generate_group(model, tokenizer, group_tokens, max_tokens, sampler)
+        finally:
+            if lora_state is not None:
+                lora_state.clear()
+
+        texts_by_index.update(zip(group, texts, strict=True))
+
+    # Count completion tokens for the whole batch in one pooled call
+    texts = [texts_by_index[i] for i in range(len(prompts))]
+    completion_ids = tokenizer_pool.encode_batch(tokenizer, texts, add_special_tokens=False)
+
+    results = []
+    for idx, text in enumerate(texts):
+        completion_tokens = len(completion_ids[idx]) if text else 0
+        results.append(BatchCompletion(
+            index=idx,
+            text=text,
+            prompt_tokens=len(prompt_tokens[idx]),
+            completion_tokens=completion_tokens,
+            finish_reason='length' if completion_tokens >= max_tokens else 'stop',
+        ))
+
+    logger.debug(f"Batched generation completed for {len(prompts)} prompts")
+    return results
+
+
+def _generate_group(model: Any, tokenizer: Any, group_tokens: list[list[int]],
+                    max_tokens: int, sampler: Any) -> list[str]:
+    """Run one length-sorted group, batched when mlx_lm supports it"""
+    sampler_kwargs = {'sampler': sampler} if sampler is not None else {}
+
+    if batch_generate is not None and len(group_tokens) > 1:
+        response = batch_generate(
+            model,
+            tokenizer,
+            group_tokens,
+            max_tokens=max_tokens,
+            prefill_batch_size=len(group_tokens),
+            completion_batch_size=len(group_tokens),
+            verbose=False,
+            **sampler_kwargs,
+        )
+        return list(response.texts)
+
+    # Sequential fallback for single prompts or older mlx_lm releases
+    return [
+        generate(model, tokenizer, prompt=tokens, max_tokens=max_tokens, verbose=False, **sampler_kwargs)
+        for tokens in group_tokens
+    ]
+
+
+def _decode_fixed_batch(model: Any, tokenizer: Any, group_tokens: list[list[int]],
+                        max_tokens: int, sampler: Any) -> list[str]:
+    """
+    Decode a left-padded batch without dropping finished rows
+
+    Row i stays row i for the whole decode, which per-sequence adapter
+    deltas rely on. Finished rows keep decoding until the batch is done;
+    their extra tokens are discarded.
+    """
+    lengths = [len(t) for t in group_tokens]
+    max_len = max(lengths)
+    padding = [max_len - n for n in lengths]
+    pad_id = getattr(tokenizer, 'pad_token_id', None) or 0
+    eos_ids = set(getattr(tokenizer, 'eos_token_ids', None) or [tokenizer.eos_token_id])
+
+    inputs = mx.array([[pad_id] * p + list(t) for p, t in zip(padding, group_tokens, strict=True)])
+    cache = [BatchKVCache(padding) for _ in range(len(model.layers))]
+    logits = model(inputs, cache=cache)[:, -1, :]
+
+    outputs: list[list[int]] = [[] for _ in group_tokens]
+    finished = [False] * len(group_tokens)
+    for _ in range(max_tokens):
+        logprobs = logits - mx.logsumexp(logits, axis=-1, keepdims=True)
+        tokens = sampler(logprobs) if sampler is not None else mx.argmax(logprobs, axis=-1)
+        for i, token in enumerate(tokens.tolist()):
+            if finished[i]:
+                continue
+            if token in eos_ids:
+                finished[i] = True
+            else:
+                outputs[i].append(token)
+        if all(finished):
+            break
+        logits = model(tokens[:, None], cache=cache)[:, -1, :]
+
+    return [tokenizer.decode(tokens) for tokens in outputs]
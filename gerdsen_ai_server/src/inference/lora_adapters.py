@@ -0,0 +1,329 @@
+"""
+Per-request LoRA adapters over a single resident base model
+
+Adapters are loaded lazily into a bounded LRU cache. Target linear layers
+of the base model are wrapped once; each forward pass adds the low-rank
+delta of the adapter assigned to every sequence in the batch, so requests
+for different fine-tunes can share one batch and one copy of the weights.
+"""
+
+import json
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from ..config.settings import settings
+from ..model_loaders.base import ModelNotFoundError
+
+try:
+    import mlx.core as mx
+    import mlx.nn as nn
+    MLX_AVAILABLE = True
+except ImportError:
+    MLX_AVAILABLE = False
+    mx = None
+    nn = None
+
+ADAPTER_WEIGHTS_FILE = "adapters.safetensors"
+ADAPTER_CONFIG_FILE = "adapter_config.json"
+
+_SAFETENSORS_DTYPES = {
+    'F64': np.float64,
+    'F32': np.float32,
+    'F16': np.float16,
+}
+
+
+@dataclass
+class LoRAAdapter:
+    """Low-rank weights of one fine-tune, keyed by base module path"""
+    name: str
+    path: Path
+    rank: int
+    scale: float
+    # module path -> (lora_a [in, rank], lora_b [rank, out])
+    weights: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+    nbytes: int = 0
+
+
+def load_lora_adapter(name: str, path: Path) -> LoRAAdapter:
+    """
+    Load an mlx_lm-format LoRA adapter directory
+
+    Expects adapter_config.json with a lora_parameters section and
+    adapters.safetensors holding '<module>.lora_a' / '<module>.lora_b' pairs.
+    """
+    config_path = path / ADAPTER_CONFIG_FILE
+    weights_path = path / ADAPTER_WEIGHTS_FILE
+    if not config_path.exists() or not weights_path.exists():
+        raise ModelNotFoundError(f"Adapter {name} is missing {ADAPTER_CONFIG_FILE} or {ADAPTER_WEIGHTS_FILE}")
+
+    with open(config_path) as f:
+        config = json.load(f)
+    lora_params = config.get('lora_parameters', {})
+    rank = int(lora_params.get('rank', 8))
+    scale = float(lora_params.get('scale', lora_params.get('alpha', 20.0)))
+
+    tensors = mx.load(str(weights_path)) if MLX_AVAILABLE else _read_safetensors(weights_path)
+
+    weights = {}
+    nbytes = 0
+    for key, lora_a in tensors.items():
+        if not key.endswith('.lora_a'):
+            continue
+        module_path = key[:-len('.lora_a')]
+        lora_b = tensors.get(f"{module_path}.lora_b")
+        if lora_b is None:
+            continue
+        weights[module_path] = (lora_a, lora_b)
+        nbytes += lora_a.nbytes + lora_b.nbytes
+
+    if not weights:
+        raise ModelNotFoundError(f"Adapter {name} contains no LoRA weights")
+
+    return LoRAAdapter(name=name, path=path, rank=rank, scale=scale, weights=weights, nbytes=nbytes)
+
+
+def _read_safetensors(path: Path) -> dict[str, np.ndarray]:
+    """Minimal safetensors reader for environments without MLX"""
+    with open(path, 'rb') as f:
+        header_size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        data = f.read()
+
+    tensors = {}
+    for name, info in header.items():
+        if name == '__metadata__':
+            continue
+        dtype = _SAFETENSORS_DTYPES.get(info['dtype'])
+        if dtype is None:
+            raise ValueError(f"Unsupported adapter dtype {info['dtype']} for {name}")
+        start, end = info['data_offsets']
+        tensors[name] = np.frombuffer(data[start:end], dtype=dtype).reshape(info['shape'])
+    return tensors
+
+
+class AdapterCache:
+    """Bounded LRU cache of loaded LoRA adapters"""
+
+    def __init__(self, adapters_dir: Path | None = None, max_adapters: int | None = None):
+        self.adapters_dir = adapters_dir or settings.model.adapters_dir
+        self.max_adapters = max_adapters or settings.model.max_loaded_adapters
+        self._adapters: OrderedDict[str, LoRAAdapter] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def resolve_path(self, name: str) -> Path | None:
+        """Map an adapter name to its directory under adapters_dir"""
+        safe_name = name.replace('/', '_')
+        if not safe_name or safe_name.startswith('.'):
+            return None
+        path = self.adapters_dir / safe_name
+        return path if (path / ADAPTER_CONFIG_FILE).exists() else None
+
+    def get(self, name: str) -> LoRAAdapter:
+        """Get an adapter, loading it and evicting the least recently used if needed"""
+        with self._lock:
+            adapter = self._adapters.get(name)
+            if adapter is not None:
+                self._adapters.move_to_end(name)
+                self.hits += 1
+                return adapter
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One loader per adapter; concurrent requests for it wait and reuse the result
+        with load_lock:
+            with self._lock:
+                adapter = self._adapters.get(name)
+                if adapter is not None:
+                    self._adapters.move_to_end(name)
+                    self.hits += 1
+                    return adapter
+
+            path = self.resolve_path(name)
+            if path is None:
+                raise ModelNotFoundError(f"Adapter {name} not found in {self.adapters_dir}")
+
+            adapter = load_lora_adapter(name, path)
+            logger.info(f"Loaded LoRA adapter {name}: {len(adapter.weights)} layers, "
+                        f"rank {adapter.rank}, {adapter.nbytes / 1024**2:.1f} MB")
+
+            with self._lock:
+                self.misses += 1
+                self._adapters[name] = adapter
+                self._adapters.move_to_end(name)
+                while len(self._adapters) > self.max_adapters:
+                    evicted, _ = self._adapters.popitem(last=False)
+                    self.evictions += 1
+                    logger.info(f"Evicted LoRA adapter {evicted} from cache")
+                self._load_locks.pop(name, None)
+        return adapter
+
+    def list_available(self) -> list[str]:
+        """List adapter directories under adapters_dir"""
+        if not self.adapters_dir.exists():
+            return []
+        return sorted(
+            p.name for p in self.adapters_dir.iterdir()
+            if p.is_dir() and (p / ADAPTER_CONFIG_FILE).exists()
+        )
+
+    def clear(self):
+        """Drop all cached adapters"""
+        with self._lock:
+            self._adapters.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            return {
+                'cached_adapters': list(self._adapters.keys()),
+                'max_adapters': self.max_adapters,
+                'memory_mb': sum(a.nbytes for a in self._adapters.values()) / 1024**2,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class MultiLoRAState:
+    """Adapter assignment for the sequences of the batch each thread is running"""
+
+    def __init__(self):
+        # Serializes wrapping base layers; generation itself runs concurrently
+        self.lock = threading.RLock()
+        # Rows are per thread, so concurrent requests never see each other's adapters
+        self._local = threading.local()
+
+    @property
+    def rows(self) -> list[LoRAAdapter | None]:
+        return getattr(self._local, 'rows', [])
+
+    def set_rows(self, adapters: list[LoRAAdapter | None]):
+        """Assign one adapter (or None) per batch row; a single entry applies to every row"""
+        self._local.rows = list(adapters)
+        self._local.stacked = {}
+
+    def clear(self):
+        self.set_rows([])
+
+    def stacked(self, key: str, builder) -> tuple[Any, Any, Any]:
+        """Per-row stacked weights for a module, built once per batch"""
+        stacked = self._local.__dict__.setdefault('stacked', {})
+        if key not in stacked:
+            stacked[key] = builder()
+        return stacked[key]
+
+
+def apply_lora_delta(x: Any, y: Any, key: str, state: MultiLoRAState) -> Any:
+    """
+    Add the per-sequence LoRA delta for one linear layer
+
+    Args:
+        x: Layer input [batch, seq, in]
+        y: Base layer output [batch, seq, out]
+        key: Module path of the layer
+        state: Current row-to-adapter assignment
+
+    Returns:
+        Output with each row's adapter delta applied
+    """
+    rows = state.rows
+    if not any(a is not None and key in a.weights for a in rows):
+        return y
+
+    # Uniform batch: one adapter for every row
+    if len(rows) == 1 or all(a is rows[0] for a in rows):
+        lora_a, lora_b = rows[0].weights[key]
+        return y + rows[0].scale * ((x @ lora_a) @ lora_b)
+
+    if len(rows) != x.shape[0]:
+        raise ValueError(f"Adapter rows ({len(rows)}) do not match batch size ({x.shape[0]})")
+
+    xp = mx if MLX_AVAILABLE and isinstance(x, mx.array) else np
+    a_rows, b_rows, scales = state.stacked(key, lambda: _stack_rows(xp, key, rows, x.shape[-1], y.shape[-1]))
+
+    # Batched matmul: [B, S, in] @ [B, in, r] @ [B, r, out]
+    delta = (x @ a_rows) @ b_rows
+    return y + scales[:, None, None] * delta
+
+
+def _stack_rows(xp, key: str, rows: list[LoRAAdapter | None], in_dim: int, out_dim: int):
+    """Stack per-row A/B matrices, zero-padding ranks and rows without an adapter"""
+    present = [a.weights[key] for a in rows if a is not None and key in a.weights]
+    rank = max(a.shape[1] for a, _ in present)
+    dtype = present[0][0].dtype
+
+    a_list, b_list, scales = [], [], []
+    for adapter in rows:
+        if adapter is None or key not in adapter.weights:
+            a_list.append(xp.zeros((in_dim, rank), dtype=dtype))
+            b_list.append(xp.zeros((rank, out_dim), dtype=dtype))
+            scales.append(0.0)
+            continue
+        lora_a, lora_b = adapter.weights[key]
+        pad = rank - lora_a.shape[1]
+        if pad:
+            lora_a = xp.concatenate([lora_a, xp.zeros((in_dim, pad), dtype=dtype)], axis=1)
+            lora_b = xp.concatenate([lora_b, xp.zeros((pad, out_dim), dtype=dtype)], axis=0)
+        a_list.append(lora_a)
+        b_list.append(lora_b)
+        scales.append(adapter.scale)
+
+    return xp.stack(a_list), xp.stack(b_list), xp.array(scales, dtype=dtype)
+
+
+class MultiLoRALinear(nn.Module if MLX_AVAILABLE else object):
+    """Wraps a base linear layer and adds per-sequence adapter deltas"""
+
+    def __init__(self, base: Any, key: str, state: MultiLoRAState):
+        super().__init__()
+        self.base = base
+        self.key = key
+        self.state = state
+
+    def __call__(self, x):
+        return apply_lora_delta(x, self.base(x), self.key, self.state)
+
+
+def attach_adapter_layers(model: Any, adapter: LoRAAdapter, state: MultiLoRAState) -> int:
+    """
+    Wrap the base-model layers an adapter targets
+
+    Wrapping is idempotent, so layers shared by several adapters are wrapped
+    once. Returns the number of newly wrapped layers.
+    """
+    wrapped = 0
+    for module_path in adapter.weights:
+        *parent_path, attr = module_path.split('.')
+        parent = model
+        for part in parent_path:
+            parent = parent[int(part)] if part.isdigit() else getattr(parent, part)
+
+        current = parent[int(attr)] if attr.isdigit() else getattr(parent, attr)
+        if isinstance(current, MultiLoRALinear):
+            continue
+
+        layer = MultiLoRALinear(current, module_path, state)
+        if attr.isdigit():
+            parent[int(attr)] = layer
+        else:
+            setattr(parent, attr, layer)
+        wrapped += 1
+
+    if wrapped:
+        logger.debug(f"Wrapped {wrapped} layers for adapter {adapter.name}")
+    return wrapped
+
+
+# Global adapter cache instance
+adapter_cache = AdapterCache()
@@ -110,6 +110,25 @@ def create_app():
         "vector_store_collections": {},
     }
 
+    # Resume offline batch jobs interrupted by a restart
+    try:
+        from gerdsen_ai_server.src.services.batch_jobs import batch_job_service
+        batch_job_service.set_app_state(flask_app.config["app_state"])
+        resumed = batch_job_service.resume_pending()
+        if resumed:
+            print(f"📦 Resuming {resumed} offline batch job(s)")
+    except Exception as e:
+        print(f"i Offline batch service not initialised: {e}")
+
+    # Watch the models directory so model listings skip stat validation
+    try:
+        from gerdsen_ai_server.src.config.settings import settings
+        from gerdsen_ai_server.src.services.model_index import model_index
+        if settings.model.model_index_watch and model_index.start_watcher(settings.model.models_dir):
+            print(f"👀 Watching {settings.model.models_dir} for model changes")
+    except Exception as e:
+        print(f"i Model index watcher not started: {e}")
+
     # Lightweight index and docs
     @flask_app.route("/")
     def index():
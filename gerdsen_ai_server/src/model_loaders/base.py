@@ -6,6 +6,12 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+# Tokens of one embedding input kept by every backend. The Core ML models are
+# traced at this length, and a job split across backends must truncate alike.
+EMBEDDING_MAX_SEQ_LENGTH = 128
+
 
 class BaseModelLoader(ABC):
     """Abstract base class for all model loaders"""
@@ -102,11 +108,15 @@ class BaseModel(ABC):
 class BaseEmbeddingModel(ABC):
     """Abstract base class for embedding models"""
 
+    # Whether embed() pads a batch to its longest member rather than a fixed input shape
+    pads_to_longest = True
+
     def __init__(self, model_name: str, model_path: str | Path, dimensions: int, max_tokens: int, device: str):
         self.model_name = model_name
         self.model_path = Path(model_path) if isinstance(model_path, str) else model_path
         self.dimensions = dimensions
         self.max_tokens = max_tokens
+        self.max_seq_length = min(EMBEDDING_MAX_SEQ_LENGTH, max_tokens)
         self.device = device
         self._loaded = False
 
@@ -126,6 +136,19 @@ class BaseEmbeddingModel(ABC):
     def embed(self, texts: list[str]) -> list[list[float]]:
         """Generate embeddings for a list of texts"""
 
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Generate embeddings as a C-contiguous float32 matrix of shape (len(texts), dimensions)"""
+        return np.ascontiguousarray(self.embed(texts), dtype=np.float32)
+
+    def embed_long_array(self, texts: list[str], window_tokens: int, overlap_tokens: int,
+                         max_batch_size: int = 32) -> np.ndarray:
+        """Embed inputs past the sequence cap by pooling overlapping windows (see long_input.py)"""
+        raise EmbeddingError(f"Embedding model '{self.model_name}' ({self.device}) does not support long inputs")
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        """Tokens each text occupies in a batch (estimated at ~4 characters per token by default)"""
+        return [min(self.max_tokens, len(text) // 4 + 2) for text in texts]
+
     def get_info(self) -> dict[str, Any]:
         """Get embedding model metadata"""
         return {
@@ -159,6 +182,10 @@ class BaseEmbeddingModelLoader(ABC):
     def list_available_models(self) -> list[dict[str, Any]]:
         """List all available embedding models"""
 
+    def create_replicas(self, name: str, count: int) -> list[BaseEmbeddingModel]:
+        """Load extra, independent instances of a loaded model (none for backends that can't share the work)"""
+        return []
+
     def get_loaded_model(self, name: str) -> BaseEmbeddingModel | None:
         """Get a loaded embedding model by name"""
         return self._loaded_models.get(name)
@@ -4,18 +4,30 @@ Compute dispatcher — routes embedding workloads to the best available device.
 Priority chain:
   1. Core ML + ANE  (if coremltools installed and ANE hardware detected)
   2. MLX Metal GPU  (if MLX installed)
-  3. Error          (no usable backend)
+  3. PyTorch CPU    (if torch installed; Linux and non-Apple nodes)
+  4. Error          (no usable backend)
+
+With embedding_multi_backend enabled, the other usable backends are loaded
+too and large jobs are split across all of them (see work_stealing.py).
 """
 
+import importlib.util
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+import numpy as np
 from loguru import logger
 
 from ..config.settings import ComputeSettings, settings
+from ..utils.embedding_cache import EmbeddingCache, cache_key
 from ..utils.hardware_detector import detect_ane_availability
 from .base import BaseEmbeddingModel, BaseEmbeddingModelLoader, EmbeddingError
+from .embedding_batcher import EmbeddingBatcher
 from .embedding_converter import EMBEDDING_MODEL_REGISTRY
+from .replica_pool import ReplicatedEmbeddingModel, choose_replica_count
+from .work_stealing import EmbedFn, WorkStealingExecutor
 
 # Lazy-check backend availability
 COREML_AVAILABLE = False
@@ -34,17 +46,106 @@ try:
 except ImportError:
     pass
 
+# torch is heavy to import; the CPU loader imports it when selected
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+
+NO_BACKEND_MESSAGE = "No embedding backend available. Install coremltools (ANE), mlx (GPU) or torch (CPU)."
+
+
+def plan_length_buckets(lengths: list[int], max_batch_size: int, max_padding: float) -> list[list[int]]:
+    """Group input positions into batches of similar token length.
+
+    Positions are sorted by length and packed greedily; a batch is closed when
+    it is full or when adding the next (longer) input would make padding more
+    than max_padding of the batch's padded tokens.
+
+    Returns:
+        Lists of input positions, shortest batch first.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    buckets: list[list[int]] = []
+    bucket: list[int] = []
+    total = 0
+    for i in order:
+        length = max(1, lengths[i])
+        if bucket:
+            padded = length * (len(bucket) + 1)
+            if len(bucket) >= max_batch_size or (padded - total - length) / padded > max_padding:
+                buckets.append(bucket)
+                bucket, total = [], 0
+        bucket.append(i)
+        total += length
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+
+def padded_tokens(lengths: list[int], batches: list[list[int]]) -> int:
+    """Tokens processed when each batch is padded to its longest member."""
+    return sum(max(lengths[i] for i in batch) * len(batch) for batch in batches if batch)
+
+
+def truncate_embeddings(vectors: np.ndarray, dimensions: int | None) -> np.ndarray:
+    """Keep the first `dimensions` components of each row and re-normalise to unit length.
+
+    Matryoshka-trained models keep most of their quality in the leading
+    components; cosine scores stay comparable only if the rows are unit
+    vectors again.
+    """
+    if dimensions is None or dimensions >= vectors.shape[1]:
+        return vectors
+    truncated = np.ascontiguousarray(vectors[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    truncated /= norms
+    return truncated
+
 
 class ComputeDispatcher:
     """Routes embedding requests to the best available compute backend."""
 
-    def __init__(self, compute_settings: ComputeSettings | None = None):
+    def __init__(self, compute_settings: ComputeSettings | None = None,
+                 embedding_loader: BaseEmbeddingModelLoader | None = None,
+                 secondary_loaders: dict[str, BaseEmbeddingModelLoader] | None = None):
+        """
+        Args:
+            compute_settings: Overrides settings.compute.
+            embedding_loader: Use this loader (device 'cpu') instead of detecting a backend.
+            secondary_loaders: Extra backends by device name, used alongside an
+                injected embedding_loader when embedding_multi_backend is on.
+        """
         self._settings = compute_settings or settings.compute
         self._embedding_loader: BaseEmbeddingModelLoader | None = None
         self._active_device: str = "none"
         self._ane_info: dict[str, Any] = {}
+        self._vector_cache: EmbeddingCache | None = None
+        self._vector_cache_lock = threading.Lock()
+        self._bucket_lock = threading.Lock()
+        self._bucket_stats = {
+            "calls": 0, "passes": 0, "tokens": 0, "padded_tokens": 0, "input_order_padded_tokens": 0,
+        }
+        self._batcher: EmbeddingBatcher | None = None
+        if self._settings.embedding_micro_batching:
+            self._batcher = EmbeddingBatcher(
+                self._settings.max_batch_size_embedding, self._settings.embedding_batch_wait_ms
+            )
+
+        self._secondary_loaders: dict[str, BaseEmbeddingModelLoader] = {}
+        self._replicated: dict[str, ReplicatedEmbeddingModel] = {}
+        self._replica_lock = threading.Lock()
+        self._multi_backend: WorkStealingExecutor | None = None
+
+        if embedding_loader is None:
+            self._detect_and_init()
+        else:
+            self._ane_info = {"available": False}
+            self._embedding_loader = embedding_loader
+            self._active_device = "cpu"
+            self._secondary_loaders = dict(secondary_loaders or {})
 
-        self._detect_and_init()
+        if self._settings.embedding_multi_backend and self._secondary_loaders:
+            self._multi_backend = WorkStealingExecutor(self._settings.max_batch_size_embedding)
+            logger.info(f"Multi-backend embedding across {[self._active_device, *self._secondary_loaders]}")
 
     # ------------------------------------------------------------------
     # Initialisation
@@ -60,6 +161,8 @@ class ComputeDispatcher:
             self._ane_info = {"available": False}
 
         self._embedding_loader = self._select_embedding_loader()
+        if self._embedding_loader is not None and self._settings.embedding_multi_backend:
+            self._secondary_loaders = self._init_secondary_loaders()
 
     def _select_embedding_loader(self) -> BaseEmbeddingModelLoader | None:
         """Select the best embedding loader based on hardware and settings."""
@@ -72,21 +175,33 @@ class ComputeDispatcher:
         if preferred == "gpu":
             return self._try_mlx_loader(cache_dir)
         if preferred == "cpu":
-            # CPU-only: use MLX loader (falls back to CPU-mode torch)
-            return self._try_mlx_loader(cache_dir)
-
-        # Auto: prefer ANE -> GPU
-        loader = self._try_coreml_loader(cache_dir)
-        if loader is not None:
-            return loader
+            return self._try_cpu_loader(cache_dir)
 
-        loader = self._try_mlx_loader(cache_dir)
-        if loader is not None:
-            return loader
+        # Auto: prefer ANE -> GPU -> CPU
+        for try_loader in (self._try_coreml_loader, self._try_mlx_loader, self._try_cpu_loader):
+            loader = try_loader(cache_dir)
+            if loader is not None:
+                return loader
 
-        logger.warning("No embedding backend available (install coremltools or mlx)")
+        logger.warning("No embedding backend available (install coremltools, mlx or torch)")
         return None
 
+    def _init_secondary_loaders(self) -> dict[str, BaseEmbeddingModelLoader]:
+        """Initialise every other usable backend so large jobs can run on all of them."""
+        primary = self._active_device
+        cache_dir = self._settings.embedding_cache_dir
+        loaders: dict[str, BaseEmbeddingModelLoader] = {}
+        for device, try_loader in (("ane", self._try_coreml_loader), ("gpu", self._try_mlx_loader),
+                                   ("cpu", self._try_cpu_loader)):
+            if device == primary:
+                continue
+            loader = try_loader(cache_dir)
+            if loader is not None:
+                loaders[device] = loader
+        # The _try_* helpers record the device they select; the primary stays active
+        self._active_device = primary
+        return loaders
+
     def _try_coreml_loader(self, cache_dir) -> BaseEmbeddingModelLoader | None:
         if not self._settings.enable_ane:
             return None
@@ -116,37 +231,109 @@ class ComputeDispatcher:
         self._active_device = "gpu"
         return MLXEmbeddingModelLoader(cache_dir=cache_dir)
 
+    def _try_cpu_loader(self, cache_dir) -> BaseEmbeddingModelLoader | None:
+        if not TORCH_AVAILABLE:
+            logger.info("PyTorch not available — skipping CPU loader")
+            return None
+
+        from .cpu_embedding_loader import CPUEmbeddingModelLoader
+
+        logger.info("Selected PyTorch CPU for embedding inference")
+        self._active_device = "cpu"
+        return CPUEmbeddingModelLoader(
+            cache_dir=cache_dir,
+            threads=self._settings.cpu_embedding_threads,
+            quantize=self._settings.cpu_embedding_quantize,
+            replicas=self._settings.embedding_replicas,
+        )
+
+    def _get_vector_cache(self) -> EmbeddingCache | None:
+        """Create the embedding vector cache on first use (None when disabled)."""
+        if not self._settings.embedding_vector_cache:
+            return None
+        with self._vector_cache_lock:
+            if self._vector_cache is None:
+                db_path = None
+                if self._settings.embedding_vector_cache_disk:
+                    db_path = self._settings.embedding_cache_dir / "vector_cache.db"
+                self._vector_cache = EmbeddingCache(
+                    db_path, self._settings.embedding_vector_cache_memory_mb * 1024 * 1024
+                )
+            return self._vector_cache
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
     def load_embedding_model(self, name: str) -> BaseEmbeddingModel:
-        """Load an embedding model via the selected backend."""
+        """Load an embedding model via the selected backend, with replicas where the backend supports them."""
         if self._embedding_loader is None:
-            raise EmbeddingError(
-                "No embedding backend available. Install coremltools (ANE) or mlx (GPU)."
-            )
-        return self._embedding_loader.load_model(name)
+            raise EmbeddingError(NO_BACKEND_MESSAGE)
+        model = self._embedding_loader.load_model(name)
+        with self._replica_lock:
+            replicated = self._replicated.get(name)
+            if replicated is None or replicated.replicas[0] is not model:
+                replicated = self._create_replicas(name, model)
+            if replicated is None:
+                return model
+            self._replicated[name] = replicated
+            return replicated
+
+    def _replica_count(self, name: str) -> int:
+        if self._settings.embedding_replicas > 0:
+            return self._settings.embedding_replicas
+        bytes_per_param = 1 if self._active_device == "cpu" and self._settings.cpu_embedding_quantize else 4
+        return choose_replica_count(EMBEDDING_MODEL_REGISTRY[name]["params_millions"], bytes_per_param)
+
+    def _create_replicas(self, name: str, model: BaseEmbeddingModel) -> ReplicatedEmbeddingModel | None:
+        """Load extra instances of a model so concurrent batches can run in parallel."""
+        count = self._replica_count(name) if name in EMBEDDING_MODEL_REGISTRY else 1
+        if count <= 1:
+            return None
+        try:
+            extras = list(self._embedding_loader.create_replicas(name, count - 1))
+        except Exception as e:
+            logger.warning(f"Could not load replicas of '{name}', using a single instance: {e}")
+            return None
+        if not extras:
+            return None
+        logger.info(f"Embedding model '{name}' running {len(extras) + 1} replicas")
+        return ReplicatedEmbeddingModel([model, *extras])
 
     def unload_embedding_model(self, name: str) -> None:
         """Unload an embedding model."""
+        with self._replica_lock:
+            replicated = self._replicated.pop(name, None)
+        if replicated is not None:
+            replicated.unload()
         if self._embedding_loader is not None:
             self._embedding_loader.unload_model(name)
+        for loader in self._secondary_loaders.values():
+            loader.unload_model(name)
+
+    def embed(self, texts: list[str], model_name: str | None = None, use_cache: bool = True) -> list[list[float]]:
+        """Generate embeddings as Python lists; see embed_array() for the NumPy result."""
+        return self.embed_array(texts, model_name, use_cache).tolist()
 
-    def embed(self, texts: list[str], model_name: str | None = None) -> list[list[float]]:
+    def embed_array(self, texts: list[str], model_name: str | None = None, use_cache: bool = True,
+                    long_input: bool = False) -> np.ndarray:
         """Generate embeddings, loading the model on demand if needed.
 
+        Vectors already computed for the same model and text are served from
+        the embedding cache; only the misses are run through the model.
+
         Args:
             texts: List of strings to embed.
             model_name: Short model name (defaults to settings.default_embedding_model).
+            use_cache: Set False to run every text through the model (benchmarks).
+            long_input: Embed each text in full by pooling overlapping windows
+                instead of truncating at the model's sequence cap.
 
         Returns:
-            List of embedding vectors.
+            C-contiguous float32 matrix with one row per text.
         """
         if self._embedding_loader is None:
-            raise EmbeddingError(
-                "No embedding backend available. Install coremltools (ANE) or mlx (GPU)."
-            )
+            raise EmbeddingError(NO_BACKEND_MESSAGE)
 
         name = model_name or self._settings.default_embedding_model
 
@@ -161,21 +348,222 @@ class ComputeDispatcher:
         if not self._embedding_loader.is_model_loaded(name):
             self.load_embedding_model(name)
 
-        model = self._embedding_loader.get_loaded_model(name)
+        model = self._replicated.get(name) or self._embedding_loader.get_loaded_model(name)
         if model is None:
             raise EmbeddingError(f"Failed to load embedding model '{name}'")
 
-        # Batch if needed
+        dimensions = EMBEDDING_MODEL_REGISTRY[name]["dimensions"]
+        if not texts:
+            return np.zeros((0, dimensions), dtype=np.float32)
+
+        if long_input:
+            window = self._settings.embedding_long_window_tokens
+            overlap = self._settings.embedding_long_overlap_tokens
+            # Pooled vectors differ from truncated ones, so they get their own keys
+            key_model = f"{name}@long{window}/{overlap}"
+
+            def run(batch: list[str]) -> np.ndarray:
+                return self._embed_long(model, batch, window, overlap, self._settings.max_batch_size_embedding)
+        else:
+            key_model = name
+
+            def run(batch: list[str]) -> np.ndarray:
+                return self._run_model(name, model, batch)
+
+        cache = self._get_vector_cache() if use_cache else None
+        if cache is None:
+            return run(texts)
+
+        # Serve what we can from the cache and only run the model on the misses
+        keys = [cache_key(key_model, text, dimensions) for text in texts]
+        cached = cache.get_many(keys)
+
+        misses: dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, cached, strict=True):
+            if vector is None and key not in misses:
+                misses[key] = text
+
+        computed: dict[str, np.ndarray] = {}
+        if misses:
+            matrix = run(list(misses.values()))
+            computed = dict(zip(misses, matrix, strict=True))
+            cache.put_many(key_model, dimensions, computed)
+
+        width = next(iter(computed.values())).shape[0] if computed else cached[0].shape[0]
+        result = np.empty((len(texts), width), dtype=np.float32)
+        for row, (key, vector) in enumerate(zip(keys, cached, strict=True)):
+            result[row] = computed[key] if vector is None else vector
+        return result
+
+    def _run_model(self, name: str, model: BaseEmbeddingModel, texts: list[str]) -> np.ndarray:
+        """Embed texts, sharing a forward pass with concurrent requests when they fit one batch."""
+        if self._multi_backend is not None and len(texts) >= self._settings.embedding_multi_backend_min_texts:
+            return self._embed_multi_backend(name, model, texts)
+        if self._batcher is None or len(texts) >= self._settings.max_batch_size_embedding:
+            return self._embed_batches(model, texts)
+        return self._batcher.embed(name, texts, lambda batch: self._embed_batches(model, batch),
+                                   workers=self._parallelism(model))
+
+    def _embed_multi_backend(self, name: str, model: BaseEmbeddingModel, texts: list[str]) -> np.ndarray:
+        """Split a large job across every backend, chunked after sorting by token length.
+
+        Sorting first keeps each chunk's texts of similar length, so chunks
+        stay as cheap to pad as length-bucketed batches. Only backends that
+        truncate inputs at the same length as the active one take part.
+        """
+        order = None
+        if (self._settings.embedding_length_bucketing and isinstance(model, BaseEmbeddingModel)
+                and model.pads_to_longest):
+            order = np.argsort(model.token_lengths(texts), kind="stable")
+            texts = [texts[i] for i in order]
+
+        backends: dict[str, EmbedFn] = {self._active_device: lambda batch: self._embed_batches(model, batch)}
+        for device, loader in self._secondary_loaders.items():
+            backends[device] = self._secondary_backend(loader, name, getattr(model, "max_seq_length", None))
+
+        vectors = self._multi_backend.run(texts, backends)
+        if order is None:
+            return vectors
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
+
+    def _secondary_backend(self, loader: BaseEmbeddingModelLoader, name: str,
+                           max_seq_length: int | None) -> EmbedFn:
+        def run(batch: list[str]) -> np.ndarray:
+            # Loaded on first use; a load failure counts as a backend failure
+            model = loader.get_loaded_model(name) if loader.is_model_loaded(name) else loader.load_model(name)
+            if getattr(model, "max_seq_length", None) != max_seq_length:
+                # Its vectors would differ from the active backend's for long texts
+                raise EmbeddingError(
+                    f"{model.device} truncates '{name}' at {getattr(model, 'max_seq_length', None)} tokens, "
+                    f"not {max_seq_length}"
+                )
+            return self._embed_batches(model, batch)
+        return run
+
+    def get_replica_stats(self) -> dict[str, Any]:
+        """Return per-replica load counters for each replicated model."""
+        with self._replica_lock:
+            replicated = dict(self._replicated)
+        return {
+            "configured": self._settings.embedding_replicas or "auto",
+            "models": {name: model.get_stats() for name, model in replicated.items()},
+        }
+
+    def get_multi_backend_stats(self) -> dict[str, Any]:
+        """Return per-backend throughput and work-stealing metrics."""
+        if self._multi_backend is None:
+            return {"enabled": False, "devices": [self._active_device]}
+        return {
+            "enabled": True,
+            "devices": [self._active_device, *self._secondary_loaders],
+            "min_texts": self._settings.embedding_multi_backend_min_texts,
+            **self._multi_backend.get_stats(),
+        }
+
+    @staticmethod
+    def _embed_long(model: BaseEmbeddingModel, texts: list[str], window_tokens: int,
+                    overlap_tokens: int, max_batch_size: int) -> np.ndarray:
+        """Windowed embedding: the windows of every text run max_batch_size per forward pass."""
+        if not isinstance(model, BaseEmbeddingModel):
+            raise EmbeddingError(f"Embedding model {model!r} does not support long inputs")
+        return model.embed_long_array(texts, window_tokens, overlap_tokens, max_batch_size)
+
+    @staticmethod
+    def _forward(model: BaseEmbeddingModel, texts: list[str]) -> np.ndarray:
+        if isinstance(model, BaseEmbeddingModel):
+            return model.embed_array(texts)
+        return np.ascontiguousarray(model.embed(texts), dtype=np.float32)
+
+    def _embed_batches(self, model: BaseEmbeddingModel, texts: list[str]) -> np.ndarray:
+        """Run the model over texts in batches of max_batch_size_embedding.
+
+        Models that pad each batch to its longest member get length-bucketed
+        batches, so short texts don't pay for a long one's attention.
+        """
         batch_size = self._settings.max_batch_size_embedding
-        if len(texts) <= batch_size:
-            return model.embed(texts)
+        if (self._settings.embedding_length_bucketing and len(texts) > 1
+                and isinstance(model, BaseEmbeddingModel) and model.pads_to_longest):
+            return self._embed_bucketed(model, texts, batch_size)
 
-        # Process in batches
-        all_embeddings: list[list[float]] = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            all_embeddings.extend(model.embed(batch))
-        return all_embeddings
+        if len(texts) <= batch_size:
+            return self._forward(model, texts)
+        return np.concatenate(self._forward_all(model, [texts[i : i + batch_size]
+                                                        for i in range(0, len(texts), batch_size)]))
+
+    @staticmethod
+    def _parallelism(model: BaseEmbeddingModel) -> int:
+        return model.replica_count if isinstance(model, ReplicatedEmbeddingModel) else 1
+
+    def _forward_all(self, model: BaseEmbeddingModel, batches: list[list[str]]) -> list[np.ndarray]:
+        """Run several batches, in parallel across replicas when the model has them."""
+        workers = min(self._parallelism(model), len(batches))
+        if workers <= 1:
+            return [self._forward(model, batch) for batch in batches]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed-replica") as pool:
+            return list(pool.map(lambda batch: self._forward(model, batch), batches))
+
+    def _embed_bucketed(self, model: BaseEmbeddingModel, texts: list[str], batch_size: int) -> np.ndarray:
+        lengths = model.token_lengths(texts)
+        buckets = plan_length_buckets(lengths, batch_size, self._settings.embedding_bucket_max_padding)
+
+        outputs = self._forward_all(model, [[texts[i] for i in bucket] for bucket in buckets])
+        results = np.empty((len(texts), outputs[0].shape[1]), dtype=np.float32)
+        for bucket, vectors in zip(buckets, outputs, strict=True):
+            results[bucket] = vectors
+
+        input_order = [list(range(i, min(i + batch_size, len(texts)))) for i in range(0, len(texts), batch_size)]
+        with self._bucket_lock:
+            self._bucket_stats["calls"] += 1
+            self._bucket_stats["passes"] += len(buckets)
+            self._bucket_stats["tokens"] += sum(lengths)
+            self._bucket_stats["padded_tokens"] += padded_tokens(lengths, buckets)
+            self._bucket_stats["input_order_padded_tokens"] += padded_tokens(lengths, input_order)
+        return results
+
+    def get_bucketing_stats(self) -> dict[str, Any]:
+        """Return padding metrics for length-bucketed batches."""
+        with self._bucket_lock:
+            stats = dict(self._bucket_stats)
+        stats["enabled"] = self._settings.embedding_length_bucketing
+        stats["max_padding"] = self._settings.embedding_bucket_max_padding
+        padded = stats["padded_tokens"]
+        stats["padding_fraction"] = (padded - stats["tokens"]) / padded if padded else 0.0
+        baseline = stats["input_order_padded_tokens"]
+        stats["padded_tokens_saved"] = baseline - padded
+        return stats
+
+    def _cpu_capabilities(self) -> dict[str, Any]:
+        info: dict[str, Any] = {
+            "available": TORCH_AVAILABLE,
+            "active": self._active_device == "cpu",
+            "threads": self._settings.cpu_embedding_threads,
+            "quantize_int8": self._settings.cpu_embedding_quantize,
+        }
+        runtime_info = getattr(self._embedding_loader, "get_runtime_info", None)
+        if self._active_device == "cpu" and callable(runtime_info):
+            info.update(runtime_info())
+        return info
+
+    def get_embedding_cache_stats(self) -> dict[str, Any]:
+        """Return hit-rate metrics for the embedding vector cache."""
+        cache = self._get_vector_cache()
+        if cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **cache.get_stats()}
+
+    def get_batching_stats(self) -> dict[str, Any]:
+        """Return queue and batch-size metrics for the embedding micro-batcher."""
+        if self._batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._batcher.get_stats()}
+
+    def clear_embedding_cache(self, model_name: str | None = None) -> None:
+        """Drop cached vectors for one model, or all of them."""
+        cache = self._get_vector_cache()
+        if cache is not None:
+            cache.clear(model_name)
 
     def get_capabilities(self) -> dict[str, Any]:
         """Return a summary of available compute capabilities."""
@@ -194,15 +582,22 @@ class ComputeDispatcher:
             "ane_version": self._ane_info.get("version", 0),
             "coremltools_installed": COREML_AVAILABLE,
             "mlx_installed": MLX_AVAILABLE,
+            "torch_installed": TORCH_AVAILABLE,
             "embedding_backend": type(self._embedding_loader).__name__ if self._embedding_loader else None,
             "loaded_embedding_models": loaded_models,
             "available_embedding_models": available_models,
             "default_embedding_model": self._settings.default_embedding_model,
             "max_batch_size": self._settings.max_batch_size_embedding,
+            "cpu_embedding": self._cpu_capabilities(),
+            "embedding_cache": self.get_embedding_cache_stats(),
+            "embedding_batching": self.get_batching_stats(),
+            "embedding_bucketing": self.get_bucketing_stats(),
+            "multi_backend_embedding": self.get_multi_backend_stats(),
+            "embedding_replicas": self.get_replica_stats(),
         }
 
     def get_active_device(self) -> str:
-        """Return the active device string: 'ane', 'gpu', or 'none'."""
+        """Return the active device string: 'ane', 'gpu', 'cpu', or 'none'."""
         return self._active_device
 
 
@@ -11,6 +11,7 @@ from typing import Any
 import numpy as np
 from loguru import logger
 
+from ..utils.tokenizer_pool import tokenizer_pool
 from .base import BaseEmbeddingModel, BaseEmbeddingModelLoader, EmbeddingError
 from .embedding_converter import (
     EMBEDDING_MODEL_REGISTRY,
@@ -31,6 +32,9 @@ except ImportError:
 class CoreMLEmbeddingModel(BaseEmbeddingModel):
     """Embedding model backed by Core ML for ANE execution."""
 
+    # Core ML inputs have a fixed shape; every row is padded to max length
+    pads_to_longest = False
+
     def __init__(
         self,
         model_name: str,
@@ -49,7 +53,6 @@ class CoreMLEmbeddingModel(BaseEmbeddingModel):
         self.hf_model_id = hf_model_id
         self._coreml_model = None
         self._tokenizer = None
-        self._max_seq_length = min(128, max_tokens)
 
     def load(self) -> None:
         if not COREML_AVAILABLE:
@@ -73,22 +76,25 @@ class CoreMLEmbeddingModel(BaseEmbeddingModel):
         logger.info(f"Core ML model '{self.model_name}' unloaded")
 
     def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
         if not self._loaded or self._coreml_model is None:
             raise EmbeddingError(f"Model '{self.model_name}' is not loaded")
 
-        embeddings: list[list[float]] = []
-        for text in texts:
-            encoded = self._tokenizer(
-                text,
-                padding="max_length",
-                max_length=self._max_seq_length,
-                truncation=True,
-                return_tensors="np",
-            )
+        # The Core ML model has a fixed input shape, so pad every row to max length
+        encoded = tokenizer_pool.encode_padded(
+            self._tokenizer, texts, max_length=self.max_seq_length, pad_to_max_length=True
+        )
+
+        embeddings = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        for row in range(len(texts)):
+            input_ids = encoded["input_ids"][row:row + 1]
+            attention_mask = encoded["attention_mask"][row:row + 1]
 
             prediction = self._coreml_model.predict({
-                "input_ids": encoded["input_ids"].astype(np.int32),
-                "attention_mask": encoded["attention_mask"].astype(np.int32),
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
             })
 
             # Get the last hidden state (first output key)
@@ -96,7 +102,7 @@ class CoreMLEmbeddingModel(BaseEmbeddingModel):
             hidden_state = prediction[output_key]  # (1, seq_len, hidden_dim)
 
             # Mean pooling over non-padding tokens
-            mask = encoded["attention_mask"].astype(np.float32)
+            mask = attention_mask.astype(np.float32)
             if hidden_state.ndim == 3:
                 mask_expanded = np.expand_dims(mask, axis=-1)  # (1, seq_len, 1)
                 summed = np.sum(hidden_state * mask_expanded, axis=1)  # (1, hidden_dim)
@@ -111,19 +117,15 @@ class CoreMLEmbeddingModel(BaseEmbeddingModel):
             norm = np.clip(norm, a_min=1e-12, a_max=None)
             normalized = pooled / norm
 
-            # Truncate to requested dimensions if needed
-            vec = normalized.flatten().tolist()
-            if len(vec) > self.dimensions:
-                vec = vec[: self.dimensions]
-
-            embeddings.append(vec)
+            # Truncate to the model's dimensions if needed
+            embeddings[row] = normalized.reshape(-1)[: self.dimensions]
 
         return embeddings
 
     def get_info(self) -> dict[str, Any]:
         info = super().get_info()
         info["hf_model_id"] = self.hf_model_id
-        info["max_seq_length"] = self._max_seq_length
+        info["max_seq_length"] = self.max_seq_length
         return info
 
 
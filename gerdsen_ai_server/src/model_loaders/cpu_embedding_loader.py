@@ -0,0 +1,222 @@
+"""
+CPU embedding model loader — for Linux and other nodes without ANE or MLX.
+
+Runs HuggingFace encoders with PyTorch on the CPU: intra-op threads are
+configurable, Linear layers can be dynamically quantized to int8, and mean
+pooling / L2 normalisation are done in NumPy on the batch.
+"""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from ..utils.tokenizer_pool import tokenizer_pool
+from .base import BaseEmbeddingModel, BaseEmbeddingModelLoader, EmbeddingError
+from .embedding_converter import EMBEDDING_MODEL_REGISTRY
+from .long_input import embed_windows, tokenize_windows
+from .replica_pool import MIN_THREADS_PER_REPLICA
+
+TORCH_AVAILABLE = False
+try:
+    import torch
+
+    TORCH_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def mean_pool(hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Masked mean over the sequence axis, L2-normalised: (batch, seq, hidden) -> (batch, hidden)"""
+    mask = attention_mask.astype(np.float32)[..., None]
+    summed = np.einsum("bsh,bsk->bh", hidden_state.astype(np.float32, copy=False), mask)
+    counts = np.maximum(mask.sum(axis=1), 1e-9)
+    pooled = summed / counts
+    norms = np.maximum(np.linalg.norm(pooled, axis=-1, keepdims=True), 1e-12)
+    return pooled / norms
+
+
+class CPUEmbeddingModel(BaseEmbeddingModel):
+    """Embedding model that runs on the CPU through PyTorch."""
+
+    def __init__(
+        self,
+        model_name: str,
+        model_path: str | Path,
+        dimensions: int,
+        max_tokens: int,
+        hf_model_id: str,
+        quantize: bool = False,
+    ):
+        super().__init__(
+            model_name=model_name,
+            model_path=model_path,
+            dimensions=dimensions,
+            max_tokens=max_tokens,
+            device="cpu",
+        )
+        self.hf_model_id = hf_model_id
+        self.quantize = quantize
+        self._hf_model = None
+        self._tokenizer = None
+
+    def load(self) -> None:
+        if not TORCH_AVAILABLE:
+            raise EmbeddingError("PyTorch is not installed (pip install impetus-llm-server[cpu])")
+
+        from transformers import AutoModel, AutoTokenizer
+
+        logger.info(f"Loading HuggingFace model '{self.hf_model_id}' for CPU embedding")
+        self._tokenizer = AutoTokenizer.from_pretrained(self.hf_model_id)
+        model = AutoModel.from_pretrained(self.hf_model_id)
+        model.eval()
+
+        if self.quantize:
+            # Weights of Linear layers stored as int8, activations quantized on the fly
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        self._hf_model = model
+        self._loaded = True
+        logger.info(f"CPU embedding model '{self.model_name}' loaded (int8={self.quantize})")
+
+    def unload(self) -> None:
+        self._hf_model = None
+        self._tokenizer = None
+        self._loaded = False
+        logger.info(f"CPU embedding model '{self.model_name}' unloaded")
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        if self._tokenizer is None:
+            return super().token_lengths(texts)
+        encoded = tokenizer_pool.encode_batch(self._tokenizer, texts, max_length=self.max_seq_length)
+        return [len(ids) for ids in encoded]
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        if not self._loaded or self._hf_model is None:
+            raise EmbeddingError(f"Model '{self.model_name}' is not loaded")
+
+        encoded = tokenizer_pool.encode_padded(self._tokenizer, texts, max_length=self.max_seq_length)
+        attention_mask = encoded["attention_mask"]
+
+        pooled = mean_pool(self._hidden_states(encoded["input_ids"], attention_mask), attention_mask)
+        return np.ascontiguousarray(pooled[:, : self.dimensions], dtype=np.float32)
+
+    def embed_long_array(self, texts: list[str], window_tokens: int, overlap_tokens: int,
+                         max_batch_size: int = 32) -> np.ndarray:
+        if not self._loaded or self._hf_model is None:
+            raise EmbeddingError(f"Model '{self.model_name}' is not loaded")
+
+        window = min(window_tokens, self.max_tokens)
+        input_ids, attention_mask, owners = tokenize_windows(self._tokenizer, texts, window, overlap_tokens)
+        pooled = embed_windows(self._hidden_states, input_ids, attention_mask, owners, len(texts), max_batch_size)
+        return np.ascontiguousarray(pooled[:, : self.dimensions])
+
+    def _hidden_states(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        with torch.inference_mode():
+            outputs = self._hf_model(
+                input_ids=torch.from_numpy(input_ids.astype(np.int64)),
+                attention_mask=torch.from_numpy(attention_mask.astype(np.int64)),
+            )
+        return outputs.last_hidden_state.numpy()
+
+    def get_info(self) -> dict[str, Any]:
+        info = super().get_info()
+        info["hf_model_id"] = self.hf_model_id
+        info["max_seq_length"] = self.max_seq_length
+        info["quantized_int8"] = self.quantize
+        return info
+
+
+def intra_op_threads(threads: int, replicas: int, cpu_cores: int | None = None) -> int:
+    """
+    Torch intra-op threads for the CPU backend (0 leaves torch's default)
+
+    An explicit thread count wins. Otherwise concurrent replicas split the
+    cores between them; with automatic replica counts each replica gets the
+    MIN_THREADS_PER_REPLICA cores the count is sized for.
+    """
+    if threads > 0:
+        return threads
+    if replicas == 1:
+        return 0
+    if replicas <= 0:
+        return MIN_THREADS_PER_REPLICA
+    return max(1, (cpu_cores or os.cpu_count() or 1) // replicas)
+
+
+class CPUEmbeddingModelLoader(BaseEmbeddingModelLoader):
+    """Loader that runs HuggingFace embedding models on the CPU via PyTorch."""
+
+    def __init__(self, cache_dir: str | Path, threads: int = 0, quantize: bool = False, replicas: int = 1):
+        super().__init__()
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.quantize = quantize
+        self.threads = threads
+
+        # torch.set_num_threads is process-wide, so it is set here once for all replicas
+        num_threads = intra_op_threads(threads, replicas)
+        if TORCH_AVAILABLE and num_threads > 0:
+            torch.set_num_threads(num_threads)
+
+    def load_model(self, name: str) -> CPUEmbeddingModel:
+        if name in self._loaded_models and self._loaded_models[name].is_loaded:
+            return self._loaded_models[name]
+
+        model = self._new_model(name)
+        model.load()
+        self._loaded_models[name] = model
+        return model
+
+    def create_replicas(self, name: str, count: int) -> list[CPUEmbeddingModel]:
+        replicas = [self._new_model(name) for _ in range(count)]
+        for replica in replicas:
+            replica.load()
+        return replicas
+
+    def _new_model(self, name: str) -> CPUEmbeddingModel:
+        registry_entry = EMBEDDING_MODEL_REGISTRY.get(name)
+        if registry_entry is None:
+            raise EmbeddingError(f"Unknown embedding model: '{name}'. Available: {list(EMBEDDING_MODEL_REGISTRY)}")
+
+        return CPUEmbeddingModel(
+            model_name=name,
+            model_path=str(self.cache_dir / name),
+            dimensions=registry_entry["dimensions"],
+            max_tokens=registry_entry["max_tokens"],
+            hf_model_id=registry_entry["hf_id"],
+            quantize=self.quantize,
+        )
+
+    def unload_model(self, name: str) -> None:
+        model = self._loaded_models.pop(name, None)
+        if model is not None:
+            model.unload()
+
+    def list_available_models(self) -> list[dict[str, Any]]:
+        models = []
+        for name, entry in EMBEDDING_MODEL_REGISTRY.items():
+            models.append({
+                "name": name,
+                "hf_id": entry["hf_id"],
+                "dimensions": entry["dimensions"],
+                "max_tokens": entry["max_tokens"],
+                "params_millions": entry["params_millions"],
+                "cached": False,
+                "loaded": self.is_model_loaded(name),
+                "device": "cpu",
+            })
+        return models
+
+    def get_runtime_info(self) -> dict[str, Any]:
+        """Threading and quantization settings in effect"""
+        return {
+            "torch_version": torch.__version__ if TORCH_AVAILABLE else None,
+            "intra_op_threads": torch.get_num_threads() if TORCH_AVAILABLE else self.threads,
+            "quantize_int8": self.quantize,
+        }
@@ -0,0 +1,177 @@
+"""
+Dynamic micro-batching for embedding requests
+
+Concurrent callers that each embed a handful of strings would otherwise run
+one forward pass apiece at batch size 1. The batcher queues requests per
+model and worker threads (one per model replica) drain the queue: each waits up to
+max_wait_ms after the first queued request (or until max_batch_size texts
+are collected), runs one forward pass over the combined texts and scatters
+the vectors back to each request's future.
+
+Requests that arrive while a pass is running accumulate in the queue and
+ride along with the next pass, so batch sizes grow with concurrency.
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from loguru import logger
+
+EmbedFn = Callable[[list[str]], list[list[float]]]
+
+
+@dataclass
+class _PendingRequest:
+    texts: list[str]
+    embed_fn: EmbedFn
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent embedding requests into shared forward passes"""
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._queues: dict[str, queue.Queue] = {}
+        self._workers: dict[str, list[threading.Thread]] = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+        self.stats = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "batched_texts": 0,
+            "full_flushes": 0,
+            "timeout_flushes": 0,
+            "errors": 0,
+            "max_queue_depth": 0,
+            "total_queue_wait_ms": 0.0,
+            "total_compute_ms": 0.0,
+        }
+
+    def submit(self, key: str, texts: list[str], embed_fn: EmbedFn, workers: int = 1) -> Future:
+        """
+        Queue texts for the model identified by key
+
+        Args:
+            key: Batching key (one queue per model)
+            texts: Strings to embed; requests larger than max_batch_size get a pass of their own
+            embed_fn: Runs one forward pass over a list of texts
+            workers: Passes that may run at once for this key (set when its queue is created)
+        """
+        request = _PendingRequest(list(texts), embed_fn)
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("Embedding batcher is stopped")
+            pending = self._queues.get(key)
+            if pending is None:
+                pending = self._queues[key] = queue.Queue()
+                self._workers[key] = [
+                    threading.Thread(target=self._worker, args=(pending,), name=f"embed-batcher-{key}-{i}", daemon=True)
+                    for i in range(max(1, workers))
+                ]
+                for worker in self._workers[key]:
+                    worker.start()
+            pending.put(request)
+            self.stats["requests"] += 1
+            self.stats["texts"] += len(request.texts)
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], pending.qsize())
+        return request.future
+
+    def embed(self, key: str, texts: list[str], embed_fn: EmbedFn, workers: int = 1) -> list[list[float]]:
+        """Submit texts and wait for their vectors"""
+        return self.submit(key, texts, embed_fn, workers).result()
+
+    def _worker(self, pending: queue.Queue):
+        carry: _PendingRequest | None = None
+        while True:
+            first = carry or pending.get()
+            carry = None
+            if first is None:
+                return
+
+            batch = [first]
+            count = len(first.texts)
+            deadline = first.enqueued_at + self.max_wait_ms / 1000
+            full = count >= self.max_batch_size
+            while not full:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    pending.put(None)  # finish this batch, then exit
+                    break
+                if count + len(request.texts) > self.max_batch_size:
+                    carry = request  # starts the next batch
+                    full = True
+                    break
+                batch.append(request)
+                count += len(request.texts)
+                full = count >= self.max_batch_size
+
+            self._run(batch, full)
+
+    def _run(self, batch: list[_PendingRequest], full: bool):
+        started = time.perf_counter()
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = batch[0].embed_fn(texts)
+            if len(vectors) != len(texts):
+                raise RuntimeError(f"Embedding pass returned {len(vectors)} vectors for {len(texts)} texts")
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["batched_requests"] += len(batch)
+            self.stats["batched_texts"] += len(texts)
+            self.stats["full_flushes" if full else "timeout_flushes"] += 1
+            self.stats["total_queue_wait_ms"] += sum((started - r.enqueued_at) * 1000 for r in batch)
+            self.stats["total_compute_ms"] += (finished - started) * 1000
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(vectors[offset:offset + len(request.texts)])
+            offset += len(request.texts)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Queue and batch metrics"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queue_depth"] = {key: q.qsize() for key, q in self._queues.items()}
+        batches = stats["batches"]
+        stats["avg_batch_size"] = stats["batched_texts"] / batches if batches else 0.0
+        stats["avg_requests_per_batch"] = stats["batched_requests"] / batches if batches else 0.0
+        stats["avg_queue_wait_ms"] = (stats["total_queue_wait_ms"] / stats["batched_requests"]
+                                      if stats["batched_requests"] else 0.0)
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait_ms
+        return stats
+
+    def stop(self, timeout: float = 5.0):
+        """Drain queued requests and stop the worker threads"""
+        with self._lock:
+            self._stopped = True
+            queues = list(self._queues.items())
+            workers = [worker for key_workers in self._workers.values() for worker in key_workers]
+        for key, pending in queues:
+            for _ in self._workers[key]:
+                pending.put(None)
+        for worker in workers:
+            worker.join(timeout)
@@ -0,0 +1,127 @@
+"""
+Windowed embedding of inputs longer than a model's sequence cap
+
+Each input is tokenized without truncation and split into overlapping
+windows that fit the model. The windows of every input are padded into one
+batch and run through the model max_batch_size windows at a time; each
+input's vector is then the mean of its windows' token states, weighted by
+the number of tokens per window, L2-normalised.
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from ..utils.tokenizer_pool import tokenizer_pool
+
+
+def _special_ids(tokenizer: Any) -> tuple[list[int], list[int]]:
+    """Tokens framing every window ([CLS] ... [SEP] for BERT-style encoders)"""
+    start = getattr(tokenizer, "cls_token_id", None)
+    if start is None:
+        start = getattr(tokenizer, "bos_token_id", None)
+    end = getattr(tokenizer, "sep_token_id", None)
+    if end is None:
+        end = getattr(tokenizer, "eos_token_id", None)
+    return ([start] if isinstance(start, int) else []), ([end] if isinstance(end, int) else [])
+
+
+def split_windows(ids: np.ndarray, window_tokens: int, overlap_tokens: int,
+                  prefix: list[int], suffix: list[int]) -> list[np.ndarray]:
+    """Split one token sequence into overlapping windows, each framed by prefix/suffix"""
+    body = window_tokens - len(prefix) - len(suffix)
+    if body <= 0:
+        raise ValueError(f"window_tokens={window_tokens} leaves no room for content tokens")
+    step = body - min(overlap_tokens, body - 1)
+
+    windows = []
+    start = 0
+    while True:
+        chunk = ids[start:start + body]
+        windows.append(np.concatenate([prefix, chunk, suffix]).astype(np.int32))
+        if start + body >= len(ids):
+            return windows
+        start += step
+
+
+def tokenize_windows(tokenizer: Any, texts: list[str], window_tokens: int,
+                     overlap_tokens: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tokenize texts into one padded batch of windows
+
+    Returns:
+        (input_ids, attention_mask, owners): int32 (windows, seq_len) arrays and
+        the index of the input each window belongs to
+    """
+    prefix, suffix = _special_ids(tokenizer)
+    encodings = tokenizer_pool.encode_batch(tokenizer, texts, add_special_tokens=False)
+
+    windows: list[np.ndarray] = []
+    owners: list[int] = []
+    for owner, ids in enumerate(encodings):
+        for window in split_windows(ids, window_tokens, overlap_tokens, prefix, suffix):
+            windows.append(window)
+            owners.append(owner)
+
+    seq_len = max(len(w) for w in windows)
+    pad_id = getattr(tokenizer, "pad_token_id", None) or 0
+    input_ids = np.full((len(windows), seq_len), pad_id, dtype=np.int32)
+    attention_mask = np.zeros((len(windows), seq_len), dtype=np.int32)
+    for row, window in enumerate(windows):
+        input_ids[row, :len(window)] = window
+        attention_mask[row, :len(window)] = 1
+    return input_ids, attention_mask, np.array(owners, dtype=np.int64)
+
+
+def pool_windows(hidden_state: np.ndarray, attention_mask: np.ndarray, owners: np.ndarray,
+                 count: int) -> np.ndarray:
+    """
+    Combine per-window token states into one unit vector per input
+
+    A window's mean vector weighted by its token count is its masked token
+    sum, so each input's vector is the sum of its windows' token sums over
+    their total token count.
+    """
+    window_sums, window_tokens = _window_sums(hidden_state, attention_mask)
+    return _combine(window_sums, window_tokens, owners, count)
+
+
+def embed_windows(forward: Callable[[np.ndarray, np.ndarray], np.ndarray], input_ids: np.ndarray,
+                  attention_mask: np.ndarray, owners: np.ndarray, count: int,
+                  max_batch_size: int) -> np.ndarray:
+    """
+    Run windows through a model max_batch_size at a time and pool them per input
+
+    Only each window's token sum is kept between passes, so memory stays
+    bounded by one batch of hidden states however long the inputs are.
+    Each slice is cut to its own longest window before the forward pass.
+    """
+    batch_size = max(1, max_batch_size)
+    sums, tokens = [], []
+    for start in range(0, input_ids.shape[0], batch_size):
+        mask = attention_mask[start:start + batch_size]
+        seq_len = int(mask.sum(axis=1).max())
+        hidden = forward(input_ids[start:start + batch_size, :seq_len], mask[:, :seq_len])
+        window_sums, window_tokens = _window_sums(hidden, mask[:, :seq_len])
+        sums.append(window_sums)
+        tokens.append(window_tokens)
+    return _combine(np.concatenate(sums), np.concatenate(tokens), owners, count)
+
+
+def _window_sums(hidden_state: np.ndarray, attention_mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Masked token-state sum (windows, hidden) and token count (windows,) of each window"""
+    mask = attention_mask.astype(np.float32)[..., None]
+    window_sums = (hidden_state.astype(np.float32, copy=False) * mask).sum(axis=1)
+    return window_sums, mask.sum(axis=(1, 2))
+
+
+def _combine(window_sums: np.ndarray, window_tokens: np.ndarray, owners: np.ndarray, count: int) -> np.ndarray:
+    sums = np.zeros((count, window_sums.shape[1]), dtype=np.float32)
+    tokens = np.zeros(count, dtype=np.float32)
+    np.add.at(sums, owners, window_sums)
+    np.add.at(tokens, owners, window_tokens)
+
+    pooled = sums / np.maximum(tokens, 1e-9)[:, None]
+    norms = np.maximum(np.linalg.norm(pooled, axis=-1, keepdims=True), 1e-12)
+    return np.ascontiguousarray(pooled / norms, dtype=np.float32)
@@ -7,10 +7,13 @@ Uses MLX Metal GPU backend for embedding inference on Apple Silicon.
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 from loguru import logger
 
+from ..utils.tokenizer_pool import tokenizer_pool
 from .base import BaseEmbeddingModel, BaseEmbeddingModelLoader, EmbeddingError
 from .embedding_converter import EMBEDDING_MODEL_REGISTRY
+from .long_input import embed_windows, tokenize_windows
 
 MLX_AVAILABLE = False
 try:
@@ -43,7 +46,6 @@ class MLXEmbeddingModel(BaseEmbeddingModel):
         self.hf_model_id = hf_model_id
         self._hf_model = None
         self._tokenizer = None
-        self._max_seq_length = min(128, max_tokens)
 
     def load(self) -> None:
         if not MLX_AVAILABLE:
@@ -66,32 +68,20 @@ class MLXEmbeddingModel(BaseEmbeddingModel):
         logger.info(f"MLX embedding model '{self.model_name}' unloaded")
 
     def embed(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
         if not self._loaded or self._hf_model is None:
             raise EmbeddingError(f"Model '{self.model_name}' is not loaded")
 
-        import numpy as np
-
-        # Tokenize all texts in batch
-        encoded = self._tokenizer(
-            texts,
-            padding=True,
-            max_length=self._max_seq_length,
-            truncation=True,
-            return_tensors="np",
-        )
+        # Tokenize all texts in batch on the shared pool
+        encoded = tokenizer_pool.encode_padded(self._tokenizer, texts, max_length=self.max_seq_length)
 
         input_ids = encoded["input_ids"]
         attention_mask = encoded["attention_mask"]
 
         # Run forward pass through HuggingFace model, then pool via MLX on GPU
-        import torch
-
-        with torch.no_grad():
-            torch_ids = torch.from_numpy(input_ids.astype(np.int64))
-            torch_mask = torch.from_numpy(attention_mask.astype(np.int64))
-            outputs = self._hf_model(input_ids=torch_ids, attention_mask=torch_mask)
-
-        hidden_state = outputs.last_hidden_state.numpy()  # (batch, seq_len, hidden_dim)
+        hidden_state = self._hidden_states(input_ids, attention_mask)  # (batch, seq_len, hidden_dim)
         attention_float = attention_mask.astype(np.float32)
 
         # Mean pooling via MLX on GPU
@@ -106,22 +96,41 @@ class MLXEmbeddingModel(BaseEmbeddingModel):
         norms = mx.maximum(norms, mx.array(1e-12))
         normalized = pooled / norms
 
-        # Force computation and convert to Python lists
-        result = np.array(normalized)
+        # Force computation and hand back one float32 matrix
+        result = np.asarray(normalized)
+        return np.ascontiguousarray(result[:, : self.dimensions], dtype=np.float32)
+
+    def _hidden_states(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        import torch
+
+        with torch.no_grad():
+            torch_ids = torch.from_numpy(input_ids.astype(np.int64))
+            torch_mask = torch.from_numpy(attention_mask.astype(np.int64))
+            outputs = self._hf_model(input_ids=torch_ids, attention_mask=torch_mask)
+        return outputs.last_hidden_state.numpy()
+
+    def embed_long_array(self, texts: list[str], window_tokens: int, overlap_tokens: int,
+                         max_batch_size: int = 32) -> np.ndarray:
+        if not self._loaded or self._hf_model is None:
+            raise EmbeddingError(f"Model '{self.model_name}' is not loaded")
 
-        embeddings = []
-        for vec in result:
-            v = vec.tolist()
-            if len(v) > self.dimensions:
-                v = v[: self.dimensions]
-            embeddings.append(v)
+        # Windows may use the model's full context, not just the short-input cap
+        window = min(window_tokens, self.max_tokens)
+        input_ids, attention_mask, owners = tokenize_windows(self._tokenizer, texts, window, overlap_tokens)
+        pooled = embed_windows(self._hidden_states, input_ids, attention_mask, owners, len(texts), max_batch_size)
+        return np.ascontiguousarray(pooled[:, : self.dimensions])
 
-        return embeddings
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        if self._tokenizer is None:
+            return super().token_lengths(texts)
+        # Encodings land in the pool's cache, so embed() doesn't tokenize these texts again
+        encoded = tokenizer_pool.encode_batch(self._tokenizer, texts, max_length=self.max_seq_length)
+        return [len(ids) for ids in encoded]
 
     def get_info(self) -> dict[str, Any]:
         info = super().get_info()
         info["hf_model_id"] = self.hf_model_id
-        info["max_seq_length"] = self._max_seq_length
+        info["max_seq_length"] = self.max_seq_length
         return info
 
 
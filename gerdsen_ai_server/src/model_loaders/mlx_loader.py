@@ -13,9 +13,13 @@ from typing import Any
 from loguru import logger
 
 from ..config.settings import settings
+from ..inference.batch_generation import BatchCompletion, generate_batch
 from ..inference.kv_cache_manager import kv_cache_manager
+from ..inference.lora_adapters import MultiLoRAState, adapter_cache, attach_adapter_layers
+from ..services.model_index import model_dir_name, model_index, resolve_model_dir
 from ..services.model_warmup import model_warmup_service
-from ..utils.mmap_loader import mmap_loader
+from ..utils.mmap_loader import LazyTensor, mmap_loader
+from ..utils.tokenizer_pool import tokenizer_pool
 from .base import BaseModel, BaseModelLoader, InferenceError, ModelLoadError, ModelNotFoundError
 
 # MLX imports with error handling
@@ -42,6 +46,8 @@ class MLXModel(BaseModel):
         self.adapter_path = None
         self.supports_kv_cache = True
         self.model_config = None
+        # Per-request LoRA adapters applied over the resident base weights
+        self.lora_state = MultiLoRAState()
 
     def load(self, **kwargs) -> None:
         """Load MLX model into memory with optional memory mapping"""
@@ -62,18 +68,10 @@ class MLXModel(BaseModel):
                     start_time = time.time()
 
                     # Load weights with mmap
-                    weights = mmap_loader.load_model_mmap(self.model_path)
-
-                    # Still need to load model structure and tokenizer normally
-                    self.model_instance, self.tokenizer_instance = load(
-                        str(self.model_path),
-                        tokenizer_config=kwargs.get('tokenizer_config', {}),
-                        model_config=kwargs.get('model_config', {}),
-                        adapter_path=kwargs.get('adapter_path'),
-                        lazy=True,
-                        # Pass weights if MLX supports it
-                        weights=weights if 'weights' in load.__code__.co_varnames else None
+                    weights = mmap_loader.load_model_mmap(
+                        self.model_path, shared=kwargs.get('shared_weights', settings.model.shared_weight_store)
                     )
+                    self.model_instance, self.tokenizer_instance = self._build_from_weights(weights, **kwargs)
 
                     mmap_time = (time.time() - start_time) * 1000
                     logger.info(f"Memory-mapped loading completed in {mmap_time:.1f}ms")
@@ -128,6 +126,38 @@ class MLXModel(BaseModel):
             logger.error(f"Failed to load MLX model {self.model_id}: {e}")
             raise ModelLoadError(f"Failed to load model: {e}") from e
 
+    def _build_from_weights(self, weights: dict[str, Any], **kwargs) -> tuple[Any, Any]:
+        """Build the model from memory-mapped weights instead of letting mlx_lm read the files
+
+        load_model() sets up the architecture (and quantized layers) from
+        config.json. Its own lazily loaded arrays are replaced before anything
+        evaluates them, so only the mapped weights are ever read.
+        """
+        from mlx_lm.utils import load_model, load_tokenizer
+
+        model = load_model(self.model_path, lazy=True, model_config=kwargs.get('model_config', {}))
+        if isinstance(model, tuple):
+            # Newer mlx_lm returns (model, config)
+            model = model[0]
+
+        arrays = {
+            name: tensor.materialize() if isinstance(tensor, LazyTensor) else tensor
+            for name, tensor in weights.items()
+        }
+        if hasattr(model, 'sanitize'):
+            arrays = model.sanitize(arrays)
+        model.load_weights(list(arrays.items()))
+
+        adapter_path = kwargs.get('adapter_path')
+        if adapter_path:
+            from mlx_lm.tuner.utils import load_adapters
+
+            model = load_adapters(model, adapter_path)
+        model.eval()
+
+        tokenizer = load_tokenizer(self.model_path, kwargs.get('tokenizer_config', {}))
+        return model, tokenizer
+
     def unload(self) -> None:
         """Unload model from memory"""
         if self.loaded:
@@ -168,14 +198,14 @@ class MLXModel(BaseModel):
             conversation_id = kwargs.get('conversation_id', 'default')
 
             # Check context window limits
-            prompt_tokens = self.tokenize(prompt)
+            prompt_ids = tokenizer_pool.encode_prompts(self.tokenizer_instance, [prompt])[0]
             context_length = self.config.get('max_position_embeddings', 2048) if self.config else 2048
 
-            if len(prompt_tokens) > context_length:
-                raise InferenceError(f"Prompt exceeds context window ({len(prompt_tokens)} > {context_length})")
+            if len(prompt_ids) > context_length:
+                raise InferenceError(f"Prompt exceeds context window ({len(prompt_ids)} > {context_length})")
 
             # Adjust max_tokens if it would exceed context window
-            available_tokens = context_length - len(prompt_tokens)
+            available_tokens = context_length - len(prompt_ids)
             if max_tokens > available_tokens:
                 logger.warning(f"Reducing max_tokens from {max_tokens} to {available_tokens} to fit context window")
                 max_tokens = available_tokens
@@ -190,13 +220,18 @@ class MLXModel(BaseModel):
             # Generate response
             # Note: The actual KV cache integration would require modifying the mlx_lm.generate function
             # or using a custom generation loop. For now, we use the standard generation.
-            response = generate(
-                self.model_instance,
-                self.tokenizer_instance,
-                prompt=prompt,
-                max_tokens=max_tokens,
-                verbose=False
-            )
+            self.lora_state.set_rows(self.resolve_adapters([kwargs.get('adapter')]))
+            try:
+                # Pass token ids so mlx_lm doesn't tokenize the prompt again
+                response = generate(
+                    self.model_instance,
+                    self.tokenizer_instance,
+                    prompt=prompt_ids,
+                    max_tokens=max_tokens,
+                    verbose=False
+                )
+            finally:
+                self.lora_state.clear()
 
             # Update cache if needed (placeholder for now)
             if use_cache and self.supports_kv_cache and kv_cache_manager.enabled:
@@ -234,7 +269,8 @@ class MLXModel(BaseModel):
 
             # Fallback: Generate in chunks for a streaming-like experience
             # This is more efficient than generating the full response at once
-            self.tokenize(prompt)
+            prompt_ids = tokenizer_pool.encode_prompts(self.tokenizer_instance, [prompt])[0]
+            adapters = self.resolve_adapters([kwargs.get('adapter')])
             previous_text = ""
 
             # Generate tokens in small batches
@@ -243,13 +279,17 @@ class MLXModel(BaseModel):
                 current_max = min(i + batch_size, max_tokens)
 
                 # Generate up to current_max tokens
-                response = generate(
-                    self.model_instance,
-                    self.tokenizer_instance,
-                    prompt=prompt,
-                    max_tokens=current_max,
-                    verbose=False
-                )
+                self.lora_state.set_rows(adapters)
+                try:
+                    response = generate(
+                        self.model_instance,
+                        self.tokenizer_instance,
+                        prompt=prompt_ids,
+                        max_tokens=current_max,
+                        verbose=False
+                    )
+                finally:
+                    self.lora_state.clear()
 
                 # Extract only the new tokens
                 if response.startswith(previous_text):
@@ -272,12 +312,53 @@ class MLXModel(BaseModel):
             logger.error(f"Streaming generation error: {e}")
             raise InferenceError(f"Failed to generate text stream: {e}") from e
 
+    def generate_batch(self, prompts: list[str], **kwargs) -> list[BatchCompletion]:
+        """Generate completions for several prompts in one batched job"""
+        if not self.loaded:
+            raise InferenceError("Model is not loaded")
+
+        try:
+            adapter_names = kwargs.get('adapters') or [None] * len(prompts)
+            return generate_batch(
+                self.model_instance,
+                self.tokenizer_instance,
+                prompts,
+                max_tokens=kwargs.get('max_tokens', settings.inference.max_tokens),
+                temperature=kwargs.get('temperature', settings.inference.temperature),
+                top_p=kwargs.get('top_p', settings.inference.top_p),
+                max_batch_size=settings.inference.max_completion_batch_size,
+                adapters=self.resolve_adapters(adapter_names),
+                lora_state=self.lora_state,
+            )
+        except Exception as e:
+            logger.error(f"Batched generation error: {e}")
+            raise InferenceError(f"Failed to generate batch: {e}") from e
+
+    def resolve_adapters(self, names: list[str | None]) -> list:
+        """
+        Fetch adapters from the shared cache and wrap the layers they target
+
+        Only the wrapping takes the state lock. A wrapped layer adds nothing
+        for rows without its adapter, so generations already running on
+        other threads are unaffected.
+        """
+        adapters = []
+        for name in names:
+            if name is None:
+                adapters.append(None)
+                continue
+            adapter = adapter_cache.get(name)
+            with self.lora_state.lock:
+                attach_adapter_layers(self.model_instance, adapter, self.lora_state)
+            adapters.append(adapter)
+        return adapters
+
     def tokenize(self, text: str) -> list[int]:
         """Tokenize text"""
         if not self.loaded or not self.tokenizer_instance:
             raise InferenceError("Model or tokenizer not loaded")
 
-        return self.tokenizer_instance.encode(text)
+        return tokenizer_pool.encode(self.tokenizer_instance, text).tolist()
 
     def detokenize(self, tokens: list[int]) -> str:
         """Detokenize tokens"""
@@ -331,13 +412,11 @@ class MLXModelLoader(BaseModelLoader):
             logger.info(f"Model {model_id} is already loaded")
             return self.loaded_models[model_id]
 
-        # Determine model path
-        if '/' in model_id:
-            # HuggingFace model ID
-            model_path = settings.model.models_dir / model_id.replace('/', '_')
-        else:
-            # Local model
-            model_path = settings.model.models_dir / model_id
+        # Determine model path; HuggingFace IDs are stored as org_name
+        try:
+            model_path = resolve_model_dir(settings.model.models_dir, model_id)
+        except ValueError as e:
+            raise ModelNotFoundError(str(e)) from e
 
         # Create model instance
         model = MLXModel(model_id, model_path)
@@ -387,23 +466,19 @@ class MLXModelLoader(BaseModelLoader):
         models = []
 
         # Check local models directory
-        if settings.model.models_dir.exists():
-            for model_dir in settings.model.models_dir.iterdir():
-                if model_dir.is_dir() and (model_dir / "config.json").exists():
-                    try:
-                        with open(model_dir / "config.json") as f:
-                            config = json.load(f)
-
-                        models.append({
-                            'id': model_dir.name,
-                            'name': config.get('name', model_dir.name),
-                            'type': 'mlx',
-                            'path': str(model_dir),
-                            'loaded': self.is_model_loaded(model_dir.name),
-                            'size_gb': sum(f.stat().st_size for f in model_dir.rglob('*') if f.is_file()) / (1024 ** 3)
-                        })
-                    except Exception as e:
-                        logger.error(f"Error reading model config for {model_dir}: {e}")
+        for entry in model_index.entries(settings.model.models_dir):
+            if entry.config is None:
+                continue
+            models.append({
+                'id': entry.model_id,
+                'name': entry.name,
+                'type': 'mlx',
+                'path': entry.path,
+                'loaded': self.is_model_loaded(entry.model_id),
+                'size_gb': entry.size_gb,
+                'tensor_count': entry.tensor_count,
+                'parameter_count': entry.parameter_count,
+            })
 
         # Add loaded HuggingFace models
         for model_id, _model in self.loaded_models.items():
@@ -440,20 +515,20 @@ class MLXModelLoader(BaseModelLoader):
             return info
 
         # Check if model exists locally
-        model_path = settings.model.models_dir / model_id
-        if model_path.exists() and (model_path / "config.json").exists():
-            try:
-                with open(model_path / "config.json") as f:
-                    config = json.load(f)
-
-                return {
-                    'model_id': model_id,
-                    'model_path': str(model_path),
-                    'loaded': False,
-                    'config': config,
-                    'size_gb': sum(f.stat().st_size for f in model_path.rglob('*') if f.is_file()) / (1024 ** 3)
-                }
-            except Exception as e:
-                logger.error(f"Error reading model info for {model_id}: {e}")
+        try:
+            entry = model_index.get(settings.model.models_dir, model_dir_name(model_id))
+        except ValueError as e:
+            raise ModelNotFoundError(str(e)) from e
+        if entry is not None and entry.config is not None:
+            return {
+                'model_id': model_id,
+                'model_path': entry.path,
+                'loaded': False,
+                'config': entry.config,
+                'size_gb': entry.size_gb,
+                'tensor_count': entry.tensor_count,
+                'parameter_count': entry.parameter_count,
+                'bytes_by_dtype': entry.bytes_by_dtype,
+            }
 
         raise ModelNotFoundError(f"Model {model_id} not found")
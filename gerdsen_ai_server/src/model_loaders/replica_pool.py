@@ -0,0 +1,124 @@
+"""
+Embedding model replicas for multi-core scaling
+
+With one model instance, the micro-batcher runs one pass at a time for it
+and the pre- and post-processing around each pass tops out at one core. A
+ReplicatedEmbeddingModel holds N independently loaded instances of the same
+model and sends every call to the replica with the fewest texts in flight,
+so N batches run at once. The PyTorch forward pass releases the GIL, and
+the CPU loader splits torch's intra-op threads between the replicas.
+"""
+
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import numpy as np
+import psutil
+
+from .base import BaseEmbeddingModel
+
+# Leave room for activations, the vector cache and the rest of the server
+REPLICA_MEMORY_FRACTION = 0.25
+MIN_THREADS_PER_REPLICA = 2
+MAX_REPLICAS = 8
+
+
+def choose_replica_count(params_millions: float, bytes_per_param: int = 4, cpu_cores: int | None = None,
+                         available_bytes: int | None = None) -> int:
+    """
+    Replica count for a model from core count and model size
+
+    Each replica gets at least MIN_THREADS_PER_REPLICA cores, and all replicas
+    together may use at most REPLICA_MEMORY_FRACTION of available memory.
+    """
+    cores = cpu_cores or os.cpu_count() or 1
+    if available_bytes is None:
+        available_bytes = psutil.virtual_memory().available
+    model_bytes = max(1, int(params_millions * 1_000_000 * bytes_per_param))
+
+    by_cores = cores // MIN_THREADS_PER_REPLICA
+    by_memory = int(available_bytes * REPLICA_MEMORY_FRACTION // model_bytes)
+    return max(1, min(by_cores, by_memory, MAX_REPLICAS))
+
+
+class ReplicatedEmbeddingModel(BaseEmbeddingModel):
+    """Least-loaded routing over several instances of one embedding model"""
+
+    def __init__(self, replicas: list[BaseEmbeddingModel]):
+        if not replicas:
+            raise ValueError("At least one replica is required")
+        primary = replicas[0]
+        super().__init__(primary.model_name, primary.model_path, primary.dimensions, primary.max_tokens,
+                         primary.device)
+        self.pads_to_longest = primary.pads_to_longest
+        self.replicas = replicas
+        self._lock = threading.Lock()
+        self._in_flight = [0] * len(replicas)
+        self._calls = [0] * len(replicas)
+        self._texts = [0] * len(replicas)
+        self._loaded = True
+
+    @property
+    def replica_count(self) -> int:
+        return len(self.replicas)
+
+    @contextmanager
+    def _acquire(self, count: int) -> Iterator[BaseEmbeddingModel]:
+        with self._lock:
+            index = min(range(len(self.replicas)), key=self._in_flight.__getitem__)
+            self._in_flight[index] += count
+            self._calls[index] += 1
+            self._texts[index] += count
+        try:
+            yield self.replicas[index]
+        finally:
+            with self._lock:
+                self._in_flight[index] -= count
+
+    def _call(self, texts: list[str], method: Callable[[BaseEmbeddingModel], Any]) -> Any:
+        with self._acquire(len(texts)) as replica:
+            return method(replica)
+
+    def load(self) -> None:
+        for replica in self.replicas:
+            if not replica.is_loaded:
+                replica.load()
+        self._loaded = True
+
+    def unload(self) -> None:
+        # The first replica belongs to the loader, which unloads it itself
+        for replica in self.replicas[1:]:
+            replica.unload()
+        self._loaded = False
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        return self._call(texts, lambda replica: replica.embed(texts))
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        return self._call(texts, lambda replica: replica.embed_array(texts))
+
+    def embed_long_array(self, texts: list[str], window_tokens: int, overlap_tokens: int,
+                         max_batch_size: int = 32) -> np.ndarray:
+        return self._call(texts, lambda replica: replica.embed_long_array(texts, window_tokens, overlap_tokens,
+                                                                          max_batch_size))
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        return self._call(texts, lambda replica: replica.token_lengths(texts))
+
+    def get_stats(self) -> dict[str, Any]:
+        """Per-replica load counters"""
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "in_flight_texts": list(self._in_flight),
+                "calls": list(self._calls),
+                "texts": list(self._texts),
+            }
+
+    def get_info(self) -> dict[str, Any]:
+        info = self.replicas[0].get_info()
+        info["replicas"] = len(self.replicas)
+        return info
@@ -0,0 +1,182 @@
+"""
+Work-stealing execution of one embedding job across several backends
+
+Machines with more than one usable backend (Core ML on the ANE, MLX on the
+GPU, PyTorch on the CPU) can run them side by side during bulk ingestion.
+A job is cut into chunks that are dealt out to per-backend queues in
+proportion to each backend's measured throughput. A backend that drains
+its own queue steals from the back of the fullest remaining queue, so a
+mis-estimated backend never holds the job up. Chunk results are merged by
+position, so output rows match input order.
+
+A backend that raises hands its chunk back to the others and sits out for
+a cool-down period; the job only fails when every backend has failed.
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from .base import EmbeddingError
+
+EmbedFn = Callable[[list[str]], np.ndarray]
+
+
+class WorkStealingExecutor:
+    """Runs embedding jobs across several backends, balancing by measured throughput"""
+
+    def __init__(self, chunk_size: int, retry_after_s: float = 30.0, smoothing: float = 0.3):
+        """
+        Args:
+            chunk_size: Texts per chunk (the unit of work a backend takes or steals).
+            retry_after_s: How long a backend that raised is left out of new jobs.
+            smoothing: Weight of the newest sample in the throughput moving average.
+        """
+        self.chunk_size = max(1, chunk_size)
+        self.retry_after_s = retry_after_s
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._throughput: dict[str, float] = {}  # texts/s, exponentially smoothed
+        self._failed_at: dict[str, float] = {}
+        self._stats: dict[str, dict[str, Any]] = {}
+        self._jobs = 0
+
+    def plan(self, devices: list[str], chunks: int) -> dict[str, int]:
+        """Number of chunks initially dealt to each device, proportional to its throughput.
+
+        Devices that have not been measured yet are assumed to match the mean
+        of the measured ones (or each other, before any measurement).
+        """
+        with self._lock:
+            known = [self._throughput[d] for d in devices if d in self._throughput]
+            default = sum(known) / len(known) if known else 1.0
+            weights = {d: self._throughput.get(d, default) for d in devices}
+
+        total = sum(weights.values())
+        exact = {d: chunks * w / total for d, w in weights.items()}
+        shares = {d: int(share) for d, share in exact.items()}
+        # Hand out the remainder by largest fractional part
+        leftover = chunks - sum(shares.values())
+        for d in sorted(devices, key=lambda d: exact[d] - shares[d], reverse=True)[:leftover]:
+            shares[d] += 1
+        return shares
+
+    def run(self, texts: list[str], backends: dict[str, EmbedFn]) -> np.ndarray:
+        """Embed texts across the given backends; rows come back in input order.
+
+        Raises:
+            EmbeddingError: If every backend failed.
+        """
+        if not texts:
+            raise ValueError("No texts to embed")
+        devices = self._healthy(list(backends))
+        spans = [(start, min(start + self.chunk_size, len(texts))) for start in range(0, len(texts), self.chunk_size)]
+        results: list[np.ndarray | None] = [None] * len(spans)
+        pending = list(range(len(spans)))
+        errors: dict[str, Exception] = {}
+
+        with self._lock:
+            self._jobs += 1
+
+        # Rounds only repeat when a failing backend handed back chunks after
+        # the others had already finished
+        while pending:
+            live = [d for d in devices if d not in errors]
+            if not live:
+                summary = "; ".join(f"{d}: {e}" for d, e in errors.items())
+                raise EmbeddingError(f"All embedding backends failed: {summary}")
+            self._run_round(texts, spans, pending, live, backends, results, errors)
+            pending = [i for i, result in enumerate(results) if result is None]
+
+        return np.concatenate(results) if len(results) > 1 else results[0]
+
+    def _run_round(self, texts: list[str], spans: list[tuple[int, int]], pending: list[int], devices: list[str],
+                   backends: dict[str, EmbedFn], results: list[np.ndarray | None],
+                   errors: dict[str, Exception]) -> None:
+        shares = self.plan(devices, len(pending))
+        queues: dict[str, deque[int]] = {}
+        position = 0
+        for device in devices:
+            queues[device] = deque(pending[position : position + shares[device]])
+            position += shares[device]
+        queue_lock = threading.Lock()
+
+        def take(device: str) -> tuple[int, bool] | None:
+            with queue_lock:
+                if queues[device]:
+                    return queues[device].popleft(), False
+                victim = max(queues, key=lambda d: len(queues[d]))
+                if not queues[victim]:
+                    return None
+                return queues[victim].pop(), True
+
+        def work(device: str) -> None:
+            while (task := take(device)) is not None:
+                index, stolen = task
+                start, end = spans[index]
+                started = time.perf_counter()
+                try:
+                    vectors = backends[device](texts[start:end])
+                except Exception as e:
+                    logger.warning(f"Embedding backend '{device}' failed, handing its work to the others: {e}")
+                    with queue_lock:
+                        # Leave it where any surviving backend can steal it
+                        queues[device].appendleft(index)
+                        errors[device] = e
+                    self._record_failure(device)
+                    return
+                results[index] = vectors
+                self._record_chunk(device, end - start, time.perf_counter() - started, stolen)
+
+        if len(devices) == 1:
+            work(devices[0])
+            return
+        with ThreadPoolExecutor(max_workers=len(devices), thread_name_prefix="embed-backend") as pool:
+            for future in [pool.submit(work, device) for device in devices]:
+                future.result()
+
+    def _healthy(self, devices: list[str]) -> list[str]:
+        """Devices not cooling down after a failure (all of them if every one is)."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [d for d in devices if now - self._failed_at.get(d, -np.inf) >= self.retry_after_s]
+        return healthy or devices
+
+    def _device_stats(self, device: str) -> dict[str, Any]:
+        return self._stats.setdefault(device, {"chunks": 0, "texts": 0, "steals": 0, "errors": 0, "busy_s": 0.0})
+
+    def _record_chunk(self, device: str, count: int, elapsed: float, stolen: bool) -> None:
+        rate = count / max(elapsed, 1e-6)
+        with self._lock:
+            previous = self._throughput.get(device)
+            self._throughput[device] = rate if previous is None else (
+                self.smoothing * rate + (1 - self.smoothing) * previous
+            )
+            stats = self._device_stats(device)
+            stats["chunks"] += 1
+            stats["texts"] += count
+            stats["steals"] += int(stolen)
+            stats["busy_s"] += elapsed
+
+    def _record_failure(self, device: str) -> None:
+        with self._lock:
+            self._failed_at[device] = time.monotonic()
+            self._device_stats(device)["errors"] += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Per-backend throughput estimates and work counters"""
+        now = time.monotonic()
+        with self._lock:
+            backends = {}
+            for device in sorted(set(self._stats) | set(self._throughput)):
+                stats = dict(self._device_stats(device))
+                stats["throughput_texts_per_s"] = self._throughput.get(device)
+                stats["cooling_down"] = now - self._failed_at.get(device, -np.inf) < self.retry_after_s
+                backends[device] = stats
+            return {"jobs": self._jobs, "chunk_size": self.chunk_size, "backends": backends}
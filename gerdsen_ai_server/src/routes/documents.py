@@ -2,18 +2,26 @@
 Document management endpoints — ingest, search, and collection CRUD.
 """
 
-from flask import Blueprint, jsonify
+import contextlib
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from loguru import logger
+from pydantic import ValidationError
 
 from ..schemas.openai_schemas import (
+    BulkIngestRequest,
     DocumentIngestRequest,
     DocumentSearchRequest,
 )
 from ..services.vector_store import vector_store_service
+from ..utils.fast_json import dumps
 from ..utils.validation import validate_json
 
 bp = Blueprint("documents", __name__)
 
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+
 
 @bp.route("/ingest", methods=["POST"])
 @validate_json(DocumentIngestRequest)
@@ -34,6 +42,75 @@ def ingest_document(validated_data: DocumentIngestRequest):
         return jsonify({"error": {"message": str(e), "type": "server_error"}}), 500
 
 
+@bp.route("/ingest/bulk", methods=["POST"])
+def ingest_bulk():
+    """Stream many documents through the chunk/embed/write pipeline.
+
+    Either an NDJSON body (one {"text", "source", "metadata"} object per
+    line, options as query parameters, with metadata for every document as
+    a JSON object in ?metadata=) or a JSON body with a "path" under
+    IMPETUS_INGEST_ROOT. Responds with NDJSON progress events ending in a
+    "done" summary.
+    """
+    from ..services.bulk_ingest import (
+        BulkIngestPipeline,
+        IngestError,
+        iter_path_documents,
+        parse_ndjson,
+        resolve_ingest_path,
+    )
+
+    ndjson = request.mimetype in NDJSON_MIMETYPES
+    if ndjson:
+        params = request.args.to_dict()
+        if "metadata" in params:
+            # Left as a string when it isn't JSON, so validation reports it
+            with contextlib.suppress(ValueError):
+                params["metadata"] = json.loads(params["metadata"])
+    else:
+        params = request.get_json(silent=True) or {}
+    try:
+        options = BulkIngestRequest(**params)
+    except ValidationError as e:
+        errors = [f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors()]
+        return jsonify({"error": "Invalid request data", "type": "validation_error", "details": errors}), 400
+
+    if ndjson:
+        documents = parse_ndjson(request.stream)
+    elif options.path:
+        try:
+            root, target = resolve_ingest_path(options.path)
+        except IngestError as e:
+            return jsonify({"error": {"message": str(e), "type": "invalid_request_error"}}), 400
+        documents = iter_path_documents(root, target)
+    else:
+        return jsonify({"error": {
+            "message": "Send an NDJSON body (Content-Type: application/x-ndjson) or a JSON body with a 'path'",
+            "type": "invalid_request_error",
+        }}), 400
+
+    pipeline = BulkIngestPipeline(
+        vector_store_service,
+        collection_name=options.collection,
+        metadata=options.metadata,
+        chunk_size=options.chunk_size,
+        chunk_overlap=options.chunk_overlap,
+    )
+
+    def generate():
+        try:
+            for event in pipeline.run(documents):
+                yield dumps(event) + b"\n"
+        except Exception as e:
+            logger.error(f"Bulk ingest error: {e}")
+            yield dumps({"event": "error", "stage": "pipeline", "source": None, "message": str(e)}) + b"\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @bp.route("/search", methods=["POST"])
 @validate_json(DocumentSearchRequest)
 def search_documents(validated_data: DocumentSearchRequest):
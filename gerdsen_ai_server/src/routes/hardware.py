@@ -2,6 +2,8 @@
 Hardware monitoring and optimization endpoints
 """
 
+from dataclasses import asdict
+
 import psutil
 from flask import Blueprint, current_app, jsonify
 from loguru import logger
@@ -247,6 +249,66 @@ def compute_capabilities():
         return jsonify({'error': 'Failed to get compute capabilities'}), 500
 
 
+@bp.route('/compute/embedding-cache', methods=['GET', 'DELETE'])
+def embedding_cache():
+    """Embedding vector cache hit rates; DELETE clears it (optionally ?model=<name>)"""
+    from flask import request
+
+    from ..model_loaders.compute_dispatcher import compute_dispatcher
+
+    try:
+        if request.method == 'DELETE':
+            compute_dispatcher.clear_embedding_cache(request.args.get('model'))
+        return jsonify(compute_dispatcher.get_embedding_cache_stats())
+    except Exception as e:
+        logger.error(f"Error accessing embedding cache: {e}")
+        return jsonify({'error': 'Failed to access embedding cache'}), 500
+
+
+@bp.route('/compute/benchmark', methods=['POST'])
+def benchmark_compute():
+    """Benchmark an embedding model on the active backend and store the result"""
+    from flask import request
+
+    from ..model_loaders.compute_dispatcher import compute_dispatcher
+    from ..services.benchmark_service import benchmark_service
+
+    data = request.get_json(silent=True) or {}
+    model_name = data.get('model') or settings.compute.default_embedding_model
+    texts = data.get('texts')
+    try:
+        iterations = max(1, min(int(data.get('iterations', 10)), 100))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'iterations must be an integer'}), 400
+    if texts is not None and not (isinstance(texts, list) and all(isinstance(t, str) for t in texts)):
+        return jsonify({'error': 'texts must be a list of strings'}), 400
+
+    try:
+        result = benchmark_service.benchmark_embedding_model(model_name, texts, iterations)
+        return jsonify({
+            'result': asdict(result),
+            'capabilities': {
+                'active_device': compute_dispatcher.get_active_device(),
+                'cpu_embedding': compute_dispatcher.get_capabilities()['cpu_embedding'],
+            },
+        })
+    except Exception as e:
+        logger.error(f"Embedding benchmark failed: {e}")
+        return jsonify({'error': 'Embedding benchmark failed', 'message': str(e)}), 500
+
+
+@bp.route('/compute/benchmark/history', methods=['GET'])
+def compute_benchmark_history():
+    """Stored embedding benchmark runs (?device=ane|gpu|cpu)"""
+    from flask import request
+
+    from ..services.benchmark_service import benchmark_service
+
+    device = request.args.get('device')
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'runs': benchmark_service.get_embedding_history(device, limit)})
+
+
 @bp.route('/gpu/metrics', methods=['GET'])
 def gpu_metrics():
     """Get detailed GPU/Metal metrics"""
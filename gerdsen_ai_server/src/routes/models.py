@@ -10,13 +10,18 @@ from loguru import logger
 
 from ..config.settings import settings
 from ..inference.kv_cache_manager import kv_cache_manager
+from ..inference.lora_adapters import adapter_cache
 from ..services.benchmark_service import benchmark_service
 from ..services.download_manager import download_manager
+from ..services.memory_estimator import memory_estimator
 from ..services.model_discovery import ModelCategory, ModelDiscoveryService
+from ..services.model_index import model_dir_name, model_index, resolve_model_dir
+from ..services.model_optimizer import OptimizationError, OptimizationStatus, model_optimizer
 from ..services.model_warmup import model_warmup_service
 from ..utils.error_recovery import ErrorType, with_error_recovery
 from ..utils.error_responses import ErrorResponse, handle_error
 from ..utils.mmap_loader import mmap_loader
+from ..utils.weight_store import weight_store
 
 bp = Blueprint("models", __name__)
 
@@ -40,22 +45,22 @@ def _load_model_internal(model_id: str, app_state: dict) -> dict:
     memory = psutil.virtual_memory()
     available_gb = memory.available / (1024**3)
 
-    # Estimate required memory from model directory size on disk
-    model_dir = settings.model.models_dir / model_id
-    if model_dir.exists():
-        total_bytes = sum(f.stat().st_size for f in model_dir.rglob("*") if f.is_file())
-        # MLX models need ~1.2x disk size in RAM
-        required_gb = (total_bytes / (1024**3)) * 1.2
-    else:
-        required_gb = 4.0  # conservative default
+    try:
+        dir_name = model_dir_name(model_id)
+    except ValueError as e:
+        return {"error": "Invalid model id", "message": str(e), "status_code": 400}
+
+    # Weights from checkpoint headers + projected KV cache + measured runtime overhead
+    entry = model_index.get(settings.model.models_dir, dir_name)
+    estimate = memory_estimator.estimate(model_id, entry)
 
-    # Use available memory with a 2GB safety buffer
-    if available_gb < required_gb + 2.0:
-        error_resp = ErrorResponse.insufficient_memory(required_gb, available_gb)
+    if not memory_estimator.admit(estimate, memory.available):
+        error_resp = ErrorResponse.insufficient_memory(estimate.required_gb, available_gb)
         return {
             "error": error_resp[0].json["error"],
             "message": error_resp[0].json["message"],
             "status_code": error_resp[1],
+            "memory_estimate": estimate.to_dict(),
         }
 
     # Check if we need to unload models
@@ -71,11 +76,14 @@ def _load_model_internal(model_id: str, app_state: dict) -> dict:
         from ..model_loaders.mlx_loader import MLXModelLoader
 
         # Create loader and load model
+        process = psutil.Process()
+        rss_before = process.memory_info().rss
         loader = MLXModelLoader()
         model = loader.load_model(model_id)
 
         # Store in app state
         loaded_models[model_id] = model
+        memory_estimator.record_load(estimate, process.memory_info().rss - rss_before)
 
         logger.info(f"Successfully loaded model: {model_id}")
 
@@ -84,6 +92,7 @@ def _load_model_internal(model_id: str, app_state: dict) -> dict:
             "model_id": model_id,
             "message": "Model loaded successfully",
             "memory_used_gb": psutil.virtual_memory().used / (1024**3),
+            "memory_estimate": estimate.to_dict(),
         }
 
     except Exception as e:
@@ -101,36 +110,27 @@ def get_available_models() -> list[dict]:
     models = []
     models_dir = settings.model.models_dir
 
-    if models_dir.exists():
-        # Look for model directories
-        for model_path in models_dir.iterdir():
-            if model_path.is_dir():
-                # Check for common model files
-                model_info = {
-                    "id": model_path.name,
-                    "name": model_path.name,
-                    "path": str(model_path),
-                    "size_gb": 0,
-                    "format": "unknown",
-                    "loaded": False,
-                }
+    # Sizes, formats and configs come from the persistent index; only changed
+    # directories are rescanned
+    for entry in model_index.entries(models_dir):
+        size_gb = 0
+        if entry.format == "mlx":
+            size_gb = entry.size_gb
+        elif entry.format == "gguf":
+            size_gb = entry.gguf_size_bytes / (1024**3)
 
-                # Check for MLX format
-                if (model_path / "config.json").exists():
-                    model_info["format"] = "mlx"
-                    # Calculate total size
-                    total_size = sum(
-                        f.stat().st_size for f in model_path.rglob("*") if f.is_file()
-                    )
-                    model_info["size_gb"] = total_size / (1024**3)
-
-                # Check for GGUF format
-                gguf_files = list(model_path.glob("*.gguf"))
-                if gguf_files:
-                    model_info["format"] = "gguf"
-                    model_info["size_gb"] = gguf_files[0].stat().st_size / (1024**3)
-
-                models.append(model_info)
+        models.append(
+            {
+                "id": entry.model_id,
+                "name": entry.model_id,
+                "path": entry.path,
+                "size_gb": size_gb,
+                "format": entry.format,
+                "loaded": False,
+                "tensor_count": entry.tensor_count,
+                "parameter_count": entry.parameter_count,
+            }
+        )
 
     # Add loaded models
     app_state = current_app.config.get("app_state", {})
@@ -264,10 +264,10 @@ def load_model():
         # Return appropriate response based on result
         if "error" in result:
             status_code = result.get("status_code", 500)
-            return (
-                jsonify({"error": result["error"], "message": result["message"]}),
-                status_code,
-            )
+            body = {"error": result["error"], "message": result["message"]}
+            if "memory_estimate" in result:
+                body["memory_estimate"] = result["memory_estimate"]
+            return jsonify(body), status_code
         else:
             return jsonify(result)
 
@@ -497,28 +497,67 @@ def download_model():
 
 @bp.route("/optimize", methods=["POST"])
 def optimize_model():
-    """Optimize a model for Apple Silicon"""
-    data = request.get_json()
+    """Quantize a local model to 4/8-bit in the background"""
+    data = request.get_json() or {}
     model_id = data.get("model_id")
-    data.get("type", "quantize")  # quantize, compile, etc.
+    optimization_type = data.get("type", "quantize")
 
     if not model_id:
         return jsonify({"error": "model_id is required"}), 400
+    if optimization_type != "quantize":
+        return jsonify({"error": f"Unsupported optimization type: {optimization_type}"}), 400
+
+    try:
+        job_id = model_optimizer.create_job(
+            model_id,
+            bits=int(data.get("bits", 4)),
+            group_size=int(data.get("group_size", 64)),
+            output_id=data.get("output_id"),
+        )
+    except (OptimizationError, ValueError) as e:
+        return jsonify({"error": "Invalid optimization request", "message": str(e)}), 400
+
+    from threading import Thread
+
+    app = current_app._get_current_object()
 
-    # TODO: Implement model optimization
-    # This would use MLX optimization techniques
+    # Progress goes to the same per-task rooms clients join for downloads
+    def progress_callback(job):
+        with app.app_context():
+            socketio = app.config.get("app_state", {}).get("socketio")
+            if socketio:
+                finished = job.status in (OptimizationStatus.COMPLETED, OptimizationStatus.FAILED)
+                socketio.emit(
+                    "optimization_complete" if finished else "optimization_progress",
+                    job.to_dict(),
+                    room=f"download_{job.job_id}",
+                )
+
+    model_optimizer.register_progress_callback(job_id, progress_callback)
+    Thread(target=model_optimizer.run_job, args=(job_id,), daemon=True).start()
 
     return (
         jsonify(
             {
-                "error": "Not implemented",
-                "message": "Model optimization will be implemented in the next phase",
+                "status": "started",
+                "job_id": job_id,
+                "job": model_optimizer.get_job(job_id).to_dict(),
+                "message": f"Subscribe to download room {job_id} for progress",
             }
         ),
-        501,
+        202,
     )
 
 
+@bp.route("/optimize/<job_id>", methods=["GET"])
+def get_optimization_status(job_id):
+    """Status and final size/accuracy report of a quantization job"""
+    job = model_optimizer.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Optimization job not found"}), 404
+    return jsonify(job.to_dict())
+
+
 @bp.route("/discover", methods=["GET"])
 def discover_models():
     """Discover available models from curated list"""
@@ -837,6 +876,16 @@ def get_cache_status():
     return jsonify(stats)
 
 
+@bp.route("/adapters", methods=["GET"])
+def list_adapters():
+    """List LoRA adapters on disk and the adapter cache state"""
+    return jsonify({
+        "adapters_dir": str(adapter_cache.adapters_dir),
+        "available": adapter_cache.list_available(),
+        "cache": adapter_cache.get_stats(),
+    })
+
+
 @bp.route("/cache/clear", methods=["POST"])
 def clear_cache():
     """Clear KV cache for specific conversation or all"""
@@ -1024,7 +1073,7 @@ def benchmark_cold_vs_warm(model_id: str):
 
 @bp.route("/mmap/benchmark", methods=["POST"])
 def benchmark_mmap_loading():
-    """Benchmark memory-mapped loading vs regular loading"""
+    """Benchmark memory-mapped loading vs regular loading in the background"""
     data = request.get_json() or {}
     model_path = data.get("model_path")
 
@@ -1061,30 +1110,56 @@ def benchmark_mmap_loading():
             404,
         )
 
-    try:
-        # Run benchmark
+    from threading import Thread
+
+    # A full benchmark reads the model several times, so it runs outside the request
+    def run_benchmark():
         results = mmap_loader.benchmark_load_time(model_path)
+        results.update(mmap_loader.get_memory_usage())
+        results["recommendation"] = "Use mmap" if results.get("speedup", 0) > 1.2 else "Regular loading is fine"
+        return results
 
-        # Add memory usage info
-        memory_stats = mmap_loader.get_memory_usage()
-        results.update(memory_stats)
+    app = current_app._get_current_object()
+    job = benchmark_service.create_load_job(str(model_path))
 
-        return jsonify(
+    def run_job():
+        benchmark_service.run_load_job(job.job_id, run_benchmark)
+        with app.app_context():
+            socketio = app.config.get("app_state", {}).get("socketio")
+            if socketio:
+                socketio.emit("mmap_benchmark_complete", job.to_dict(), room=f"download_{job.job_id}")
+
+    Thread(target=run_job, daemon=True).start()
+
+    return (
+        jsonify(
             {
-                "status": "success",
-                "model_path": str(model_path),
-                "results": results,
-                "recommendation": (
-                    "Use mmap"
-                    if results.get("speedup", 0) > 1.2
-                    else "Regular loading is fine"
-                ),
+                "status": "started",
+                "job_id": job.job_id,
+                "job": job.to_dict(),
+                "message": f"Poll /api/models/mmap/benchmark/{job.job_id} or subscribe to download room {job.job_id}",
             }
-        )
+        ),
+        202,
+    )
+
+
+@bp.route("/mmap/benchmark/<job_id>", methods=["GET"])
+def get_mmap_benchmark(job_id):
+    """Status and results of a background load benchmark"""
+    job = benchmark_service.get_load_job(job_id)
+    if not job:
+        return jsonify({"error": "Benchmark job not found"}), 404
+    return jsonify(job.to_dict())
 
-    except Exception as e:
-        logger.error(f"Memory map benchmark failed: {e}")
-        return jsonify({"error": "Benchmark failed", "message": str(e)}), 500
+
+@bp.route("/mmap/benchmark/history", methods=["GET"])
+def get_mmap_benchmark_history():
+    """Get stored model load benchmark runs"""
+    model_path = request.args.get("model_path")
+    limit = request.args.get("limit", 50, type=int)
+
+    return jsonify({"runs": benchmark_service.get_load_history(model_path, limit)})
 
 
 @bp.route("/mmap/status", methods=["GET"])
@@ -1096,6 +1171,97 @@ def get_mmap_status():
         {
             "enabled": True,
             "stats": stats,
-            "supported_formats": ["safetensors", "numpy", "pytorch"],
+            "memory": mmap_loader.get_sharing_stats(),
+            "weight_stores": weight_store.list_stores(),
+            "shared_weight_store": settings.model.shared_weight_store,
+            "supported_formats": ["safetensors", "gguf", "numpy", "pytorch"],
         }
     )
+
+
+@bp.route("/mmap/store/<path:model_id>", methods=["POST"])
+def build_weight_store(model_id):
+    """Convert a local model into the shared page-aligned weight store in the background"""
+    try:
+        model_path = resolve_model_dir(settings.model.models_dir, model_id)
+    except ValueError as e:
+        return jsonify({"error": "Invalid model id", "message": str(e)}), 400
+    if not model_path.is_dir():
+        return jsonify({"error": "Model not found", "message": f"Model {model_id} not found locally"}), 404
+
+    from threading import Thread
+
+    # Conversion copies the whole checkpoint into the blob, so it runs outside the request
+    app = current_app._get_current_object()
+    job = weight_store.create_job(model_path)
+
+    def run_job():
+        weight_store.run_job(job.job_id)
+        with app.app_context():
+            socketio = app.config.get("app_state", {}).get("socketio")
+            if socketio:
+                socketio.emit("weight_store_complete", job.to_dict(), room=f"download_{job.job_id}")
+
+    Thread(target=run_job, daemon=True).start()
+
+    return (
+        jsonify(
+            {
+                "status": "started",
+                "job_id": job.job_id,
+                "job": job.to_dict(),
+                "message": f"Poll /api/models/mmap/store/jobs/{job.job_id} or subscribe to download room {job.job_id}",
+            }
+        ),
+        202,
+    )
+
+
+@bp.route("/mmap/store/jobs/<job_id>", methods=["GET"])
+def get_weight_store_job(job_id):
+    """Status of a background weight store conversion"""
+    job = weight_store.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Weight store job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route("/index/refresh", methods=["POST"])
+def refresh_model_index():
+    """Rescan the models directory index (all models when force is set)"""
+    data = request.get_json(silent=True) or {}
+    entries = model_index.refresh(force=bool(data.get("force", False)))
+
+    return jsonify(
+        {
+            "status": "success",
+            "model_count": len(entries),
+            "stats": model_index.get_stats(),
+        }
+    )
+
+
+@bp.route("/memory-estimate/<path:model_id>", methods=["GET"])
+def estimate_model_memory(model_id):
+    """Projected memory for a model and whether it would be admitted right now"""
+    try:
+        context_length = request.args.get("context_length", type=int)
+        concurrency = request.args.get("concurrency", type=int)
+        try:
+            dir_name = model_dir_name(model_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        entry = model_index.get(settings.model.models_dir, dir_name)
+        estimate = memory_estimator.estimate(model_id, entry, context_length, concurrency)
+        available = psutil.virtual_memory().available
+
+        return jsonify(
+            {
+                "model_id": model_id,
+                "estimate": estimate.to_dict(),
+                "available_gb": available / (1024**3),
+                "admitted": memory_estimator.admit(estimate, available),
+            }
+        )
+    except Exception as e:
+        return handle_error(e, "estimating model memory")
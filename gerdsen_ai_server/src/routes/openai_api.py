@@ -2,20 +2,25 @@
 OpenAI-compatible API endpoints for VS Code integration
 """
 
+import base64
 import json
 import time
 import uuid
 from collections.abc import Generator
 
+import numpy as np
 from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from loguru import logger
+from pydantic import ValidationError
 
 from ..config.settings import settings
 from ..schemas.openai_schemas import (
     ChatCompletionRequest,
     ChatMessage,
+    CompletionRequest,
     EmbeddingRequest,
 )
+from ..utils.fast_json import json_response
 from ..utils.metrics_calculator import metrics_calculator
 from ..utils.validation import validate_json
 
@@ -131,29 +136,21 @@ def chat_completions(validated_data: ChatCompletionRequest):
     loaded_models = app_state.get('loaded_models', {})
 
     # Check if model is loaded
-    if model not in loaded_models:
-        # Try to load the model
-        try:
-            from ..model_loaders.mlx_loader import MLXModelLoader
-            loader = MLXModelLoader()
-            loaded_model = loader.load_model(model)
-            loaded_models[model] = loaded_model
-            logger.info(f"Auto-loaded model: {model}")
-        except Exception as e:
-            logger.error(f"Failed to auto-load model {model}: {e}")
-            return jsonify({
-                'error': 'Model not found',
-                'message': f'Model {model} is not loaded. Please load it first.'
-            }), 404
+    if not ensure_model_loaded(model, loaded_models):
+        return jsonify({
+            'error': 'Model not found',
+            'message': f'Model {model} is not loaded. Please load it first.'
+        }), 404
 
-    # Update metrics
-    metrics = app_state.get('metrics', {})
-    metrics['requests_total'] = metrics.get('requests_total', 0) + 1
+    adapter = validated_data.adapter
+    missing = find_missing_adapters([adapter])
+    if missing:
+        return jsonify({
+            'error': 'Adapter not found',
+            'message': f'LoRA adapter {missing[0]} was not found in {settings.model.adapters_dir}'
+        }), 404
 
-    # Track per-model inference counts
-    if 'model_inference_counts' not in app_state:
-        app_state['model_inference_counts'] = {}
-    app_state['model_inference_counts'][model] = app_state['model_inference_counts'].get(model, 0) + 1
+    record_request_metrics(model, app_state)
 
     # Generate response
     if stream:
@@ -167,7 +164,8 @@ def chat_completions(validated_data: ChatCompletionRequest):
                     top_p,
                     app_state,
                     use_cache,
-                    conversation_id
+                    conversation_id,
+                    adapter=adapter
                 )
             ),
             mimetype='text/event-stream'
@@ -187,19 +185,57 @@ def chat_completions(validated_data: ChatCompletionRequest):
             top_p,
             app_state,
             use_cache,
-            conversation_id
+            conversation_id,
+            adapter=adapter
         )
         if rag_sources:
             response["rag_sources"] = rag_sources
         return jsonify(response)
 
 
+def ensure_model_loaded(model: str, loaded_models: dict) -> bool:
+    """Auto-load a model if it is not already loaded. Returns False on failure."""
+    if model in loaded_models:
+        return True
+
+    try:
+        from ..model_loaders.mlx_loader import MLXModelLoader
+        loader = MLXModelLoader()
+        loaded_model = loader.load_model(model)
+        loaded_models[model] = loaded_model
+        logger.info(f"Auto-loaded model: {model}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to auto-load model {model}: {e}")
+        return False
+
+
+def find_missing_adapters(adapters: list[str | None]) -> list[str]:
+    """Return requested LoRA adapters that do not exist on disk"""
+    from ..inference.lora_adapters import adapter_cache
+
+    return [name for name in dict.fromkeys(adapters) if name and adapter_cache.resolve_path(name) is None]
+
+
+def record_request_metrics(model: str, app_state: dict) -> None:
+    """Update request totals and per-model inference counts"""
+    metrics = app_state.get('metrics', {})
+    metrics['requests_total'] = metrics.get('requests_total', 0) + 1
+
+    # Track per-model inference counts
+    if 'model_inference_counts' not in app_state:
+        app_state['model_inference_counts'] = {}
+    app_state['model_inference_counts'][model] = app_state['model_inference_counts'].get(model, 0) + 1
+
+
 def generate_chat_stream(model, messages, temperature: float,
                         max_tokens: int, top_p: float, app_state: dict,
-                        use_cache: bool = True, conversation_id: str = 'default') -> Generator:
+                        use_cache: bool = True, conversation_id: str = 'default',
+                        adapter: str | None = None) -> Generator:
     """Generate streaming chat completion response"""
     chat_id = f"chatcmpl-{uuid.uuid4().hex[:8]}"
     created = int(time.time())
+    adapter_kwargs = {'adapter': adapter} if adapter else {}
 
     # Convert messages to prompt
     prompt = convert_messages_to_prompt(messages)
@@ -232,7 +268,8 @@ def generate_chat_stream(model, messages, temperature: float,
                 temperature=temperature,
                 top_p=top_p,
                 use_cache=use_cache,
-                conversation_id=conversation_id
+                conversation_id=conversation_id,
+                **adapter_kwargs
             ):
                 chunk = {
                     'id': chat_id,
@@ -255,7 +292,8 @@ def generate_chat_stream(model, messages, temperature: float,
                 temperature=temperature,
                 top_p=top_p,
                 use_cache=use_cache,
-                conversation_id=conversation_id
+                conversation_id=conversation_id,
+                **adapter_kwargs
             )
             # Remove the prompt from the response if it's included
             if response.startswith(prompt):
@@ -324,10 +362,12 @@ def generate_chat_stream(model, messages, temperature: float,
 
 def generate_chat_completion(model, messages, temperature: float,
                            max_tokens: int, top_p: float, app_state: dict,
-                           use_cache: bool = True, conversation_id: str = 'default') -> dict:
+                           use_cache: bool = True, conversation_id: str = 'default',
+                           adapter: str | None = None) -> dict:
     """Generate non-streaming chat completion response"""
     chat_id = f"chatcmpl-{uuid.uuid4().hex[:8]}"
     created = int(time.time())
+    adapter_kwargs = {'adapter': adapter} if adapter else {}
 
     # Convert messages to prompt
     prompt = convert_messages_to_prompt(messages)
@@ -343,7 +383,8 @@ def generate_chat_completion(model, messages, temperature: float,
             temperature=temperature,
             top_p=top_p,
             use_cache=use_cache,
-            conversation_id=conversation_id
+            conversation_id=conversation_id,
+            **adapter_kwargs
         )
 
         # Remove the prompt from the response if it's included
@@ -445,28 +486,184 @@ def completions():
     """OpenAI-compatible completions endpoint"""
     data = request.get_json() or {}
 
+    # A list of prompts is processed as one batched job
+    if isinstance(data.get('prompt'), list):
+        return batch_completions(data)
+
     validated = ChatCompletionRequest(
         model=data.get('model', settings.model.default_model),
         messages=[ChatMessage(role='user', content=data.get('prompt', ''))],
         temperature=data.get('temperature', settings.inference.temperature),
         max_tokens=data.get('max_tokens', settings.inference.max_tokens),
         stream=data.get('stream', False),
+        adapter=data.get('adapter'),
     )
     return chat_completions(validated)
 
 
+def batch_completions(data: dict):
+    """Generate one completion choice per prompt using batched prefill and decode"""
+    try:
+        validated = CompletionRequest(
+            model=data.get('model', settings.model.default_model),
+            prompt=data.get('prompt'),
+            temperature=data.get('temperature', settings.inference.temperature),
+            max_tokens=data.get('max_tokens', settings.inference.max_tokens),
+            top_p=data.get('top_p', 1.0),
+            stream=data.get('stream', False),
+            echo=data.get('echo', False),
+            adapter=data.get('adapter'),
+        )
+    except ValidationError as e:
+        errors = [f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors()]
+        return jsonify({
+            'error': 'Invalid request data',
+            'type': 'validation_error',
+            'details': errors
+        }), 400
+
+    if validated.stream:
+        return jsonify({
+            'error': 'Streaming is not supported for batched prompts',
+            'type': 'invalid_request_error'
+        }), 400
+
+    model = validated.model
+    prompts = validated.prompt
+
+    # One adapter for every prompt, or one entry per prompt for a mixed batch
+    adapters = validated.adapter if isinstance(validated.adapter, list) else [validated.adapter] * len(prompts)
+    if len(adapters) != len(prompts):
+        return jsonify({
+            'error': 'Invalid request data',
+            'type': 'validation_error',
+            'details': [f'adapter: expected {len(prompts)} entries, got {len(adapters)}']
+        }), 400
+    missing = find_missing_adapters(adapters)
+    if missing:
+        return jsonify({
+            'error': 'Adapter not found',
+            'message': f'LoRA adapter {missing[0]} was not found in {settings.model.adapters_dir}'
+        }), 404
+
+    app_state = current_app.config.get('app_state', {})
+    loaded_models = app_state.get('loaded_models', {})
+
+    if not ensure_model_loaded(model, loaded_models):
+        return jsonify({
+            'error': 'Model not found',
+            'message': f'Model {model} is not loaded. Please load it first.'
+        }), 404
+
+    record_request_metrics(model, app_state)
+
+    start_time = time.time()
+    try:
+        results = generate_completion_batch(
+            loaded_models[model],
+            prompts,
+            temperature=validated.temperature,
+            max_tokens=validated.max_tokens,
+            top_p=validated.top_p,
+            adapters=adapters if any(adapters) else None,
+        )
+    except Exception as e:
+        logger.error(f"Error in batched completion generation: {e}")
+        return jsonify({
+            'error': {
+                'message': str(e),
+                'type': 'internal_error',
+                'code': 500
+            }
+        }), 500
+
+    prompt_tokens = sum(r.prompt_tokens for r in results)
+    completion_tokens = sum(r.completion_tokens for r in results)
+
+    # Update metrics
+    elapsed = (time.time() - start_time) * 1000
+    metrics = app_state.get('metrics', {})
+    metrics['tokens_generated'] = metrics.get('tokens_generated', 0) + completion_tokens
+    metrics_calculator.record(elapsed)
+    if elapsed > 0:
+        metrics['average_tokens_per_second'] = completion_tokens / (elapsed / 1000)
+
+    return jsonify({
+        'id': f"cmpl-{uuid.uuid4().hex[:8]}",
+        'object': 'text_completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [
+            {
+                'text': prompts[r.index] + r.text if validated.echo else r.text,
+                'index': r.index,
+                'logprobs': None,
+                'finish_reason': r.finish_reason
+            }
+            for r in sorted(results, key=lambda r: r.index)
+        ],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    })
+
+
+def generate_completion_batch(model, prompts: list[str], temperature: float,
+                              max_tokens: int, top_p: float, adapters: list[str | None] | None = None) -> list:
+    """Run a batched generation job, falling back to per-prompt generation"""
+    from ..inference.batch_generation import BatchCompletion
+
+    adapter_kwargs = {'adapters': adapters} if adapters else {}
+    if hasattr(model, 'generate_batch'):
+        return model.generate_batch(
+            prompts,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            **adapter_kwargs
+        )
+
+    results = []
+    for i, prompt in enumerate(prompts):
+        extra = {'adapter': adapters[i]} if adapters and adapters[i] else {}
+        text = model.generate(prompt, max_tokens=max_tokens, temperature=temperature, top_p=top_p, **extra)
+        if text.startswith(prompt):
+            text = text[len(prompt):]
+        prompt_tokens = len(model.tokenize(prompt)) if hasattr(model, 'tokenize') else len(prompt.split())
+        completion_tokens = len(model.tokenize(text)) if hasattr(model, 'tokenize') else len(text.split())
+        results.append(BatchCompletion(
+            index=i,
+            text=text,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            finish_reason='length' if completion_tokens >= max_tokens else 'stop'
+        ))
+    return results
+
+
+def encode_embeddings(vectors: np.ndarray, encoding_format: str) -> list:
+    """Rows of vectors as float arrays, or base64 strings of their float32 bytes"""
+    if encoding_format == "base64":
+        # Little-endian float32 bytes straight from each row's buffer
+        rows = np.ascontiguousarray(vectors, dtype='<f4')
+        return [base64.b64encode(row.data).decode('ascii') for row in rows]
+    return list(vectors)
+
+
 @bp.route('/embeddings', methods=['POST'])
 @validate_json(EmbeddingRequest)
 def embeddings(validated_data: EmbeddingRequest):
     """OpenAI-compatible embeddings endpoint powered by hybrid ANE/GPU compute"""
-    from ..model_loaders.compute_dispatcher import compute_dispatcher
+    from ..model_loaders.compute_dispatcher import compute_dispatcher, truncate_embeddings
 
     # Normalise input to list
     texts = validated_data.input if isinstance(validated_data.input, list) else [validated_data.input]
     model_name = validated_data.model
 
     try:
-        vectors = compute_dispatcher.embed(texts, model_name)
+        vectors = compute_dispatcher.embed_array(texts, model_name, long_input=validated_data.long_input)
     except Exception as e:
         error_msg = str(e)
         if "Unknown embedding model" in error_msg:
@@ -482,33 +679,20 @@ def embeddings(validated_data: EmbeddingRequest):
             'error': {'message': f'Embedding inference failed: {error_msg}', 'type': 'server_error'}
         }), 500
 
-    # Optional dimension truncation
-    if validated_data.dimensions is not None:
-        dim = validated_data.dimensions
-        vectors = [v[:dim] for v in vectors]
-
-    # Optional base64 encoding
-    if validated_data.encoding_format == "base64":
-        import base64
-        import struct
-        encoded_vectors = []
-        for v in vectors:
-            raw = struct.pack(f'{len(v)}f', *v)
-            encoded_vectors.append(base64.b64encode(raw).decode('ascii'))
-        data_list = [
-            {'object': 'embedding', 'embedding': enc, 'index': i}
-            for i, enc in enumerate(encoded_vectors)
-        ]
-    else:
-        data_list = [
-            {'object': 'embedding', 'embedding': v, 'index': i}
-            for i, v in enumerate(vectors)
-        ]
+    # Optional dimension truncation (re-normalised, one vectorised op over the batch)
+    vectors = truncate_embeddings(vectors, validated_data.dimensions)
+
+    embeddings = encode_embeddings(vectors, validated_data.encoding_format)
+
+    data_list = [
+        {'object': 'embedding', 'embedding': embedding, 'index': i}
+        for i, embedding in enumerate(embeddings)
+    ]
 
     # Approximate token count
     total_tokens = sum(len(t.split()) for t in texts)
 
-    return jsonify({
+    return json_response({
         'object': 'list',
         'data': data_list,
         'model': model_name,
@@ -517,3 +701,125 @@ def embeddings(validated_data: EmbeddingRequest):
             'total_tokens': total_tokens,
         }
     })
+
+
+@bp.route('/files', methods=['POST'])
+def upload_file():
+    """Upload a JSONL input file for the batch API"""
+    from ..services.batch_jobs import batch_job_service
+
+    upload = request.files.get('file')
+    if upload is not None:
+        content = upload.read()
+        filename = upload.filename or 'batch.jsonl'
+        purpose = request.form.get('purpose', 'batch')
+    else:
+        content = request.get_data()
+        filename = request.args.get('filename', 'batch.jsonl')
+        purpose = request.args.get('purpose', 'batch')
+
+    if not content:
+        return jsonify({
+            'error': {'message': 'No file content provided', 'type': 'invalid_request_error'}
+        }), 400
+    if purpose != 'batch':
+        return jsonify({
+            'error': {'message': f"Unsupported purpose '{purpose}'", 'type': 'invalid_request_error'}
+        }), 400
+
+    return jsonify(batch_job_service.create_file(content, filename=filename, purpose=purpose))
+
+
+@bp.route('/files/<file_id>', methods=['GET'])
+def get_file(file_id: str):
+    """Retrieve a file object"""
+    from ..services.batch_jobs import batch_job_service
+
+    file_obj = batch_job_service.get_file(file_id)
+    if file_obj is None:
+        return jsonify({
+            'error': {'message': f"File '{file_id}' not found", 'type': 'invalid_request_error'}
+        }), 404
+    return jsonify(file_obj)
+
+
+@bp.route('/files/<file_id>/content', methods=['GET'])
+def get_file_content(file_id: str):
+    """Download the JSONL content of a file"""
+    from ..services.batch_jobs import batch_job_service
+
+    path = batch_job_service.get_file_path(file_id)
+    if path is None:
+        return jsonify({
+            'error': {'message': f"File '{file_id}' not found", 'type': 'invalid_request_error'}
+        }), 404
+    return Response(path.read_bytes(), mimetype='application/jsonl')
+
+
+@bp.route('/batches', methods=['POST'])
+def create_batch():
+    """Create an offline batch job from an uploaded JSONL file"""
+    from ..services.batch_jobs import BatchError, batch_job_service
+
+    data = request.get_json(silent=True) or {}
+    input_file_id = data.get('input_file_id')
+    endpoint = data.get('endpoint')
+    if not input_file_id or not endpoint:
+        return jsonify({
+            'error': {'message': 'input_file_id and endpoint are required', 'type': 'invalid_request_error'}
+        }), 400
+
+    batch_job_service.set_app_state(current_app.config.get('app_state', {}))
+    try:
+        job = batch_job_service.create_batch(
+            input_file_id,
+            endpoint,
+            completion_window=data.get('completion_window', '24h'),
+            metadata=data.get('metadata'),
+        )
+    except BatchError as e:
+        return jsonify({'error': {'message': str(e), 'type': 'invalid_request_error'}}), 400
+
+    return jsonify(job.to_dict())
+
+
+@bp.route('/batches', methods=['GET'])
+def list_batches():
+    """List batch jobs, newest first"""
+    from ..services.batch_jobs import batch_job_service
+
+    limit = request.args.get('limit', 20, type=int)
+    jobs = [job.to_dict() for job in batch_job_service.list_batches(limit)]
+    return jsonify({
+        'object': 'list',
+        'data': jobs,
+        'first_id': jobs[0]['id'] if jobs else None,
+        'last_id': jobs[-1]['id'] if jobs else None,
+        'has_more': len(batch_job_service.jobs) > len(jobs),
+    })
+
+
+@bp.route('/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id: str):
+    """Retrieve a batch job"""
+    from ..services.batch_jobs import batch_job_service
+
+    job = batch_job_service.get_batch(batch_id)
+    if job is None:
+        return jsonify({
+            'error': {'message': f"Batch '{batch_id}' not found", 'type': 'invalid_request_error'}
+        }), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route('/batches/<batch_id>/cancel', methods=['POST'])
+def cancel_batch(batch_id: str):
+    """Cancel a batch job; work stops at the next checkpoint"""
+    from ..services.batch_jobs import batch_job_service
+
+    job = batch_job_service.cancel_batch(batch_id)
+    if job is None:
+        return jsonify({
+            'error': {'message': f"Batch '{batch_id}' not found", 'type': 'invalid_request_error'}
+        }), 404
+    return jsonify(job.to_dict())
@@ -107,10 +107,14 @@ def register_handlers(socketio, app_state):
         join_room(room)
         logger.info(f"Client {request.sid} subscribed to download {task_id}")
 
-        # Send current status
+        # Send current status (the room also carries quantization job progress)
         from ..services.download_manager import download_manager
+        from ..services.model_optimizer import model_optimizer
         task = download_manager.get_task_status(task_id)
-        if task:
+        job = model_optimizer.get_job(task_id)
+        if job:
+            emit('optimization_progress', job.to_dict())
+        elif task:
             emit('download_progress', {
                 'task_id': task.task_id,
                 'model_id': task.model_id,
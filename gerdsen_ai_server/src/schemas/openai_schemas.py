@@ -43,6 +43,7 @@ class ChatCompletionRequest(BaseModel):
     conversation_id: str | None = Field(None, description="Conversation ID for KV cache")
     use_cache: bool | None = Field(True, description="Whether to use KV cache")
     repetition_penalty: float | None = Field(1.0, ge=0.1, le=2.0, description="Repetition penalty")
+    adapter: str | None = Field(None, max_length=255, description="LoRA adapter to apply over the base model")
 
     # RAG extensions
     use_rag: bool | None = Field(False, description="Enable automatic RAG context retrieval")
@@ -101,9 +102,12 @@ class CompletionRequest(BaseModel):
     best_of: int | None = Field(1, ge=1, le=20, description="Number of completions to generate server-side")
     logit_bias: dict[str, float] | None = Field(None, description="Modify likelihood of specified tokens")
     user: str | None = Field(None, max_length=255, description="Unique identifier for the end-user")
+    adapter: str | list[str | None] | None = Field(
+        None, description="LoRA adapter for all prompts, or one adapter (or null) per prompt"
+    )
 
-    @classmethod
     @field_validator('prompt')
+    @classmethod
     def validate_prompt(cls, v):
         if isinstance(v, str):
             if not v.strip():
@@ -220,6 +224,7 @@ class EmbeddingRequest(BaseModel):
     model: str = Field(default="all-MiniLM-L6-v2", description="Embedding model name")
     encoding_format: Literal["float", "base64"] = Field(default="float", description="Output encoding format")
     dimensions: int | None = Field(None, ge=1, description="Optional dimension truncation")
+    long_input: bool = Field(False, description="Embed inputs past the model's token cap by pooling overlapping windows")
 
 
 class EmbeddingData(BaseModel):
@@ -259,13 +264,27 @@ class DocumentIngestRequest(BaseModel):
     chunk_overlap: int | None = Field(None, ge=0, le=1024, description="Override default chunk overlap")
 
 
+class BulkIngestRequest(BaseModel):
+    """Options for bulk ingestion: a path, or an NDJSON request body with these as query parameters."""
+    path: str | None = Field(None, max_length=4096, description="File or directory under IMPETUS_INGEST_ROOT")
+    collection: str | None = Field(None, max_length=128, description="Target collection name")
+    metadata: dict[str, Any] | None = Field(
+        None, description="Additional metadata for all chunks (a JSON object string as a query parameter)"
+    )
+    chunk_size: int | None = Field(None, ge=64, le=8192, description="Override default chunk size")
+    chunk_overlap: int | None = Field(None, ge=0, le=1024, description="Override default chunk overlap")
+
+
 class DocumentIngestResponse(BaseModel):
     """Response from document ingestion."""
-    status: str = Field(..., description="Ingestion status")
-    chunks_stored: int = Field(..., ge=0, description="Number of chunks stored")
+    status: str = Field(..., description="Ingestion status: success, unchanged or empty")
+    chunks_stored: int = Field(..., ge=0, description="Number of chunks embedded and stored")
+    chunks_updated: int = Field(0, ge=0, description="Stored chunks whose metadata was rewritten")
+    chunks_unchanged: int = Field(0, ge=0, description="Stored chunks kept as they were")
+    chunks_deleted: int = Field(0, ge=0, description="Chunks the new version of the document no longer has")
     collection: str = Field(..., description="Collection name")
     source: str = Field(..., description="Source identifier")
-    document_ids: list[str] = Field(default_factory=list, description="Stored chunk IDs")
+    document_ids: list[str] = Field(default_factory=list, description="IDs of all chunks of the document")
 
 
 class DocumentSearchRequest(BaseModel):
@@ -0,0 +1,566 @@
+"""
+Offline Batch Service - OpenAI-style /v1/batches over local JSONL files
+
+Input files and results live under settings.model.cache_dir / "batches".
+Jobs run on a single low-priority background worker that groups requests
+into large batches and checkpoints after every chunk, so a restart resumes
+where the previous process stopped.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from ..config.settings import settings
+
+SUPPORTED_ENDPOINTS = ("/v1/chat/completions", "/v1/embeddings")
+
+
+class BatchStatus(Enum):
+    VALIDATING = "validating"
+    IN_PROGRESS = "in_progress"
+    FINALIZING = "finalizing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLING = "cancelling"
+    CANCELLED = "cancelled"
+
+
+# Statuses that the worker picks up again after a restart
+RESUMABLE_STATUSES = (BatchStatus.VALIDATING, BatchStatus.IN_PROGRESS, BatchStatus.FINALIZING)
+
+
+class BatchError(Exception):
+    """Exception raised for invalid batch or file requests"""
+    pass
+
+
+@dataclass
+class BatchJob:
+    """Batch job state, persisted as the job checkpoint"""
+    id: str
+    input_file_id: str
+    endpoint: str
+    completion_window: str
+    status: BatchStatus
+    created_at: int
+    metadata: dict[str, Any] | None = None
+    output_file_id: str | None = None
+    error_file_id: str | None = None
+    in_progress_at: int | None = None
+    finalizing_at: int | None = None
+    completed_at: int | None = None
+    failed_at: int | None = None
+    cancelled_at: int | None = None
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    # Checkpoint: next input line and committed output sizes
+    next_line: int = 0
+    output_bytes: int = 0
+    error_bytes: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        """OpenAI batch object representation"""
+        return {
+            'id': self.id,
+            'object': 'batch',
+            'endpoint': self.endpoint,
+            'errors': {'object': 'list', 'data': self.errors} if self.errors else None,
+            'input_file_id': self.input_file_id,
+            'completion_window': self.completion_window,
+            'status': self.status.value,
+            'output_file_id': self.output_file_id,
+            'error_file_id': self.error_file_id,
+            'created_at': self.created_at,
+            'in_progress_at': self.in_progress_at,
+            'finalizing_at': self.finalizing_at,
+            'completed_at': self.completed_at,
+            'failed_at': self.failed_at,
+            'cancelled_at': self.cancelled_at,
+            'request_counts': {
+                'total': self.total,
+                'completed': self.completed,
+                'failed': self.failed,
+            },
+            'metadata': self.metadata,
+        }
+
+
+class BatchJobService:
+    """Manages batch input files, job state and the background worker"""
+
+    def __init__(self, root_dir: Path | None = None, chunk_size: int | None = None,
+                 pause_ms: int | None = None):
+        self.root_dir = root_dir or settings.model.cache_dir / "batches"
+        self.files_dir = self.root_dir / "files"
+        self.jobs_dir = self.root_dir / "jobs"
+        self.files_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        self.chunk_size = chunk_size or settings.inference.offline_batch_chunk_size
+        self.pause_ms = settings.inference.offline_batch_pause_ms if pause_ms is None else pause_ms
+
+        self.jobs: dict[str, BatchJob] = {}
+        self.app_state: dict | None = None
+        self._queue: deque[str] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: threading.Thread | None = None
+
+        self._load_jobs()
+
+    def set_app_state(self, app_state: dict):
+        """Set the Flask app state used to resolve loaded models"""
+        self.app_state = app_state
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def create_file(self, content: bytes, filename: str = "batch.jsonl", purpose: str = "batch") -> dict[str, Any]:
+        """Store an uploaded JSONL file and return its file object"""
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        (self.files_dir / f"{file_id}.jsonl").write_bytes(content)
+        return self._write_file_meta(file_id, filename, purpose)
+
+    def get_file(self, file_id: str) -> dict[str, Any] | None:
+        """Get a stored file object"""
+        meta_path = self.files_dir / f"{file_id}.json"
+        if not meta_path.exists():
+            return None
+        return json.loads(meta_path.read_text())
+
+    def get_file_path(self, file_id: str) -> Path | None:
+        """Get the on-disk path of a stored file"""
+        path = self.files_dir / f"{file_id}.jsonl"
+        return path if path.exists() else None
+
+    def _write_file_meta(self, file_id: str, filename: str, purpose: str) -> dict[str, Any]:
+        path = self.files_dir / f"{file_id}.jsonl"
+        meta = {
+            'id': file_id,
+            'object': 'file',
+            'bytes': path.stat().st_size if path.exists() else 0,
+            'created_at': int(time.time()),
+            'filename': filename,
+            'purpose': purpose,
+        }
+        _atomic_write_json(self.files_dir / f"{file_id}.json", meta)
+        return meta
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def create_batch(self, input_file_id: str, endpoint: str, completion_window: str = "24h",
+                     metadata: dict[str, Any] | None = None) -> BatchJob:
+        """Create a batch job and queue it for background processing"""
+        if endpoint not in SUPPORTED_ENDPOINTS:
+            raise BatchError(f"Unsupported endpoint '{endpoint}'. Supported: {list(SUPPORTED_ENDPOINTS)}")
+        if self.get_file_path(input_file_id) is None:
+            raise BatchError(f"Input file '{input_file_id}' not found")
+
+        job = BatchJob(
+            id=f"batch_{uuid.uuid4().hex[:24]}",
+            input_file_id=input_file_id,
+            endpoint=endpoint,
+            completion_window=completion_window,
+            status=BatchStatus.VALIDATING,
+            created_at=int(time.time()),
+            metadata=metadata,
+        )
+        with self._lock:
+            self.jobs[job.id] = job
+        self._save_job(job)
+        logger.info(f"Created batch {job.id} for {endpoint} from {input_file_id}")
+
+        self._enqueue(job.id)
+        return job
+
+    def get_batch(self, batch_id: str) -> BatchJob | None:
+        """Get a batch job by ID"""
+        return self.jobs.get(batch_id)
+
+    def list_batches(self, limit: int = 20) -> list[BatchJob]:
+        """List batch jobs, newest first"""
+        jobs = sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+        return jobs[:limit]
+
+    def cancel_batch(self, batch_id: str) -> BatchJob | None:
+        """Request cancellation; the worker stops at the next checkpoint"""
+        job = self.jobs.get(batch_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.status not in RESUMABLE_STATUSES:
+                return job
+            job.status = BatchStatus.CANCELLING
+            self._save_job(job)
+        logger.info(f"Cancelling batch {batch_id}")
+        return job
+
+    def resume_pending(self) -> int:
+        """Queue jobs interrupted by a restart. Returns the number resumed."""
+        pending = [j for j in self.jobs.values() if j.status in RESUMABLE_STATUSES]
+        for job in sorted(pending, key=lambda j: j.created_at):
+            logger.info(f"Resuming batch {job.id} from line {job.next_line}")
+            self._enqueue(job.id)
+
+        # Jobs cancelled mid-flight only need their final state recorded
+        for job in self.jobs.values():
+            if job.status == BatchStatus.CANCELLING:
+                self._finish(job, BatchStatus.CANCELLED)
+        return len(pending)
+
+    def _load_jobs(self):
+        """Load persisted job checkpoints"""
+        for state_path in self.jobs_dir.glob("*.json"):
+            try:
+                data = json.loads(state_path.read_text())
+                data['status'] = BatchStatus(data['status'])
+                job = BatchJob(**data)
+                self.jobs[job.id] = job
+            except Exception as e:
+                logger.error(f"Failed to load batch state {state_path.name}: {e}")
+
+    def _save_job(self, job: BatchJob):
+        data = asdict(job)
+        data['status'] = job.status.value
+        _atomic_write_json(self.jobs_dir / f"{job.id}.json", data)
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, batch_id: str):
+        with self._lock:
+            if batch_id not in self._queue:
+                self._queue.append(batch_id)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._worker_loop, name="batch-worker", daemon=True)
+                self._worker.start()
+        self._wakeup.set()
+
+    def _worker_loop(self):
+        _lower_thread_priority()
+        while True:
+            with self._lock:
+                batch_id = self._queue.popleft() if self._queue else None
+                if batch_id is None:
+                    self._wakeup.clear()
+            if batch_id is None:
+                if not self._wakeup.wait(timeout=30):
+                    with self._lock:
+                        if not self._queue:
+                            self._worker = None
+                            return
+                continue
+
+            try:
+                self.process_batch(batch_id)
+            except Exception as e:
+                logger.error(f"Batch {batch_id} failed: {e}")
+                job = self.jobs.get(batch_id)
+                if job:
+                    job.errors.append({'code': 'internal_error', 'message': str(e), 'line': None})
+                    self._finish(job, BatchStatus.FAILED)
+
+    def process_batch(self, batch_id: str):
+        """Process a job to completion, checkpointing after each chunk"""
+        job = self.jobs.get(batch_id)
+        if job is None:
+            return
+        if job.status == BatchStatus.CANCELLING:
+            self._finish(job, BatchStatus.CANCELLED)
+            return
+        if job.status not in RESUMABLE_STATUSES:
+            return
+
+        input_path = self.get_file_path(job.input_file_id)
+        if input_path is None:
+            job.errors.append({'code': 'file_not_found', 'message': 'Input file missing', 'line': None})
+            self._finish(job, BatchStatus.FAILED)
+            return
+
+        lines = input_path.read_text().splitlines()
+        job.total = len(lines)
+
+        if job.output_file_id is None:
+            job.output_file_id = f"file-{uuid.uuid4().hex[:24]}"
+            job.error_file_id = f"file-{uuid.uuid4().hex[:24]}"
+        output_path = self.files_dir / f"{job.output_file_id}.jsonl"
+        error_path = self.files_dir / f"{job.error_file_id}.jsonl"
+
+        # Drop anything written after the last committed checkpoint
+        _truncate_to(output_path, job.output_bytes)
+        _truncate_to(error_path, job.error_bytes)
+
+        if job.status == BatchStatus.VALIDATING:
+            job.status = BatchStatus.IN_PROGRESS
+            job.in_progress_at = int(time.time())
+        self._save_job(job)
+
+        while job.next_line < len(lines):
+            if job.status == BatchStatus.CANCELLING:
+                self._finish(job, BatchStatus.CANCELLED)
+                return
+
+            start = job.next_line
+            chunk = lines[start:start + self.chunk_size]
+            outputs, errors = self._process_chunk(job.endpoint, chunk, start)
+
+            with open(output_path, 'a') as out_f, open(error_path, 'a') as err_f:
+                for record in outputs:
+                    out_f.write(json.dumps(record) + "\n")
+                for record in errors:
+                    err_f.write(json.dumps(record) + "\n")
+                out_f.flush()
+                err_f.flush()
+                os.fsync(out_f.fileno())
+                os.fsync(err_f.fileno())
+
+            job.completed += len(outputs)
+            job.failed += len(errors)
+            job.next_line = start + len(chunk)
+            job.output_bytes = output_path.stat().st_size
+            job.error_bytes = error_path.stat().st_size
+            self._save_job(job)
+
+            # Yield between chunks so interactive requests keep priority
+            if self.pause_ms > 0:
+                time.sleep(self.pause_ms / 1000)
+
+        # A cancel that arrived during the last chunk still wins over completion
+        with self._lock:
+            cancelled = job.status == BatchStatus.CANCELLING
+            if not cancelled:
+                job.status = BatchStatus.FINALIZING
+        if cancelled:
+            self._finish(job, BatchStatus.CANCELLED)
+            return
+        job.finalizing_at = int(time.time())
+        self._write_file_meta(job.output_file_id, f"{job.id}_output.jsonl", "batch_output")
+        self._write_file_meta(job.error_file_id, f"{job.id}_errors.jsonl", "batch_output")
+        self._finish(job, BatchStatus.COMPLETED)
+        logger.info(f"Batch {job.id} completed: {job.completed} succeeded, {job.failed} failed")
+
+    def _finish(self, job: BatchJob, status: BatchStatus):
+        job.status = status
+        now = int(time.time())
+        if status == BatchStatus.COMPLETED:
+            job.completed_at = now
+        elif status == BatchStatus.FAILED:
+            job.failed_at = now
+        elif status == BatchStatus.CANCELLED:
+            job.cancelled_at = now
+        self._save_job(job)
+
+    # ------------------------------------------------------------------
+    # Request execution
+    # ------------------------------------------------------------------
+
+    def _process_chunk(self, endpoint: str, lines: list[str], first_line: int) -> tuple[list[dict], list[dict]]:
+        """Run one chunk of requests, grouping compatible requests into single calls"""
+        from ..schemas.openai_schemas import ChatCompletionRequest, EmbeddingRequest
+
+        schema = EmbeddingRequest if endpoint == "/v1/embeddings" else ChatCompletionRequest
+        outputs: list[dict] = []
+        errors: list[dict] = []
+        groups: dict[tuple, list[tuple[str, Any]]] = {}
+
+        for offset, line in enumerate(lines):
+            if not line.strip():
+                continue
+            custom_id = None
+            try:
+                request = json.loads(line)
+                custom_id = request['custom_id']
+                body = request['body']
+                if request.get('url', endpoint) != endpoint:
+                    raise BatchError(f"Request url must match batch endpoint {endpoint}")
+                if not isinstance(body, dict):
+                    raise BatchError("Request body must be a JSON object")
+                # Validate here so one malformed line can't fail the group it would join
+                parsed = schema(**body)
+            except Exception as e:
+                errors.append(_error_record(custom_id, 'invalid_request', f"Line {first_line + offset + 1}: {e}"))
+                continue
+
+            if getattr(parsed, 'adapter', None):
+                from ..routes.openai_api import find_missing_adapters
+
+                if find_missing_adapters([parsed.adapter]):
+                    errors.append(_error_record(custom_id, 'invalid_request',
+                                                f"LoRA adapter {parsed.adapter} was not found"))
+                    continue
+
+            if endpoint == "/v1/embeddings":
+                key = (parsed.model, parsed.dimensions, parsed.encoding_format, parsed.long_input)
+            else:
+                # Requests only share a call when every option but the messages and
+                # adapter matches; adapters are applied per prompt within the call
+                options = parsed.model_dump(exclude={'messages', 'adapter'})
+                key = (parsed.model, json.dumps(options, sort_keys=True, default=str))
+            groups.setdefault(key, []).append((custom_id, parsed))
+
+        for requests in groups.values():
+            try:
+                bodies = self._run_embeddings(requests) if endpoint == "/v1/embeddings" else self._run_chat(requests)
+                for (custom_id, _), response_body in zip(requests, bodies, strict=True):
+                    outputs.append(_response_record(custom_id, response_body))
+            except Exception as e:
+                logger.error(f"Batch request group failed: {e}")
+                for custom_id, _ in requests:
+                    errors.append(_error_record(custom_id, 'server_error', str(e)))
+
+        return outputs, errors
+
+    def _run_chat(self, requests: list[tuple[str, Any]]) -> list[dict]:
+        """Generate all validated chat requests of a group in one batched job"""
+        from ..routes.openai_api import convert_messages_to_prompt, generate_completion_batch
+
+        parsed = [request for _, request in requests]
+        first = parsed[0]
+        adapters = [r.adapter for r in parsed]
+        model = self._get_model(first.model)
+        prompts = [convert_messages_to_prompt(r.messages) for r in parsed]
+
+        results = generate_completion_batch(
+            model,
+            prompts,
+            temperature=first.temperature if first.temperature is not None else 0.7,
+            max_tokens=first.max_tokens or 150,
+            top_p=first.top_p if first.top_p is not None else 1.0,
+            adapters=adapters if any(adapters) else None,
+        )
+        results = sorted(results, key=lambda r: r.index)
+
+        return [
+            {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:8]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': first.model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': r.text.strip()},
+                    'finish_reason': r.finish_reason,
+                }],
+                'usage': {
+                    'prompt_tokens': r.prompt_tokens,
+                    'completion_tokens': r.completion_tokens,
+                    'total_tokens': r.prompt_tokens + r.completion_tokens,
+                },
+            }
+            for r in results
+        ]
+
+    def _run_embeddings(self, requests: list[tuple[str, Any]]) -> list[dict]:
+        """Embed every input of a group in a single dispatcher call"""
+        from ..model_loaders.compute_dispatcher import compute_dispatcher, truncate_embeddings
+        from ..routes.openai_api import encode_embeddings
+
+        parsed = [request for _, request in requests]
+        texts_per_request = [r.input if isinstance(r.input, list) else [r.input] for r in parsed]
+        all_texts = [t for texts in texts_per_request for t in texts]
+        first = parsed[0]
+
+        vectors = compute_dispatcher.embed_array(all_texts, first.model, long_input=first.long_input)
+        vectors = truncate_embeddings(vectors, first.dimensions)
+        # Same encoding as /v1/embeddings; float rows become lists for the JSONL writer
+        embeddings = [
+            e if isinstance(e, str) else e.tolist()
+            for e in encode_embeddings(vectors, first.encoding_format)
+        ]
+
+        bodies = []
+        offset = 0
+        for texts in texts_per_request:
+            request_embeddings = embeddings[offset:offset + len(texts)]
+            offset += len(texts)
+            total_tokens = sum(len(t.split()) for t in texts)
+            bodies.append({
+                'object': 'list',
+                'data': [
+                    {'object': 'embedding', 'embedding': e, 'index': i}
+                    for i, e in enumerate(request_embeddings)
+                ],
+                'model': first.model,
+                'usage': {'prompt_tokens': total_tokens, 'total_tokens': total_tokens},
+            })
+        return bodies
+
+    def _get_model(self, model_id: str):
+        """Resolve a loaded model, loading it on demand"""
+        loaded_models = (self.app_state or {}).get('loaded_models', {})
+        if model_id in loaded_models:
+            return loaded_models[model_id]
+
+        from ..model_loaders.mlx_loader import MLXModelLoader
+
+        model = MLXModelLoader().load_model(model_id)
+        loaded_models[model_id] = model
+        logger.info(f"Auto-loaded model for batch processing: {model_id}")
+        return model
+
+
+def _response_record(custom_id: str, body: dict) -> dict:
+    return {
+        'id': f"batch_req_{uuid.uuid4().hex[:24]}",
+        'custom_id': custom_id,
+        'response': {
+            'status_code': 200,
+            'request_id': uuid.uuid4().hex,
+            'body': body,
+        },
+        'error': None,
+    }
+
+
+def _error_record(custom_id: str | None, code: str, message: str) -> dict:
+    return {
+        'id': f"batch_req_{uuid.uuid4().hex[:24]}",
+        'custom_id': custom_id,
+        'response': None,
+        'error': {'code': code, 'message': message},
+    }
+
+
+def _atomic_write_json(path: Path, data: dict):
+    """Write JSON via a temp file so a crash never leaves a torn checkpoint"""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _truncate_to(path: Path, size: int):
+    if path.exists() and path.stat().st_size > size:
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+
+
+def _lower_thread_priority():
+    """Best-effort nice for the worker thread (Linux schedules threads individually)"""
+    try:
+        if hasattr(os, 'setpriority') and hasattr(threading, 'get_native_id') and os.uname().sysname == "Linux":
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except OSError:
+        pass
+
+
+# Singleton instance
+batch_job_service = BatchJobService()
@@ -5,9 +5,13 @@ Measures and tracks model performance metrics for optimization
 
 import sqlite3
 import statistics
+import threading
 import time
+import uuid
+from collections.abc import Callable
 from dataclasses import asdict, dataclass
-from datetime import datetime
+from datetime import UTC, datetime
+from typing import Any
 
 import psutil
 from loguru import logger
@@ -84,6 +88,29 @@ class EmbeddingBenchmarkResult:
     timestamp: str
 
 
+@dataclass
+class LoadBenchmarkJob:
+    """Background model load benchmark"""
+    job_id: str
+    model_path: str
+    status: str = "pending"  # pending, running, completed or failed
+    results: dict[str, Any] | None = None
+    error: str | None = None
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "model_path": self.model_path,
+            "status": self.status,
+            "results": self.results,
+            "error": self.error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+        }
+
+
 class BenchmarkService:
     """Service for benchmarking model performance"""
 
@@ -127,6 +154,8 @@ Now, please explain the differences between lists and tuples in Python, when to
 
     def __init__(self):
         self.db_path = settings.model.cache_dir / "benchmarks.db"
+        self.load_jobs: dict[str, LoadBenchmarkJob] = {}
+        self._jobs_lock = threading.Lock()
         self._init_database()
 
     def _init_database(self):
@@ -176,6 +205,31 @@ Now, please explain the differences between lists and tuples in Python, when to
                 )
             """)
 
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS load_benchmarks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    model_path TEXT NOT NULL,
+                    strategy TEXT NOT NULL,
+                    cache_state TEXT NOT NULL,
+                    evicted INTEGER NOT NULL,
+                    model_size_gb REAL NOT NULL,
+                    file_count INTEGER NOT NULL,
+                    tensor_count INTEGER NOT NULL,
+                    time_to_first_tensor_ms REAL NOT NULL,
+                    full_materialization_ms REAL NOT NULL,
+                    throughput_gbps REAL NOT NULL,
+                    peak_rss_mb REAL NOT NULL,
+                    major_page_faults INTEGER NOT NULL,
+                    minor_page_faults INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
+
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_load_model_timestamp
+                ON load_benchmarks(model_path, timestamp DESC)
+            """)
+
     def benchmark_model(self, model, model_id: str, chip_type: str,
                        custom_prompts: list[dict] | None = None) -> BenchmarkSuite:
         """Run complete benchmark suite on a model"""
@@ -434,13 +488,13 @@ Now, please explain the differences between lists and tuples in Python, when to
         logger.info(f"Benchmarking embedding model '{model_name}' ({iterations} iterations)")
 
         # Warmup run
-        compute_dispatcher.embed(sample_texts[:1], model_name)
+        compute_dispatcher.embed(sample_texts[:1], model_name, use_cache=False)
 
         # Timed runs
         times: list[float] = []
         for _ in range(iterations):
             start = time.perf_counter()
-            vectors = compute_dispatcher.embed(sample_texts, model_name)
+            vectors = compute_dispatcher.embed(sample_texts, model_name, use_cache=False)
             elapsed_ms = (time.perf_counter() - start) * 1000
             times.append(elapsed_ms)
 
@@ -483,6 +537,76 @@ Now, please explain the differences between lists and tuples in Python, when to
         )
         return result
 
+    def get_embedding_history(self, device: str | None = None, limit: int = 50) -> list[dict]:
+        """Get recent embedding benchmark runs, newest first"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            if device:
+                rows = conn.execute(
+                    "SELECT * FROM embedding_benchmarks WHERE device = ? ORDER BY timestamp DESC LIMIT ?",
+                    (device, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM embedding_benchmarks ORDER BY timestamp DESC LIMIT ?", (limit,)
+                ).fetchall()
+            return [dict(row) for row in rows]
+
+    def store_load_results(self, results: list[dict]):
+        """Store model load benchmark runs (LoadBenchmarkResult dicts)"""
+        columns = (
+            'model_path', 'strategy', 'cache_state', 'evicted', 'model_size_gb', 'file_count',
+            'tensor_count', 'time_to_first_tensor_ms', 'full_materialization_ms', 'throughput_gbps',
+            'peak_rss_mb', 'major_page_faults', 'minor_page_faults', 'timestamp',
+        )
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                f"INSERT INTO load_benchmarks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [tuple(result[column] for column in columns) for result in results],
+            )
+
+    def create_load_job(self, model_path: str) -> LoadBenchmarkJob:
+        """Register a pending load benchmark for run_load_job"""
+        job = LoadBenchmarkJob(job_id=str(uuid.uuid4()), model_path=model_path)
+        with self._jobs_lock:
+            self.load_jobs[job.job_id] = job
+        return job
+
+    def run_load_job(self, job_id: str, benchmark: Callable[[], dict[str, Any]]):
+        """Run a load benchmark on the calling thread and store its runs"""
+        job = self.load_jobs[job_id]
+        job.status = "running"
+        job.started_at = datetime.now(UTC)
+        try:
+            results = benchmark()
+            if results.get("runs"):
+                self.store_load_results(results["runs"])
+            job.results = results
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Load benchmark {job_id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        job.completed_at = datetime.now(UTC)
+
+    def get_load_job(self, job_id: str) -> LoadBenchmarkJob | None:
+        return self.load_jobs.get(job_id)
+
+    def get_load_history(self, model_path: str | None = None, limit: int = 50) -> list[dict]:
+        """Get recent model load benchmark runs, newest first"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            if model_path:
+                rows = conn.execute(
+                    "SELECT * FROM load_benchmarks WHERE model_path = ? ORDER BY timestamp DESC LIMIT ?",
+                    (model_path, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM load_benchmarks ORDER BY timestamp DESC LIMIT ?", (limit,)
+                ).fetchall()
+            return [dict(row) for row in rows]
+
     def get_all_models_summary(self) -> list[dict]:
         """Get summary of all benchmarked models"""
         with sqlite3.connect(self.db_path) as conn:
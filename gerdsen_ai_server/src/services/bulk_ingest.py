@@ -0,0 +1,389 @@
+"""
+Bulk document ingestion: a staged pipeline from documents to vector store writes
+
+    reader -> [documents] -> chunk workers -> [chunks] -> embed workers -> [embedded] -> writer
+
+- the reader is the iterator handed to BulkIngestPipeline.run(): NDJSON
+  lines from a request body, or the files under a directory
+- chunk workers read files and diff each document against the ingest
+  manifest with VectorStoreService.plan_ingest: unchanged documents stop
+  here, and only chunks with new text go on to be embedded
+- embed workers pack chunks from any number of documents into fixed-size
+  batches and embed them through VectorStoreService.embed (the compute
+  dispatcher on the native backend). Several batches are in flight at once,
+  so the device has the next batch waiting while one is being written
+- a single writer groups embedded batches into large collection.add calls,
+  and finishes a document's plan (stale chunk deletes, metadata updates,
+  manifest entry) once the last of its new chunks is written
+
+Every queue is bounded: when a later stage falls behind, the earlier ones
+block instead of buffering the whole input. run() yields progress events
+while the pipeline drains and ends with a summary event.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from ..config.settings import settings
+from .ingest_manifest import IngestPlan
+
+TEXT_EXTENSIONS = frozenset({
+    ".txt", ".text", ".md", ".markdown", ".rst", ".html", ".htm", ".xml",
+    ".csv", ".json", ".jsonl", ".yaml", ".yml", ".log",
+})
+# Errors beyond this many are counted in the summary but not sent as events
+MAX_REPORTED_ERRORS = 100
+
+
+class IngestError(Exception):
+    """Exception raised for invalid bulk ingestion input"""
+    pass
+
+
+@dataclass
+class IngestDocument:
+    """One pipeline input: inline text, or a file that a chunk worker reads"""
+    source: str
+    text: str | None = None
+    path: Path | None = None
+    metadata: dict[str, Any] | None = None
+    error: str | None = None  # input the reader couldn't parse, reported by the chunk stage
+
+
+@dataclass
+class IngestStats:
+    documents: int = 0
+    documents_chunked: int = 0
+    documents_failed: int = 0
+    documents_unchanged: int = 0
+    chunks: int = 0  # new chunks, to be embedded and written
+    chunks_embedded: int = 0
+    chunks_written: int = 0
+    chunks_failed: int = 0
+    chunks_updated: int = 0
+    chunks_unchanged: int = 0
+    chunks_deleted: int = 0
+
+
+def parse_ndjson(lines: Iterable[bytes | str]) -> Iterator[IngestDocument]:
+    """Documents from NDJSON lines of {"text": ..., "source": ..., "metadata": {...}}"""
+    for number, raw in enumerate(lines, 1):
+        line = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+        if not line.strip():
+            continue
+        source = f"line {number}"
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield IngestDocument(source=source, error=f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict) or not isinstance(record.get("text"), str):
+            yield IngestDocument(source=source, error="Each line must be an object with a 'text' string")
+            continue
+        metadata = record.get("metadata")
+        yield IngestDocument(
+            source=str(record.get("source") or source),
+            text=record["text"],
+            metadata=metadata if isinstance(metadata, dict) else None,
+        )
+
+
+def resolve_ingest_path(path: str, root: Path | None = None) -> tuple[Path, Path]:
+    """(root, target) for a file or directory that must lie under the ingest root"""
+    root = root or settings.vectorstore.ingest_root
+    if root is None:
+        raise IngestError("Path ingestion is disabled; set IMPETUS_INGEST_ROOT to the directory it may read")
+    root = Path(root).resolve()
+    target = (root / path).resolve()
+    if not target.is_relative_to(root):
+        raise IngestError(f"Path '{path}' is outside the ingest root")
+    if not target.exists():
+        raise IngestError(f"Path '{path}' does not exist")
+    return root, target
+
+
+def iter_path_documents(root: Path, target: Path,
+                        extensions: frozenset[str] = TEXT_EXTENSIONS) -> Iterator[IngestDocument]:
+    """A document per text file at target (a file, or a directory walked recursively)"""
+    files = [target] if target.is_file() else sorted(
+        p for p in target.rglob("*") if p.suffix.lower() in extensions and p.is_file()
+    )
+    for file in files:
+        # Symlinks may point outside the root
+        if file.resolve().is_relative_to(root):
+            yield IngestDocument(source=str(file.relative_to(root)), path=file)
+
+
+class BulkIngestPipeline:
+    """Chunk, embed and write a stream of documents into one collection"""
+
+    def __init__(
+        self,
+        service: Any,
+        collection_name: str | None = None,
+        metadata: dict | None = None,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+    ):
+        config = settings.vectorstore
+        self.service = service
+        self.collection_name = collection_name
+        self.metadata = metadata
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunk_workers = max(1, config.ingest_chunk_workers)
+        self.embed_workers = max(1, config.ingest_embed_workers)
+        self.embed_batch_size = max(1, config.ingest_embed_batch_size)
+        self.write_batch_size = max(1, config.ingest_write_batch_size)
+        self.progress_interval_s = config.ingest_progress_interval_s
+
+        self.stats = IngestStats()
+        self._documents: queue.Queue = queue.Queue(maxsize=config.ingest_queue_size)
+        self._chunks: queue.Queue = queue.Queue(maxsize=config.ingest_queue_size)
+        self._embedded: queue.Queue = queue.Queue(maxsize=config.ingest_queue_size)
+        self._events: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._errors = 0
+        self._in_flight: set[str] = set()  # sources with an unfinished plan
+        self._collection = None
+        self._started = 0.0
+        self._last_progress = 0.0
+
+    # ------------------------------------------------------------------
+    # Stages (a None item means the stage's input is exhausted)
+    # ------------------------------------------------------------------
+
+    def _chunk_worker(self) -> None:
+        while (document := self._documents.get()) is not None:
+            if self._cancelled.is_set():
+                continue
+            try:
+                plan = self._plan(document)
+            except Exception as e:
+                self._fail("chunk", document.source, e, documents=1)
+                continue
+            with self._lock:
+                self.stats.documents_chunked += 1
+                self.stats.documents_unchanged += plan.unchanged
+                self.stats.chunks += len(plan.added)
+                self.stats.chunks_unchanged += plan.kept
+            if plan.added:
+                plan.pending = len(plan.added)
+                self._chunks.put(plan)
+            else:
+                self._finish(plan)
+
+    def _plan(self, document: IngestDocument) -> IngestPlan:
+        if document.error:
+            raise IngestError(document.error)
+        with self._lock:
+            # Two plans for one source would each delete the other's chunks
+            if document.source in self._in_flight:
+                raise IngestError(f"Source '{document.source}' appears earlier in this request")
+            self._in_flight.add(document.source)
+        try:
+            text = document.text
+            if document.path is not None:
+                text = document.path.read_text(encoding="utf-8", errors="replace")
+            metadata = {**(self.metadata or {}), **(document.metadata or {})} or None
+            return self.service.plan_ingest(
+                self._collection, text, document.source, metadata, self.chunk_size, self.chunk_overlap
+            )
+        except Exception:
+            with self._lock:
+                self._in_flight.discard(document.source)
+            raise
+
+    def _embed_worker(self) -> None:
+        ids: list[str] = []
+        documents: list[str] = []
+        metadatas: list[dict] = []
+        plans: list[IngestPlan] = []  # the plan each chunk belongs to
+        while True:
+            plan = self._chunks.get()
+            if plan is not None:
+                ids += [plan.ids[i] for i in plan.added]
+                documents += [plan.documents[i] for i in plan.added]
+                metadatas += [plan.metadatas[i] for i in plan.added]
+                plans += [plan] * len(plan.added)
+            while len(ids) >= self.embed_batch_size or (plan is None and ids):
+                n = self.embed_batch_size
+                self._embed_batch(ids[:n], documents[:n], metadatas[:n], plans[:n])
+                del ids[:n], documents[:n], metadatas[:n], plans[:n]
+            if plan is None:
+                return
+
+    def _embed_batch(self, ids: list[str], documents: list[str], metadatas: list[dict],
+                     plans: list[IngestPlan]) -> None:
+        if self._cancelled.is_set():
+            return
+        try:
+            vectors = self.service.embed(documents)
+        except Exception as e:
+            self._fail("embed", plans[0].source, e, chunks=len(ids))
+            return
+        with self._lock:
+            self.stats.chunks_embedded += len(ids)
+        self._embedded.put((ids, documents, metadatas, vectors, plans))
+
+    def _writer(self) -> None:
+        pending: list[tuple] = []
+        size = 0
+        while True:
+            batch = self._embedded.get()
+            if batch is not None:
+                pending.append(batch)
+                size += len(batch[0])
+            if pending and (size >= self.write_batch_size or batch is None):
+                self._write(pending)
+                pending, size = [], 0
+            if batch is None:
+                return
+
+    def _write(self, batches: list[tuple]) -> None:
+        if self._cancelled.is_set():
+            return
+        ids = [chunk_id for batch in batches for chunk_id in batch[0]]
+        try:
+            self._collection.add(
+                ids=ids,
+                documents=[document for batch in batches for document in batch[1]],
+                metadatas=[metadata for batch in batches for metadata in batch[2]],
+                embeddings=np.concatenate([np.asarray(batch[3], dtype=np.float32) for batch in batches]),
+            )
+        except Exception as e:
+            self._fail("write", batches[0][4][0].source, e, chunks=len(ids))
+            return
+        with self._lock:
+            self.stats.chunks_written += len(ids)
+        # A plan whose chunks all made it is finished; one with a failed batch never is
+        for plan in (plan for batch in batches for plan in batch[4]):
+            plan.pending -= 1
+            if plan.pending == 0:
+                self._finish(plan)
+
+    def _finish(self, plan: IngestPlan) -> None:
+        if not plan.unchanged:
+            try:
+                self.service.finish_plan(self._collection, plan)
+            except Exception as e:
+                self._fail("write", plan.source, e, documents=1)
+                return
+            with self._lock:
+                self.stats.chunks_updated += len(plan.updated)
+                self.stats.chunks_deleted += len(plan.stale)
+        with self._lock:
+            self._in_flight.discard(plan.source)
+
+    def _fail(self, stage: str, source: str | None, error: Exception, documents: int = 0, chunks: int = 0) -> None:
+        with self._lock:
+            self.stats.documents_failed += documents
+            self.stats.chunks_failed += chunks
+            self._errors += 1
+            report = self._errors <= MAX_REPORTED_ERRORS
+        logger.warning(f"Bulk ingest {stage} stage failed for '{source}': {error}")
+        if report:
+            self._events.put({"event": "error", "stage": stage, "source": source, "message": str(error)})
+
+    # ------------------------------------------------------------------
+    # Driver
+    # ------------------------------------------------------------------
+
+    def _progress(self) -> dict[str, Any]:
+        with self._lock:
+            stats = asdict(self.stats)
+        elapsed = time.perf_counter() - self._started
+        return {
+            "collection": self._collection.name,
+            **stats,
+            "elapsed_s": round(elapsed, 3),
+            "chunks_per_s": round(stats["chunks_written"] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _pending_events(self) -> Iterator[dict[str, Any]]:
+        """Queued error events, plus a progress event once per progress interval"""
+        while True:
+            try:
+                yield self._events.get_nowait()
+            except queue.Empty:
+                break
+        now = time.perf_counter()
+        if now - self._last_progress >= self.progress_interval_s:
+            self._last_progress = now
+            yield {"event": "progress", **self._progress()}
+
+    def _put(self, inbox: queue.Queue, item: Any) -> Iterator[dict[str, Any]]:
+        """Blocking put that keeps reporting progress while the stage applies backpressure"""
+        while True:
+            try:
+                inbox.put(item, timeout=self.progress_interval_s)
+                return
+            except queue.Full:
+                yield from self._pending_events()
+
+    def run(self, documents: Iterable[IngestDocument]) -> Iterator[dict[str, Any]]:
+        """Ingest documents, yielding progress and error events and finally a "done" summary
+
+        If the consumer stops iterating (e.g. the client disconnects), queued
+        work is dropped and the stage threads are wound down.
+        """
+        self._collection = self.service.get_or_create_collection(self.collection_name)
+        self._started = self._last_progress = time.perf_counter()
+        stages = [
+            (self._documents, [self._start(self._chunk_worker, f"ingest-chunk-{i}") for i in range(self.chunk_workers)]),
+            (self._chunks, [self._start(self._embed_worker, f"ingest-embed-{i}") for i in range(self.embed_workers)]),
+            (self._embedded, [self._start(self._writer, "ingest-write")]),
+        ]
+        closed = [0] * len(stages)
+        finished = False
+        try:
+            for document in documents:
+                with self._lock:
+                    self.stats.documents += 1
+                yield from self._put(self._documents, document)
+                yield from self._pending_events()
+
+            # Close stage by stage so each drains before the next sees its end
+            for stage, (inbox, threads) in enumerate(stages):
+                while closed[stage] < len(threads):
+                    yield from self._put(inbox, None)
+                    closed[stage] += 1
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(self.progress_interval_s)
+                        yield from self._pending_events()
+            finished = True
+        finally:
+            if not finished:
+                self._cancelled.set()
+                for stage, (inbox, threads) in enumerate(stages):
+                    for _ in range(len(threads) - closed[stage]):
+                        inbox.put(None)
+                    for thread in threads:
+                        thread.join()
+                logger.warning(f"Bulk ingest into '{self._collection.name}' cancelled: {self._progress()}")
+
+        while not self._events.empty():
+            yield self._events.get_nowait()
+        summary = self._progress()
+        status = "success" if not (summary["documents_failed"] or summary["chunks_failed"]) else "partial"
+        logger.info(f"Bulk ingest into '{self._collection.name}' finished ({status}): "
+                    f"{summary['documents']} documents, {summary['chunks_written']} chunks "
+                    f"in {summary['elapsed_s']:.1f}s")
+        yield {"event": "done", "status": status, **summary}
+
+    @staticmethod
+    def _start(target: Callable[[], None], name: str) -> threading.Thread:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
@@ -7,7 +7,7 @@ from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 
 
 class ImpetusEmbeddingFunction(EmbeddingFunction[Documents]):
-    """Adapts compute_dispatcher.embed() for ChromaDB."""
+    """Adapts compute_dispatcher.embed_array() for ChromaDB."""
 
     def __init__(self, model_name: str | None = None):
         self._model_name = model_name
@@ -17,4 +17,5 @@ class ImpetusEmbeddingFunction(EmbeddingFunction[Documents]):
         # (same pattern as openai_api.py:428)
         from ..model_loaders.compute_dispatcher import compute_dispatcher
 
-        return compute_dispatcher.embed(list(input), self._model_name)
+        # ChromaDB takes one float32 array per document; rows of the matrix avoid a list round-trip
+        return list(compute_dispatcher.embed_array(list(input), self._model_name))
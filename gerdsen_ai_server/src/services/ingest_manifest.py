@@ -0,0 +1,133 @@
+"""
+Ingest manifest: what each source last contributed to a collection
+
+Chunk ids are derived from the source and a hash of the chunk text, so the
+same paragraph gets the same id every time its document is ingested. One
+SQLite row per (collection, source) records the hash of the whole document,
+the parameters it was chunked and embedded with, and the ids of the chunks it
+produced with a hash of each chunk's metadata.
+
+VectorStoreService.plan_ingest diffs a new version of a document against
+that row: an unchanged document is skipped outright, otherwise only chunks
+with new text are embedded and written, chunks that disappeared are deleted,
+and chunks that only moved (chunk_index, character offsets) get their
+metadata rewritten without being re-embedded.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+MANIFEST_FILE = "ingest_manifest.db"
+# Hex digits of the chunk text hash used in chunk ids (64 bits)
+CHUNK_HASH_CHARS = 16
+
+
+def content_hash(value: str | dict | list) -> str:
+    """sha256 of a text, or of a JSON-serialisable value in canonical form"""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(value.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+def chunk_ids(source: str, texts: list[str]) -> list[str]:
+    """Deterministic ids for a document's chunks: source plus a hash of the chunk text
+
+    Repeated texts within one document get a _1, _2 ... suffix in order of
+    appearance. Position is deliberately not part of the id, so inserting a
+    paragraph only adds ids instead of renaming every chunk after it.
+    """
+    seen: dict[str, int] = {}
+    ids = []
+    for text in texts:
+        digest = content_hash(text)[:CHUNK_HASH_CHARS]
+        n = seen.get(digest, 0)
+        seen[digest] = n + 1
+        ids.append(f"{source}_{digest}" if n == 0 else f"{source}_{digest}_{n}")
+    return ids
+
+
+@dataclass
+class ManifestEntry:
+    """What one source contributed to a collection at its last ingestion"""
+    document_hash: str
+    params_hash: str  # chunk size/overlap and request metadata
+    embedding_model: str
+    chunks: dict[str, str] = field(default_factory=dict)  # chunk id -> metadata hash, in document order
+
+
+@dataclass
+class IngestPlan:
+    """The writes that bring a collection in line with a new version of one source"""
+    collection: str
+    source: str
+    entry: ManifestEntry  # committed to the manifest once the writes succeed
+    ids: list[str]
+    documents: list[str]
+    metadatas: list[dict[str, Any]]
+    added: list[int] = field(default_factory=list)  # positions to embed and write
+    updated: list[int] = field(default_factory=list)  # positions whose metadata changed, text didn't
+    stale: list[str] = field(default_factory=list)  # chunk ids to delete
+    unchanged: bool = False  # the whole document matched its manifest entry
+    pending: int = 0  # added chunks not yet written, for callers that write in batches
+
+    @property
+    def kept(self) -> int:
+        """Chunks already stored that are reused as they are"""
+        return len(self.ids) - len(self.added) - len(self.updated)
+
+
+class IngestManifest:
+    """SQLite table of ManifestEntry rows keyed by (collection, source)"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                collection TEXT NOT NULL,
+                source TEXT NOT NULL,
+                document_hash TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                embedding_model TEXT NOT NULL,
+                chunks TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (collection, source)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, collection: str, source: str) -> ManifestEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_hash, params_hash, embedding_model, chunks FROM sources "
+                "WHERE collection = ? AND source = ?",
+                (collection, source),
+            ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(row[0], row[1], row[2], json.loads(row[3]))
+
+    def put(self, collection: str, source: str, entry: ManifestEntry) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources "
+                "(collection, source, document_hash, params_hash, embedding_model, chunks, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (collection, source, entry.document_hash, entry.params_hash, entry.embedding_model,
+                 json.dumps(entry.chunks), time.time()),
+            )
+
+    def forget(self, collection: str) -> None:
+        """Drop every entry of a collection"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sources WHERE collection = ?", (collection,))
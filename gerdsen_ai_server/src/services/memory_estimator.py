@@ -0,0 +1,197 @@
+"""
+Model memory estimation for load admission
+
+Estimates what a model will actually need once loaded instead of scaling
+the directory size on disk (which counts tokenizer files, READMEs and
+duplicate weight formats):
+
+- weights: exact tensor bytes by dtype from the safetensors/GGUF headers
+- KV cache: 2 x layers x KV heads x head dim x bytes per element for every
+  token of the configured context length, times the number of concurrent
+  sequences
+- runtime overhead: measured RSS growth beyond the weights on earlier loads
+  of the same model, otherwise a learned or default fraction of the weights
+"""
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from ..config.settings import settings
+from .model_index import ModelIndexEntry
+
+GB = 1024 ** 3
+DEFAULT_REQUIRED_GB = 4.0  # models we know nothing about (not on disk yet)
+DEFAULT_OVERHEAD_FRACTION = 0.10
+MIN_OVERHEAD_BYTES = 256 * 1024 ** 2
+
+
+@dataclass
+class MemoryEstimate:
+    """Projected memory for one model at a given context length and concurrency"""
+    model_id: str
+    source: str  # headers, disk_size or default
+    weights_bytes: int
+    kv_cache_bytes: int
+    overhead_bytes: int
+    context_length: int
+    concurrency: int
+    kv_bytes_per_token: int = 0
+    overhead_measured: bool = False
+    bytes_by_dtype: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_bytes(self) -> int:
+        return self.weights_bytes + self.kv_cache_bytes + self.overhead_bytes
+
+    @property
+    def required_gb(self) -> float:
+        return self.total_bytes / GB
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "weights_gb": self.weights_bytes / GB,
+            "kv_cache_gb": self.kv_cache_bytes / GB,
+            "overhead_gb": self.overhead_bytes / GB,
+            "required_gb": self.required_gb,
+        }
+
+
+class MemoryEstimator:
+    """Estimates load-time memory and learns runtime overhead from real loads"""
+
+    def __init__(self, profile_path: Path | None = None):
+        self.profile_path = profile_path or settings.model.cache_dir / "memory_profile.json"
+        self._lock = threading.Lock()
+        self._profile: dict[str, Any] | None = None
+
+    def _load_profile(self) -> dict[str, Any]:
+        if self._profile is None:
+            try:
+                with open(self.profile_path) as f:
+                    self._profile = json.load(f)
+            except FileNotFoundError:
+                self._profile = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Discarding unreadable memory profile {self.profile_path}: {e}")
+                self._profile = {}
+            self._profile.setdefault("models", {})
+        return self._profile
+
+    def estimate(self, model_id: str, entry: ModelIndexEntry | None, context_length: int | None = None,
+                 concurrency: int | None = None) -> MemoryEstimate:
+        """
+        Estimate the memory needed to serve model_id
+
+        Args:
+            model_id: Model identifier (used for measured overhead)
+            entry: Model index entry, or None when the model isn't on disk
+            context_length: Tokens per sequence (default IMPETUS_ADMISSION_CONTEXT_LENGTH,
+                capped at the model's maximum)
+            concurrency: Concurrent sequences (default IMPETUS_ADMISSION_CONCURRENCY)
+        """
+        context_length = context_length or settings.model.admission_context_length
+        concurrency = max(1, concurrency or settings.model.admission_concurrency)
+
+        if entry is None:
+            return MemoryEstimate(model_id, "default", int(DEFAULT_REQUIRED_GB * GB), 0, 0,
+                                  context_length, concurrency)
+
+        # MLX loads safetensors when both formats are present
+        if entry.weight_bytes.get("safetensors"):
+            source, weights_bytes = "headers", entry.weight_bytes["safetensors"]
+        elif entry.weight_bytes.get("gguf"):
+            source, weights_bytes = "headers", entry.weight_bytes["gguf"]
+        else:
+            # No parsable headers; fall back to what's on disk
+            source, weights_bytes = "disk_size", entry.gguf_size_bytes or entry.size_bytes
+
+        arch = entry.architecture
+        kv_bytes_per_token = 0
+        if arch:
+            if arch.get("max_context"):
+                context_length = min(context_length, arch["max_context"])
+            kv_bytes_per_token = (2 * arch["num_layers"] * arch["num_kv_heads"] * arch["head_dim"]
+                                  * settings.model.kv_cache_bytes_per_element)
+        kv_cache_bytes = kv_bytes_per_token * context_length * concurrency
+
+        overhead_bytes, measured = self._overhead(model_id, weights_bytes)
+        return MemoryEstimate(
+            model_id=model_id,
+            source=source,
+            weights_bytes=weights_bytes,
+            kv_cache_bytes=kv_cache_bytes,
+            overhead_bytes=overhead_bytes,
+            context_length=context_length,
+            concurrency=concurrency,
+            kv_bytes_per_token=kv_bytes_per_token,
+            overhead_measured=measured,
+            bytes_by_dtype=dict(entry.bytes_by_dtype),
+        )
+
+    def _overhead(self, model_id: str, weights_bytes: int) -> tuple[int, bool]:
+        with self._lock:
+            profile = self._load_profile()
+            measured = profile["models"].get(model_id)
+            if measured is not None:
+                return int(measured["overhead_bytes"]), True
+            fraction = profile.get("overhead_fraction", DEFAULT_OVERHEAD_FRACTION)
+        return max(MIN_OVERHEAD_BYTES, int(weights_bytes * fraction)), False
+
+    def admit(self, estimate: MemoryEstimate, available_bytes: int) -> bool:
+        """Whether the estimate fits in available memory after the configured headroom"""
+        budget = available_bytes - settings.model.admission_headroom_gb * GB
+        if settings.model.max_memory_gb:
+            budget = min(budget, settings.model.max_memory_gb * GB)
+        return estimate.total_bytes <= budget
+
+    def record_load(self, estimate: MemoryEstimate, rss_delta_bytes: int):
+        """
+        Learn runtime overhead from a completed load
+
+        The overhead is the RSS growth beyond the weights; KV cache isn't
+        allocated at load time. The model's own measurement is kept, and an
+        average fraction of weights is maintained for models not loaded yet.
+
+        Samples where RSS grew by less than the weights are skipped: the
+        weights weren't resident yet (MLX evaluates lazily, mmap pages fault
+        in on first use), so the difference says nothing about overhead.
+        """
+        if estimate.source == "default" or estimate.weights_bytes <= 0:
+            return
+        if rss_delta_bytes < estimate.weights_bytes:
+            logger.debug(f"Not learning overhead for {estimate.model_id}: RSS grew {rss_delta_bytes} bytes, "
+                         f"less than its {estimate.weights_bytes} bytes of weights")
+            return
+        overhead = rss_delta_bytes - estimate.weights_bytes
+        with self._lock:
+            profile = self._load_profile()
+            profile["models"][estimate.model_id] = {
+                "overhead_bytes": overhead,
+                "weights_bytes": estimate.weights_bytes,
+                "rss_delta_bytes": rss_delta_bytes,
+            }
+            fractions = [m["overhead_bytes"] / m["weights_bytes"] for m in profile["models"].values()
+                         if m["weights_bytes"] > 0]
+            profile["overhead_fraction"] = sum(fractions) / len(fractions)
+            self._save(profile)
+
+    def _save(self, profile: dict[str, Any]):
+        try:
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.profile_path.with_suffix(self.profile_path.suffix + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(profile, f)
+            os.replace(tmp_path, self.profile_path)
+        except OSError as e:
+            logger.warning(f"Failed to persist memory profile: {e}")
+
+
+# Global memory estimator instance
+memory_estimator = MemoryEstimator()
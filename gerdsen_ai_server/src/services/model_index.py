@@ -0,0 +1,519 @@
+"""
+Persistent index of the local models directory
+
+Listing models used to walk every model directory with rglob() and stat()
+every file on each request. The index scans a model directory once, records
+its size, format, config and safetensors/GGUF header summary, and persists
+the result as JSON under the cache directory.
+
+Freshness is checked per listing with one stat() of each model directory and
+its config.json: adding, removing or renaming files changes the directory
+mtime and triggers a rescan of that model only. On Linux an optional inotify
+watcher (IMPETUS_MODEL_INDEX_WATCH) marks models dirty as files change, so
+listings become pure in-memory lookups.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from ..config.settings import settings
+
+INDEX_VERSION = 2
+WEIGHT_SUFFIXES = (".safetensors", ".gguf", ".npz", ".bin", ".pt")
+
+# inotify(7) event bits
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_MODEL_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ATTRIB | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class ModelIndexEntry:
+    """Cached description of one model directory"""
+    model_id: str
+    path: str
+    format: str  # mlx, gguf or unknown
+    size_bytes: int
+    file_count: int
+    weight_files: list[str] = field(default_factory=list)
+    gguf_size_bytes: int = 0  # size of the first GGUF file, used as the GGUF model size
+    config: dict[str, Any] | None = None
+    tensor_count: int = 0
+    parameter_count: int = 0
+    bytes_by_dtype: dict[str, int] = field(default_factory=dict)
+    weight_bytes: dict[str, int] = field(default_factory=dict)  # header-exact tensor bytes per format
+    architecture: dict[str, int] = field(default_factory=dict)  # layer/head dims for KV-cache sizing
+    dir_mtime_ns: int = 0
+    config_mtime_ns: int = 0
+    indexed_at: float = 0.0
+
+    @property
+    def size_gb(self) -> float:
+        return self.size_bytes / (1024 ** 3)
+
+    @property
+    def name(self) -> str:
+        if self.config and isinstance(self.config.get("name"), str):
+            return self.config["name"]
+        return self.model_id
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ModelIndexEntry":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+def model_dir_name(model_id: str) -> str:
+    """Directory a model lives in under models_dir; hub IDs (org/name) map to org_name
+
+    Raises ValueError for IDs that would escape models_dir ('..', dotfiles,
+    backslashes) instead of joining them onto it.
+    """
+    name = model_id.replace('/', '_')
+    if not name or name.startswith('.') or '\\' in name or '\0' in name:
+        raise ValueError(f"Invalid model id: {model_id!r}")
+    return name
+
+
+def resolve_model_dir(models_dir: Path, model_id: str) -> Path:
+    """Local directory for model_id, resolved the same way downloads are stored"""
+    return models_dir / model_dir_name(model_id)
+
+
+def _stat_signature(model_dir: Path) -> tuple[int, int]:
+    """(directory mtime, config.json mtime) in ns; config is 0 when absent"""
+    dir_mtime = model_dir.stat().st_mtime_ns
+    try:
+        config_mtime = (model_dir / "config.json").stat().st_mtime_ns
+    except OSError:
+        config_mtime = 0
+    return dir_mtime, config_mtime
+
+
+def read_safetensors_header(path: Path) -> dict[str, Any]:
+    """Parse only the JSON header of a safetensors file"""
+    with open(path, 'rb') as f:
+        prefix = f.read(8)
+        if len(prefix) < 8:
+            raise ValueError("truncated safetensors header")
+        header_size = struct.unpack('<Q', prefix)[0]
+        if header_size > path.stat().st_size - 8:
+            raise ValueError("safetensors header exceeds file size")
+        return json.loads(f.read(header_size))
+
+
+def scan_model_dir(model_dir: Path) -> ModelIndexEntry:
+    """Walk one model directory and summarize its files and weight headers"""
+    dir_mtime, config_mtime = _stat_signature(model_dir)
+    size_bytes = 0
+    file_count = 0
+    weight_files = []
+    for path in model_dir.rglob("*"):
+        if path.is_file():
+            size_bytes += path.stat().st_size
+            file_count += 1
+            if path.suffix in WEIGHT_SUFFIXES:
+                weight_files.append(str(path.relative_to(model_dir)))
+    weight_files.sort()
+
+    entry = ModelIndexEntry(
+        model_id=model_dir.name,
+        path=str(model_dir),
+        format="unknown",
+        size_bytes=size_bytes,
+        file_count=file_count,
+        weight_files=weight_files,
+        dir_mtime_ns=dir_mtime,
+        config_mtime_ns=config_mtime,
+        indexed_at=time.time(),
+    )
+
+    if config_mtime:
+        entry.format = "mlx"
+        try:
+            with open(model_dir / "config.json") as f:
+                entry.config = json.load(f)
+            entry.architecture = _architecture_from_config(entry.config)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Unreadable config.json in {model_dir}: {e}")
+
+    gguf_files = sorted(model_dir.glob("*.gguf"))
+    if gguf_files:
+        entry.format = "gguf"
+        entry.gguf_size_bytes = gguf_files[0].stat().st_size
+
+    # Sharded checkpoints list their shards; other safetensors files (e.g. a
+    # consolidated copy of the same weights) aren't loaded and aren't counted
+    shards = _indexed_shards(model_dir)
+    for relative in weight_files:
+        path = model_dir / relative
+        try:
+            if path.suffix == ".safetensors" and (shards is None or relative in shards):
+                _add_safetensors_summary(entry, path)
+            elif gguf_files and path == gguf_files[0]:
+                # Several GGUF files are alternative quantizations; the first is the one listed
+                _add_gguf_summary(entry, path)
+        except Exception as e:
+            # Partial downloads and placeholder files are listed without a tensor summary
+            logger.debug(f"Skipping weight header of {path}: {e}")
+
+    return entry
+
+
+def _indexed_shards(model_dir: Path) -> set[str] | None:
+    try:
+        with open(model_dir / "model.safetensors.index.json") as f:
+            return set(json.load(f)["weight_map"].values())
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _architecture_from_config(config: dict) -> dict[str, int]:
+    """Dimensions that size the KV cache, from a Hugging Face style config"""
+    config = {**config.get("text_config", {}), **config}
+    layers = config.get("num_hidden_layers") or config.get("n_layer") or config.get("num_layers")
+    heads = config.get("num_attention_heads") or config.get("n_head")
+    hidden = config.get("hidden_size") or config.get("n_embd")
+    if not layers or not heads or not hidden:
+        return {}
+    return {
+        "num_layers": int(layers),
+        "num_kv_heads": int(config.get("num_key_value_heads") or heads),
+        "head_dim": int(config.get("head_dim") or hidden // heads),
+        "max_context": int(config.get("max_position_embeddings") or config.get("n_positions") or 0),
+    }
+
+
+def _architecture_from_gguf(metadata: dict) -> dict[str, int]:
+    arch = metadata.get("general.architecture")
+    layers = metadata.get(f"{arch}.block_count")
+    heads = metadata.get(f"{arch}.attention.head_count")
+    hidden = metadata.get(f"{arch}.embedding_length")
+    if not layers or not heads or not hidden:
+        return {}
+    return {
+        "num_layers": int(layers),
+        "num_kv_heads": int(metadata.get(f"{arch}.attention.head_count_kv") or heads),
+        "head_dim": int(metadata.get(f"{arch}.attention.key_length") or hidden // heads),
+        "max_context": int(metadata.get(f"{arch}.context_length") or 0),
+    }
+
+
+def _add_safetensors_summary(entry: ModelIndexEntry, path: Path):
+    header = read_safetensors_header(path)
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        start, end = info["data_offsets"]
+        n_elements = 1
+        for dim in info["shape"]:
+            n_elements *= dim
+        entry.tensor_count += 1
+        entry.parameter_count += n_elements
+        entry.bytes_by_dtype[info["dtype"]] = entry.bytes_by_dtype.get(info["dtype"], 0) + (end - start)
+        entry.weight_bytes["safetensors"] = entry.weight_bytes.get("safetensors", 0) + (end - start)
+
+
+def _add_gguf_summary(entry: ModelIndexEntry, path: Path):
+    from ..utils.gguf_reader import GGUFReader
+
+    with GGUFReader(path) as reader:
+        for info in reader.tensors.values():
+            entry.tensor_count += 1
+            entry.parameter_count += info.n_elements
+            entry.bytes_by_dtype[info.type_name] = entry.bytes_by_dtype.get(info.type_name, 0) + info.nbytes
+            entry.weight_bytes["gguf"] = entry.weight_bytes.get("gguf", 0) + info.nbytes
+        if not entry.architecture:
+            entry.architecture = _architecture_from_gguf(reader.metadata)
+
+
+class _InotifyWatcher:
+    """Marks models dirty from inotify events on the models directory (Linux only)"""
+
+    def __init__(self, index: "ModelIndex", models_dir: Path, libc):
+        self._index = index
+        self._libc = libc
+        self.models_dir = models_dir
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: dict[int, str | None] = {}  # wd -> model id, None for the root
+        self._stop = threading.Event()
+        self._add_watch(models_dir, None, _ROOT_MASK)
+        for child in models_dir.iterdir():
+            if child.is_dir():
+                self._add_watch(child, child.name, _MODEL_MASK)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="model-index-watch")
+        self._thread.start()
+
+    def _add_watch(self, path: Path, model_id: str | None, mask: int):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            logger.warning(f"inotify_add_watch failed for {path}: errno {ctypes.get_errno()}")
+            return
+        self._watches[wd] = model_id
+
+    def _run(self):
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._fd], [], [], 0.5)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                break
+            self._handle(data)
+
+    def _handle(self, data: bytes):
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + name_len].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + name_len
+
+            if mask & IN_Q_OVERFLOW:
+                self._index.invalidate(models_dir=self.models_dir)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if wd not in self._watches:
+                continue
+
+            model_id = self._watches[wd]
+            if model_id is None:
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    self._index.invalidate(models_dir=self.models_dir)
+                    continue
+                child = os.fsdecode(name)
+                if mask & (IN_CREATE | IN_MOVED_TO) and (self.models_dir / child).is_dir():
+                    self._add_watch(self.models_dir / child, child, _MODEL_MASK)
+                self._index.invalidate(child, models_dir=self.models_dir)
+            else:
+                self._index.invalidate(model_id, models_dir=self.models_dir)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+        os.close(self._fd)
+
+
+class ModelIndex:
+    """On-disk index of model directories with incremental refresh"""
+
+    def __init__(self, index_path: Path | None = None):
+        self.index_path = index_path or settings.model.cache_dir / "model_index.json"
+        self._lock = threading.RLock()
+        self._entries: dict[str, dict[str, ModelIndexEntry]] = {}  # models dir -> model id -> entry
+        self._dirty: dict[str, set[str] | None] = {}  # None = whole directory
+        self._loaded = False
+        self._watcher: _InotifyWatcher | None = None
+        self.stats = {"scans": 0, "hits": 0, "validations": 0}
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return
+            for root, entries in data.get("directories", {}).items():
+                self._entries[root] = {
+                    model_id: ModelIndexEntry.from_dict(entry) for model_id, entry in entries.items()
+                }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Discarding unreadable model index {self.index_path}: {e}")
+
+    def _save(self):
+        # Forget directories that no longer exist, e.g. old test or scratch roots
+        directories = {
+            root: {model_id: asdict(entry) for model_id, entry in entries.items()}
+            for root, entries in self._entries.items() if Path(root).is_dir()
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({"version": INDEX_VERSION, "directories": directories}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Failed to persist model index: {e}")
+
+    def _is_watched(self, root: str) -> bool:
+        return self._watcher is not None and str(self._watcher.models_dir) == root
+
+    def entries(self, models_dir: Path) -> list[ModelIndexEntry]:
+        """All model directories under models_dir, rescanning only the changed ones"""
+        if not models_dir.exists():
+            return []
+
+        root = str(models_dir)
+        with self._lock:
+            self._load()
+            cached = self._entries.setdefault(root, {})
+            dirty = self._dirty.pop(root, set())
+
+            if self._is_watched(root) and dirty is not None:
+                # The watcher reports every change; only dirty models need a look
+                changed = False
+                for model_id in dirty:
+                    changed |= self._refresh_one(models_dir / model_id, cached)
+                self.stats["hits"] += len(cached) - len(dirty)
+                if changed:
+                    self._save()
+                return sorted(cached.values(), key=lambda e: e.model_id)
+
+            changed = False
+            seen = set()
+            for model_dir in models_dir.iterdir():
+                if not model_dir.is_dir():
+                    continue
+                seen.add(model_dir.name)
+                changed |= self._refresh_one(model_dir, cached)
+            for model_id in set(cached) - seen:
+                del cached[model_id]
+                changed = True
+            if changed:
+                self._save()
+            return sorted(cached.values(), key=lambda e: e.model_id)
+
+    def get(self, models_dir: Path, model_id: str) -> ModelIndexEntry | None:
+        """Entry for one model, or None if its directory doesn't exist"""
+        model_dir = models_dir / model_id
+        if not model_dir.exists() or not model_dir.is_dir():
+            return None
+
+        root = str(models_dir)
+        with self._lock:
+            self._load()
+            cached = self._entries.setdefault(root, {})
+            dirty = self._dirty.get(root, set())
+            if self._is_watched(root) and model_id in cached and dirty is not None and model_id not in dirty:
+                self.stats["hits"] += 1
+                return cached[model_id]
+            if dirty:
+                dirty.discard(model_id)
+            if self._refresh_one(model_dir, cached):
+                self._save()
+            return cached.get(model_id)
+
+    def _refresh_one(self, model_dir: Path, cached: dict[str, ModelIndexEntry]) -> bool:
+        """Rescan model_dir if its stat signature changed. Returns True if the index changed."""
+        model_id = model_dir.name
+        try:
+            signature = _stat_signature(model_dir)
+        except OSError:
+            return cached.pop(model_id, None) is not None
+
+        entry = cached.get(model_id)
+        self.stats["validations"] += 1
+        if entry and (entry.dir_mtime_ns, entry.config_mtime_ns) == signature:
+            self.stats["hits"] += 1
+            return False
+
+        try:
+            cached[model_id] = scan_model_dir(model_dir)
+        except OSError as e:
+            logger.warning(f"Failed to index {model_dir}: {e}")
+            return cached.pop(model_id, None) is not None
+        self.stats["scans"] += 1
+        return True
+
+    def invalidate(self, model_id: str | None = None, models_dir: Path | None = None):
+        """Force a rescan of one model, or of every model when model_id is None"""
+        root = str(models_dir or settings.model.models_dir)
+        with self._lock:
+            if model_id is None:
+                self._dirty[root] = None
+                self._entries[root] = {}
+            else:
+                dirty = self._dirty.setdefault(root, set())
+                if dirty is not None:
+                    dirty.add(model_id)
+                if root in self._entries:
+                    self._entries[root].pop(model_id, None)
+
+    def refresh(self, models_dir: Path | None = None, force: bool = False) -> list[ModelIndexEntry]:
+        """Bring the index up to date, rescanning everything when force is set"""
+        models_dir = models_dir or settings.model.models_dir
+        if force:
+            self.invalidate(models_dir=models_dir)
+        return self.entries(models_dir)
+
+    def start_watcher(self, models_dir: Path | None = None) -> bool:
+        """Watch models_dir with inotify. Returns False where inotify isn't available."""
+        models_dir = models_dir or settings.model.models_dir
+        if self._watcher is not None:
+            return True
+        libc = _load_libc()
+        if libc is None or not models_dir.is_dir():
+            return False
+        try:
+            watcher = _InotifyWatcher(self, models_dir, libc)
+        except OSError as e:
+            logger.warning(f"Model index watcher unavailable: {e}")
+            return False
+        with self._lock:
+            # Changes made before the watch was set up are caught by one full validation
+            self._dirty[str(models_dir)] = None
+            self._watcher = watcher
+        logger.info(f"Watching {models_dir} for model changes")
+        return True
+
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "index_path": str(self.index_path),
+                "watching": str(self._watcher.models_dir) if self._watcher else None,
+                "directories": {root: len(entries) for root, entries in self._entries.items()},
+            }
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1  # noqa: B018
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+# Global model index instance
+model_index = ModelIndex()
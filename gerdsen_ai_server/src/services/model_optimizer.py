@@ -0,0 +1,444 @@
+"""
+Model Optimizer Service - Converts FP16/BF16 checkpoints to group-quantized weights
+
+Linear and embedding weights are quantized with MLX's affine scheme: each
+group of group_size input columns gets a scale and bias, values are stored
+as bits-wide integers packed little-end first into uint32 words, and
+
+    w ~= q * scale + bias
+
+The output is a sharded safetensors checkpoint with a quantization entry in
+config.json, the layout mlx_lm loads directly. Tensors are quantized in a
+process pool; each worker reads its own tensor from the source file, so only
+the tensors in flight are held in memory. The shard layout is computed from
+the source headers up front, which lets results stream straight to disk.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from ..config.settings import settings
+from ..utils.dtype_decode import decode_tensor, needs_decode
+from ..utils.mmap_loader import MemoryMappedLoader
+from .model_index import read_safetensors_header, resolve_model_dir
+
+SUPPORTED_BITS = (4, 8)
+SUPPORTED_SOURCE_DTYPES = ("F32", "F16", "BF16")
+WEIGHT_FILES = (".safetensors", ".gguf", ".bin", ".pt", ".pth", ".npz")
+
+
+class OptimizationStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class OptimizationJob:
+    """Quantization job information"""
+    job_id: str
+    model_id: str
+    bits: int
+    group_size: int
+    output_id: str
+    status: OptimizationStatus
+    progress: float = 0.0
+    tensors_done: int = 0
+    tensors_total: int = 0
+    error: str | None = None
+    report: dict[str, Any] | None = None
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "model_id": self.model_id,
+            "output_id": self.output_id,
+            "bits": self.bits,
+            "group_size": self.group_size,
+            "status": self.status.value,
+            "progress": self.progress,
+            "tensors_done": self.tensors_done,
+            "tensors_total": self.tensors_total,
+            "error": self.error,
+            "report": self.report,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+        }
+
+
+class OptimizationError(Exception):
+    """Raised when a checkpoint can't be quantized"""
+    pass
+
+
+def quantize_weight(weight: np.ndarray, bits: int, group_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Affine group quantization of a 2-D float weight
+
+    Returns:
+        (packed uint32 of shape (rows, cols * bits / 32),
+         float16 scales and biases of shape (rows, cols / group_size))
+    """
+    rows, cols = weight.shape
+    groups = weight.reshape(rows, cols // group_size, group_size).astype(np.float32)
+    w_min = groups.min(axis=2)
+    w_max = groups.max(axis=2)
+    levels = (1 << bits) - 1
+
+    scales = ((w_max - w_min) / levels).astype(np.float16)
+    biases = w_min.astype(np.float16)
+    # Quantize against the float16 values that will be stored, so dequantization matches exactly
+    safe_scales = np.where(scales == 0, 1, scales).astype(np.float32)
+    q = np.rint((groups - biases.astype(np.float32)[..., None]) / safe_scales[..., None])
+    q = np.clip(q, 0, levels).astype(np.uint32).reshape(rows, cols)
+
+    per_word = 32 // bits
+    q = q.reshape(rows, cols // per_word, per_word)
+    shifts = (np.arange(per_word, dtype=np.uint32) * bits)
+    packed = np.bitwise_or.reduce(q << shifts, axis=2).astype(np.uint32)
+    return packed, scales, biases
+
+
+def dequantize_weight(packed: np.ndarray, scales: np.ndarray, biases: np.ndarray, bits: int,
+                      group_size: int) -> np.ndarray:
+    """Inverse of quantize_weight, as float32"""
+    rows = packed.shape[0]
+    per_word = 32 // bits
+    shifts = (np.arange(per_word, dtype=np.uint32) * bits)
+    q = ((packed[..., None] >> shifts) & ((1 << bits) - 1)).reshape(rows, -1, group_size)
+    w = q.astype(np.float32) * scales.astype(np.float32)[..., None] + biases.astype(np.float32)[..., None]
+    return w.reshape(rows, -1)
+
+
+def _read_tensor(path: str, start: int, end: int, dtype: str, shape: list[int]) -> np.ndarray:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    raw = np.frombuffer(data, dtype=MemoryMappedLoader._safetensors_dtype_to_numpy(dtype)).reshape(shape)
+    return decode_tensor(raw, dtype) if needs_decode(dtype) else raw
+
+
+def _quantize_task(path: str, start: int, end: int, dtype: str, shape: list[int], bits: int,
+                   group_size: int) -> tuple[list[np.ndarray], dict[str, float]]:
+    """Process-pool worker: read one tensor, quantize it and measure the reconstruction error"""
+    weight = _read_tensor(path, start, end, dtype, shape).astype(np.float32)
+    packed, scales, biases = quantize_weight(weight, bits, group_size)
+    error = dequantize_weight(packed, scales, biases, bits, group_size) - weight
+    norm = float(np.linalg.norm(weight))
+    stats = {
+        "relative_error": float(np.linalg.norm(error)) / norm if norm > 0 else 0.0,
+        "max_abs_error": float(np.abs(error).max()) if error.size else 0.0,
+    }
+    return [packed, scales, biases], stats
+
+
+@dataclass
+class _SourceTensor:
+    name: str
+    path: str
+    start: int
+    end: int
+    dtype: str
+    shape: list[int]
+    quantize: bool
+    outputs: list[tuple[str, str, list[int], int]] = field(default_factory=list)  # name, dtype, shape, nbytes
+
+    @property
+    def output_bytes(self) -> int:
+        return sum(nbytes for _, _, _, nbytes in self.outputs)
+
+
+class ModelOptimizer:
+    """Runs quantization jobs and tracks their progress"""
+
+    def __init__(self, models_dir: Path | None = None, workers: int | None = None,
+                 shard_bytes: int | None = None):
+        self.models_dir = models_dir or settings.model.models_dir
+        self.workers = workers or settings.model.optimize_workers or min(4, os.cpu_count() or 1)
+        self.shard_bytes = shard_bytes or settings.model.optimize_shard_mb * 1024 * 1024
+        self.jobs: dict[str, OptimizationJob] = {}
+        self.progress_callbacks: dict[str, Callable[[OptimizationJob], None]] = {}
+        self._lock = threading.Lock()
+
+    def create_job(self, model_id: str, bits: int = 4, group_size: int = 64, output_id: str | None = None) -> str:
+        """Validate the request and register a pending job"""
+        if bits not in SUPPORTED_BITS:
+            raise OptimizationError(f"bits must be one of {SUPPORTED_BITS}")
+        if group_size <= 0 or group_size % (32 // bits):
+            raise OptimizationError(f"group_size must be a positive multiple of {32 // bits} for {bits}-bit")
+        source = _model_dir(self.models_dir, model_id)
+        if not source.is_dir() or not any(source.glob("*.safetensors")):
+            raise OptimizationError(f"Model {model_id} has no local safetensors checkpoint")
+        if _source_quantization(source) is not None:
+            raise OptimizationError(f"Model {model_id} is already quantized; start from an unquantized checkpoint")
+
+        output_id = output_id or f"{Path(model_id).name}-{bits}bit"
+        if _model_dir(self.models_dir, output_id).exists():
+            raise OptimizationError(f"Output model {output_id} already exists")
+
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self.jobs[job_id] = OptimizationJob(
+                job_id=job_id, model_id=model_id, bits=bits, group_size=group_size,
+                output_id=output_id, status=OptimizationStatus.PENDING,
+            )
+        logger.info(f"Created optimization job {job_id}: {model_id} -> {output_id} ({bits}-bit, g{group_size})")
+        return job_id
+
+    def register_progress_callback(self, job_id: str, callback: Callable[[OptimizationJob], None]):
+        """Register a callback for progress updates"""
+        self.progress_callbacks[job_id] = callback
+
+    def get_job(self, job_id: str) -> OptimizationJob | None:
+        return self.jobs.get(job_id)
+
+    def get_all_jobs(self) -> dict[str, OptimizationJob]:
+        return self.jobs.copy()
+
+    def _notify(self, job: OptimizationJob):
+        callback = self.progress_callbacks.get(job.job_id)
+        if callback:
+            try:
+                callback(job)
+            except Exception as e:
+                logger.debug(f"Optimization progress callback failed: {e}")
+
+    def _plan(self, source: Path, bits: int, group_size: int) -> list[_SourceTensor]:
+        """Read source headers and decide each tensor's output tensors and sizes"""
+        files = sorted(source.glob("*.safetensors"))
+        try:
+            with open(source / "model.safetensors.index.json") as f:
+                indexed = set(json.load(f)["weight_map"].values())
+            files = [p for p in files if p.name in indexed]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        plan = []
+        for path in files:
+            header = read_safetensors_header(path)
+            base = 8 + _header_length(path)
+            tensors = [(name, info) for name, info in header.items() if name != "__metadata__"]
+            for name, info in sorted(tensors, key=lambda item: item[1]["data_offsets"][0]):
+                start, end = info["data_offsets"]
+                shape = list(info["shape"])
+                quantize = (
+                    name.endswith(".weight") and len(shape) == 2 and shape[1] % group_size == 0
+                    and info["dtype"] in SUPPORTED_SOURCE_DTYPES and "norm" not in name
+                )
+                tensor = _SourceTensor(name, str(path), base + start, base + end, info["dtype"], shape, quantize)
+                if quantize:
+                    rows, cols = shape
+                    prefix = name[:-len(".weight")]
+                    packed_cols = cols * bits // 32
+                    groups = cols // group_size
+                    tensor.outputs = [
+                        (name, "U32", [rows, packed_cols], rows * packed_cols * 4),
+                        (f"{prefix}.scales", "F16", [rows, groups], rows * groups * 2),
+                        (f"{prefix}.biases", "F16", [rows, groups], rows * groups * 2),
+                    ]
+                else:
+                    tensor.outputs = [(name, info["dtype"], shape, end - start)]
+                plan.append(tensor)
+        if not plan:
+            raise OptimizationError(f"No tensors found under {source}")
+        return plan
+
+    def _layout(self, plan: list[_SourceTensor]) -> list[list[_SourceTensor]]:
+        """Group tensors into shards of at most shard_bytes (a tensor's outputs stay together)"""
+        shards, current, size = [], [], 0
+        for tensor in plan:
+            if current and size + tensor.output_bytes > self.shard_bytes:
+                shards.append(current)
+                current, size = [], 0
+            current.append(tensor)
+            size += tensor.output_bytes
+        if current:
+            shards.append(current)
+        return shards
+
+    def run_job(self, job_id: str) -> bool:
+        """Run a job to completion on the calling thread. Returns True on success."""
+        job = self.jobs.get(job_id)
+        if not job:
+            logger.error(f"Optimization job {job_id} not found")
+            return False
+
+        job.status = OptimizationStatus.RUNNING
+        job.started_at = datetime.now()
+        self._notify(job)
+        source = _model_dir(self.models_dir, job.model_id)
+        staging = settings.model.cache_dir / "optimize" / job_id
+        start_time = time.time()
+
+        try:
+            plan = self._plan(source, job.bits, job.group_size)
+            shards = self._layout(plan)
+            job.tensors_total = len(plan)
+            staging.mkdir(parents=True, exist_ok=True)
+
+            errors = self._write_shards(job, shards, staging)
+            self._write_metadata(job, source, staging, shards)
+
+            destination = _model_dir(self.models_dir, job.output_id)
+            shutil.move(str(staging), str(destination))
+
+            source_bytes = sum(t.end - t.start for t in plan)
+            output_bytes = sum(t.output_bytes for t in plan)
+            quantized = [e for e in errors if e is not None]
+            worst = max(quantized, key=lambda e: e["relative_error"]) if quantized else None
+            job.report = {
+                "output_dir": str(destination),
+                "shards": len(shards),
+                "source_weight_bytes": source_bytes,
+                "output_weight_bytes": output_bytes,
+                "compression_ratio": source_bytes / output_bytes if output_bytes else 0.0,
+                "quantized_tensors": len(quantized),
+                "passthrough_tensors": len(plan) - len(quantized),
+                "mean_relative_error": (sum(e["relative_error"] for e in quantized) / len(quantized)
+                                        if quantized else 0.0),
+                "max_relative_error": worst["relative_error"] if worst else 0.0,
+                "worst_tensor": worst["name"] if worst else None,
+                "max_abs_error": max((e["max_abs_error"] for e in quantized), default=0.0),
+                "elapsed_s": time.time() - start_time,
+            }
+            job.status = OptimizationStatus.COMPLETED
+            job.progress = 1.0
+            logger.info(f"Optimization job {job_id} finished: {source_bytes / 1024 ** 3:.2f} GB -> "
+                        f"{output_bytes / 1024 ** 3:.2f} GB, mean relative error "
+                        f"{job.report['mean_relative_error']:.4f}")
+            return True
+
+        except Exception as e:
+            job.status = OptimizationStatus.FAILED
+            job.error = str(e)
+            logger.error(f"Optimization job {job_id} failed: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+
+        finally:
+            job.completed_at = datetime.now()
+            self._notify(job)
+
+    def _write_shards(self, job: OptimizationJob, shards: list[list[_SourceTensor]],
+                      staging: Path) -> list[dict | None]:
+        """Quantize on the process pool and stream results into the pre-laid-out shards"""
+        errors: list[dict | None] = []
+        max_inflight = self.workers * 2
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for index, shard in enumerate(shards):
+                header, offset = {}, 0
+                for tensor in shard:
+                    for name, dtype, shape, nbytes in tensor.outputs:
+                        header[name] = {"dtype": dtype, "shape": shape, "data_offsets": [offset, offset + nbytes]}
+                        offset += nbytes
+                header["__metadata__"] = {"format": "mlx"}
+                header_bytes = json.dumps(header).encode()
+                header_bytes += b" " * (-(8 + len(header_bytes)) % 8)
+
+                path = staging / _shard_name(index, len(shards))
+                with open(path, 'wb') as f:
+                    f.write(len(header_bytes).to_bytes(8, "little") + header_bytes)
+                    pending: deque = deque()
+                    for tensor in shard:
+                        if tensor.quantize:
+                            pending.append((tensor, pool.submit(
+                                _quantize_task, tensor.path, tensor.start, tensor.end, tensor.dtype,
+                                tensor.shape, job.bits, job.group_size,
+                            )))
+                        else:
+                            pending.append((tensor, None))
+                        while len(pending) > max_inflight:
+                            errors.append(self._write_result(job, f, *pending.popleft()))
+                    while pending:
+                        errors.append(self._write_result(job, f, *pending.popleft()))
+        return errors
+
+    def _write_result(self, job: OptimizationJob, f, tensor: _SourceTensor, future) -> dict | None:
+        if future is None:
+            # Passthrough tensors keep their stored bytes (bf16 words included)
+            with open(tensor.path, 'rb') as src:
+                src.seek(tensor.start)
+                f.write(src.read(tensor.end - tensor.start))
+            stats = None
+        else:
+            arrays, stats = future.result()
+            for array in arrays:
+                f.write(np.ascontiguousarray(array).tobytes())
+            stats = {**stats, "name": tensor.name}
+
+        job.tensors_done += 1
+        job.progress = job.tensors_done / job.tensors_total
+        self._notify(job)
+        return stats
+
+    def _write_metadata(self, job: OptimizationJob, source: Path, staging: Path,
+                        shards: list[list[_SourceTensor]]):
+        """Shard index, quantized config.json and the non-weight files of the source"""
+        weight_map, total = {}, 0
+        for index, shard in enumerate(shards):
+            for tensor in shard:
+                for name, _, _, nbytes in tensor.outputs:
+                    weight_map[name] = _shard_name(index, len(shards))
+                    total += nbytes
+        with open(staging / "model.safetensors.index.json", 'w') as f:
+            json.dump({"metadata": {"total_size": total}, "weight_map": weight_map}, f, indent=2)
+
+        for path in source.iterdir():
+            if path.is_file() and path.suffix not in WEIGHT_FILES and path.name != "model.safetensors.index.json":
+                shutil.copy2(path, staging / path.name)
+
+        config_path = staging / "config.json"
+        config = json.loads(config_path.read_text()) if config_path.exists() else {}
+        quantization = {"group_size": job.group_size, "bits": job.bits}
+        config["quantization"] = quantization
+        config["quantization_config"] = quantization
+        config_path.write_text(json.dumps(config, indent=2))
+
+
+def _model_dir(models_dir: Path, model_id: str) -> Path:
+    """Local directory for a model ID (org/name is stored as org_name), as OptimizationError"""
+    try:
+        return resolve_model_dir(models_dir, model_id)
+    except ValueError as e:
+        raise OptimizationError(str(e)) from e
+
+
+def _source_quantization(source: Path) -> dict | None:
+    """Quantization section of a checkpoint's config.json, if it has one"""
+    try:
+        config = json.loads((source / "config.json").read_text())
+    except (OSError, ValueError):
+        return None
+    return config.get("quantization") or config.get("quantization_config")
+
+
+def _header_length(path: Path) -> int:
+    with open(path, 'rb') as f:
+        return int.from_bytes(f.read(8), "little")
+
+
+def _shard_name(index: int, count: int) -> str:
+    return f"model-{index + 1:05d}-of-{count:05d}.safetensors"
+
+
+# Global model optimizer instance
+model_optimizer = ModelOptimizer()
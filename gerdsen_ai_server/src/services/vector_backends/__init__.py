@@ -0,0 +1,11 @@
+"""
+Pluggable storage engines for VectorStoreService
+
+- chroma: ChromaDB PersistentClient (pip install impetus-llm-server[rag])
+- native: memory-mapped float32 matrices with SQLite metadata and an optional
+  HNSW index (hnsw.py), no extra dependencies
+"""
+
+from .base import VectorCollection, VectorStoreBackend
+
+__all__ = ["VectorCollection", "VectorStoreBackend"]
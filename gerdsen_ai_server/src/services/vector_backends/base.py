@@ -0,0 +1,78 @@
+"""
+Vector store backend interface
+
+VectorStoreService embeds texts itself and hands the backend plain float32
+matrices, so a backend only stores vectors with their documents and
+metadata and answers nearest-neighbour queries in cosine distance.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+import numpy as np
+
+
+class VectorCollection(ABC):
+    """One named set of embedded chunks"""
+
+    name: str
+
+    @property
+    @abstractmethod
+    def metadata(self) -> dict[str, Any]:
+        """Collection-level metadata"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored chunks"""
+
+    @abstractmethod
+    def add(self, ids: list[str], documents: list[str], metadatas: list[dict[str, Any]],
+            embeddings: np.ndarray) -> None:
+        """Store chunks; an existing id is replaced"""
+
+    @abstractmethod
+    def update_metadata(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        """Replace the metadata of stored chunks, keeping their documents and vectors"""
+
+    @abstractmethod
+    def query(self, embedding: np.ndarray, n_results: int, where: dict | None = None) -> dict[str, list]:
+        """Nearest chunks to one query vector
+
+        Returns:
+            dict with ids, documents, metadatas and distances (cosine), closest first
+        """
+
+    @abstractmethod
+    def get(self, ids: list[str] | None = None, where: dict | None = None) -> dict[str, list]:
+        """Stored chunks by id and/or metadata filter: dict with ids, documents, metadatas"""
+
+    @abstractmethod
+    def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        """Delete chunks by id and/or metadata filter"""
+
+
+class VectorStoreBackend(ABC):
+    """Storage engine holding a set of collections"""
+
+    name: str
+
+    @abstractmethod
+    def get_or_create_collection(self, name: str) -> VectorCollection:
+        """Open a collection, creating it if needed"""
+
+    @abstractmethod
+    def get_collection(self, name: str) -> VectorCollection:
+        """Open an existing collection
+
+        Raises:
+            ValueError: If the collection does not exist
+        """
+
+    @abstractmethod
+    def list_collections(self) -> list[VectorCollection]:
+        """All collections"""
+
+    @abstractmethod
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and everything in it"""
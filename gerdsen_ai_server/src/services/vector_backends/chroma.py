@@ -0,0 +1,84 @@
+"""
+ChromaDB vector store backend
+"""
+
+from typing import Any
+
+import numpy as np
+
+from .base import VectorCollection, VectorStoreBackend
+
+
+class ChromaCollection(VectorCollection):
+    """Adapter over a chromadb Collection"""
+
+    def __init__(self, collection: Any):
+        self._collection = collection
+        self.name = collection.name
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        return self._collection.metadata or {}
+
+    def count(self) -> int:
+        return self._collection.count()
+
+    def add(self, ids: list[str], documents: list[str], metadatas: list[dict[str, Any]],
+            embeddings: np.ndarray) -> None:
+        self._collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        if ids:
+            self._collection.update(ids=ids, metadatas=metadatas)
+
+    def query(self, embedding: np.ndarray, n_results: int, where: dict | None = None) -> dict[str, list]:
+        kwargs: dict = {"query_embeddings": [embedding], "n_results": n_results}
+        if where:
+            kwargs["where"] = where
+        results = self._collection.query(**kwargs)
+        return {
+            key: (results.get(key) or [[]])[0]
+            for key in ("ids", "documents", "metadatas", "distances")
+        }
+
+    def get(self, ids: list[str] | None = None, where: dict | None = None) -> dict[str, list]:
+        results = self._collection.get(ids=ids, where=where or None, include=["documents", "metadatas"])
+        return {
+            "ids": list(results.get("ids") or []),
+            "documents": list(results.get("documents") or []),
+            "metadatas": list(results.get("metadatas") or []),
+        }
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        kwargs: dict = {}
+        if ids:
+            kwargs["ids"] = ids
+        if where:
+            kwargs["where"] = where
+        self._collection.delete(**kwargs)
+
+
+class ChromaVectorBackend(VectorStoreBackend):
+    """Collections in a chromadb client, using HNSW in cosine space"""
+
+    name = "chroma"
+
+    def __init__(self, client: Any, embedding_fn: Any = None):
+        self._client = client
+        self._embedding_fn = embedding_fn
+
+    def get_or_create_collection(self, name: str) -> ChromaCollection:
+        return ChromaCollection(self._client.get_or_create_collection(
+            name=name,
+            embedding_function=self._embedding_fn,
+            metadata={"hnsw:space": "cosine"},
+        ))
+
+    def get_collection(self, name: str) -> ChromaCollection:
+        return ChromaCollection(self._client.get_collection(name, embedding_function=self._embedding_fn))
+
+    def list_collections(self) -> list[ChromaCollection]:
+        return [self.get_collection(col.name) for col in self._client.list_collections()]
+
+    def delete_collection(self, name: str) -> None:
+        self._client.delete_collection(name)
@@ -0,0 +1,433 @@
+"""
+HNSW approximate nearest-neighbour index for the native vector store
+
+A Hierarchical Navigable Small World graph (Malkov & Yashunin) over the
+unit-length rows of a NativeCollection's vector matrix, searched by cosine
+distance (1 - dot product).
+
+The index is a list of segments, each an independent graph over a
+contiguous range of matrix rows:
+
+- new rows are inserted incrementally into the last (tail) segment until it
+  holds segment_size nodes, after which it is sealed and never changes
+- a query searches every segment and merges their top k
+- a rebuild builds all segments at once on a process pool, one segment per
+  worker, so it scales with cores instead of being one long serial insert
+
+Graphs hold row numbers only; the vectors stay in the collection's
+memory-mapped matrix. Deletes are tombstones: dead rows stay in the graph
+for navigation but are never returned, using the collection's alive mask.
+Each segment persists as .npy arrays that reload with np.load(mmap_mode="r"),
+so opening a large index costs a few page faults rather than a rebuild.
+"""
+
+import heapq
+import json
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Layers above 0 (a node reaches level L with probability M^-L, so 16 is never hit in practice)
+MAX_LEVEL = 16
+INDEX_FILE = "index.json"
+
+
+@dataclass
+class HNSWConfig:
+    """Graph and build parameters (settings.vectorstore.hnsw_*)"""
+
+    m: int = 16                    # links per node per layer (2*m on layer 0)
+    ef_construction: int = 100     # beam width while inserting
+    ef_search: int = 64            # beam width while querying (>= k)
+    min_vectors: int = 50000       # collections smaller than this use exact search
+    segment_size: int = 250000     # nodes per graph segment (unit of parallel rebuild)
+    build_workers: int = 0         # processes for a rebuild, 0 = one per core
+    seed: int = 0
+
+    @property
+    def workers(self) -> int:
+        return self.build_workers if self.build_workers > 0 else (os.cpu_count() or 1)
+
+
+class HNSWGraph:
+    """One HNSW graph over rows [start, start + count) of a vector matrix
+
+    Node ids are local (row - start). Every method that needs vectors takes
+    them as an argument, indexed by local id.
+    """
+
+    def __init__(self, start: int, m: int, ef_construction: int, seed: int = 0, capacity: int = 1024):
+        self.start = start
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.count = 0
+        self.entry = -1
+        self.max_level = -1
+        self.upper_count = 0
+        self.dirty = False
+        self._level_mult = 1.0 / math.log(max(m, 2))
+        self._rng = np.random.default_rng(seed + start)
+
+        self.levels = np.zeros(capacity, dtype=np.int8)
+        self.links0 = np.full((capacity, self.m0), -1, dtype=np.int32)
+        self.upper_slot = np.full(capacity, -1, dtype=np.int32)
+        self.links_upper = np.full((max(capacity // m, 16), MAX_LEVEL, m), -1, dtype=np.int32)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _reserve(self, nodes: int, upper: int) -> None:
+        """Grow (or, after an mmap load, copy into memory) the link arrays"""
+        if nodes > self.levels.shape[0] or not self.levels.flags.writeable:
+            capacity = max(nodes, self.levels.shape[0] * 2, 1024)
+            self.levels = _grown(self.levels, capacity, 0)
+            self.links0 = _grown(self.links0, capacity, -1)
+            self.upper_slot = _grown(self.upper_slot, capacity, -1)
+        if upper > self.links_upper.shape[0] or not self.links_upper.flags.writeable:
+            self.links_upper = _grown(self.links_upper, max(upper, self.links_upper.shape[0] * 2, 16), -1)
+
+    def save(self, path: Path) -> None:
+        """Write the graph to a directory, replacing what was there"""
+        staging = path.with_name(path.name + ".tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        np.save(staging / "levels.npy", self.levels[:self.count])
+        np.save(staging / "links0.npy", self.links0[:self.count])
+        np.save(staging / "upper_slot.npy", self.upper_slot[:self.count])
+        np.save(staging / "links_upper.npy", self.links_upper[:self.upper_count])
+        (staging / "graph.json").write_text(json.dumps({
+            "start": self.start, "count": self.count, "m": self.m, "ef_construction": self.ef_construction,
+            "entry": self.entry, "max_level": self.max_level, "upper_count": self.upper_count,
+        }))
+        shutil.rmtree(path, ignore_errors=True)
+        staging.rename(path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path, seed: int = 0) -> "HNSWGraph":
+        """Map a saved graph read-only; it is copied into memory on the first insert"""
+        header = json.loads((path / "graph.json").read_text())
+        graph = cls(header["start"], header["m"], header["ef_construction"], seed=seed + header["count"], capacity=0)
+        graph.count = header["count"]
+        graph.entry = header["entry"]
+        graph.max_level = header["max_level"]
+        graph.upper_count = header["upper_count"]
+        graph.levels = np.load(path / "levels.npy", mmap_mode="r")
+        graph.links0 = np.load(path / "links0.npy", mmap_mode="r")
+        graph.upper_slot = np.load(path / "upper_slot.npy", mmap_mode="r")
+        graph.links_upper = np.load(path / "links_upper.npy", mmap_mode="r")
+        if graph.links0.shape != (graph.count, graph.m0) or graph.links_upper.shape[0] != graph.upper_count:
+            raise ValueError(f"Corrupt HNSW segment at {path}")
+        return graph
+
+    # ------------------------------------------------------------------
+    # Graph primitives
+    # ------------------------------------------------------------------
+
+    def _links(self, node: int, level: int, limit: int | None = None) -> np.ndarray:
+        """Neighbours of node on a layer; with a limit, only ids below it"""
+        row = self.links0[node] if level == 0 else self.links_upper[self.upper_slot[node], level - 1]
+        if limit is None:
+            return row[row >= 0]
+        return row[(row >= 0) & (row < limit)]
+
+    @staticmethod
+    def _distances(vectors: np.ndarray, query: np.ndarray, nodes) -> np.ndarray:
+        return 1.0 - vectors[nodes] @ query
+
+    def _greedy(self, vectors: np.ndarray, query: np.ndarray, node: int, dist: float, level: int,
+                limit: int | None = None) -> tuple[int, float]:
+        """Walk to the closest node on an upper layer"""
+        while True:
+            links = self._links(node, level, limit)
+            if links.size == 0:
+                return node, dist
+            dists = self._distances(vectors, query, links)
+            best = int(np.argmin(dists))
+            if dists[best] >= dist:
+                return node, dist
+            node, dist = int(links[best]), float(dists[best])
+
+    def _search_layer(self, vectors: np.ndarray, query: np.ndarray, entries: list[tuple[float, int]],
+                      ef: int, level: int, alive: np.ndarray | None = None,
+                      limit: int | None = None) -> list[tuple[float, int]]:
+        """Beam search one layer; returns up to ef (distance, node) pairs, nearest first
+
+        With an alive mask, dead nodes are still expanded but never enter the results.
+        With a limit, links to nodes at or past it are ignored.
+        """
+        visited = {node for _, node in entries}
+        candidates = list(entries)
+        heapq.heapify(candidates)
+        results = [(-d, n) for d, n in entries if alive is None or alive[n]]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            dist, node = heapq.heappop(candidates)
+            if len(results) >= ef and dist > -results[0][0]:
+                break
+            fresh = [n for n in self._links(node, level, limit).tolist() if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for d, n in zip(self._distances(vectors, query, fresh).tolist(), fresh, strict=True):
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    if alive is None or alive[n]:
+                        heapq.heappush(results, (-d, n))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+
+        return sorted((-d, n) for d, n in results)
+
+    @staticmethod
+    def _select(vectors: np.ndarray, candidates: list[tuple[float, int]], m: int) -> list[int]:
+        """Neighbour selection heuristic: prefer candidates that aren't closer to an already chosen neighbour
+
+        Keeps links spread across directions so clusters stay connected;
+        pruned candidates top the list back up to m.
+        """
+        if len(candidates) <= m:
+            return [n for _, n in candidates]
+        nodes = np.array([n for _, n in candidates], dtype=np.int64)
+        dists = np.array([d for d, _ in candidates], dtype=np.float32)
+        candidate_vectors = vectors[nodes]
+        # blocked[i, j]: candidate i is closer to candidate j than to the query
+        blocked = (1.0 - candidate_vectors @ candidate_vectors.T) < dists[:, None]
+
+        chosen: list[int] = []
+        pruned: list[int] = []
+        covered = np.zeros(len(nodes), dtype=bool)
+        for i in range(len(nodes)):
+            if covered[i]:
+                pruned.append(i)
+                continue
+            chosen.append(i)
+            if len(chosen) == m:
+                break
+            covered |= blocked[:, i]
+        chosen.extend(pruned[:m - len(chosen)])
+        return nodes[chosen].tolist()
+
+    def _set_links(self, node: int, level: int, links: list[int]) -> None:
+        width = self.m0 if level == 0 else self.m
+        row = np.full(width, -1, dtype=np.int32)
+        row[:len(links)] = links
+        # One assignment, so a concurrent search never sees a half-written row
+        if level == 0:
+            self.links0[node] = row
+        else:
+            self.links_upper[self.upper_slot[node], level - 1] = row
+
+    def _connect(self, vectors: np.ndarray, node: int, new: int, level: int) -> None:
+        """Add a back-link new -> node, re-selecting node's links when full"""
+        width = self.m0 if level == 0 else self.m
+        links = self._links(node, level)
+        if links.size < width:
+            self._set_links(node, level, [*links.tolist(), new])
+            return
+        candidates = np.append(links, new)
+        dists = self._distances(vectors, vectors[node], candidates)
+        order = np.argsort(dists, kind="stable")
+        self._set_links(node, level, self._select(
+            vectors, list(zip(dists[order].tolist(), candidates[order].tolist(), strict=True)), width
+        ))
+
+    # ------------------------------------------------------------------
+    # Insert / search
+    # ------------------------------------------------------------------
+
+    def insert(self, vectors: np.ndarray) -> None:
+        """Insert the next node (local id == count); vectors must cover it"""
+        node = self.count
+        query = vectors[node]
+        level = min(int(-math.log(1.0 - self._rng.random()) * self._level_mult), MAX_LEVEL)
+
+        self._reserve(node + 1, self.upper_count + (level > 0))
+        self.levels[node] = level
+        self.links0[node] = -1
+        self.upper_slot[node] = -1
+        if level > 0:
+            self.upper_slot[node] = self.upper_count
+            self.links_upper[self.upper_count] = -1
+            self.upper_count += 1
+        # Counted before any back-link makes the node reachable from a concurrent search
+        self.count = node + 1
+        self.dirty = True
+
+        if self.entry < 0:
+            self.entry, self.max_level = node, level
+            return
+
+        entry = self.entry
+        dist = float(self._distances(vectors, query, [entry])[0])
+        for layer in range(self.max_level, level, -1):
+            entry, dist = self._greedy(vectors, query, entry, dist, layer)
+
+        entries = [(dist, entry)]
+        selected = []
+        for layer in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(vectors, query, entries, self.ef_construction, layer)
+            neighbours = self._select(vectors, found, self.m)
+            self._set_links(node, layer, neighbours)
+            selected.append((layer, neighbours))
+            entries = found
+        # Back-links last: a concurrent search that reaches the node finds all of its layers linked
+        for layer, neighbours in selected:
+            for neighbour in neighbours:
+                self._connect(vectors, neighbour, node, layer)
+
+        if level > self.max_level:
+            self.entry, self.max_level = node, level
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, ef: int,
+               alive: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(local ids, distances) of up to k nearest live nodes, nearest first
+
+        Safe against a concurrent insert(): only nodes already counted (and
+        covered by vectors) are visited; back-links to newer nodes are ignored.
+        """
+        # insert() counts a node before it can become the entry point, so read the entry first
+        entry, max_level = self.entry, self.max_level
+        limit = min(self.count, len(vectors))
+        if not 0 <= entry < limit:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        dist = float(self._distances(vectors, query, [entry])[0])
+        # The entry may have changed after max_level was read
+        for layer in range(min(max_level, int(self.levels[entry])), 0, -1):
+            entry, dist = self._greedy(vectors, query, entry, dist, layer, limit)
+        found = self._search_layer(vectors, query, [(dist, entry)], max(ef, k), 0, alive, limit)[:k]
+        return (np.array([n for _, n in found], dtype=np.int64),
+                np.array([d for d, _ in found], dtype=np.float32))
+
+
+def _grown(array: np.ndarray, rows: int, fill: int) -> np.ndarray:
+    grown = np.full((rows, *array.shape[1:]), fill, dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+def _build_segment(vector_file: str, rows: int, dims: int, start: int, stop: int,
+                   params: dict, out_dir: str) -> str:
+    """Process pool worker: build one segment from the mapped vector file and save it"""
+    vectors = np.memmap(vector_file, dtype=np.float32, mode="r", shape=(rows, dims))[start:stop]
+    graph = HNSWGraph(start, params["m"], params["ef_construction"], seed=params["seed"], capacity=stop - start)
+    for _ in range(stop - start):
+        graph.insert(vectors)
+    graph.save(Path(out_dir))
+    return out_dir
+
+
+class HNSWIndex:
+    """Segmented HNSW index over the rows of one vector matrix"""
+
+    def __init__(self, config: HNSWConfig):
+        self.config = config
+        self.segments: list[HNSWGraph] = []
+        self.saved_rows = 0
+
+    @property
+    def rows(self) -> int:
+        """Matrix rows [0, rows) are in the index"""
+        if not self.segments:
+            return 0
+        return self.segments[-1].start + self.segments[-1].count
+
+    def add(self, vectors: np.ndarray, rows: int) -> None:
+        """Insert matrix rows [self.rows, rows)"""
+        while self.rows < rows:
+            tail = self.segments[-1] if self.segments else None
+            if tail is None or tail.count >= self.config.segment_size:
+                tail = HNSWGraph(self.rows, self.config.m, self.config.ef_construction, seed=self.config.seed)
+                self.segments.append(tail)
+            view = vectors[tail.start:rows]
+            for _ in range(min(rows - self.rows, self.config.segment_size - tail.count)):
+                tail.insert(view)
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, alive: np.ndarray,
+               ef: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, similarity scores) of the k best live rows across segments, best first"""
+        ef = max(ef or self.config.ef_search, k)
+        rows: list[np.ndarray] = []
+        dists: list[np.ndarray] = []
+        for segment in list(self.segments):
+            # Not cut at segment.count: the segment may grow while it is searched, and bounds itself
+            local, dist = segment.search(vectors[segment.start:], query, k, ef, alive[segment.start:])
+            rows.append(local + segment.start)
+            dists.append(dist)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        all_rows, all_dists = np.concatenate(rows), np.concatenate(dists)
+        order = np.argsort(all_dists, kind="stable")[:k]
+        return all_rows[order], 1.0 - all_dists[order]
+
+    # ------------------------------------------------------------------
+    # Persistence / rebuild
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """Write changed segments and the index manifest"""
+        path.mkdir(parents=True, exist_ok=True)
+        for i, segment in enumerate(self.segments):
+            if segment.dirty or not (path / f"segment-{i:04d}").exists():
+                segment.save(path / f"segment-{i:04d}")
+        manifest = path / (INDEX_FILE + ".tmp")
+        manifest.write_text(json.dumps({
+            "m": self.config.m, "segment_size": self.config.segment_size,
+            "segments": len(self.segments), "rows": self.rows,
+        }))
+        manifest.replace(path / INDEX_FILE)
+        self.saved_rows = self.rows
+
+    @classmethod
+    def load(cls, path: Path, config: HNSWConfig) -> "HNSWIndex":
+        manifest = json.loads((path / INDEX_FILE).read_text())
+        if manifest["m"] != config.m or manifest["segment_size"] != config.segment_size:
+            raise ValueError(
+                f"HNSW index at {path} was built with m={manifest['m']}, segment_size={manifest['segment_size']}"
+            )
+        index = cls(config)
+        for i in range(manifest["segments"]):
+            segment = HNSWGraph.load(path / f"segment-{i:04d}", seed=config.seed)
+            if segment.start != index.rows:
+                raise ValueError(f"HNSW segment {i} at {path} is not contiguous")
+            index.segments.append(segment)
+        if index.rows != manifest["rows"]:
+            raise ValueError(f"HNSW index at {path} is incomplete")
+        index.saved_rows = index.rows
+        return index
+
+    @classmethod
+    def build(cls, config: HNSWConfig, vector_file: Path, rows: int, dims: int, path: Path) -> "HNSWIndex":
+        """Build segments for matrix rows [0, rows) in parallel and save them under path"""
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        ranges = [(start, min(start + config.segment_size, rows)) for start in range(0, rows, config.segment_size)]
+        jobs = [
+            (str(vector_file), rows, dims, start, stop, asdict(config), str(path / f"segment-{i:04d}"))
+            for i, (start, stop) in enumerate(ranges)
+        ]
+        workers = min(config.workers, len(jobs))
+        logger.info(f"Building HNSW index over {rows} rows: {len(jobs)} segments, {workers} workers")
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_build_segment, *zip(*jobs, strict=True)))
+        else:
+            for job in jobs:
+                _build_segment(*job)
+
+        index = cls(config)
+        index.segments = [HNSWGraph.load(Path(job[-1]), seed=config.seed) for job in jobs]
+        index.save(path)
+        return index
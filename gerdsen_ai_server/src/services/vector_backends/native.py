@@ -0,0 +1,549 @@
+"""
+Native vector store backend: memory-mapped float32 matrices + SQLite metadata
+
+Each collection is a directory holding
+
+- vectors.<generation>.f32: an append-only matrix of unit-length float32
+  rows, memory-mapped for queries
+- chunks.db: SQLite rows mapping each matrix row to its chunk id, document
+  and JSON metadata
+
+- hnsw.<generation>/: an optional HNSW index over the matrix (hnsw.py)
+
+Search is exact by default: one matrix-vector product over the mapped rows,
+then argpartition for the top k. Once a collection with an HNSW config
+reaches min_vectors live rows, a background thread builds the index and
+then keeps inserting new rows into it; unfiltered queries search the graph
+plus an exact scan of any rows it hasn't caught up with yet. Filtered
+queries stay exact over the rows SQLite selects.
+
+Deleted rows are tombstones (their SQLite row is gone and the row is masked
+out of searches) until enough accumulate to compact the matrix into the
+next generation's file, which also rebuilds the index. The vector file is
+written before the SQLite commit that references it, so a crash can leave
+unreferenced rows but never a chunk without its vector. The index is only
+ever behind the matrix, never ahead, and catches up on reopen.
+"""
+
+import json
+import re
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from .base import VectorCollection, VectorStoreBackend
+from .hnsw import HNSWConfig, HNSWIndex
+
+COLLECTION_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,62}$")
+META_FILE = "chunks.db"
+SQLITE_MAX_VARIABLES = 500
+# Compact once tombstones outnumber live rows (and there are enough to matter)
+COMPACT_MIN_DEAD_ROWS = 1024
+# Rows the background indexer inserts between checks for new work, compaction or close
+INDEX_BATCH_ROWS = 1024
+# The index is written to disk once this many inserted rows are unsaved (the rest is caught up on reopen)
+INDEX_SAVE_ROWS = 16384
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def where_to_sql(where: dict[str, Any]) -> tuple[str, list[Any]]:
+    """Translate a Chroma-style metadata filter into a SQLite expression over chunks.metadata
+
+    Supports field equality ({"source": "a.txt"}), the comparison operators
+    $eq/$ne/$gt/$gte/$lt/$lte, $in/$nin, and $and/$or combinations.
+    """
+    clauses: list[str] = []
+    params: list[Any] = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(sub) for sub in condition]
+            if not parts:
+                continue
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, sub_params in parts:
+                params.extend(sub_params)
+            continue
+
+        if '"' in key or key.startswith("$"):
+            raise ValueError(f"Unsupported metadata filter key: {key!r}")
+        path = f'$."{key}"'
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, value in condition.items():
+            if op in _OPERATORS:
+                clauses.append(f"json_extract(metadata, ?) {_OPERATORS[op]} ?")
+                params.extend([path, value])
+            elif op in ("$in", "$nin"):
+                values = list(value)
+                if not values:
+                    clauses.append("0" if op == "$in" else "1")
+                    continue
+                negate = "NOT " if op == "$nin" else ""
+                clauses.append(f"json_extract(metadata, ?) {negate}IN ({','.join('?' * len(values))})")
+                params.extend([path, *values])
+            else:
+                raise ValueError(f"Unsupported metadata filter operator: {op!r}")
+
+    return (" AND ".join(clauses) or "1"), params
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows (cosine similarity becomes a dot product)"""
+    matrix = np.array(matrix, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    matrix /= norms
+    return matrix
+
+
+class NativeCollection(VectorCollection):
+    """One collection directory: memory-mapped vectors, SQLite chunks"""
+
+    def __init__(self, path: Path, name: str, hnsw: HNSWConfig | None = None):
+        self.name = name
+        self.path = path
+        self.hnsw = hnsw
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path / META_FILE), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+        self._dimensions: int | None = None
+        self._generation = 0
+        self._rows = 0
+        self._vectors: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._alive: np.ndarray = np.zeros(0, dtype=bool)
+        self._index: HNSWIndex | None = None
+        self._indexer: threading.Thread | None = None
+        self._closed = False
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _setting(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_setting(self, key: str, value: Any) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def _vector_file(self) -> Path:
+        return self.path / f"vectors.{self._generation}.f32"
+
+    @property
+    def _index_dir(self) -> Path:
+        return self.path / f"hnsw.{self._generation}"
+
+    def _load(self) -> None:
+        dimensions = self._setting("dimensions")
+        self._dimensions = int(dimensions) if dimensions else None
+        self._generation = int(self._setting("generation") or 0)
+
+        # Files from an interrupted compaction are never referenced
+        for stale in self.path.glob("vectors.*.f32"):
+            if stale != self._vector_file:
+                stale.unlink()
+        for stale in self.path.glob("hnsw.*"):
+            if stale != self._index_dir:
+                shutil.rmtree(stale, ignore_errors=True)
+
+        if self._dimensions is None:
+            return
+        row_bytes = self._dimensions * 4
+        size = self._vector_file.stat().st_size if self._vector_file.exists() else 0
+        if size % row_bytes:
+            # Drop a partially written trailing row
+            with open(self._vector_file, "r+b") as f:
+                f.truncate(size - size % row_bytes)
+        self._rows = size // row_bytes
+
+        # Chunks whose vector never reached the file can't be searched
+        self._conn.execute("DELETE FROM chunks WHERE row >= ?", (self._rows,))
+        self._conn.commit()
+        self._alive = np.zeros(self._rows, dtype=bool)
+        live = np.fromiter((row for (row,) in self._conn.execute("SELECT row FROM chunks")), dtype=np.int64)
+        self._alive[live] = True
+        self._map()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if self.hnsw is None:
+            return
+        if self._index_dir.exists():
+            try:
+                self._index = HNSWIndex.load(self._index_dir, self.hnsw)
+                if self._index.rows > self._rows:
+                    raise ValueError("index covers rows missing from the vector file")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Discarding HNSW index for collection '{self.name}': {e}")
+                self._index = None
+                shutil.rmtree(self._index_dir, ignore_errors=True)
+        self._schedule_indexing()
+
+    def _map(self) -> None:
+        if self._rows == 0:
+            self._vectors = np.zeros((0, self._dimensions or 0), dtype=np.float32)
+            return
+        self._vectors = np.memmap(self._vector_file, dtype=np.float32, mode="r",
+                                  shape=(self._rows, self._dimensions))
+
+    def _select_rows(self, ids: list[str] | None, where: dict | None) -> list[tuple]:
+        """(row, id, document, metadata) for chunks matching ids and/or where, in row order"""
+        where_sql, where_params = where_to_sql(where) if where else ("1", [])
+        if ids is None:
+            return self._conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE {where_sql} ORDER BY row", where_params
+            ).fetchall()
+
+        found: list[tuple] = []
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            found.extend(self._conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks "
+                f"WHERE id IN ({','.join('?' * len(chunk))}) AND {where_sql}",
+                [*chunk, *where_params],
+            ).fetchall())
+        return sorted(found)
+
+    def _rows_by_number(self, rows: list[int]) -> dict[int, tuple]:
+        found: dict[int, tuple] = {}
+        for start in range(0, len(rows), SQLITE_MAX_VARIABLES):
+            chunk = rows[start:start + SQLITE_MAX_VARIABLES]
+            for record in self._conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ):
+                found[record[0]] = record
+        return found
+
+    # ------------------------------------------------------------------
+    # VectorCollection
+    # ------------------------------------------------------------------
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        return {"space": "cosine", "backend": "native", "dimensions": self._dimensions}
+
+    @property
+    def dimensions(self) -> int | None:
+        return self._dimensions
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._alive.sum())
+
+    def add(self, ids: list[str], documents: list[str], metadatas: list[dict[str, Any]],
+            embeddings: np.ndarray) -> None:
+        if not ids:
+            return
+        if not len(ids) == len(documents) == len(metadatas) == len(embeddings):
+            raise ValueError("ids, documents, metadatas and embeddings must have the same length")
+
+        # Last occurrence of a repeated id wins
+        positions = list({chunk_id: i for i, chunk_id in enumerate(ids)}.values())
+        vectors = normalize_rows(np.asarray(embeddings)[positions])
+
+        with self._lock:
+            if self._dimensions is None:
+                self._dimensions = vectors.shape[1]
+                self._set_setting("dimensions", self._dimensions)
+                self._set_setting("generation", self._generation)
+                self._conn.commit()
+            elif vectors.shape[1] != self._dimensions:
+                raise ValueError(
+                    f"Collection '{self.name}' stores {self._dimensions}-dim vectors, got {vectors.shape[1]}"
+                )
+
+            replaced = [row for row, *_ in self._select_rows([ids[i] for i in positions], None)]
+
+            with open(self._vector_file, "ab") as f:
+                f.write(vectors.tobytes())
+            first = self._rows
+            try:
+                with self._conn:
+                    self._delete_rows(replaced)
+                    self._conn.executemany(
+                        "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                        [(first + n, ids[i], documents[i], json.dumps(metadatas[i] or {}))
+                         for n, i in enumerate(positions)],
+                    )
+            finally:
+                # Rows are in the file either way; without their chunks they stay dead
+                self._rows += len(positions)
+                alive = np.zeros(self._rows, dtype=bool)
+                alive[: len(self._alive)] = self._alive
+                self._alive = alive
+                self._map()
+            self._alive[replaced] = False
+            self._alive[first:] = True
+            self._schedule_indexing()
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict[str, Any]]) -> None:
+        if len(ids) != len(metadatas):
+            raise ValueError("ids and metadatas must have the same length")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(metadata or {}), chunk_id) for chunk_id, metadata in zip(ids, metadatas, strict=True)],
+            )
+
+    def _delete_rows(self, rows: list[int]) -> None:
+        for start in range(0, len(rows), SQLITE_MAX_VARIABLES):
+            chunk = rows[start:start + SQLITE_MAX_VARIABLES]
+            self._conn.execute(f"DELETE FROM chunks WHERE row IN ({','.join('?' * len(chunk))})", chunk)
+
+    def query(self, embedding: np.ndarray, n_results: int, where: dict | None = None) -> dict[str, list]:
+        empty: dict[str, list] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            if self._rows == 0 or n_results <= 0:
+                return empty
+            query = normalize_rows(embedding)[0]
+
+            if where:
+                candidates = np.array([row for row, *_ in self._select_rows(None, where)], dtype=np.int64)
+                if candidates.size == 0:
+                    return empty
+                scores = self._vectors[candidates] @ query
+                top = self._top_k(scores, n_results)
+                found, scores = candidates[top], scores[top]
+            else:
+                live = int(self._alive.sum())
+                if live == 0:
+                    return empty
+                n_results = min(n_results, live)
+                if self._index is not None:
+                    found, scores = self._search_index(self._index, query, n_results)
+                else:
+                    scores = self._vectors @ query
+                    scores[~self._alive] = -np.inf
+                    found = self._top_k(scores, n_results)
+                    scores = scores[found]
+
+            rows = found.tolist()
+            records = self._rows_by_number(rows)
+
+        return {
+            "ids": [records[row][1] for row in rows],
+            "documents": [records[row][2] for row in rows],
+            "metadatas": [json.loads(records[row][3]) for row in rows],
+            "distances": [float(1.0 - s) for s in scores],
+        }
+
+    def _search_index(self, index: HNSWIndex, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """HNSW over the indexed rows plus an exact scan of rows the indexer hasn't reached"""
+        covered = index.rows
+        rows, scores = index.search(self._vectors, query, k, self._alive, self.hnsw.ef_search)
+        if covered < self._rows:
+            tail = self._vectors[covered:] @ query
+            tail[~self._alive[covered:]] = -np.inf
+            top = self._top_k(tail, k)
+            top = top[np.isfinite(tail[top])]
+            rows = np.concatenate([rows, top + covered])
+            scores = np.concatenate([scores, tail[top]])
+            # The indexer may have inserted rows past `covered` mid-search
+            rows, first = np.unique(rows, return_index=True)
+            scores = scores[first]
+            order = np.argsort(-scores, kind="stable")[:k]
+            rows, scores = rows[order], scores[order]
+        return rows, scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, highest first"""
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def get(self, ids: list[str] | None = None, where: dict | None = None) -> dict[str, list]:
+        with self._lock:
+            records = self._select_rows(ids, where)
+        return {
+            "ids": [r[1] for r in records],
+            "documents": [r[2] for r in records],
+            "metadatas": [json.loads(r[3]) for r in records],
+        }
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        if ids is None and not where:
+            return
+        with self._lock:
+            rows = [row for row, *_ in self._select_rows(ids, where)]
+            if not rows:
+                return
+            with self._conn:
+                self._delete_rows(rows)
+            self._alive[rows] = False
+
+            dead = self._rows - int(self._alive.sum())
+            if dead >= COMPACT_MIN_DEAD_ROWS and dead > self._rows // 2:
+                self.compact()
+
+    def compact(self) -> None:
+        """Rewrite live rows into the next generation's file, dropping tombstones"""
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            old_file = self._vector_file
+            self._generation += 1
+            new_file = self._vector_file
+            with open(new_file, "wb") as f:
+                for start in range(0, len(live), 65536):
+                    f.write(np.ascontiguousarray(self._vectors[live[start:start + 65536]]).tobytes())
+
+            records = self._conn.execute("SELECT id, document, metadata FROM chunks ORDER BY row").fetchall()
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.executemany(
+                    "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [(row, *record) for row, record in enumerate(records)],
+                )
+                self._set_setting("generation", self._generation)
+
+            self._rows = len(live)
+            self._alive = np.ones(self._rows, dtype=bool)
+            self._map()
+            old_file.unlink(missing_ok=True)
+            # Row numbers changed, so the graph is rebuilt against the new generation
+            self._index = None
+            shutil.rmtree(self.path / f"hnsw.{self._generation - 1}", ignore_errors=True)
+            logger.info(f"Compacted collection '{self.name}' to {self._rows} rows")
+            self._schedule_indexing()
+
+    # ------------------------------------------------------------------
+    # HNSW maintenance
+    # ------------------------------------------------------------------
+
+    def _schedule_indexing(self) -> None:
+        """Start the background indexer if the index is missing or behind (call with the lock held)"""
+        if self.hnsw is None or self._closed or (self._indexer is not None and self._indexer.is_alive()):
+            return
+        if self._index is None and int(self._alive.sum()) < self.hnsw.min_vectors:
+            return
+        if self._index is not None and self._index.rows >= self._rows:
+            return
+        self._indexer = threading.Thread(target=self._run_indexer, name=f"hnsw-{self.name}", daemon=True)
+        self._indexer.start()
+
+    def _run_indexer(self) -> None:
+        """Build the index if needed, then insert rows until it covers the matrix"""
+        failed = False
+        try:
+            while True:
+                with self._lock:
+                    if self._closed or (self._index is None and int(self._alive.sum()) < self.hnsw.min_vectors):
+                        return
+                    index = self._index
+                    generation, rows, vectors = self._generation, self._rows, self._vectors
+                    vector_file, index_dir = self._vector_file, self._index_dir
+                    if index is not None and index.rows >= rows:
+                        break
+
+                if index is None:
+                    index = HNSWIndex.build(self.hnsw, vector_file, rows, self._dimensions, index_dir)
+                else:
+                    index.add(vectors, min(rows, index.rows + INDEX_BATCH_ROWS))
+
+                with self._lock:
+                    if self._generation == generation:
+                        self._index = index
+                    # else: compacted underneath us, so start over on the new generation
+
+            if index.rows - index.saved_rows >= INDEX_SAVE_ROWS:
+                index.save(index_dir)
+        except Exception as e:
+            failed = True
+            logger.error(f"HNSW indexing failed for collection '{self.name}': {e}")
+        finally:
+            with self._lock:
+                self._indexer = None
+                if not failed:
+                    # Rows added after the last check would otherwise wait for the next add()
+                    self._schedule_indexing()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            indexer = self._indexer
+        if indexer is not None:
+            indexer.join(timeout=10)
+        with self._lock:
+            index = self._index
+            if index is not None and self._indexer is None and index.rows > index.saved_rows:
+                index.save(self._index_dir)
+            self._vectors = np.zeros((0, self._dimensions or 0), dtype=np.float32)
+            self._conn.close()
+
+
+class NativeVectorBackend(VectorStoreBackend):
+    """Collections as directories under a root path"""
+
+    name = "native"
+
+    def __init__(self, root: str | Path, hnsw: HNSWConfig | None = None):
+        self.root = Path(root)
+        self.hnsw = hnsw
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._collections: dict[str, NativeCollection] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        if not COLLECTION_NAME_RE.match(name):
+            raise ValueError(
+                f"Invalid collection name '{name}': use 1-63 letters, digits, '.', '_' or '-', "
+                "starting with a letter or digit"
+            )
+        return self.root / name
+
+    def _open(self, name: str) -> NativeCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = NativeCollection(self._path(name), name, self.hnsw)
+        return collection
+
+    def get_or_create_collection(self, name: str) -> NativeCollection:
+        with self._lock:
+            return self._open(name)
+
+    def get_collection(self, name: str) -> NativeCollection:
+        with self._lock:
+            if name not in self._collections and not (self._path(name) / META_FILE).exists():
+                raise ValueError(f"Collection {name} does not exist")
+            return self._open(name)
+
+    def list_collections(self) -> list[NativeCollection]:
+        with self._lock:
+            names = sorted(p.parent.name for p in self.root.glob(f"*/{META_FILE}"))
+            return [self._open(name) for name in names if COLLECTION_NAME_RE.match(name)]
+
+    def delete_collection(self, name: str) -> None:
+        with self._lock:
+            path = self._path(name)
+            collection = self._collections.pop(name, None)
+            if collection is None and not (path / META_FILE).exists():
+                raise ValueError(f"Collection {name} does not exist")
+            if collection is not None:
+                collection.close()
+            shutil.rmtree(path, ignore_errors=True)
@@ -1,30 +1,82 @@
 """
-VectorStoreService — ChromaDB wrapper for document storage and similarity search.
-
-Uses PersistentClient for data that survives restarts.
-Lazy-initialised: ChromaDB doesn't start until first use (fast server startup).
+VectorStoreService — document storage and similarity search over a pluggable backend.
+
+Backends (settings.vectorstore.backend, see vector_backends/):
+  - chroma: ChromaDB PersistentClient
+  - native: memory-mapped float32 matrices with SQLite metadata, HNSW-indexed
+    once a collection reaches settings.vectorstore.hnsw_min_vectors chunks
+
+The service chunks and embeds texts itself and hands the backend vectors.
+Chunk ids are content hashes and an ingest manifest remembers what each
+source stored, so re-ingesting a document only embeds what changed
+(see ingest_manifest.py).
+Lazy-initialised: the backend doesn't start until first use (fast server startup).
 """
 
-import uuid
+import threading
+from pathlib import Path
 
+import numpy as np
 from loguru import logger
 
 from ..config.settings import settings
 from ..utils.document_chunker import chunk_text
+from .ingest_manifest import (
+    MANIFEST_FILE,
+    IngestManifest,
+    IngestPlan,
+    ManifestEntry,
+    chunk_ids,
+    content_hash,
+)
+from .vector_backends import VectorCollection, VectorStoreBackend
 
 
 class VectorStoreService:
-    """ChromaDB-backed vector store with lazy initialisation."""
+    """Vector store with lazy initialisation."""
 
-    def __init__(self, persist_dir: str | None = None):
+    def __init__(self, persist_dir: str | None = None, backend: str | None = None):
         self._persist_dir = persist_dir
+        self._backend_name = backend
+        self._backend: VectorStoreBackend | None = None
         self._client = None
         self._embedding_fn = None
+        self._manifest: IngestManifest | None = None
+        self._lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Lazy init
     # ------------------------------------------------------------------
 
+    @property
+    def backend_name(self) -> str:
+        return self._backend_name or settings.vectorstore.backend
+
+    @property
+    def backend(self) -> VectorStoreBackend:
+        if self._backend is None:
+            if self.backend_name == "native":
+                from .vector_backends.hnsw import HNSWConfig
+                from .vector_backends.native import NativeVectorBackend
+
+                config = settings.vectorstore
+                hnsw = HNSWConfig(
+                    m=config.hnsw_m,
+                    ef_construction=config.hnsw_ef_construction,
+                    ef_search=config.hnsw_ef_search,
+                    min_vectors=config.hnsw_min_vectors,
+                    segment_size=config.hnsw_segment_size,
+                    build_workers=config.hnsw_build_workers,
+                ) if config.hnsw_enabled else None
+                root = Path(self._persist_dir or config.persist_directory) / "native"
+                self._backend = NativeVectorBackend(root, hnsw=hnsw)
+                logger.info(f"Native vector store initialised at {root}")
+            else:
+                from .vector_backends.chroma import ChromaVectorBackend
+
+                self._backend = ChromaVectorBackend(self.client, self.embedding_fn)
+        return self._backend
+
     @property
     def client(self):
         if self._client is None:
@@ -45,80 +97,76 @@ class VectorStoreService:
             logger.info(f"Embedding bridge initialised with model '{model}'")
         return self._embedding_fn
 
+    @property
+    def manifest(self) -> IngestManifest:
+        # Bulk ingest chunk workers may race to open it
+        with self._lock:
+            if self._manifest is None:
+                persist_dir = self._persist_dir or settings.vectorstore.persist_directory
+                self._manifest = IngestManifest(Path(persist_dir) / MANIFEST_FILE)
+            return self._manifest
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts with the vector store's embedding model (one float32 row per text)."""
+        if self._embedding_fn is None and self.backend_name == "native":
+            # The Chroma embedding function adapter would import chromadb
+            from ..model_loaders.compute_dispatcher import compute_dispatcher
+
+            return compute_dispatcher.embed_array(texts, settings.vectorstore.embedding_model)
+        return np.asarray(self.embedding_fn(texts), dtype=np.float32)
+
     # ------------------------------------------------------------------
     # Collection management
     # ------------------------------------------------------------------
 
-    def get_or_create_collection(self, name: str | None = None):
-        """Get or create a ChromaDB collection with cosine similarity."""
-        name = name or settings.vectorstore.default_collection
-        return self.client.get_or_create_collection(
-            name=name,
-            embedding_function=self.embedding_fn,
-            metadata={"hnsw:space": "cosine"},
-        )
+    def get_or_create_collection(self, name: str | None = None) -> VectorCollection:
+        """Get or create a collection with cosine similarity."""
+        return self.backend.get_or_create_collection(name or settings.vectorstore.default_collection)
 
     def list_collections(self) -> list[dict]:
         """List all collections with document counts."""
-        collections = self.client.list_collections()
-        result = []
-        for col in collections:
-            # Re-fetch with embedding fn to get accurate count
-            collection = self.client.get_collection(col.name, embedding_function=self.embedding_fn)
-            result.append({
-                "name": col.name,
-                "count": collection.count(),
-                "metadata": col.metadata or {},
-            })
-        return result
+        return [
+            {"name": collection.name, "count": collection.count(), "metadata": collection.metadata}
+            for collection in self.backend.list_collections()
+        ]
 
     def get_collection_info(self, name: str) -> dict:
         """Get detailed info about a single collection."""
-        collection = self.client.get_collection(name, embedding_function=self.embedding_fn)
+        collection = self.backend.get_collection(name)
         return {
             "name": name,
             "count": collection.count(),
-            "metadata": collection.metadata or {},
+            "metadata": collection.metadata,
         }
 
     def delete_collection(self, name: str) -> None:
         """Delete an entire collection."""
-        self.client.delete_collection(name)
+        self.backend.delete_collection(name)
+        self.manifest.forget(name)
         logger.info(f"Deleted collection '{name}'")
 
     # ------------------------------------------------------------------
     # Document operations
     # ------------------------------------------------------------------
 
-    def ingest_text(
+    def chunk_records(
         self,
         text: str,
-        source: str = "unknown",
-        collection_name: str | None = None,
+        source: str,
         metadata: dict | None = None,
         chunk_size: int | None = None,
         chunk_overlap: int | None = None,
-    ) -> dict:
-        """Chunk text and store embeddings in ChromaDB.
+    ) -> tuple[list[str], list[str], list[dict]]:
+        """Split text into (ids, documents, metadatas) ready for collection.add.
 
-        Returns dict with status, chunks_stored, collection, source, document_ids.
+        Ids are derived from the source and the chunk text, so they are stable
+        across re-ingestion of the same content.
         """
-        collection = self.get_or_create_collection(collection_name)
-
-        cs = chunk_size or settings.vectorstore.chunk_size
-        co = chunk_overlap or settings.vectorstore.chunk_overlap
-
-        chunks = chunk_text(text, chunk_size=cs, chunk_overlap=co)
-        if not chunks:
-            return {
-                "status": "empty",
-                "chunks_stored": 0,
-                "collection": collection.name,
-                "source": source,
-                "document_ids": [],
-            }
-
-        doc_ids = [f"{source}_{uuid.uuid4().hex[:8]}" for _ in chunks]
+        chunks = chunk_text(
+            text,
+            chunk_size=chunk_size or settings.vectorstore.chunk_size,
+            chunk_overlap=chunk_overlap or settings.vectorstore.chunk_overlap,
+        )
         documents = [c.text for c in chunks]
         metadatas = []
         for c in chunks:
@@ -127,21 +175,128 @@ class VectorStoreService:
             if metadata:
                 m.update(metadata)
             metadatas.append(m)
+        return chunk_ids(source, documents), documents, metadatas
 
-        collection.add(
-            ids=doc_ids,
-            documents=documents,
-            metadatas=metadatas,
-        )
+    def plan_ingest(
+        self,
+        collection: VectorCollection,
+        text: str,
+        source: str,
+        metadata: dict | None = None,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+    ) -> IngestPlan:
+        """Diff a document against what its source last stored in the collection.
+
+        Nothing is written; apply_plan (or finish_plan, once the added chunks
+        are stored some other way) carries the plan out.
+        """
+        chunk_size = chunk_size or settings.vectorstore.chunk_size
+        chunk_overlap = chunk_overlap or settings.vectorstore.chunk_overlap
+        model = settings.vectorstore.embedding_model
+        document_hash = content_hash(text)
+        params_hash = content_hash({"chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                                    "metadata": metadata or {}})
+
+        previous = self.manifest.get(collection.name, source)
+        if previous is not None and (previous.document_hash, previous.params_hash, previous.embedding_model) == (
+            document_hash, params_hash, model
+        ):
+            ids = list(previous.chunks)
+            # Chunks deleted behind the manifest's back fall through to a full diff
+            if not ids or len(collection.get(ids=ids)["ids"]) == len(ids):
+                return IngestPlan(collection.name, source, previous, ids, [], [], unchanged=True)
+
+        ids, documents, metadatas = self.chunk_records(text, source, metadata, chunk_size, chunk_overlap)
+        entry = ManifestEntry(document_hash, params_hash, model,
+                              {chunk_id: content_hash(m) for chunk_id, m in zip(ids, metadatas, strict=True)})
+        plan = IngestPlan(collection.name, source, entry, ids, documents, metadatas)
+        if previous is not None:
+            plan.stale = [chunk_id for chunk_id in previous.chunks if chunk_id not in entry.chunks]
+
+        # Vectors from another embedding model can't be reused
+        old = previous.chunks if previous is not None and previous.embedding_model == model else {}
+        reusable = [chunk_id for chunk_id in ids if chunk_id in old]
+        stored = set(collection.get(ids=reusable)["ids"]) if reusable else set()
+        for position, chunk_id in enumerate(ids):
+            if chunk_id not in stored:
+                plan.added.append(position)
+            elif old[chunk_id] != entry.chunks[chunk_id]:
+                plan.updated.append(position)
+        return plan
+
+    def apply_plan(self, collection: VectorCollection, plan: IngestPlan) -> None:
+        """Embed and write a plan's added chunks, then finish it."""
+        if plan.unchanged:
+            return
+        if plan.added:
+            documents = [plan.documents[i] for i in plan.added]
+            collection.add(
+                ids=[plan.ids[i] for i in plan.added],
+                documents=documents,
+                metadatas=[plan.metadatas[i] for i in plan.added],
+                embeddings=self.embed(documents),
+            )
+        self.finish_plan(collection, plan)
+
+    def finish_plan(self, collection: VectorCollection, plan: IngestPlan) -> None:
+        """Delete stale chunks, rewrite moved metadata and record the source in the manifest.
+
+        Call once the plan's added chunks are stored. Until then the manifest
+        keeps the previous entry, so an interrupted ingestion is redone in full.
+        """
+        if plan.stale:
+            collection.delete(ids=plan.stale)
+        if plan.updated:
+            collection.update_metadata(
+                [plan.ids[i] for i in plan.updated],
+                [plan.metadatas[i] for i in plan.updated],
+            )
+        self.manifest.put(collection.name, plan.source, plan.entry)
+
+    def ingest_text(
+        self,
+        text: str,
+        source: str = "unknown",
+        collection_name: str | None = None,
+        metadata: dict | None = None,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+    ) -> dict:
+        """Chunk text and store embeddings in the vector store.
 
-        logger.info(f"Ingested {len(chunks)} chunks from '{source}' into '{collection.name}'")
+        Re-ingesting a source only embeds chunks whose text is new and deletes
+        chunks that are gone; an identical document is skipped.
+
+        Returns dict with status (success, unchanged or empty), chunks_stored,
+        chunks_updated, chunks_unchanged, chunks_deleted, collection, source,
+        document_ids.
+        """
+        collection = self.get_or_create_collection(collection_name)
+
+        plan = self.plan_ingest(collection, text, source, metadata, chunk_size, chunk_overlap)
+        self.apply_plan(collection, plan)
+
+        if not plan.ids:
+            status = "empty"
+        elif plan.unchanged:
+            status = "unchanged"
+        else:
+            status = "success"
+        logger.info(
+            f"Ingested '{source}' into '{collection.name}' ({status}): {len(plan.added)} chunks stored, "
+            f"{len(plan.updated)} updated, {plan.kept} unchanged, {len(plan.stale)} deleted"
+        )
 
         return {
-            "status": "success",
-            "chunks_stored": len(chunks),
+            "status": status,
+            "chunks_stored": len(plan.added),
+            "chunks_updated": len(plan.updated),
+            "chunks_unchanged": plan.kept,
+            "chunks_deleted": len(plan.stale),
             "collection": collection.name,
             "source": source,
-            "document_ids": doc_ids,
+            "document_ids": plan.ids,
         }
 
     def search(
@@ -151,26 +306,20 @@ class VectorStoreService:
         collection_name: str | None = None,
         where: dict | None = None,
     ) -> dict:
-        """Similarity search using the query text.
-
-        ChromaDB calls our ImpetusEmbeddingFunction to embed the query.
-        """
+        """Similarity search using the query text."""
         collection = self.get_or_create_collection(collection_name)
 
-        kwargs: dict = {
-            "query_texts": [query],
-            "n_results": min(n_results, collection.count() or 1),
-        }
-        if where:
-            kwargs["where"] = where
-
-        results = collection.query(**kwargs)
+        results = collection.query(
+            self.embed([query])[0],
+            n_results=min(n_results, collection.count() or 1),
+            where=where,
+        )
 
         return {
-            "documents": results.get("documents", [[]])[0],
-            "metadatas": results.get("metadatas", [[]])[0],
-            "distances": results.get("distances", [[]])[0],
-            "count": len(results.get("documents", [[]])[0]),
+            "documents": results["documents"],
+            "metadatas": results["metadatas"],
+            "distances": results["distances"],
+            "count": len(results["documents"]),
             "query": query,
         }
 
@@ -182,14 +331,7 @@ class VectorStoreService:
     ) -> None:
         """Delete documents by ID or filter."""
         collection = self.get_or_create_collection(collection_name)
-
-        kwargs: dict = {}
-        if ids:
-            kwargs["ids"] = ids
-        if where:
-            kwargs["where"] = where
-
-        collection.delete(**kwargs)
+        collection.delete(ids=ids or None, where=where)
 
 
 # Singleton instance
@@ -0,0 +1,153 @@
+"""
+Decoding of reduced-precision tensor formats numpy has no dtype for
+
+bfloat16 and the two FP8 variants (e4m3fn, e5m2) are stored as raw
+uint16/uint8 words. They are widened with bit manipulation rather than
+reinterpreted, in chunks on a shared thread pool so multi-GB shards
+decode at memory bandwidth (numpy releases the GIL for these kernels).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Safetensors dtype -> numpy storage dtype of the raw words
+STORAGE_DTYPES = {
+    "BF16": np.dtype(np.uint16),
+    "F8_E4M3": np.dtype(np.uint8),
+    "F8_E5M2": np.dtype(np.uint8),
+}
+
+# Default decoded dtype: bf16 needs float32 for its exponent range, both FP8 formats are exact in float16
+DEFAULT_DECODED_DTYPES = {
+    "BF16": np.dtype(np.float32),
+    "F8_E4M3": np.dtype(np.float16),
+    "F8_E5M2": np.dtype(np.float16),
+}
+
+# Elements per chunk handed to a worker
+CHUNK_ELEMENTS = 1 << 22
+
+
+def needs_decode(dtype_str: str) -> bool:
+    """Whether a safetensors dtype is stored as raw words that must be decoded"""
+    return dtype_str in STORAGE_DTYPES
+
+
+def bf16_to_float32(raw: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Widen raw bfloat16 words to float32 (exact: bf16 is the top half of a float32)"""
+    if out is None:
+        out = np.empty(raw.shape, dtype=np.float32)
+    words = out.view(np.uint32)
+    words[...] = raw
+    words <<= 16
+    return out
+
+
+def fp8_e5m2_to_float16(raw: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Widen raw e5m2 bytes to float16 (exact: e5m2 is the top byte of a float16)"""
+    if out is None:
+        out = np.empty(raw.shape, dtype=np.float16)
+    words = out.view(np.uint16)
+    words[...] = raw
+    words <<= 8
+    return out
+
+
+def _build_e4m3_table() -> np.ndarray:
+    """float16 value of every e4m3fn byte (bias 7, no infinities, 0x7F/0xFF are NaN)"""
+    codes = np.arange(256, dtype=np.uint16)
+    sign = (codes & 0x80) << 8
+    exponent = (codes >> 3) & 0xF
+    mantissa = codes & 0x7
+
+    # Normals: rebias 7 -> 15 and move the 3 mantissa bits to the top of float16's 10
+    words = sign | ((exponent + 8) << 10) | (mantissa << 7)
+    table = words.view(np.float16).copy()
+
+    # Subnormals are mantissa * 2^-9, which float16 represents exactly as normals
+    subnormal = exponent == 0
+    magnitude = mantissa[subnormal].astype(np.float16) * np.float16(2.0 ** -9)
+    table[subnormal] = np.where(sign[subnormal] != 0, -magnitude, magnitude)
+
+    table[(codes & 0x7F) == 0x7F] = np.nan
+    table.flags.writeable = False
+    return table
+
+
+_E4M3_TABLE = _build_e4m3_table()
+
+
+def fp8_e4m3_to_float16(raw: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Widen raw e4m3fn bytes to float16 through a 256-entry lookup table"""
+    if out is None:
+        out = np.empty(raw.shape, dtype=np.float16)
+    np.take(_E4M3_TABLE, raw, out=out)
+    return out
+
+
+_DECODERS = {
+    "BF16": bf16_to_float32,
+    "F8_E4M3": fp8_e4m3_to_float16,
+    "F8_E5M2": fp8_e5m2_to_float16,
+}
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1),
+                                           thread_name_prefix="dtype-decode")
+        return _executor
+
+
+def decode_tensor(raw: np.ndarray, dtype_str: str, out_dtype: np.dtype | None = None,
+                  chunk_elements: int = CHUNK_ELEMENTS) -> np.ndarray:
+    """
+    Decode raw bf16/fp8 words into a floating point array
+
+    Args:
+        raw: Array of raw words in the STORAGE_DTYPES dtype (any shape; may be a read-only mmap view)
+        dtype_str: Safetensors dtype string ("BF16", "F8_E4M3" or "F8_E5M2")
+        out_dtype: float32 or float16; defaults to DEFAULT_DECODED_DTYPES
+        chunk_elements: Elements per worker chunk; smaller tensors decode inline
+
+    Returns:
+        Newly allocated array with the same shape as raw
+    """
+    if dtype_str not in _DECODERS:
+        raise ValueError(f"Unsupported encoded dtype: {dtype_str}")
+
+    out_dtype = np.dtype(out_dtype or DEFAULT_DECODED_DTYPES[dtype_str])
+    if out_dtype not in (np.float32, np.float16):
+        raise ValueError(f"Cannot decode {dtype_str} to {out_dtype}")
+
+    decoder = _DECODERS[dtype_str]
+    native = DEFAULT_DECODED_DTYPES[dtype_str]
+    flat = raw.reshape(-1)
+    result = np.empty(flat.shape, dtype=out_dtype)
+
+    def convert(start: int, end: int):
+        if out_dtype == native:
+            decoder(flat[start:end], out=result[start:end])
+        else:
+            result[start:end] = decoder(flat[start:end])
+
+    if flat.size <= chunk_elements:
+        convert(0, flat.size)
+    else:
+        executor = _get_executor()
+        futures = [
+            executor.submit(convert, start, min(start + chunk_elements, flat.size))
+            for start in range(0, flat.size, chunk_elements)
+        ]
+        for future in futures:
+            future.result()
+
+    return result.reshape(raw.shape)
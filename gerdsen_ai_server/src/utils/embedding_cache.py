@@ -0,0 +1,201 @@
+"""
+Two-tier cache for embedding vectors
+
+Vectors are keyed by a content hash of (model, normalized text, dimensions)
+so identical strings embedded by RAG re-ingestion, repeated queries and the
+vector store's embedding function are computed once:
+
+- memory: LRU of float32 arrays bounded by a byte budget
+- disk: SQLite table of packed little-endian float32 blobs, consulted on a
+  memory miss and promoted back into memory on a hit
+
+Lookups take a whole batch and report which positions missed, so callers
+only run the model on the misses.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+# Per-entry bookkeeping on top of the vector bytes (key, OrderedDict node, array header)
+ENTRY_OVERHEAD_BYTES = 200
+SQLITE_MAX_VARIABLES = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (Unicode NFC, surrounding whitespace stripped)"""
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def cache_key(model_name: str, text: str, dimensions: int) -> str:
+    """Content-hash key for one text embedded by one model at one width"""
+    digest = hashlib.sha256()
+    digest.update(f"{model_name}\x00{dimensions}\x00".encode())
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """In-memory LRU with a byte budget, backed by an on-disk vector store"""
+
+    def __init__(self, db_path: Path | None, memory_bytes: int):
+        self.db_path = db_path
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memory_models: dict[str, str] = {}  # key -> model name, so clear(model) spares other models
+        self._memory_used = 0
+        self._conn: sqlite3.Connection | None = None
+        self.stats = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if db_path is not None:
+            self._open_db()
+
+    def _open_db(self):
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    key TEXT PRIMARY KEY,
+                    model_name TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    vector BLOB NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._conn = conn
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache disabled ({self.db_path}): {e}")
+            self._conn = None
+
+    def get_many(self, keys: list[str]) -> list[np.ndarray | None]:
+        """Look up a batch of keys; missing positions are None"""
+        results: list[np.ndarray | None] = [None] * len(keys)
+        disk_lookup: dict[str, list[int]] = {}
+
+        with self._lock:
+            self.stats["requests"] += len(keys)
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.stats["memory_hits"] += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup and self._conn is not None:
+                for key, model_name, blob in self._read_disk(list(disk_lookup)):
+                    vector = np.frombuffer(blob, dtype="<f4")
+                    self._remember(key, model_name, vector)
+                    for i in disk_lookup.pop(key):
+                        results[i] = vector
+                        self.stats["disk_hits"] += 1
+
+            self.stats["misses"] += sum(len(positions) for positions in disk_lookup.values())
+        return results
+
+    def put_many(self, model_name: str, dimensions: int, items: dict[str, np.ndarray]):
+        """Store computed vectors in both tiers"""
+        if not items:
+            return
+        # Copy so cached rows never pin the caller's batch matrix
+        vectors = {key: np.array(v, dtype="<f4") for key, v in items.items()}
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, model_name, vector)
+            if self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO vectors (key, model_name, dimensions, vector) VALUES (?, ?, ?, ?)",
+                        [(key, model_name, dimensions, vector.tobytes()) for key, vector in vectors.items()],
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Failed to persist embeddings: {e}")
+
+    def _read_disk(self, keys: list[str]) -> list[tuple[str, str, bytes]]:
+        rows: list[tuple[str, str, bytes]] = []
+        try:
+            for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                rows.extend(self._conn.execute(
+                    f"SELECT key, model_name, vector FROM vectors WHERE key IN ({placeholders})", chunk
+                ).fetchall())
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache read failed: {e}")
+        return rows
+
+    def _remember(self, key: str, model_name: str, vector: np.ndarray):
+        """Insert into the memory tier and evict least recently used entries over budget"""
+        size = vector.nbytes + ENTRY_OVERHEAD_BYTES
+        if size > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= previous.nbytes + ENTRY_OVERHEAD_BYTES
+        self._memory[key] = vector
+        self._memory_models[key] = model_name
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            del self._memory_models[evicted_key]
+            self._memory_used -= evicted.nbytes + ENTRY_OVERHEAD_BYTES
+            self.stats["evictions"] += 1
+
+    def clear(self, model_name: str | None = None):
+        """Drop cached vectors (one model's, including its model@variant entries, or everything)"""
+        with self._lock:
+            if model_name is None:
+                self._memory.clear()
+                self._memory_models.clear()
+                self._memory_used = 0
+            else:
+                prefix = f"{model_name}@"
+                for key in [k for k, m in self._memory_models.items() if m == model_name or m.startswith(prefix)]:
+                    del self._memory_models[key]
+                    self._memory_used -= self._memory.pop(key).nbytes + ENTRY_OVERHEAD_BYTES
+            if self._conn is not None:
+                if model_name is None:
+                    self._conn.execute("DELETE FROM vectors")
+                else:
+                    self._conn.execute(
+                        "DELETE FROM vectors WHERE model_name = ? OR substr(model_name, 1, ?) = ?",
+                        (model_name, len(prefix), prefix),
+                    )
+                self._conn.commit()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Hit rates and tier sizes"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_used
+            stats["memory_budget_bytes"] = self.memory_bytes
+            stats["disk_enabled"] = self._conn is not None
+            if self._conn is not None:
+                try:
+                    stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+                except sqlite3.Error:
+                    stats["disk_entries"] = None
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = hits / stats["requests"] if stats["requests"] else 0.0
+        stats["memory_hit_rate"] = stats["memory_hits"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
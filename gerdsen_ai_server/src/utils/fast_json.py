@@ -0,0 +1,42 @@
+"""
+Fast JSON responses for payloads carrying NumPy arrays
+
+Embedding responses hold thousands of floats; converting them to Python
+lists and through the stdlib encoder dominates request latency for large
+batches. orjson serializes float32 arrays straight from their buffers.
+Without orjson, arrays fall back to tolist() and the stdlib encoder.
+"""
+
+import json
+from typing import Any
+
+import numpy as np
+from flask import Response
+
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize payload (which may contain NumPy arrays and scalars) to JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Flask JSON response built with dumps()"""
+    return Response(dumps(payload), status=status, mimetype="application/json")
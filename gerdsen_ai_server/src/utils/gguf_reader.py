@@ -0,0 +1,389 @@
+"""
+Memory-mapped GGUF reader
+
+Parses the GGUF header, metadata key/values and tensor infos straight
+from a read-only mapping, so a model can be inspected without reading
+its weights. Tensors are exposed as zero-copy views over the mapping:
+plain types as typed arrays, quantized types as (n_blocks, block_bytes)
+uint8 arrays that the vectorized dequantizers below expand on demand.
+"""
+
+import contextlib
+import mmap
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .dtype_decode import decode_tensor
+
+GGUF_MAGIC = b"GGUF"
+GGUF_DEFAULT_ALIGNMENT = 32
+
+
+class GGUFValueType(IntEnum):
+    """Metadata value types"""
+    UINT8 = 0
+    INT8 = 1
+    UINT16 = 2
+    INT16 = 3
+    UINT32 = 4
+    INT32 = 5
+    FLOAT32 = 6
+    BOOL = 7
+    STRING = 8
+    ARRAY = 9
+    UINT64 = 10
+    INT64 = 11
+    FLOAT64 = 12
+
+
+class GGMLType(IntEnum):
+    """Tensor storage types (subset of ggml_type)"""
+    F32 = 0
+    F16 = 1
+    Q4_0 = 2
+    Q4_1 = 3
+    Q5_0 = 6
+    Q5_1 = 7
+    Q8_0 = 8
+    Q8_1 = 9
+    Q2_K = 10
+    Q3_K = 11
+    Q4_K = 12
+    Q5_K = 13
+    Q6_K = 14
+    Q8_K = 15
+    I8 = 24
+    I16 = 25
+    I32 = 26
+    I64 = 27
+    F64 = 28
+    BF16 = 30
+
+
+# Scalar metadata types -> struct/numpy format
+_SCALAR_FORMATS = {
+    GGUFValueType.UINT8: "<B",
+    GGUFValueType.INT8: "<b",
+    GGUFValueType.UINT16: "<H",
+    GGUFValueType.INT16: "<h",
+    GGUFValueType.UINT32: "<I",
+    GGUFValueType.INT32: "<i",
+    GGUFValueType.FLOAT32: "<f",
+    GGUFValueType.BOOL: "<?",
+    GGUFValueType.UINT64: "<Q",
+    GGUFValueType.INT64: "<q",
+    GGUFValueType.FLOAT64: "<d",
+}
+
+# Block layout per type: (elements per block, bytes per block)
+BLOCK_LAYOUTS = {
+    GGMLType.F32: (1, 4),
+    GGMLType.F16: (1, 2),
+    GGMLType.BF16: (1, 2),
+    GGMLType.F64: (1, 8),
+    GGMLType.I8: (1, 1),
+    GGMLType.I16: (1, 2),
+    GGMLType.I32: (1, 4),
+    GGMLType.I64: (1, 8),
+    GGMLType.Q4_0: (32, 18),
+    GGMLType.Q4_1: (32, 20),
+    GGMLType.Q5_0: (32, 22),
+    GGMLType.Q5_1: (32, 24),
+    GGMLType.Q8_0: (32, 34),
+    GGMLType.Q8_1: (32, 36),
+    GGMLType.Q2_K: (256, 84),
+    GGMLType.Q3_K: (256, 110),
+    GGMLType.Q4_K: (256, 144),
+    GGMLType.Q5_K: (256, 176),
+    GGMLType.Q6_K: (256, 210),
+    GGMLType.Q8_K: (256, 292),
+}
+
+# Unquantized types -> safetensors-style dtype string used by the mmap loader
+PLAIN_TYPES = {
+    GGMLType.F32: "F32",
+    GGMLType.F16: "F16",
+    GGMLType.BF16: "BF16",
+    GGMLType.F64: "F64",
+    GGMLType.I8: "I8",
+    GGMLType.I16: "I16",
+    GGMLType.I32: "I32",
+    GGMLType.I64: "I64",
+}
+
+
+class GGUFError(ValueError):
+    """Raised for malformed or unsupported GGUF files"""
+
+
+@dataclass
+class GGUFTensorInfo:
+    """Location and layout of one tensor in a GGUF file"""
+    name: str
+    shape: tuple[int, ...]  # numpy (row-major) order, i.e. GGUF dims reversed
+    ggml_type: int
+    offset: int  # absolute offset in the file
+    nbytes: int
+
+    @property
+    def type_name(self) -> str:
+        try:
+            return GGMLType(self.ggml_type).name
+        except ValueError:
+            return f"type_{self.ggml_type}"
+
+    @property
+    def n_elements(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) if self.shape else 1
+
+    @property
+    def is_quantized(self) -> bool:
+        return self.ggml_type not in PLAIN_TYPES
+
+
+class GGUFReader:
+    """Read-only, memory-mapped view of a GGUF file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            # The mapping holds its own reference to the file
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file_size = len(self.mm)
+        try:
+            self._parse()
+        except (struct.error, UnicodeDecodeError, ValueError) as e:
+            self.close()
+            if isinstance(e, GGUFError):
+                raise
+            raise GGUFError(f"Malformed GGUF file {self.path.name}: {e}") from e
+
+    def _parse(self):
+        if self.mm[:4] != GGUF_MAGIC:
+            raise GGUFError(f"{self.path.name} is not a GGUF file")
+
+        self.version = struct.unpack_from("<I", self.mm, 4)[0]
+        if self.version < 2:
+            raise GGUFError(f"GGUF version {self.version} is not supported")
+        tensor_count, kv_count = struct.unpack_from("<QQ", self.mm, 8)
+        cursor = 24
+
+        self.metadata: dict[str, Any] = {}
+        for _ in range(kv_count):
+            key, cursor = self._read_string(cursor)
+            value_type = struct.unpack_from("<I", self.mm, cursor)[0]
+            value, cursor = self._read_value(value_type, cursor + 4)
+            self.metadata[key] = value
+
+        infos = []
+        for _ in range(tensor_count):
+            name, cursor = self._read_string(cursor)
+            n_dims = struct.unpack_from("<I", self.mm, cursor)[0]
+            dims = struct.unpack_from(f"<{n_dims}Q", self.mm, cursor + 4)
+            ggml_type, offset = struct.unpack_from("<IQ", self.mm, cursor + 4 + 8 * n_dims)
+            cursor += 4 + 8 * n_dims + 12
+            infos.append((name, tuple(reversed(dims)), ggml_type, offset))
+
+        self.alignment = int(self.metadata.get("general.alignment", GGUF_DEFAULT_ALIGNMENT))
+        self.data_offset = cursor + (-cursor % self.alignment)
+
+        self.tensors: dict[str, GGUFTensorInfo] = {}
+        for name, shape, ggml_type, offset in infos:
+            layout = BLOCK_LAYOUTS.get(ggml_type)
+            n_elements = int(np.prod(shape, dtype=np.int64)) if shape else 1
+            if layout is None:
+                raise GGUFError(f"Tensor {name} has unknown ggml type {ggml_type}")
+            block_elements, block_bytes = layout
+            if n_elements % block_elements:
+                raise GGUFError(f"Tensor {name} size {n_elements} is not a multiple of its block size")
+
+            info = GGUFTensorInfo(
+                name=name,
+                shape=shape,
+                ggml_type=ggml_type,
+                offset=self.data_offset + offset,
+                nbytes=n_elements // block_elements * block_bytes,
+            )
+            if info.offset + info.nbytes > self.file_size:
+                raise GGUFError(f"Tensor {name} extends past the end of {self.path.name}")
+            self.tensors[name] = info
+
+    def _read_string(self, cursor: int) -> tuple[str, int]:
+        length = struct.unpack_from("<Q", self.mm, cursor)[0]
+        start = cursor + 8
+        return self.mm[start:start + length].decode("utf-8", errors="replace"), start + length
+
+    def _read_value(self, value_type: int, cursor: int) -> tuple[Any, int]:
+        if value_type == GGUFValueType.STRING:
+            return self._read_string(cursor)
+
+        if value_type == GGUFValueType.ARRAY:
+            item_type, count = struct.unpack_from("<IQ", self.mm, cursor)
+            cursor += 12
+            fmt = _SCALAR_FORMATS.get(item_type)
+            if fmt is not None:
+                # Numeric arrays (token scores, types) are read in one go
+                dtype = np.dtype(fmt)
+                values = np.frombuffer(self.mm, dtype=dtype, count=count, offset=cursor).tolist()
+                return values, cursor + count * dtype.itemsize
+            items = []
+            for _ in range(count):
+                item, cursor = self._read_value(item_type, cursor)
+                items.append(item)
+            return items, cursor
+
+        fmt = _SCALAR_FORMATS.get(value_type)
+        if fmt is None:
+            raise GGUFError(f"Unknown metadata value type {value_type}")
+        return struct.unpack_from(fmt, self.mm, cursor)[0], cursor + struct.calcsize(fmt)
+
+    def raw(self, name: str) -> np.ndarray:
+        """
+        Zero-copy view of a tensor's stored data
+
+        Plain types come back as typed arrays in the tensor's shape (bf16 as
+        uint16 words); quantized types as (n_blocks, block_bytes) uint8.
+        """
+        info = self.tensors[name]
+        if info.ggml_type in PLAIN_TYPES:
+            dtype = np.dtype(np.uint16) if info.ggml_type == GGMLType.BF16 else _plain_numpy_dtype(info.ggml_type)
+            return np.frombuffer(self.mm, dtype=dtype, count=info.n_elements, offset=info.offset).reshape(info.shape)
+        block_bytes = BLOCK_LAYOUTS[info.ggml_type][1]
+        return np.frombuffer(self.mm, dtype=np.uint8, count=info.nbytes, offset=info.offset).reshape(-1, block_bytes)
+
+    def dequantize(self, name: str, out_dtype: np.dtype = np.float32) -> np.ndarray:
+        """Expand a tensor to a float array in its logical shape"""
+        info = self.tensors[name]
+        return dequantize(self.raw(name), info.ggml_type, out_dtype).reshape(info.shape)
+
+    def summary(self) -> dict[str, Any]:
+        """Header-level description of the model (no tensor data is touched)"""
+        type_counts: dict[str, int] = {}
+        for info in self.tensors.values():
+            type_counts[info.type_name] = type_counts.get(info.type_name, 0) + 1
+
+        # Skip large arrays such as the tokenizer vocabulary
+        metadata = {
+            key: value for key, value in self.metadata.items()
+            if not isinstance(value, list) or len(value) <= 64
+        }
+        return {
+            "version": self.version,
+            "architecture": self.metadata.get("general.architecture"),
+            "name": self.metadata.get("general.name"),
+            "tensor_count": len(self.tensors),
+            "parameter_count": sum(info.n_elements for info in self.tensors.values()),
+            "tensor_types": type_counts,
+            "metadata": metadata,
+        }
+
+    def close(self):
+        """Unmap and close the file"""
+        # With views still alive the mapping is released when they are collected
+        with contextlib.suppress(BufferError):
+            self.mm.close()
+
+    def __enter__(self) -> "GGUFReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _plain_numpy_dtype(ggml_type: int) -> np.dtype:
+    return np.dtype({
+        GGMLType.F32: np.float32,
+        GGMLType.F16: np.float16,
+        GGMLType.F64: np.float64,
+        GGMLType.I8: np.int8,
+        GGMLType.I16: np.int16,
+        GGMLType.I32: np.int32,
+        GGMLType.I64: np.int64,
+    }[ggml_type])
+
+
+def _f16_column(blocks: np.ndarray, start: int) -> np.ndarray:
+    """Little-endian float16 field at byte `start` of every block, as float32 (n, 1)"""
+    return blocks[:, start:start + 2].copy().view(np.float16).astype(np.float32)
+
+
+def dequantize_q8_0(blocks: np.ndarray) -> np.ndarray:
+    """Q8_0: per 32 values, a float16 scale and 32 int8 quants"""
+    d = _f16_column(blocks, 0)
+    qs = blocks[:, 2:].view(np.int8)
+    return (d * qs).reshape(-1)
+
+
+def dequantize_q4_0(blocks: np.ndarray) -> np.ndarray:
+    """Q4_0: per 32 values, a float16 scale and 16 bytes of 4-bit quants offset by 8"""
+    d = _f16_column(blocks, 0)
+    qs = blocks[:, 2:]
+    # Low nibbles hold values 0-15, high nibbles values 16-31
+    q = np.concatenate([qs & 0x0F, qs >> 4], axis=1).astype(np.int8) - 8
+    return (d * q).reshape(-1)
+
+
+def dequantize_q4_k(blocks: np.ndarray) -> np.ndarray:
+    """
+    Q4_K: 256-value super-blocks of eight 32-value sub-blocks
+
+    Each super-block holds float16 d and dmin, twelve bytes packing the
+    8 six-bit sub-block scales and mins, and 128 bytes of 4-bit quants.
+    """
+    n = blocks.shape[0]
+    d = _f16_column(blocks, 0)
+    dmin = _f16_column(blocks, 2)
+    packed = blocks[:, 4:16]
+
+    scales = np.empty((n, 8), dtype=np.uint8)
+    mins = np.empty((n, 8), dtype=np.uint8)
+    scales[:, :4] = packed[:, 0:4] & 63
+    mins[:, :4] = packed[:, 4:8] & 63
+    scales[:, 4:] = (packed[:, 8:12] & 0x0F) | ((packed[:, 0:4] >> 6) << 4)
+    mins[:, 4:] = (packed[:, 8:12] >> 4) | ((packed[:, 4:8] >> 6) << 4)
+
+    # Each 32-byte chunk of quants holds sub-block 2i in its low nibbles and 2i+1 in its high nibbles
+    qs = blocks[:, 16:].reshape(n, 4, 1, 32)
+    q = np.concatenate([qs & 0x0F, qs >> 4], axis=2).reshape(n, 8, 32)
+
+    values = (d * scales)[:, :, None] * q - (dmin * mins)[:, :, None]
+    return values.reshape(-1)
+
+
+_DEQUANTIZERS = {
+    GGMLType.Q4_0: dequantize_q4_0,
+    GGMLType.Q4_K: dequantize_q4_k,
+    GGMLType.Q8_0: dequantize_q8_0,
+}
+
+
+def dequantize(raw: np.ndarray, ggml_type: int, out_dtype: np.dtype = np.float32) -> np.ndarray:
+    """
+    Expand raw GGUF tensor data to a flat float array
+
+    Args:
+        raw: Array returned by GGUFReader.raw()
+        ggml_type: The tensor's ggml type
+        out_dtype: Output float dtype
+
+    Returns:
+        1-D array of the tensor's values
+    """
+    if ggml_type in PLAIN_TYPES:
+        if ggml_type == GGMLType.BF16:
+            return decode_tensor(raw, "BF16", out_dtype=out_dtype).reshape(-1)
+        return raw.reshape(-1).astype(out_dtype, copy=False)
+
+    dequantizer = _DEQUANTIZERS.get(ggml_type)
+    if dequantizer is None:
+        try:
+            type_name = GGMLType(ggml_type).name
+        except ValueError:
+            type_name = str(ggml_type)
+        raise GGUFError(f"Dequantization of {type_name} is not supported")
+    return dequantizer(raw).astype(out_dtype, copy=False)
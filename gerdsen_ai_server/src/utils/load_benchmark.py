@@ -0,0 +1,282 @@
+"""
+End-to-end model load benchmarks
+
+Measures each loading strategy from an explicit page-cache state:
+
+- regular: read every shard into memory and build arrays from the bytes
+- mmap: lazy memory-mapped handles, materialized one by one in file order
+- parallel: shards prefetched concurrently on the loader's shard pool
+
+For every run it records time to the first usable tensor, time until all
+tensors are materialized and resident, peak RSS growth and page faults.
+Cold runs evict the files with posix_fadvise(POSIX_FADV_DONTNEED) first.
+"""
+
+import gc
+import json
+import os
+import resource
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import psutil
+
+from ..config.settings import settings
+from .dtype_decode import decode_tensor, needs_decode
+from .gguf_reader import GGUFReader
+from .mmap_loader import MLX_AVAILABLE, LazyTensor, MemoryMappedLoader, mx
+
+STRATEGIES = ("regular", "mmap", "parallel")
+CACHE_STATES = ("cold", "warm")
+
+
+@dataclass
+class LoadBenchmarkResult:
+    """One strategy measured from one page-cache state"""
+    model_path: str
+    strategy: str
+    cache_state: str
+    evicted: bool  # False when the cold state couldn't be produced on this platform
+    model_size_gb: float
+    file_count: int
+    tensor_count: int
+    time_to_first_tensor_ms: float
+    full_materialization_ms: float
+    throughput_gbps: float
+    peak_rss_mb: float
+    major_page_faults: int
+    minor_page_faults: int
+    timestamp: str
+
+
+def evict_page_cache(paths: list[Path]) -> bool:
+    """
+    Drop files from the page cache with POSIX_FADV_DONTNEED
+
+    Pages still mapped by a live mmap are not evicted, so close loaders
+    first. Returns False where posix_fadvise isn't available (macOS).
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+def write_synthetic_checkpoint(root: Path, size_mb: float, shards: int = 1, hidden_size: int = 1024,
+                               dtype: str = "F16", seed: int = 0) -> list[Path]:
+    """
+    Write a sharded safetensors checkpoint of roughly size_mb in total
+
+    Each shard holds square-ish (rows, hidden_size) layer weights with page-aligned
+    data, fsynced so the eviction in cold runs starts from clean pages.
+    """
+    np_dtype = {"F16": np.float16, "F32": np.float32}[dtype]
+    itemsize = np.dtype(np_dtype).itemsize
+    rows_per_layer = max(1, hidden_size // 4)
+    layer_bytes = rows_per_layer * hidden_size * itemsize
+    layers_per_shard = max(1, int(size_mb * 1024 * 1024 / shards // layer_bytes))
+    rng = np.random.default_rng(seed)
+
+    root.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for shard in range(shards):
+        header, offset, blobs = {}, 0, []
+        for layer in range(layers_per_shard):
+            name = f"model.layers.{shard * layers_per_shard + layer}.weight"
+            data = rng.standard_normal((rows_per_layer, hidden_size), dtype=np.float32).astype(np_dtype).tobytes()
+            header[name] = {"dtype": dtype, "shape": [rows_per_layer, hidden_size],
+                            "data_offsets": [offset, offset + len(data)]}
+            offset += len(data)
+            blobs.append(data)
+
+        header_bytes = json.dumps(header).encode()
+        header_bytes += b" " * (-(8 + len(header_bytes)) % 4096)
+        path = root / f"model-{shard + 1:05d}-of-{shards:05d}.safetensors"
+        with open(path, 'wb') as f:
+            f.write(struct.pack('<Q', len(header_bytes)) + header_bytes)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        paths.append(path)
+    return paths
+
+
+def _weight_files(model_path: Path) -> list[Path]:
+    if model_path.is_file():
+        return [model_path]
+    return sorted(model_path.glob("*.safetensors")) + sorted(model_path.glob("*.gguf"))
+
+
+def _consume(value: Any) -> None:
+    """Make a tensor usable: evaluate MLX arrays, fault in every page of numpy ones"""
+    if isinstance(value, LazyTensor):
+        value = value.materialize()
+    if MLX_AVAILABLE and not isinstance(value, np.ndarray):
+        mx.eval(value)
+        return
+    array = np.ascontiguousarray(value).reshape(-1).view(np.uint8)
+    int(array[::4096].sum())
+
+
+class _RSSSampler:
+    """Background sampler for the peak resident set size during a run"""
+
+    def __init__(self, interval_s: float = 0.005):
+        self._process = psutil.Process()
+        self._interval = interval_s
+        self._stop = threading.Event()
+        self.baseline = self._process.memory_info().rss
+        self.peak = self.baseline
+        self._thread = threading.Thread(target=self._run, daemon=True, name="rss-sampler")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            self._stop.wait(self._interval)
+
+    def __enter__(self) -> "_RSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+
+def _load_regular(files: list[Path], on_first) -> int:
+    """Read whole shards and build arrays from the bytes, like a non-mmap loader"""
+    tensor_count = 0
+    for path in files:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if path.suffix == ".gguf":
+            # Quantized blocks are used as read; only the tensor count comes from the header
+            _consume(np.frombuffer(data, dtype=np.uint8))
+            with GGUFReader(path) as reader:
+                tensor_count += len(reader.tensors)
+            on_first()
+            del data
+            continue
+
+        header_size = struct.unpack_from('<Q', data)[0]
+        header = json.loads(data[8:8 + header_size])
+        base = 8 + header_size
+        for name, info in header.items():
+            if name == "__metadata__":
+                continue
+            start, end = info["data_offsets"]
+            dtype = MemoryMappedLoader._safetensors_dtype_to_numpy(info["dtype"])
+            array = np.frombuffer(data, dtype=dtype, count=(end - start) // dtype.itemsize, offset=base + start)
+            array = array.reshape(info["shape"])
+            _consume(decode_tensor(array, info["dtype"]) if needs_decode(info["dtype"]) else array.copy())
+            tensor_count += 1
+            on_first()
+        del data
+    return tensor_count
+
+
+def _load_mapped(model_path: Path, io_concurrency: int, prefetch: bool, on_first) -> int:
+    loader = MemoryMappedLoader(io_concurrency=io_concurrency)
+    try:
+        weights = loader.load_model_mmap(model_path, prefetch=prefetch)
+        # Shards come back in file order
+        for tensor in weights.values():
+            _consume(tensor)
+            on_first()
+        count = len(weights)
+        del weights
+    finally:
+        loader.close_all()
+    return count
+
+
+def run_load_benchmark(model_path: Path, strategies: tuple[str, ...] = STRATEGIES,
+                       cache_states: tuple[str, ...] = CACHE_STATES,
+                       io_concurrency: int | None = None) -> list[LoadBenchmarkResult]:
+    """
+    Benchmark each strategy from each page-cache state
+
+    Args:
+        model_path: Safetensors/GGUF file or directory of shards
+        strategies: Subset of STRATEGIES
+        cache_states: Subset of CACHE_STATES; "warm" runs after a priming read
+        io_concurrency: Shard pool size for the parallel strategy
+
+    Returns:
+        One LoadBenchmarkResult per (strategy, cache state)
+    """
+    model_path = Path(model_path)
+    files = _weight_files(model_path)
+    if not files:
+        raise FileNotFoundError(f"No safetensors or GGUF files under {model_path}")
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown load strategies: {sorted(unknown)}")
+
+    size_bytes = sum(f.stat().st_size for f in files)
+    workers = io_concurrency or settings.model.load_io_concurrency
+    results = []
+
+    for strategy in strategies:
+        for cache_state in cache_states:
+            gc.collect()
+            if cache_state == "cold":
+                evicted = evict_page_cache(files)
+            else:
+                # Prime the cache so the warm run doesn't depend on what ran before
+                for path in files:
+                    with open(path, 'rb') as f:
+                        while f.read(16 * 1024 * 1024):
+                            pass
+                evicted = False
+
+            first_at: list[float] = []
+            usage_before = resource.getrusage(resource.RUSAGE_SELF)
+            with _RSSSampler() as sampler:
+                start = time.perf_counter()
+
+                def on_first(first_at=first_at):
+                    if not first_at:
+                        first_at.append(time.perf_counter())
+
+                if strategy == "regular":
+                    tensor_count = _load_regular(files, on_first)
+                elif strategy == "mmap":
+                    tensor_count = _load_mapped(model_path, 1, False, on_first)
+                else:
+                    tensor_count = _load_mapped(model_path, workers, True, on_first)
+                elapsed = time.perf_counter() - start
+            usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+            results.append(LoadBenchmarkResult(
+                model_path=str(model_path),
+                strategy=strategy,
+                cache_state=cache_state,
+                evicted=evicted,
+                model_size_gb=size_bytes / (1024 ** 3),
+                file_count=len(files),
+                tensor_count=tensor_count,
+                time_to_first_tensor_ms=((first_at[0] if first_at else start + elapsed) - start) * 1000,
+                full_materialization_ms=elapsed * 1000,
+                throughput_gbps=size_bytes / (1024 ** 3) / elapsed if elapsed > 0 else 0.0,
+                peak_rss_mb=max(0, sampler.peak - sampler.baseline) / (1024 ** 2),
+                major_page_faults=usage_after.ru_majflt - usage_before.ru_majflt,
+                minor_page_faults=usage_after.ru_minflt - usage_before.ru_minflt,
+                timestamp=datetime.now(UTC).isoformat(),
+            ))
+
+    return results
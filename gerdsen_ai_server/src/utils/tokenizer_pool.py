@@ -0,0 +1,216 @@
+"""
+Shared tokenization service for prompts and embedding inputs
+
+Batches are encoded with the fast tokenizer's batch API on a bounded
+worker pool, so request threads don't do tokenization work themselves.
+Encodings of frequently repeated strings (system prompts, chat templates,
+duplicated chunks) are cached, and results are numpy int32 arrays that
+can be handed to the model without list conversions.
+"""
+
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from ..config.settings import settings
+
+
+class TokenizerPool:
+    """Bounded tokenization worker pool with an LRU encoding cache"""
+
+    def __init__(self, max_workers: int | None = None, cache_size: int | None = None,
+                 max_cached_chars: int = 4096, chunk_size: int = 64):
+        workers = max_workers or settings.inference.tokenizer_workers or min(4, os.cpu_count() or 1)
+        self.max_workers = max(1, workers)
+        self.cache_size = settings.inference.tokenizer_cache_size if cache_size is None else cache_size
+        self.max_cached_chars = max_cached_chars
+        self.chunk_size = chunk_size
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tokenizer")
+        self._cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, tokenizer: Any, text: str, max_length: int | None = None,
+               add_special_tokens: bool = True) -> np.ndarray:
+        """Encode one string to a 1-D int32 array"""
+        return self.encode_batch(tokenizer, [text], max_length, add_special_tokens)[0]
+
+    def encode_batch(self, tokenizer: Any, texts: list[str], max_length: int | None = None,
+                     add_special_tokens: bool = True) -> list[np.ndarray]:
+        """
+        Encode several strings, serving repeated strings from the cache
+
+        Args:
+            tokenizer: HuggingFace (fast) tokenizer, mlx_lm TokenizerWrapper or any object with encode()
+            texts: Strings to encode
+            max_length: Truncate encodings to this many tokens
+            add_special_tokens: Whether to add BOS/EOS/CLS/SEP tokens
+
+        Returns:
+            One read-only int32 array per input text, in input order
+        """
+        results: list[np.ndarray | None] = [None] * len(texts)
+        missing: dict[str, list[int]] = {}
+
+        with self._lock:
+            prefix = (_tokenizer_key(tokenizer), max_length, add_special_tokens)
+            for i, text in enumerate(texts):
+                cached = self._cache.get((*prefix, text))
+                if cached is not None:
+                    self._cache.move_to_end((*prefix, text))
+                    results[i] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(text, []).append(i)
+            self.misses += sum(len(v) for v in missing.values())
+
+        if missing:
+            unique = list(missing)
+            chunks = [unique[i:i + self.chunk_size] for i in range(0, len(unique), self.chunk_size)]
+            futures = [
+                self._executor.submit(_encode_chunk, tokenizer, chunk, max_length, add_special_tokens)
+                for chunk in chunks
+            ]
+
+            encoded: list[np.ndarray] = []
+            for future in futures:
+                encoded.extend(future.result())
+
+            with self._lock:
+                for text, ids in zip(unique, encoded, strict=True):
+                    for i in missing[text]:
+                        results[i] = ids
+                    if self.cache_size and len(text) <= self.max_cached_chars:
+                        self._cache[(*prefix, text)] = ids
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return results
+
+    def encode_prompts(self, tokenizer: Any, prompts: list[str]) -> list[np.ndarray]:
+        """
+        Encode generation prompts without doubling the BOS token
+
+        Prompts rendered by a chat template already start with the BOS text,
+        so they are encoded without special tokens; others get them added,
+        as mlx_lm's own generate does.
+        """
+        bos = getattr(tokenizer, 'bos_token', None)
+        templated = [i for i, p in enumerate(prompts) if isinstance(bos, str) and bos and p.startswith(bos)]
+        if not templated:
+            return self.encode_batch(tokenizer, prompts)
+
+        results: list[np.ndarray | None] = [None] * len(prompts)
+        plain = [i for i in range(len(prompts)) if i not in set(templated)]
+        for indices, add_special_tokens in ((templated, False), (plain, True)):
+            if indices:
+                encoded = self.encode_batch(tokenizer, [prompts[i] for i in indices],
+                                            add_special_tokens=add_special_tokens)
+                for i, ids in zip(indices, encoded, strict=True):
+                    results[i] = ids
+        return results
+
+    def encode_padded(self, tokenizer: Any, texts: list[str], max_length: int,
+                      pad_to_max_length: bool = False) -> dict[str, np.ndarray]:
+        """
+        Encode and right-pad a batch for encoder models
+
+        Returns:
+            Dict with int32 'input_ids' and 'attention_mask' of shape (batch, seq_len)
+        """
+        encodings = self.encode_batch(tokenizer, texts, max_length=max_length)
+        seq_len = max_length if pad_to_max_length else max((len(e) for e in encodings), default=0)
+        pad_id = getattr(tokenizer, 'pad_token_id', None) or 0
+
+        input_ids = np.full((len(encodings), seq_len), pad_id, dtype=np.int32)
+        attention_mask = np.zeros((len(encodings), seq_len), dtype=np.int32)
+        for row, ids in enumerate(encodings):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        return {'input_ids': input_ids, 'attention_mask': attention_mask}
+
+    def clear_cache(self):
+        """Drop all cached encodings"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get pool and cache statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'workers': self.max_workers,
+                'cached_entries': len(self._cache),
+                'cache_size': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False)
+
+
+_instance_ids: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_instance_counter = itertools.count()
+
+
+def _tokenizer_key(tokenizer: Any) -> tuple:
+    """Stable cache key for a tokenizer instance"""
+    inner = getattr(tokenizer, '_tokenizer', tokenizer)
+    name = getattr(inner, 'name_or_path', None)
+    if isinstance(name, str) and name:
+        return (type(inner).__name__, name)
+
+    # Unnamed tokenizers get a per-instance key that is never reused after GC
+    try:
+        if inner not in _instance_ids:
+            _instance_ids[inner] = next(_instance_counter)
+        return (type(inner).__name__, _instance_ids[inner])
+    except TypeError:
+        return (type(inner).__name__, id(inner))
+
+
+def _encode_chunk(tokenizer: Any, texts: list[str], max_length: int | None,
+                  add_special_tokens: bool) -> list[np.ndarray]:
+    """Encode one chunk on a worker thread"""
+    # mlx_lm's TokenizerWrapper forwards attributes to the HF tokenizer but isn't callable itself
+    inner = getattr(tokenizer, '_tokenizer', tokenizer)
+
+    if getattr(inner, 'is_fast', False) is True:
+        # Rust batch encoding releases the GIL and parallelises internally
+        encoded = inner(
+            texts,
+            add_special_tokens=add_special_tokens,
+            truncation=max_length is not None,
+            max_length=max_length,
+            padding=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )['input_ids']
+    else:
+        kwargs = {} if add_special_tokens else {'add_special_tokens': False}
+        encoded = [tokenizer.encode(t, **kwargs) for t in texts]
+        if max_length is not None:
+            encoded = [ids[:max_length] for ids in encoded]
+
+    arrays = []
+    for ids in encoded:
+        array = np.asarray(ids, dtype=np.int32)
+        array.flags.writeable = False  # shared through the cache
+        arrays.append(array)
+    return arrays
+
+
+# Global tokenizer pool instance
+tokenizer_pool = TokenizerPool()
@@ -0,0 +1,345 @@
+"""
+Shared on-disk weight store
+
+Converts a model once into a single blob of native-dtype tensors, each
+starting on a 16 KB boundary (the Apple Silicon page size, so offsets are
+page-aligned on 4 KB systems too), plus a JSON manifest describing every
+tensor. Each process then maps the same blob read-only: the pages live in
+the page cache once and are shared by every worker, the menubar server and
+the CLI instead of each holding a private copy.
+
+Consumers that work on the mapped views (numpy, the GGUF dequantizer)
+share those pages directly. MLX copies host memory into its own arrays, so
+an MLX model built from the store (MLXModel._build_from_weights) still
+holds a private copy of every tensor it materializes. What it saves is the
+disk read: loads after the first are served from the shared page cache.
+
+A store is keyed by the resolved source path and invalidated when any
+source weight file changes size or mtime. Conversion is serialized across
+processes with flock, and a rebuilt blob replaces the old one atomically so
+processes still mapping the previous version are unaffected.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from ..config.settings import settings
+from .mmap_loader import LazyTensor, MemoryMappedLoader, QuantizedLazyTensor
+
+STORE_VERSION = 1
+STORE_ALIGNMENT = 16384
+SOURCE_SUFFIXES = (".safetensors", ".gguf", ".npy")
+
+# Reverse of MemoryMappedLoader._safetensors_dtype_to_numpy for plain numpy arrays
+_NUMPY_DTYPE_NAMES = {
+    np.dtype(np.float64): "F64",
+    np.dtype(np.float32): "F32",
+    np.dtype(np.float16): "F16",
+    np.dtype(np.int64): "I64",
+    np.dtype(np.int32): "I32",
+    np.dtype(np.int16): "I16",
+    np.dtype(np.int8): "I8",
+    np.dtype(np.uint8): "U8",
+    np.dtype(np.bool_): "BOOL",
+}
+
+
+class WeightStoreError(Exception):
+    """Raised when a model can't be converted into the weight store"""
+    pass
+
+
+@dataclass
+class StoredTensor:
+    """Location of one tensor inside the store blob"""
+    name: str
+    dtype: str  # safetensors dtype string, or the GGML type name for quantized blocks
+    shape: list[int]
+    offset: int
+    nbytes: int
+    ggml_type: int | None = None
+
+
+@dataclass
+class WeightManifest:
+    """Describes a converted model blob"""
+    store_id: str
+    source: str
+    source_signature: list[list]
+    blob: str
+    alignment: int
+    total_bytes: int
+    tensors: list[StoredTensor] = field(default_factory=list)
+    created_at: float = 0.0
+    version: int = STORE_VERSION
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WeightManifest":
+        data = dict(data)
+        data["tensors"] = [StoredTensor(**t) for t in data.get("tensors", [])]
+        return cls(**data)
+
+
+@dataclass
+class StoreJob:
+    """Background conversion of one model into the store"""
+    job_id: str
+    model_path: str
+    status: str = "pending"  # pending, running, completed or failed
+    store: dict[str, Any] | None = None
+    error: str | None = None
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "model_path": self.model_path,
+            "status": self.status,
+            "store": self.store,
+            "error": self.error,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+        }
+
+
+def _source_files(model_path: Path) -> list[Path]:
+    if model_path.is_file():
+        return [model_path]
+    return sorted(p for p in model_path.iterdir() if p.suffix in SOURCE_SUFFIXES and p.is_file())
+
+
+def _source_signature(files: list[Path]) -> list[list]:
+    signature = []
+    for path in files:
+        stat = path.stat()
+        signature.append([path.name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+class WeightStore:
+    """Converts models into shared, page-aligned blobs and finds existing ones"""
+
+    def __init__(self, root: Path | None = None):
+        self.root = root or settings.model.cache_dir / "weight_store"
+        self.jobs: dict[str, StoreJob] = {}
+        self._jobs_lock = threading.Lock()
+
+    def store_id(self, model_path: Path) -> str:
+        resolved = str(Path(model_path).resolve())
+        return f"{Path(resolved).name}-{hashlib.sha1(resolved.encode()).hexdigest()[:12]}"
+
+    def store_dir(self, store_id: str) -> Path:
+        return self.root / store_id
+
+    def blob_path(self, manifest: WeightManifest) -> Path:
+        return self.store_dir(manifest.store_id) / manifest.blob
+
+    def _read_manifest(self, store_id: str) -> WeightManifest | None:
+        try:
+            with open(self.store_dir(store_id) / "manifest.json") as f:
+                manifest = WeightManifest.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable weight store manifest for {store_id}: {e}")
+            return None
+        if manifest.version != STORE_VERSION or not self.blob_path(manifest).exists():
+            return None
+        return manifest
+
+    def lookup(self, model_path: Path) -> WeightManifest | None:
+        """Manifest for an up-to-date conversion of model_path, if there is one"""
+        model_path = Path(model_path)
+        manifest = self._read_manifest(self.store_id(model_path))
+        if manifest is None or manifest.source_signature != _source_signature(_source_files(model_path)):
+            return None
+        return manifest
+
+    def ensure(self, model_path: Path) -> WeightManifest:
+        """Return the store for model_path, converting it first if missing or stale"""
+        model_path = Path(model_path)
+        manifest = self.lookup(model_path)
+        if manifest is not None:
+            return manifest
+
+        store_id = self.store_id(model_path)
+        store_dir = self.store_dir(store_id)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        with open(store_dir / ".lock", 'w') as lock:
+            # Another process may be converting the same model; wait for it and reuse its blob
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                manifest = self.lookup(model_path)
+                if manifest is None:
+                    manifest = self.convert(model_path)
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        return manifest
+
+    def convert(self, model_path: Path) -> WeightManifest:
+        """
+        Write every tensor of model_path into a page-aligned blob
+
+        Tensors keep their stored dtype (bf16/fp8 words and GGUF quantized
+        blocks are copied as-is) so the blob is no larger than the source.
+        Callers should go through ensure(), which holds the conversion lock.
+        """
+        model_path = Path(model_path)
+        files = _source_files(model_path)
+        if not files:
+            raise WeightStoreError(f"No safetensors, GGUF or numpy weights under {model_path}")
+
+        store_id = self.store_id(model_path)
+        store_dir = self.store_dir(store_id)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        signature = _source_signature(files)
+        start_time = time.time()
+
+        loader = MemoryMappedLoader()
+        blob_tmp = store_dir / "weights.bin.tmp"
+        tensors = []
+        try:
+            weights = loader.load_model_mmap(model_path)
+            with open(blob_tmp, 'wb') as f:
+                offset = 0
+                for name, value in weights.items():
+                    stored, data = self._stored_bytes(name, value)
+                    if stored is None:
+                        logger.warning(f"Skipping tensor {name} of unsupported type {type(value).__name__}")
+                        continue
+                    padding = -offset % STORE_ALIGNMENT
+                    f.write(b"\0" * padding)
+                    offset += padding
+                    stored.offset = offset
+                    f.write(data)
+                    offset += stored.nbytes
+                    tensors.append(stored)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            with contextlib.suppress(OSError):
+                blob_tmp.unlink()
+            raise WeightStoreError(f"Failed to convert {model_path}: {e}") from e
+        finally:
+            loader.close_all()
+
+        manifest = WeightManifest(
+            store_id=store_id,
+            source=str(model_path.resolve()),
+            source_signature=signature,
+            blob="weights.bin",
+            alignment=STORE_ALIGNMENT,
+            total_bytes=offset,
+            tensors=tensors,
+            created_at=time.time(),
+        )
+        # Blob first, then the manifest that points at it
+        os.replace(blob_tmp, store_dir / manifest.blob)
+        manifest_tmp = store_dir / "manifest.json.tmp"
+        with open(manifest_tmp, 'w') as f:
+            json.dump(asdict(manifest), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(manifest_tmp, store_dir / "manifest.json")
+
+        logger.info(f"Converted {model_path.name} into weight store {store_id}: {len(tensors)} tensors, "
+                    f"{offset / (1024 ** 3):.2f} GB in {(time.time() - start_time):.1f}s")
+        return manifest
+
+    @staticmethod
+    def _stored_bytes(name: str, value: Any) -> tuple[StoredTensor | None, memoryview | None]:
+        if isinstance(value, QuantizedLazyTensor):
+            raw = value.raw()
+            return StoredTensor(name, value.dtype, list(value.shape), 0, raw.nbytes, value.ggml_type), raw.data
+        if isinstance(value, LazyTensor):
+            raw = np.ascontiguousarray(value.raw())
+            return StoredTensor(name, value.dtype, list(value.shape), 0, raw.nbytes), raw.reshape(-1).data
+        if isinstance(value, np.ndarray) and value.dtype in _NUMPY_DTYPE_NAMES:
+            raw = np.ascontiguousarray(value)
+            dtype = _NUMPY_DTYPE_NAMES[value.dtype]
+            return StoredTensor(name, dtype, list(value.shape), 0, raw.nbytes), raw.reshape(-1).data
+        return None, None
+
+    def create_job(self, model_path: Path) -> StoreJob:
+        """Register a pending conversion for run_job"""
+        job = StoreJob(job_id=str(uuid.uuid4()), model_path=str(model_path))
+        with self._jobs_lock:
+            self.jobs[job.job_id] = job
+        return job
+
+    def run_job(self, job_id: str):
+        """Run ensure() for a job on the calling thread; copying a large checkpoint takes a while"""
+        job = self.jobs[job_id]
+        job.status = "running"
+        job.started_at = datetime.now(UTC)
+        try:
+            job.store = self.summary(self.ensure(Path(job.model_path)))
+            job.status = "completed"
+        except Exception as e:
+            logger.error(f"Weight store conversion {job_id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        job.completed_at = datetime.now(UTC)
+
+    def get_job(self, job_id: str) -> StoreJob | None:
+        return self.jobs.get(job_id)
+
+    def summary(self, manifest: WeightManifest) -> dict[str, Any]:
+        return {
+            "store_id": manifest.store_id,
+            "source": manifest.source,
+            "blob": str(self.blob_path(manifest)),
+            "size_gb": manifest.total_bytes / (1024 ** 3),
+            "tensor_count": len(manifest.tensors),
+            "created_at": manifest.created_at,
+        }
+
+    def list_stores(self) -> list[dict[str, Any]]:
+        """Summaries of every converted model"""
+        if not self.root.exists():
+            return []
+        stores = []
+        for store_dir in sorted(self.root.iterdir()):
+            manifest = self._read_manifest(store_dir.name) if store_dir.is_dir() else None
+            if manifest is not None:
+                stores.append(self.summary(manifest))
+        return stores
+
+    def remove(self, store_id: str) -> bool:
+        """
+        Delete a store; processes that still map the blob keep their pages until they unmap
+
+        Holds the conversion lock, so a conversion in progress finishes first.
+        The lock file itself stays: a process already waiting on it must
+        not end up converting alongside one that created a fresh lock file.
+        """
+        store_dir = self.store_dir(store_id)
+        if not store_dir.is_dir():
+            return False
+        with open(store_dir / ".lock", 'w') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                for path in store_dir.iterdir():
+                    if path.name != ".lock":
+                        path.unlink()
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+        return True
+
+
+# Global weight store instance
+weight_store = WeightStore()
@@ -0,0 +1,81 @@
+"""
+Unit tests for batched multi-prompt generation (inference/batch_generation.py).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from src.inference.batch_generation import generate_batch, length_sorted_batches
+
+
+class TestLengthSortedBatches:
+    """Tests for length_sorted_batches grouping."""
+
+    def test_groups_sorted_by_length(self):
+        """Indices are ordered shortest-first and split at max_batch_size."""
+        groups = length_sorted_batches([5, 1, 3, 9, 2], max_batch_size=2)
+        assert groups == [[1, 4], [2, 0], [3]]
+
+    def test_single_group_when_batch_fits(self):
+        """All prompts share one group when they fit in a batch."""
+        groups = length_sorted_batches([4, 2, 8], max_batch_size=20)
+        assert groups == [[1, 0, 2]]
+
+    def test_invalid_batch_size_clamped(self):
+        """A non-positive batch size degrades to one prompt per group."""
+        assert length_sorted_batches([1, 2], max_batch_size=0) == [[0], [1]]
+
+
+class TestGenerateBatch:
+    """Tests for generate_batch with mlx_lm mocked out."""
+
+    @staticmethod
+    def _tokenizer():
+        tokenizer = MagicMock()
+        tokenizer.encode.side_effect = lambda text, **kwargs: list(range(len(text.split())))
+        return tokenizer
+
+    @patch("src.inference.batch_generation.MLX_AVAILABLE", False)
+    def test_raises_without_mlx(self):
+        """generate_batch raises RuntimeError when MLX unavailable."""
+        with pytest.raises(RuntimeError, match="MLX is not available"):
+            generate_batch(MagicMock(), MagicMock(), ["hello"])
+
+    @patch("src.inference.batch_generation.make_sampler", None)
+    @patch("src.inference.batch_generation.MLX_AVAILABLE", True)
+    def test_results_restored_to_prompt_order(self):
+        """Prompts are decoded length-sorted but returned in request order."""
+        calls = []
+
+        def fake_batch_generate(model, tokenizer, prompts, **kwargs):
+            calls.append([len(p) for p in prompts])
+            response = MagicMock()
+            response.texts = [f"out{len(p)}" for p in prompts]
+            return response
+
+        with patch("src.inference.batch_generation.batch_generate", side_effect=fake_batch_generate):
+            results = generate_batch(
+                MagicMock(), self._tokenizer(),
+                ["a b c", "a", "a b"],
+                max_tokens=1,
+                max_batch_size=20,
+            )
+
+        # One batched call with prompts sorted by length
+        assert calls == [[1, 2, 3]]
+        assert [r.index for r in results] == [0, 1, 2]
+        assert [r.text for r in results] == ["out3", "out1", "out2"]
+        assert [r.prompt_tokens for r in results] == [3, 1, 2]
+        assert all(r.finish_reason == "length" for r in results)
+
+    @patch("src.inference.batch_generation.make_sampler", None)
+    @patch("src.inference.batch_generation.batch_generate", None)
+    @patch("src.inference.batch_generation.MLX_AVAILABLE", True)
+    def test_sequential_fallback(self):
+        """Without mlx_lm batch support each prompt is generated on its own."""
+        with patch("src.inference.batch_generation.generate", return_value="x y") as mock_generate:
+            results = generate_batch(MagicMock(), self._tokenizer(), ["a", "b c"], max_tokens=10)
+
+        assert mock_generate.call_count == 2
+        assert [r.completion_tokens for r in results] == [2, 2]
+        assert all(r.finish_reason == "stop" for r in results)
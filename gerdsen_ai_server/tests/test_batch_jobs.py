@@ -0,0 +1,316 @@
+"""
+Unit tests for the offline batch job service and /v1/batches endpoints
+"""
+
+import base64
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from flask import Flask
+from src.inference.batch_generation import BatchCompletion
+from src.routes.openai_api import bp
+from src.services.batch_jobs import BatchError, BatchJobService, BatchStatus
+
+
+def _jsonl(records):
+    return ("\n".join(json.dumps(r) for r in records) + "\n").encode()
+
+
+def _chat_line(custom_id, content="Hi", **body):
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": "test-model", "messages": [{"role": "user", "content": content}], **body},
+    }
+
+
+def _embedding_line(custom_id, text, **body):
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/embeddings",
+        "body": {"model": "all-MiniLM-L6-v2", "input": text, **body},
+    }
+
+
+def _batch_model():
+    """Mock model whose generate_batch echoes one completion per prompt."""
+    model = MagicMock()
+    model.generate_batch.side_effect = lambda prompts, **kwargs: [
+        BatchCompletion(index=i, text=f" reply {i}", prompt_tokens=3, completion_tokens=2, finish_reason="stop")
+        for i in range(len(prompts))
+    ]
+    return model
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Service rooted in a temp dir with the background worker disabled."""
+    svc = BatchJobService(root_dir=tmp_path / "batches", chunk_size=2, pause_ms=0)
+    svc._enqueue = MagicMock()
+    return svc
+
+
+def _read_jsonl(service, file_id):
+    return [json.loads(line) for line in service.get_file_path(file_id).read_text().splitlines()]
+
+
+class TestBatchJobService:
+    """Tests for batch creation, processing and checkpointing."""
+
+    def test_create_batch_validates_input(self, service):
+        """Unknown files and unsupported endpoints are rejected."""
+        with pytest.raises(BatchError):
+            service.create_batch("file-missing", "/v1/chat/completions")
+
+        file_obj = service.create_file(_jsonl([_chat_line("a")]))
+        with pytest.raises(BatchError):
+            service.create_batch(file_obj["id"], "/v1/images")
+
+    def test_chat_batch_groups_requests(self, service):
+        """Compatible chat requests in a chunk share one batched generation call."""
+        model = _batch_model()
+        service.set_app_state({"loaded_models": {"test-model": model}})
+        file_obj = service.create_file(_jsonl([_chat_line(f"req-{i}") for i in range(4)]))
+        job = service.create_batch(file_obj["id"], "/v1/chat/completions")
+
+        service.process_batch(job.id)
+
+        assert job.status == BatchStatus.COMPLETED
+        assert job.completed == 4
+        assert job.failed == 0
+        # chunk_size=2 -> two batched calls of two prompts each
+        assert model.generate_batch.call_count == 2
+        records = _read_jsonl(service, job.output_file_id)
+        assert [r["custom_id"] for r in records] == ["req-0", "req-1", "req-2", "req-3"]
+        assert records[0]["response"]["status_code"] == 200
+        assert records[0]["response"]["body"]["choices"][0]["message"]["content"] == "reply 0"
+
+    def test_chat_batch_keeps_adapters_and_options_apart(self, service):
+        """Adapters are passed per prompt; differing sampling options get separate calls."""
+        model = _batch_model()
+        service.set_app_state({"loaded_models": {"test-model": model}})
+        service.chunk_size = 3
+        lines = [_chat_line("a", adapter="styled"), _chat_line("b"), _chat_line("c", top_k=5)]
+        job = service.create_batch(service.create_file(_jsonl(lines))["id"], "/v1/chat/completions")
+
+        with patch("src.routes.openai_api.find_missing_adapters", return_value=[]):
+            service.process_batch(job.id)
+
+        assert job.completed == 3
+        assert model.generate_batch.call_count == 2
+        first_call = model.generate_batch.call_args_list[0]
+        assert len(first_call.args[0]) == 2
+        assert first_call.kwargs["adapters"] == ["styled", None]
+        assert "adapters" not in model.generate_batch.call_args_list[1].kwargs
+
+    def test_missing_adapter_fails_only_its_request(self, service):
+        """A request naming an unknown adapter is reported without failing its neighbours."""
+        service.set_app_state({"loaded_models": {"test-model": _batch_model()}})
+        lines = [_chat_line("a", adapter="nope"), _chat_line("b")]
+        job = service.create_batch(service.create_file(_jsonl(lines))["id"], "/v1/chat/completions")
+
+        with patch("src.routes.openai_api.find_missing_adapters", side_effect=lambda names: names):
+            service.process_batch(job.id)
+
+        assert job.completed == 1
+        errors = _read_jsonl(service, job.error_file_id)
+        assert errors[0]["custom_id"] == "a"
+
+    def test_invalid_lines_go_to_error_file(self, service):
+        """Malformed lines are recorded in the error file without failing the batch."""
+        service.set_app_state({"loaded_models": {"test-model": _batch_model()}})
+        content = _jsonl([_chat_line("ok")]) + b"not json\n"
+        job = service.create_batch(service.create_file(content)["id"], "/v1/chat/completions")
+
+        service.process_batch(job.id)
+
+        assert job.status == BatchStatus.COMPLETED
+        assert job.completed == 1
+        assert job.failed == 1
+        errors = _read_jsonl(service, job.error_file_id)
+        assert errors[0]["error"]["code"] == "invalid_request"
+
+    def test_malformed_bodies_fail_only_their_lines(self, service):
+        """Bodies that aren't objects or fail validation don't take valid neighbours down."""
+        model = _batch_model()
+        service.set_app_state({"loaded_models": {"test-model": model}})
+        service.chunk_size = 3
+        not_object = {**_chat_line("b"), "body": "x"}
+        bad_messages = _chat_line("c")
+        bad_messages["body"]["messages"] = "x"
+        job = service.create_batch(
+            service.create_file(_jsonl([_chat_line("a"), not_object, bad_messages]))["id"], "/v1/chat/completions")
+
+        service.process_batch(job.id)
+
+        assert job.status == BatchStatus.COMPLETED
+        assert job.completed == 1
+        assert [r["custom_id"] for r in _read_jsonl(service, job.output_file_id)] == ["a"]
+        errors = _read_jsonl(service, job.error_file_id)
+        assert [e["custom_id"] for e in errors] == ["b", "c"]
+        assert {e["error"]["code"] for e in errors} == {"invalid_request"}
+        assert len(model.generate_batch.call_args.args[0]) == 1
+
+    def test_embeddings_batch_uses_single_dispatch(self, service):
+        """All embedding inputs of a chunk are embedded in one dispatcher call."""
+        file_obj = service.create_file(_jsonl([_embedding_line("e1", "hello"), _embedding_line("e2", "world")]))
+        job = service.create_batch(file_obj["id"], "/v1/embeddings")
+
+        with patch("src.model_loaders.compute_dispatcher.compute_dispatcher") as dispatcher:
+            dispatcher.embed_array.return_value = np.array([[0.1, 0.2], [0.3, 0.4]], dtype=np.float32)
+            service.process_batch(job.id)
+
+        dispatcher.embed_array.assert_called_once_with(["hello", "world"], "all-MiniLM-L6-v2", long_input=False)
+        records = _read_jsonl(service, job.output_file_id)
+        assert records[1]["response"]["body"]["data"][0]["embedding"] == pytest.approx([0.3, 0.4])
+
+    def test_embeddings_batch_honours_encoding_and_long_input(self, service):
+        """base64 and long_input requests are dispatched apart and encoded like /v1/embeddings."""
+        service.chunk_size = 3
+        lines = [
+            _embedding_line("plain", "a"),
+            _embedding_line("b64", "b", encoding_format="base64"),
+            _embedding_line("long", "c", long_input=True),
+        ]
+        job = service.create_batch(service.create_file(_jsonl(lines))["id"], "/v1/embeddings")
+
+        with patch("src.model_loaders.compute_dispatcher.compute_dispatcher") as dispatcher:
+            dispatcher.embed_array.side_effect = lambda texts, model, long_input: np.full(
+                (len(texts), 2), 0.5, dtype=np.float32)
+            service.process_batch(job.id)
+
+        assert dispatcher.embed_array.call_count == 3
+        assert dispatcher.embed_array.call_args_list[2].kwargs == {"long_input": True}
+        records = {r["custom_id"]: r["response"]["body"] for r in _read_jsonl(service, job.output_file_id)}
+        assert records["plain"]["data"][0]["embedding"] == pytest.approx([0.5, 0.5])
+        encoded = records["b64"]["data"][0]["embedding"]
+        assert np.frombuffer(base64.b64decode(encoded), dtype="<f4").tolist() == [0.5, 0.5]
+
+    def test_resume_from_checkpoint(self, service, tmp_path):
+        """A restarted service continues after the last committed chunk."""
+        model = _batch_model()
+        service.set_app_state({"loaded_models": {"test-model": model}})
+        file_obj = service.create_file(_jsonl([_chat_line(f"req-{i}") for i in range(4)]))
+        job = service.create_batch(file_obj["id"], "/v1/chat/completions")
+
+        # Simulate the process dying while the second chunk is in flight
+        original = service._process_chunk
+        calls = []
+
+        def crash_after_first(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("process killed")
+            return original(*args)
+
+        service._process_chunk = crash_after_first
+        with pytest.raises(RuntimeError):
+            service.process_batch(job.id)
+        assert job.next_line == 2
+
+        restarted = BatchJobService(root_dir=tmp_path / "batches", chunk_size=2, pause_ms=0)
+        restarted._enqueue = MagicMock()
+        restarted.set_app_state({"loaded_models": {"test-model": model}})
+        assert restarted.resume_pending() == 1
+        restarted.process_batch(job.id)
+
+        resumed = restarted.get_batch(job.id)
+        assert resumed.status == BatchStatus.COMPLETED
+        records = _read_jsonl(restarted, resumed.output_file_id)
+        assert [r["custom_id"] for r in records] == ["req-0", "req-1", "req-2", "req-3"]
+
+    def test_cancel_stops_at_checkpoint(self, service):
+        """A cancelled job stops before processing further chunks."""
+        service.set_app_state({"loaded_models": {"test-model": _batch_model()}})
+        file_obj = service.create_file(_jsonl([_chat_line(f"req-{i}") for i in range(4)]))
+        job = service.create_batch(file_obj["id"], "/v1/chat/completions")
+
+        service.cancel_batch(job.id)
+        service.process_batch(job.id)
+
+        assert job.status == BatchStatus.CANCELLED
+        assert job.completed == 0
+        assert job.cancelled_at is not None
+
+
+    def test_cancel_during_last_chunk_is_not_overwritten(self, service):
+        """A cancel that lands while the final chunk runs ends the job as cancelled."""
+        model = _batch_model()
+        service.set_app_state({"loaded_models": {"test-model": model}})
+        job = service.create_batch(service.create_file(_jsonl([_chat_line("a")]))["id"], "/v1/chat/completions")
+        generate = model.generate_batch.side_effect
+
+        def cancel_then_generate(prompts, **kwargs):
+            service.cancel_batch(job.id)
+            return generate(prompts, **kwargs)
+
+        model.generate_batch.side_effect = cancel_then_generate
+        service.process_batch(job.id)
+
+        assert job.status == BatchStatus.CANCELLED
+        assert job.completed_at is None
+        assert job.cancelled_at is not None
+
+
+class TestBatchRoutes:
+    """Tests for the /v1/files and /v1/batches endpoints."""
+
+    @pytest.fixture
+    def client(self, service):
+        """Create test client backed by the temp-dir service."""
+        app = Flask(__name__)
+        app.config["TESTING"] = True
+        app.register_blueprint(bp, url_prefix="/v1")
+        app.config["app_state"] = {"loaded_models": {}, "metrics": {}}
+        with patch("src.routes.openai_api.verify_api_key", return_value=True), \
+                patch("src.services.batch_jobs.batch_job_service", service):
+            yield app.test_client()
+
+    def test_upload_create_and_retrieve(self, client, service):
+        """Uploading a file and creating a batch returns OpenAI-shaped objects."""
+        response = client.post("/v1/files", data=_jsonl([_chat_line("a")]))
+        assert response.status_code == 200
+        file_obj = response.get_json()
+        assert file_obj["object"] == "file"
+        assert file_obj["purpose"] == "batch"
+
+        response = client.post("/v1/batches", json={
+            "input_file_id": file_obj["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        })
+        assert response.status_code == 200
+        batch = response.get_json()
+        assert batch["object"] == "batch"
+        assert batch["status"] == "validating"
+        service._enqueue.assert_called_once_with(batch["id"])
+
+        response = client.get(f"/v1/batches/{batch['id']}")
+        assert response.get_json()["id"] == batch["id"]
+
+        listing = client.get("/v1/batches").get_json()
+        assert listing["data"][0]["id"] == batch["id"]
+
+    def test_create_batch_errors(self, client):
+        """Missing fields return 400 and unknown batches return 404."""
+        assert client.post("/v1/batches", json={}).status_code == 400
+        response = client.post("/v1/batches", json={"input_file_id": "file-x", "endpoint": "/v1/chat/completions"})
+        assert response.status_code == 400
+        assert client.get("/v1/batches/batch_missing").status_code == 404
+        assert client.post("/v1/batches/batch_missing/cancel").status_code == 404
+
+    def test_cancel_and_download(self, client, service):
+        """Cancelling a queued batch marks it as cancelling; file content is downloadable."""
+        file_obj = service.create_file(_jsonl([_chat_line("a")]))
+        job = service.create_batch(file_obj["id"], "/v1/chat/completions")
+
+        response = client.post(f"/v1/batches/{job.id}/cancel")
+        assert response.get_json()["status"] == "cancelling"
+
+        response = client.get(f"/v1/files/{file_obj['id']}/content")
+        assert response.status_code == 200
+        assert json.loads(response.data.decode().splitlines()[0])["custom_id"] == "a"
@@ -0,0 +1,225 @@
+"""
+Tests for the bulk ingestion pipeline (services/bulk_ingest.py).
+"""
+
+import threading
+
+import pytest
+import src.services.bulk_ingest as bulk_ingest
+from src.services.bulk_ingest import (
+    BulkIngestPipeline,
+    IngestDocument,
+    IngestError,
+    iter_path_documents,
+    parse_ndjson,
+    resolve_ingest_path,
+)
+from src.services.ingest_manifest import content_hash
+from src.services.vector_store import VectorStoreService
+
+
+@pytest.fixture
+def small_stages(monkeypatch):
+    config = bulk_ingest.settings.vectorstore
+    monkeypatch.setattr(config, "ingest_chunk_workers", 2)
+    monkeypatch.setattr(config, "ingest_embed_workers", 2)
+    monkeypatch.setattr(config, "ingest_embed_batch_size", 3)
+    monkeypatch.setattr(config, "ingest_write_batch_size", 5)
+    monkeypatch.setattr(config, "ingest_queue_size", 2)
+    monkeypatch.setattr(config, "ingest_progress_interval_s", 0.01)
+    return config
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = VectorStoreService(persist_dir=str(tmp_path), backend="native")
+    svc.embed_calls = []
+
+    def embed(texts):
+        svc.embed_calls.append(list(texts))
+        return [[float(len(t)), float("cake" in t), 1.0] for t in texts]
+
+    svc._embedding_fn = embed
+    return svc
+
+
+def _documents(n: int) -> list[IngestDocument]:
+    return [IngestDocument(source=f"doc-{i}.txt", text=f"Document {i} about cake number {i}.") for i in range(n)]
+
+
+class TestBulkIngestPipeline:
+
+    def test_ingests_across_document_batches(self, service, small_stages):
+        events = list(BulkIngestPipeline(service, collection_name="kb").run(_documents(20)))
+
+        done = events[-1]
+        assert done["event"] == "done"
+        assert done["status"] == "success"
+        assert done["documents"] == done["documents_chunked"] == 20
+        assert done["chunks"] == done["chunks_embedded"] == done["chunks_written"] == 20
+        assert service.get_collection_info("kb")["count"] == 20
+        assert all(len(batch) <= 3 for batch in service.embed_calls)
+        assert any(len(batch) == 3 for batch in service.embed_calls)
+
+    def test_request_and_document_metadata_are_merged(self, service, small_stages):
+        document = IngestDocument(source="a.txt", text="Some text.", metadata={"lang": "en", "team": "docs"})
+
+        list(BulkIngestPipeline(service, collection_name="kb", metadata={"team": "all", "batch": 1}).run([document]))
+
+        stored = service.get_or_create_collection("kb").get()["metadatas"][0]
+        assert stored["source"] == "a.txt"
+        assert stored["lang"] == "en"
+        assert stored["team"] == "docs"
+        assert stored["batch"] == 1
+
+    def test_failures_are_reported_and_skipped(self, service, small_stages, monkeypatch):
+        embed = service._embedding_fn
+
+        def flaky(texts):
+            if any("poison" in t for t in texts):
+                raise RuntimeError("device lost")
+            return embed(texts)
+
+        service._embedding_fn = flaky
+        documents = [
+            IngestDocument(source="line 1", error="Invalid JSON"),
+            IngestDocument(source="bad.txt", text="poison pill"),
+            *_documents(2),
+        ]
+        monkeypatch.setattr(small_stages, "ingest_embed_workers", 1)
+        monkeypatch.setattr(small_stages, "ingest_embed_batch_size", 1)
+
+        events = list(BulkIngestPipeline(service, collection_name="kb").run(documents))
+
+        errors = [e for e in events if e["event"] == "error"]
+        assert {(e["stage"], e["source"]) for e in errors} == {("chunk", "line 1"), ("embed", "bad.txt")}
+        done = events[-1]
+        assert done["status"] == "partial"
+        assert done["documents_failed"] == 1
+        assert done["chunks_failed"] == 1
+        assert done["chunks_written"] == 2
+
+    def test_backpressure_bounds_reader(self, service, small_stages):
+        release = threading.Event()
+        embed = service._embedding_fn
+
+        def blocked(texts):
+            release.wait(10)
+            return embed(texts)
+
+        service._embedding_fn = blocked
+        consumed = []
+
+        def reader():
+            for document in _documents(200):
+                consumed.append(document.source)
+                yield document
+
+        events = BulkIngestPipeline(service, collection_name="kb").run(reader())
+        progress = 0
+        for event in events:
+            progress += event["event"] == "progress"
+            if progress == 20:
+                break
+        # Queues of 2 between stages, 2 chunk and 2 embed workers holding a batch each
+        assert len(consumed) < 30
+
+        release.set()
+        assert list(events)[-1]["chunks_written"] == 200
+
+    def test_closing_the_stream_stops_all_stages(self, service, small_stages):
+        before = {t.name for t in threading.enumerate()}
+        events = BulkIngestPipeline(service, collection_name="kb").run(iter(_documents(500)))
+        next(events)
+
+        events.close()
+
+        assert not [t for t in threading.enumerate() if t.name.startswith("ingest-") and t.name not in before]
+        assert service.get_collection_info("kb")["count"] < 500
+
+    def test_reingestion_only_embeds_changes(self, service, small_stages):
+        documents = _documents(10)
+        list(BulkIngestPipeline(service, collection_name="kb").run(documents))
+        service.embed_calls.clear()
+        documents[3] = IngestDocument(source="doc-3.txt", text="Document 3 was rewritten.")
+
+        done = list(BulkIngestPipeline(service, collection_name="kb").run(documents))[-1]
+
+        assert [t for batch in service.embed_calls for t in batch] == ["Document 3 was rewritten."]
+        assert done["documents_unchanged"] == 9
+        assert done["chunks"] == done["chunks_written"] == 1
+        assert done["chunks_unchanged"] == 9
+        assert done["chunks_deleted"] == 1
+        assert service.get_or_create_collection("kb").count() == 10
+        assert service.manifest.get("kb", "doc-3.txt").document_hash == content_hash("Document 3 was rewritten.")
+
+    def test_repeated_source_is_rejected_while_in_flight(self, service, small_stages, monkeypatch):
+        monkeypatch.setattr(small_stages, "ingest_chunk_workers", 1)
+        release = threading.Event()
+        embed = service._embedding_fn
+
+        def blocked(texts):
+            release.wait(10)
+            return embed(texts)
+
+        service._embedding_fn = blocked
+        documents = [IngestDocument(source="a.txt", text="First version."),
+                     IngestDocument(source="a.txt", text="Second version.")]
+        events = BulkIngestPipeline(service, collection_name="kb").run(documents)
+
+        errors = []
+        for event in events:
+            if event["event"] == "error":
+                errors.append(event)
+                release.set()
+
+        assert [(e["stage"], e["source"]) for e in errors] == [("chunk", "a.txt")]
+        assert service.get_or_create_collection("kb").get()["documents"] == ["First version."]
+
+class TestInputs:
+
+    def test_parse_ndjson(self):
+        lines = [
+            b'{"text": "first", "source": "a.md", "metadata": {"k": 1}}\n',
+            b"\n",
+            b"{not json}\n",
+            b'{"source": "no text"}\n',
+            '{"text": "unnamed"}',
+        ]
+
+        documents = list(parse_ndjson(lines))
+
+        assert [(d.source, d.text, d.metadata) for d in documents[:1]] == [("a.md", "first", {"k": 1})]
+        assert documents[1].error.startswith("Invalid JSON")
+        assert documents[2].source == "line 4"
+        assert documents[2].error
+        assert (documents[3].source, documents[3].text) == ("line 5", "unnamed")
+
+    def test_path_ingestion_needs_a_root(self, monkeypatch):
+        monkeypatch.setattr(bulk_ingest.settings.vectorstore, "ingest_root", None)
+        with pytest.raises(IngestError, match="IMPETUS_INGEST_ROOT"):
+            resolve_ingest_path("docs")
+
+    def test_paths_stay_under_root(self, tmp_path):
+        (tmp_path / "wiki" / "deep").mkdir(parents=True)
+        (tmp_path / "wiki" / "a.md").write_text("alpha")
+        (tmp_path / "wiki" / "deep" / "b.txt").write_text("beta")
+        (tmp_path / "wiki" / "image.png").write_bytes(b"\x89PNG")
+
+        with pytest.raises(IngestError, match="outside"):
+            resolve_ingest_path("../etc", root=tmp_path)
+        with pytest.raises(IngestError, match="does not exist"):
+            resolve_ingest_path("missing", root=tmp_path)
+
+        root, target = resolve_ingest_path("wiki", root=tmp_path)
+        assert [d.source for d in iter_path_documents(root, target)] == ["wiki/a.md", "wiki/deep/b.txt"]
+
+    def test_path_documents_are_read_by_chunk_workers(self, service, small_stages, tmp_path):
+        (tmp_path / "notes.md").write_text("Notes about cake.")
+
+        root, target = resolve_ingest_path("notes.md", root=tmp_path)
+        events = list(BulkIngestPipeline(service, collection_name="kb").run(iter_path_documents(root, target)))
+
+        assert events[-1]["chunks_written"] == 1
+        assert service.search("cake", collection_name="kb")["metadatas"][0]["source"] == "notes.md"
+        assert events[-1]["collection"] == "kb"
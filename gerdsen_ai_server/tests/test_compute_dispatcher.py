@@ -5,10 +5,16 @@ capabilities reporting, and embedding dispatch.
 
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from src.config.settings import ComputeSettings
-from src.model_loaders.base import EmbeddingError
-from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.model_loaders.base import BaseEmbeddingModel, EmbeddingError
+from src.model_loaders.compute_dispatcher import (
+    ComputeDispatcher,
+    padded_tokens,
+    plan_length_buckets,
+    truncate_embeddings,
+)
 
 # ── Helpers ────────────────────────────────────────────────────────
 
@@ -58,6 +64,7 @@ class TestBackendSelection:
 
     @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.detect_ane_availability")
     @patch("src.model_loaders.compute_dispatcher.platform")
     def test_no_backend_returns_none(self, mock_platform, mock_ane, tmp_path):
@@ -102,6 +109,7 @@ class TestCapabilities:
 
     @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.platform")
     def test_capabilities_structure(self, mock_platform, tmp_path):
         mock_platform.system.return_value = "Linux"
@@ -127,6 +135,7 @@ class TestEmbedDispatch:
 
     @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.platform")
     def test_embed_without_backend_raises(self, mock_platform, tmp_path):
         mock_platform.system.return_value = "Linux"
@@ -138,6 +147,7 @@ class TestEmbedDispatch:
 
     @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", False)
     @patch("src.model_loaders.compute_dispatcher.platform")
     def test_embed_unknown_model_raises(self, mock_platform, tmp_path):
         mock_platform.system.return_value = "Linux"
@@ -164,7 +174,7 @@ class TestEmbedDispatch:
         dispatcher._active_device = "gpu"
 
         result = dispatcher.embed(["hello"], model_name="all-MiniLM-L6-v2")
-        assert result == [[0.1, 0.2, 0.3]]
+        assert result == [pytest.approx([0.1, 0.2, 0.3])]
         mock_model.embed.assert_called_once_with(["hello"])
 
     def test_embed_batching(self, tmp_path):
@@ -187,3 +197,89 @@ class TestEmbedDispatch:
         assert len(result) == 5
         # Should have been called 3 times: [a,b], [c,d], [e]
         assert mock_model.embed.call_count == 3
+
+
+# ── Length bucketing ───────────────────────────────────────────────
+
+
+class _WordModel(BaseEmbeddingModel):
+    """Fake model whose tokens are words; records each batch it sees."""
+
+    def __init__(self):
+        super().__init__("all-MiniLM-L6-v2", "fake", 2, 256, "cpu")
+        self._loaded = True
+        self.batches: list[list[str]] = []
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+    def token_lengths(self, texts):
+        return [len(t.split()) for t in texts]
+
+    def embed(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t.split())), 0.0] for t in texts]
+
+
+class TestLengthBucketing:
+
+    def test_plan_groups_similar_lengths(self):
+        lengths = [100, 3, 4, 98, 5, 3]
+        buckets = plan_length_buckets(lengths, max_batch_size=4, max_padding=0.25)
+        assert buckets == [[1, 5, 2, 4], [3, 0]]
+        assert padded_tokens(lengths, buckets) < padded_tokens(lengths, [[0, 1, 2, 3], [4, 5]])
+
+    def test_plan_respects_batch_size(self):
+        buckets = plan_length_buckets([5] * 10, max_batch_size=4, max_padding=0.25)
+        assert [len(b) for b in buckets] == [4, 4, 2]
+
+    def test_dispatcher_restores_input_order(self, tmp_path):
+        """Bucketed passes come back in the caller's order, with padding savings reported."""
+        model = _WordModel()
+        loader = MagicMock()
+        loader.get_loaded_model.return_value = model
+        settings = _make_settings(tmp_path, embedding_vector_cache=False, embedding_micro_batching=False)
+        dispatcher = ComputeDispatcher(settings, embedding_loader=loader)
+
+        texts = ["w " * 60, "a", "b c", "w " * 50, "d"]
+        result = dispatcher.embed(texts)
+
+        assert [v[0] for v in result] == [60.0, 1.0, 2.0, 50.0, 1.0]
+        assert all(len({len(t.split()) > 10 for t in batch}) == 1 for batch in model.batches)
+        stats = dispatcher.get_bucketing_stats()
+        assert stats["padded_tokens_saved"] > 0
+        assert dispatcher.get_active_device() == "cpu"
+
+
+# ── NumPy output path ──────────────────────────────────────────────
+
+
+class TestEmbedArray:
+
+    def test_returns_contiguous_float32_matrix(self, tmp_path):
+        """Cached and freshly computed rows land in one float32 matrix in input order."""
+        model = _WordModel()
+        loader = MagicMock()
+        loader.get_loaded_model.return_value = model
+        dispatcher = ComputeDispatcher(_make_settings(tmp_path, embedding_micro_batching=False),
+                                       embedding_loader=loader)
+        dispatcher.embed_array(["a b"])
+
+        matrix = dispatcher.embed_array(["x y z", "a b", "q"])
+
+        assert matrix.dtype == np.float32
+        assert matrix.flags["C_CONTIGUOUS"]
+        np.testing.assert_array_equal(matrix[:, 0], [3.0, 2.0, 1.0])
+        assert dispatcher.embed_array([]).shape == (0, 384)
+
+    def test_truncate_embeddings_renormalises(self):
+        vectors = np.array([[3.0, 4.0, 12.0], [1.0, 0.0, 5.0]], dtype=np.float32)
+
+        truncated = truncate_embeddings(vectors, 2)
+
+        np.testing.assert_allclose(truncated, [[0.6, 0.8], [1.0, 0.0]], rtol=1e-6)
+        assert truncate_embeddings(vectors, None) is vectors
+        assert truncate_embeddings(vectors, 3) is vectors
@@ -0,0 +1,141 @@
+"""
+Tests for the PyTorch CPU embedding backend (model_loaders/cpu_embedding_loader.py)
+and its place in the dispatcher's priority chain.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from src.config.settings import ComputeSettings
+from src.model_loaders import cpu_embedding_loader
+from src.model_loaders.base import EmbeddingError
+from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.model_loaders.cpu_embedding_loader import CPUEmbeddingModelLoader, intra_op_threads, mean_pool
+from src.services.benchmark_service import BenchmarkService
+
+
+def _settings(tmp_path, **overrides) -> ComputeSettings:
+    return ComputeSettings(embedding_cache_dir=tmp_path / "embeddings", **overrides)
+
+
+class TestMeanPool:
+    """Tests for NumPy mean pooling."""
+
+    def test_padding_is_ignored_and_rows_normalised(self):
+        hidden = np.array([
+            [[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]],
+            [[0.0, 2.0], [0.0, 4.0], [0.0, 6.0]],
+        ], dtype=np.float32)
+        mask = np.array([[1, 1, 0], [1, 1, 1]], dtype=np.int32)
+
+        pooled = mean_pool(hidden, mask)
+
+        np.testing.assert_allclose(pooled, [[1.0, 0.0], [0.0, 1.0]])
+
+    def test_matches_reference_on_random_batch(self):
+        rng = np.random.default_rng(0)
+        hidden = rng.standard_normal((4, 7, 16)).astype(np.float32)
+        mask = (np.arange(7) < np.array([[7], [3], [1], [5]])).astype(np.int32)
+
+        expected = np.stack([hidden[i, : mask[i].sum()].mean(axis=0) for i in range(4)])
+        expected /= np.linalg.norm(expected, axis=-1, keepdims=True)
+        np.testing.assert_allclose(mean_pool(hidden, mask), expected, rtol=1e-5, atol=1e-6)
+
+
+class TestCPULoader:
+    """Tests for the loader without a real model."""
+
+    def test_lists_registry_models_on_cpu(self, tmp_path):
+        loader = CPUEmbeddingModelLoader(cache_dir=tmp_path)
+        models = loader.list_available_models()
+        assert models
+        assert {m["device"] for m in models} == {"cpu"}
+        assert not any(m["loaded"] for m in models)
+
+    def test_unknown_model(self, tmp_path):
+        with pytest.raises(EmbeddingError, match="Unknown embedding model"):
+            CPUEmbeddingModelLoader(cache_dir=tmp_path).load_model("nope")
+
+    def test_load_without_torch(self, tmp_path):
+        with patch.object(cpu_embedding_loader, "TORCH_AVAILABLE", False), \
+                pytest.raises(EmbeddingError, match="PyTorch is not installed"):
+            CPUEmbeddingModelLoader(cache_dir=tmp_path, quantize=True).load_model("all-MiniLM-L6-v2")
+
+    def test_intra_op_threads(self):
+        assert intra_op_threads(3, replicas=4, cpu_cores=16) == 3
+        assert intra_op_threads(0, replicas=1, cpu_cores=16) == 0
+        assert intra_op_threads(0, replicas=4, cpu_cores=16) == 4
+        assert intra_op_threads(0, replicas=0, cpu_cores=16) == 2
+
+    def test_default_settings_use_one_replica(self, tmp_path):
+        assert _settings(tmp_path).embedding_replicas == 1
+
+
+class TestPriorityChain:
+    """Tests for CPU selection in the dispatcher."""
+
+    @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", True)
+    @patch("src.model_loaders.compute_dispatcher.platform")
+    def test_linux_falls_back_to_cpu(self, mock_platform, tmp_path):
+        mock_platform.system.return_value = "Linux"
+        mock_platform.machine.return_value = "x86_64"
+
+        dispatcher = ComputeDispatcher(_settings(tmp_path, cpu_embedding_threads=2, cpu_embedding_quantize=True))
+
+        assert dispatcher.get_active_device() == "cpu"
+        caps = dispatcher.get_capabilities()
+        assert caps["embedding_backend"] == "CPUEmbeddingModelLoader"
+        assert caps["cpu_embedding"]["active"]
+        assert caps["cpu_embedding"]["quantize_int8"]
+
+    @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", True)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", True)
+    @patch("src.model_loaders.compute_dispatcher.platform")
+    def test_cpu_preference_skips_mlx(self, mock_platform, tmp_path):
+        mock_platform.system.return_value = "Linux"
+        mock_platform.machine.return_value = "x86_64"
+
+        dispatcher = ComputeDispatcher(_settings(tmp_path, preferred_embedding_device="cpu"))
+
+        assert dispatcher.get_active_device() == "cpu"
+
+    @patch("src.model_loaders.compute_dispatcher.COREML_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.MLX_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.TORCH_AVAILABLE", False)
+    @patch("src.model_loaders.compute_dispatcher.platform")
+    def test_no_torch_no_backend(self, mock_platform, tmp_path):
+        mock_platform.system.return_value = "Linux"
+        mock_platform.machine.return_value = "x86_64"
+
+        dispatcher = ComputeDispatcher(_settings(tmp_path))
+
+        with pytest.raises(EmbeddingError, match="torch"):
+            dispatcher.embed(["hello"])
+
+
+class TestCPUBenchmarks:
+    """Tests for embedding benchmark results recorded per device."""
+
+    def test_benchmark_bypasses_vector_cache_and_records_device(self, tmp_path):
+        """Every timed iteration runs the model, and the run is stored under device 'cpu'."""
+        model = MagicMock()
+        model.embed.side_effect = lambda texts: [[0.5, 0.5] for _ in texts]
+        loader = MagicMock()
+        loader.get_loaded_model.return_value = model
+        dispatcher = ComputeDispatcher(_settings(tmp_path, embedding_micro_batching=False), embedding_loader=loader)
+
+        with patch("src.services.benchmark_service.settings") as mock_settings:
+            mock_settings.model.cache_dir = tmp_path
+            service = BenchmarkService()
+        with patch("src.model_loaders.compute_dispatcher.compute_dispatcher", dispatcher):
+            result = service.benchmark_embedding_model("all-MiniLM-L6-v2", ["a", "b"], iterations=3)
+
+        assert model.embed.call_count == 4  # warmup + 3 iterations
+        assert result.device == "cpu"
+        history = service.get_embedding_history(device="cpu")
+        assert [run["model_name"] for run in history] == ["all-MiniLM-L6-v2"]
+        assert service.get_embedding_history(device="ane") == []
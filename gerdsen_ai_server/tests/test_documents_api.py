@@ -7,10 +7,13 @@ Follows the pattern from test_embeddings_api.py.
 
 import json
 from unittest.mock import MagicMock, patch
+from urllib.parse import quote
 
+import numpy as np
 import pytest
 from flask import Flask
 from src.routes.documents import bp as documents_bp
+from src.services.ingest_manifest import IngestPlan, ManifestEntry
 
 
 @pytest.fixture
@@ -97,6 +100,71 @@ class TestDocumentIngest:
         assert resp.status_code == 400
 
 
+class TestBulkIngest:
+
+    @patch("src.routes.documents.vector_store_service")
+    def test_ndjson_body_streams_progress(self, mock_svc, client):
+        mock_svc.plan_ingest.side_effect = lambda collection, text, source, *args: IngestPlan(
+            "kb", source, ManifestEntry("", "", ""), [f"{source}_0"], [text], [{"source": source}], added=[0],
+        )
+        mock_svc.embed.side_effect = lambda texts: np.ones((len(texts), 3), dtype=np.float32)
+        mock_svc.get_or_create_collection.return_value.name = "kb"
+        body = "\n".join(json.dumps({"text": f"text {i}", "source": f"{i}.md"}) for i in range(5))
+
+        resp = client.post("/api/documents/ingest/bulk?collection=kb", data=body,
+                           content_type="application/x-ndjson")
+
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+        events = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert events[-1]["event"] == "done"
+        assert events[-1]["chunks_written"] == 5
+        mock_svc.get_or_create_collection.assert_called_once_with("kb")
+        written = mock_svc.get_or_create_collection.return_value.add.call_args_list
+        assert sorted(i for call in written for i in call.kwargs["ids"]) == [f"{i}.md_0" for i in range(5)]
+
+    @patch("src.routes.documents.vector_store_service")
+    def test_ndjson_metadata_query_parameter(self, mock_svc, client):
+        mock_svc.plan_ingest.side_effect = lambda collection, text, source, *args: IngestPlan(
+            "kb", source, ManifestEntry("", "", ""), [f"{source}_0"], [text], [{"source": source}], added=[0],
+        )
+        mock_svc.embed.side_effect = lambda texts: np.ones((len(texts), 3), dtype=np.float32)
+        body = json.dumps({"text": "hello", "source": "a.md", "metadata": {"lang": "en"}})
+        metadata = quote(json.dumps({"team": "docs"}))
+
+        resp = client.post(f"/api/documents/ingest/bulk?collection=kb&metadata={metadata}", data=body,
+                           content_type="application/x-ndjson")
+
+        assert resp.status_code == 200
+        resp.get_data()
+        request_metadata = mock_svc.plan_ingest.call_args.args[3]
+        assert request_metadata == {"team": "docs", "lang": "en"}
+
+    def test_ndjson_metadata_must_be_an_object(self, client):
+        resp = client.post("/api/documents/ingest/bulk?metadata=not-json", data="{}",
+                           content_type="application/x-ndjson")
+        assert resp.status_code == 400
+        assert resp.get_json()["type"] == "validation_error"
+
+    def test_path_requires_ingest_root(self, client, monkeypatch):
+        from src.services import bulk_ingest
+
+        monkeypatch.setattr(bulk_ingest.settings.vectorstore, "ingest_root", None)
+        resp = _post_json(client, "/api/documents/ingest/bulk", {"path": "wiki"})
+        assert resp.status_code == 400
+        assert "IMPETUS_INGEST_ROOT" in resp.get_json()["error"]["message"]
+
+    def test_missing_input_returns_400(self, client):
+        resp = _post_json(client, "/api/documents/ingest/bulk", {"collection": "kb"})
+        assert resp.status_code == 400
+
+    def test_invalid_options_return_400(self, client):
+        resp = client.post("/api/documents/ingest/bulk?chunk_size=1", data="{}",
+                           content_type="application/x-ndjson")
+        assert resp.status_code == 400
+        assert resp.get_json()["type"] == "validation_error"
+
+
 class TestDocumentSearch:
 
     @patch("src.routes.documents.vector_store_service")
@@ -0,0 +1,130 @@
+"""
+Correctness tests for bf16/fp8 decoding (utils/dtype_decode.py).
+"""
+
+import json
+import math
+import struct
+
+import numpy as np
+import pytest
+from src.utils.dtype_decode import decode_tensor, needs_decode
+from src.utils.mmap_loader import MemoryMappedLoader
+
+
+def _reference_fp8(code, exponent_bits, mantissa_bits, bias, ieee_specials):
+    """Scalar decoding straight from the format definition."""
+    sign = -1.0 if code & 0x80 else 1.0
+    exponent = (code >> mantissa_bits) & ((1 << exponent_bits) - 1)
+    mantissa = code & ((1 << mantissa_bits) - 1)
+    max_exponent = (1 << exponent_bits) - 1
+
+    if ieee_specials and exponent == max_exponent:
+        return sign * math.inf if mantissa == 0 else math.nan
+    if not ieee_specials and exponent == max_exponent and mantissa == (1 << mantissa_bits) - 1:
+        return math.nan
+    if exponent == 0:
+        return sign * mantissa * 2.0 ** (1 - bias - mantissa_bits)
+    return sign * (1 + mantissa / (1 << mantissa_bits)) * 2.0 ** (exponent - bias)
+
+
+class TestBF16:
+    """Tests for bfloat16 widening."""
+
+    def test_reference_values(self):
+        """Known bf16 bit patterns decode to their exact values."""
+        words = np.array([0x3F80, 0xC000, 0x4049, 0x0000, 0x8000, 0x7F80, 0xFF80, 0x0001], dtype=np.uint16)
+        decoded = decode_tensor(words, "BF16")
+
+        assert decoded.dtype == np.float32
+        np.testing.assert_array_equal(
+            decoded, np.array([1.0, -2.0, 3.140625, 0.0, -0.0, np.inf, -np.inf, 2.0 ** -133], dtype=np.float32)
+        )
+        assert np.signbit(decoded[4])
+        assert np.isnan(decode_tensor(np.array([0x7FC0], dtype=np.uint16), "BF16")[0])
+
+    def test_matches_truncated_float32(self):
+        """Decoding the top half of float32 words equals zeroing their low half."""
+        values = np.random.default_rng(0).standard_normal(10_000).astype(np.float32) * 1e3
+        words = (values.view(np.uint32) >> 16).astype(np.uint16)
+
+        expected = (values.view(np.uint32) & 0xFFFF0000).view(np.float32)
+        np.testing.assert_array_equal(decode_tensor(words, "BF16"), expected)
+
+    def test_float16_output(self):
+        """bf16 can be decoded straight to float16."""
+        words = np.array([0x3F80, 0x3FC0], dtype=np.uint16)
+        decoded = decode_tensor(words, "BF16", out_dtype=np.float16)
+        assert decoded.dtype == np.float16
+        np.testing.assert_array_equal(decoded, [1.0, 1.5])
+
+
+class TestFP8:
+    """Tests for e4m3fn and e5m2 widening."""
+
+    def test_e4m3_reference_values(self):
+        """Spot values from the OCP FP8 spec, including subnormals, max and NaN."""
+        codes = np.array([0x00, 0x01, 0x07, 0x08, 0x38, 0x3C, 0x40, 0x7E, 0xFE, 0xB8], dtype=np.uint8)
+        decoded = decode_tensor(codes, "F8_E4M3")
+
+        assert decoded.dtype == np.float16
+        np.testing.assert_array_equal(
+            decoded, [0.0, 2.0 ** -9, 7 * 2.0 ** -9, 2.0 ** -6, 1.0, 1.5, 2.0, 448.0, -448.0, -1.0]
+        )
+        assert np.isnan(decode_tensor(np.array([0x7F, 0xFF], dtype=np.uint8), "F8_E4M3")).all()
+
+    def test_e5m2_reference_values(self):
+        """Spot values for e5m2, which keeps IEEE infinities."""
+        codes = np.array([0x3C, 0xC0, 0x7B, 0x01, 0x7C, 0xFC], dtype=np.uint8)
+        decoded = decode_tensor(codes, "F8_E5M2")
+
+        np.testing.assert_array_equal(decoded, [1.0, -2.0, 57344.0, 2.0 ** -16, np.inf, -np.inf])
+        assert np.isnan(decode_tensor(np.array([0x7F], dtype=np.uint8), "F8_E5M2")[0])
+
+    @pytest.mark.parametrize(("dtype_str", "exponent_bits", "mantissa_bits", "bias", "ieee_specials"), [
+        ("F8_E4M3", 4, 3, 7, False),
+        ("F8_E5M2", 5, 2, 15, True),
+    ])
+    def test_all_codes_match_definition(self, dtype_str, exponent_bits, mantissa_bits, bias, ieee_specials):
+        """Every one of the 256 codes matches the scalar reference decoder."""
+        codes = np.arange(256, dtype=np.uint8)
+        expected = np.array(
+            [_reference_fp8(int(c), exponent_bits, mantissa_bits, bias, ieee_specials) for c in codes],
+            dtype=np.float32,
+        )
+        np.testing.assert_array_equal(decode_tensor(codes, dtype_str, out_dtype=np.float32), expected)
+
+
+class TestChunkedDecoding:
+    """Tests for chunked decoding on the worker pool."""
+
+    def test_chunked_matches_inline(self):
+        """Splitting into worker chunks gives the same result and shape."""
+        words = np.random.default_rng(1).integers(0, 0x7F80, size=(33, 17), dtype=np.uint16)
+        inline = decode_tensor(words, "BF16")
+        chunked = decode_tensor(words, "BF16", chunk_elements=50)
+
+        assert chunked.shape == (33, 17)
+        np.testing.assert_array_equal(chunked, inline)
+
+    def test_rejects_unknown_dtype(self):
+        """Plain dtypes don't go through the decoder."""
+        assert not needs_decode("F32")
+        with pytest.raises(ValueError, match="Unsupported encoded dtype"):
+            decode_tensor(np.zeros(2, dtype=np.uint8), "F32")
+
+    def test_mmap_loader_decodes_bf16(self, tmp_path):
+        """BF16 safetensors tensors load as real values instead of reinterpreted float16 bits."""
+        values = np.array([1.0, -2.5, 0.15625, 1024.0], dtype=np.float32)
+        words = (values.view(np.uint32) >> 16).astype(np.uint16)
+        header = json.dumps({"w": {"dtype": "BF16", "shape": [2, 2], "data_offsets": [0, words.nbytes]}}).encode()
+        path = tmp_path / "model.safetensors"
+        path.write_bytes(struct.pack("<Q", len(header)) + header + words.tobytes())
+
+        loader = MemoryMappedLoader()
+        try:
+            tensor = loader.load_model_mmap(path)["w"]
+            np.testing.assert_array_equal(tensor.numpy(), values.reshape(2, 2))
+            assert tensor.raw().dtype == np.uint16
+        finally:
+            loader.close_all()
@@ -0,0 +1,97 @@
+"""
+Tests for the embedding micro-batcher (model_loaders/embedding_batcher.py).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.model_loaders.embedding_batcher import EmbeddingBatcher
+
+
+class _SlowModel:
+    """Fake model whose forward pass takes a fixed time regardless of batch size."""
+
+    def __init__(self, pass_seconds: float = 0.02):
+        self.pass_seconds = pass_seconds
+        self.batch_sizes: list[int] = []
+        self._lock = threading.Lock()
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.pass_seconds)
+        with self._lock:
+            self.batch_sizes.append(len(texts))
+        return [[float(len(t))] for t in texts]
+
+
+@pytest.fixture
+def batcher():
+    batcher = EmbeddingBatcher(max_batch_size=8, max_wait_ms=20)
+    yield batcher
+    batcher.stop()
+
+
+class TestMicroBatching:
+    """Tests for request coalescing and result scattering."""
+
+    def test_concurrent_requests_share_passes(self, batcher):
+        """Sixteen single-string requests run in far fewer passes, each getting its own vector."""
+        model = _SlowModel()
+        texts = ["x" * (i + 1) for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda t: batcher.embed("m", [t], model.embed), texts))
+
+        assert results == [[[float(len(t))]] for t in texts]
+        assert sum(model.batch_sizes) == 16
+        assert max(model.batch_sizes) <= 8
+        assert len(model.batch_sizes) < 16
+
+        stats = batcher.get_stats()
+        assert stats["requests"] == 16
+        assert stats["batches"] == len(model.batch_sizes)
+        assert stats["avg_batch_size"] > 1
+
+    def test_multi_text_requests_are_not_split(self, batcher):
+        """A request that doesn't fit the current batch starts the next one intact."""
+        model = _SlowModel(pass_seconds=0)
+        futures = [batcher.submit("m", ["a"] * 5, model.embed) for _ in range(3)]
+
+        assert [len(f.result(timeout=5)) for f in futures] == [5, 5, 5]
+        assert all(size % 5 == 0 for size in model.batch_sizes)
+
+    def test_lone_request_waits_at_most_max_wait(self):
+        batcher = EmbeddingBatcher(max_batch_size=32, max_wait_ms=5)
+        try:
+            started = time.perf_counter()
+            assert batcher.embed("m", ["a"], _SlowModel(pass_seconds=0).embed) == [[1.0]]
+            assert time.perf_counter() - started < 1.0
+            assert batcher.get_stats()["timeout_flushes"] == 1
+        finally:
+            batcher.stop()
+
+    def test_errors_reach_every_request_in_the_batch(self, batcher):
+        def failing(texts):
+            raise RuntimeError("backend crashed")
+
+        futures = [batcher.submit("m", ["a"], failing) for _ in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="backend crashed"):
+                future.result(timeout=5)
+        assert batcher.get_stats()["errors"] >= 1
+
+    def test_models_batch_independently(self, batcher):
+        """Requests for different models never share a pass."""
+        a, b = _SlowModel(pass_seconds=0), _SlowModel(pass_seconds=0)
+        fa = batcher.submit("a", ["1"], a.embed)
+        fb = batcher.submit("b", ["22"], b.embed)
+
+        assert fa.result(timeout=5) == [[1.0]]
+        assert fb.result(timeout=5) == [[2.0]]
+        assert set(batcher.get_stats()["queue_depth"]) == {"a", "b"}
+
+    def test_stopped_batcher_rejects_requests(self, batcher):
+        batcher.stop()
+        with pytest.raises(RuntimeError, match="stopped"):
+            batcher.submit("m", ["a"], _SlowModel().embed)
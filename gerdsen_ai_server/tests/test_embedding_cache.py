@@ -0,0 +1,153 @@
+"""
+Tests for the two-tier embedding vector cache (utils/embedding_cache.py)
+and its use in ComputeDispatcher.embed.
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.utils.embedding_cache import ENTRY_OVERHEAD_BYTES, EmbeddingCache, cache_key
+from test_compute_dispatcher import _make_settings
+
+
+def _vector(seed: float, dims: int = 4) -> np.ndarray:
+    return np.full(dims, seed, dtype=np.float32)
+
+
+class TestCacheKey:
+    """Tests for content-hash keys."""
+
+    def test_normalized_text_shares_a_key(self):
+        """NFC-equivalent text and surrounding whitespace map to the same key."""
+        assert cache_key("m", "café", 384) == cache_key("m", "  café\n", 384)
+
+    def test_model_and_dimensions_are_part_of_the_key(self):
+        assert cache_key("a", "text", 384) != cache_key("b", "text", 384)
+        assert cache_key("a", "text", 384) != cache_key("a", "text", 768)
+
+
+class TestEmbeddingCache:
+    """Tests for the memory and disk tiers."""
+
+    def test_partial_batch_lookup(self, tmp_path):
+        """Hits come back in position, misses are None."""
+        cache = EmbeddingCache(tmp_path / "vectors.db", 1024 * 1024)
+        cache.put_many("m", 4, {"a": _vector(1), "c": _vector(3)})
+
+        result = cache.get_many(["a", "b", "c", "a"])
+
+        assert result[1] is None
+        np.testing.assert_array_equal(result[2], _vector(3))
+        assert cache.get_stats()["memory_hits"] == 3
+        assert cache.get_stats()["misses"] == 1
+        assert cache.get_stats()["hit_rate"] == pytest.approx(0.75)
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        """The memory tier stays within budget, dropping the coldest entries first."""
+        entry_bytes = 16 + ENTRY_OVERHEAD_BYTES
+        cache = EmbeddingCache(None, 2 * entry_bytes)
+        cache.put_many("m", 4, {"a": _vector(1), "b": _vector(2)})
+        cache.get_many(["a"])  # b is now least recently used
+        cache.put_many("m", 4, {"c": _vector(3)})
+
+        a, b, c = cache.get_many(["a", "b", "c"])
+        assert b is None
+        assert a is not None
+        assert c is not None
+        stats = cache.get_stats()
+        assert stats["memory_bytes"] <= 2 * entry_bytes
+        assert stats["evictions"] == 1
+
+    def test_disk_tier_survives_restart_and_promotes(self, tmp_path):
+        """Vectors persist as float32 and are promoted into memory on a disk hit."""
+        db_path = tmp_path / "vectors.db"
+        first = EmbeddingCache(db_path, 1024 * 1024)
+        first.put_many("m", 4, {"a": np.array([0.5, -1.0, 2.0, 3.25])})
+        first.close()
+
+        second = EmbeddingCache(db_path, 1024 * 1024)
+        (vector,) = second.get_many(["a"])
+        assert vector.dtype == np.float32
+        np.testing.assert_array_equal(vector, [0.5, -1.0, 2.0, 3.25])
+
+        second.get_many(["a"])
+        stats = second.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["disk_entries"] == 1
+
+    def test_clear_by_model(self, tmp_path):
+        cache = EmbeddingCache(tmp_path / "vectors.db", 1024 * 1024)
+        cache.put_many("m1", 4, {"a": _vector(1)})
+        cache.put_many("m2", 4, {"b": _vector(2)})
+
+        cache.clear("m1")
+
+        assert cache.get_many(["a", "b"])[0] is None
+        assert cache.get_stats()["disk_entries"] == 1
+
+    def test_clear_by_model_keeps_other_models_in_memory(self):
+        cache = EmbeddingCache(None, 1024 * 1024)
+        cache.put_many("m1", 4, {"a": _vector(1)})
+        cache.put_many("m1@long512/64", 4, {"c": _vector(3)})
+        cache.put_many("m2", 4, {"b": _vector(2)})
+
+        cache.clear("m1")
+
+        a, b, c = cache.get_many(["a", "b", "c"])
+        assert a is None
+        assert c is None
+        np.testing.assert_array_equal(b, _vector(2))
+        assert cache.get_stats()["memory_bytes"] == 16 + ENTRY_OVERHEAD_BYTES
+
+
+class TestDispatcherCaching:
+    """Tests for cache use in ComputeDispatcher.embed."""
+
+    @pytest.fixture
+    def dispatcher(self, tmp_path):
+        model = MagicMock()
+        model.embed.side_effect = lambda texts: [[float(len(t)), 1.0] for t in texts]
+        loader = MagicMock()
+        loader.is_model_loaded.return_value = True
+        loader.get_loaded_model.return_value = model
+
+        dispatcher = ComputeDispatcher(_make_settings(tmp_path, max_batch_size_embedding=2))
+        dispatcher._embedding_loader = loader
+        return dispatcher, model
+
+    def test_only_misses_are_computed(self, dispatcher):
+        """A partially cached batch runs the model on the new texts only, once each."""
+        dispatcher, model = dispatcher
+        dispatcher.embed(["a", "bb"])
+        model.embed.reset_mock()
+
+        result = dispatcher.embed(["bb", "ccc", "a", "ccc"])
+
+        model.embed.assert_called_once_with(["ccc"])
+        assert result == [[2.0, 1.0], [3.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+
+    def test_fully_cached_batch_skips_the_model(self, dispatcher):
+        dispatcher, model = dispatcher
+        dispatcher.embed(["x", "y", "z"])
+        model.embed.reset_mock()
+
+        assert dispatcher.embed([" x", "z"]) == [[1.0, 1.0], [1.0, 1.0]]
+        model.embed.assert_not_called()
+        assert dispatcher.get_capabilities()["embedding_cache"]["hit_rate"] == pytest.approx(2 / 5)
+
+    def test_cache_can_be_disabled(self, tmp_path):
+        model = MagicMock()
+        model.embed.side_effect = lambda texts: [[1.0] for _ in texts]
+        loader = MagicMock()
+        loader.get_loaded_model.return_value = model
+        dispatcher = ComputeDispatcher(_make_settings(tmp_path, embedding_vector_cache=False))
+        dispatcher._embedding_loader = loader
+
+        dispatcher.embed(["a"])
+        dispatcher.embed(["a"])
+
+        assert model.embed.call_count == 2
+        assert dispatcher.get_embedding_cache_stats() == {"enabled": False}
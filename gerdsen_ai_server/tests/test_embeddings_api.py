@@ -5,9 +5,11 @@ Uses a test Flask app with a mocked compute_dispatcher so tests
 run without MLX or coremltools installed.
 """
 
+import base64
 import json
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from flask import Flask
 from src.routes.openai_api import bp as openai_bp
@@ -17,7 +19,7 @@ from src.routes.openai_api import bp as openai_bp
 def mock_dispatcher():
     """Create a mock compute_dispatcher that returns fixed embeddings."""
     dispatcher = MagicMock()
-    dispatcher.embed.return_value = [[0.1, 0.2, 0.3, 0.4] * 96]  # 384-dim
+    dispatcher.embed_array.return_value = np.array([[0.1, 0.2, 0.3, 0.4] * 96], dtype=np.float32)  # 384-dim
     dispatcher.get_active_device.return_value = "gpu"
     return dispatcher
 
@@ -58,7 +60,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_single_string_input(self, mock_cd, mock_auth, client):
-        mock_cd.embed.return_value = [[0.1, 0.2, 0.3]]
+        mock_cd.embed_array.return_value = np.array([[0.1, 0.2, 0.3]], dtype=np.float32)
 
         resp = _post_embeddings(client, {"input": "Hello world", "model": "all-MiniLM-L6-v2"})
         assert resp.status_code == 200
@@ -75,7 +77,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_list_input(self, mock_cd, mock_auth, client):
-        mock_cd.embed.return_value = [[0.1], [0.2]]
+        mock_cd.embed_array.return_value = np.array([[0.1], [0.2]], dtype=np.float32)
 
         resp = _post_embeddings(client, {
             "input": ["Hello", "World"],
@@ -87,10 +89,19 @@ class TestEmbeddingsEndpoint:
         assert data["data"][0]["index"] == 0
         assert data["data"][1]["index"] == 1
 
+    @patch("src.routes.openai_api.verify_api_key", return_value=True)
+    @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
+    def test_long_input_flag_is_passed_through(self, mock_cd, mock_auth, client):
+        mock_cd.embed_array.return_value = np.array([[0.1, 0.2]], dtype=np.float32)
+
+        resp = _post_embeddings(client, {"input": "long document", "long_input": True})
+        assert resp.status_code == 200
+        assert mock_cd.embed_array.call_args.kwargs["long_input"] is True
+
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_unknown_model_returns_404(self, mock_cd, mock_auth, client):
-        mock_cd.embed.side_effect = Exception("Unknown embedding model: 'fake-model'")
+        mock_cd.embed_array.side_effect = Exception("Unknown embedding model: 'fake-model'")
 
         resp = _post_embeddings(client, {"input": "hi", "model": "fake-model"})
         assert resp.status_code == 404
@@ -98,7 +109,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_no_backend_returns_503(self, mock_cd, mock_auth, client):
-        mock_cd.embed.side_effect = Exception("No embedding backend available")
+        mock_cd.embed_array.side_effect = Exception("No embedding backend available")
 
         resp = _post_embeddings(client, {"input": "hi"})
         assert resp.status_code == 503
@@ -106,7 +117,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_server_error_returns_500(self, mock_cd, mock_auth, client):
-        mock_cd.embed.side_effect = RuntimeError("GPU out of memory")
+        mock_cd.embed_array.side_effect = RuntimeError("GPU out of memory")
 
         resp = _post_embeddings(client, {"input": "hi"})
         assert resp.status_code == 500
@@ -116,7 +127,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_token_counting(self, mock_cd, mock_auth, client):
-        mock_cd.embed.return_value = [[0.5]]
+        mock_cd.embed_array.return_value = np.array([[0.5]], dtype=np.float32)
 
         resp = _post_embeddings(client, {"input": "one two three four five"})
         data = resp.get_json()
@@ -126,7 +137,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_dimension_truncation(self, mock_cd, mock_auth, client):
-        mock_cd.embed.return_value = [[0.1, 0.2, 0.3, 0.4, 0.5]]
+        mock_cd.embed_array.return_value = np.array([[0.1, 0.2, 0.3, 0.4, 0.5]], dtype=np.float32)
 
         resp = _post_embeddings(client, {
             "input": "test",
@@ -138,7 +149,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_base64_encoding(self, mock_cd, mock_auth, client):
-        mock_cd.embed.return_value = [[1.0, 2.0, 3.0]]
+        mock_cd.embed_array.return_value = np.array([[1.0, 2.0, 3.0]], dtype=np.float32)
 
         resp = _post_embeddings(client, {
             "input": "test",
@@ -148,6 +159,41 @@ class TestEmbeddingsEndpoint:
         embedding = data["data"][0]["embedding"]
         # base64 returns a string, not a list
         assert isinstance(embedding, str)
+        # ... holding the little-endian float32 bytes of the vector
+        decoded = np.frombuffer(base64.b64decode(embedding), dtype="<f4")
+        np.testing.assert_array_equal(decoded, [1.0, 2.0, 3.0])
+
+    @patch("src.routes.openai_api.verify_api_key", return_value=True)
+    @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
+    def test_truncated_vectors_are_renormalised(self, mock_cd, mock_auth, client):
+        mock_cd.embed_array.return_value = np.array([[3.0, 4.0, 12.0], [0.0, 2.0, 1.0]], dtype=np.float32)
+
+        resp = _post_embeddings(client, {"input": ["a", "b"], "dimensions": 2})
+        vectors = [item["embedding"] for item in resp.get_json()["data"]]
+
+        assert vectors == [pytest.approx([0.6, 0.8]), pytest.approx([0.0, 1.0])]
+
+    @patch("src.routes.openai_api.verify_api_key", return_value=True)
+    @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
+    def test_large_batch_float_output(self, mock_cd, mock_auth, client):
+        """Float32 matrices serialize without per-vector list conversion and keep their values."""
+        matrix = np.random.default_rng(0).standard_normal((256, 384)).astype(np.float32)
+        mock_cd.embed_array.return_value = matrix
+
+        resp = _post_embeddings(client, {"input": [f"t{i}" for i in range(256)]})
+
+        assert resp.mimetype == "application/json"
+        returned = np.array([item["embedding"] for item in resp.get_json()["data"]], dtype=np.float32)
+        np.testing.assert_array_equal(returned, matrix)
+
+    @patch("src.routes.openai_api.verify_api_key", return_value=True)
+    @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
+    @patch("src.utils.fast_json.ORJSON_AVAILABLE", False)
+    def test_float_output_without_orjson(self, mock_cd, mock_auth, client):
+        mock_cd.embed_array.return_value = np.array([[0.5, -1.0]], dtype=np.float32)
+
+        resp = _post_embeddings(client, {"input": "hello"})
+        assert resp.get_json()["data"][0]["embedding"] == [0.5, -1.0]
 
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     def test_missing_input_returns_400(self, mock_auth, client):
@@ -157,7 +203,7 @@ class TestEmbeddingsEndpoint:
     @patch("src.routes.openai_api.verify_api_key", return_value=True)
     @patch("src.model_loaders.compute_dispatcher.compute_dispatcher")
     def test_response_matches_openai_format(self, mock_cd, mock_auth, client):
-        mock_cd.embed.return_value = [[0.1, 0.2]]
+        mock_cd.embed_array.return_value = np.array([[0.1, 0.2]], dtype=np.float32)
 
         resp = _post_embeddings(client, {"input": "hello"})
         data = resp.get_json()
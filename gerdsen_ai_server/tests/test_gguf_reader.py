@@ -0,0 +1,174 @@
+"""
+Unit tests for the memory-mapped GGUF reader (utils/gguf_reader.py).
+"""
+
+import struct
+
+import numpy as np
+import pytest
+from src.utils.gguf_reader import GGMLType, GGUFError, GGUFReader, GGUFValueType, dequantize
+from src.utils.mmap_loader import MemoryMappedLoader, QuantizedLazyTensor
+
+
+def _string(value):
+    data = value.encode()
+    return struct.pack("<Q", len(data)) + data
+
+
+def _write_gguf(path, metadata, tensors, alignment=32):
+    """Write a GGUF v3 file. tensors maps name -> (gguf dims, ggml type, raw bytes)."""
+    out = bytearray(b"GGUF" + struct.pack("<IQQ", 3, len(tensors), len(metadata)))
+    for key, (value_type, value) in metadata.items():
+        out += _string(key) + struct.pack("<I", value_type)
+        if value_type == GGUFValueType.STRING:
+            out += _string(value)
+        elif value_type == GGUFValueType.ARRAY:
+            item_type, items = value
+            out += struct.pack("<IQ", item_type, len(items))
+            for item in items:
+                out += _string(item) if item_type == GGUFValueType.STRING else struct.pack("<i", item)
+        else:
+            out += struct.pack({GGUFValueType.UINT32: "<I", GGUFValueType.FLOAT32: "<f"}[value_type], value)
+
+    offset, blobs = 0, []
+    for name, (dims, ggml_type, data) in tensors.items():
+        out += _string(name) + struct.pack(f"<I{len(dims)}QIQ", len(dims), *dims, ggml_type, offset)
+        padded = data + b"\0" * (-len(data) % alignment)
+        blobs.append(padded)
+        offset += len(padded)
+
+    out += b"\0" * (-len(out) % alignment)
+    path.write_bytes(bytes(out) + b"".join(blobs))
+    return path
+
+
+def _random_blocks(rng, n_blocks, block_bytes, f16_fields):
+    """Random quantized blocks with sane float16 scale fields at the given byte offsets."""
+    blocks = rng.integers(0, 256, size=(n_blocks, block_bytes), dtype=np.uint8)
+    for start in f16_fields:
+        scales = rng.uniform(0.001, 0.1, size=n_blocks).astype(np.float16)
+        blocks[:, start:start + 2] = scales.view(np.uint8).reshape(n_blocks, 2)
+    return blocks
+
+
+def _reference_q4_k(block):
+    """Scalar Q4_K dequantization following ggml's dequantize_row_q4_K."""
+    d = float(block[0:2].view(np.float16)[0])
+    dmin = float(block[2:4].view(np.float16)[0])
+    q_scales, qs = block[4:16], block[16:]
+
+    def scale_min(j):
+        if j < 4:
+            return q_scales[j] & 63, q_scales[j + 4] & 63
+        return ((q_scales[j + 4] & 0xF) | ((q_scales[j - 4] >> 6) << 4),
+                (q_scales[j + 4] >> 4) | ((q_scales[j] >> 6) << 4))
+
+    out = []
+    for chunk in range(4):
+        q = qs[chunk * 32:(chunk + 1) * 32]
+        sc, m = scale_min(2 * chunk)
+        out += [d * sc * (v & 0xF) - dmin * m for v in q]
+        sc, m = scale_min(2 * chunk + 1)
+        out += [d * sc * (v >> 4) - dmin * m for v in q]
+    return out
+
+
+class TestGGUFParsing:
+    """Tests for header, metadata and tensor info parsing."""
+
+    def test_metadata_and_tensor_infos(self, tmp_path):
+        """Metadata values and tensor layouts are parsed without touching tensor data."""
+        weight = np.arange(6, dtype=np.float32).reshape(2, 3)
+        path = _write_gguf(tmp_path / "model.gguf", {
+            "general.architecture": (GGUFValueType.STRING, "llama"),
+            "llama.context_length": (GGUFValueType.UINT32, 4096),
+            "tokenizer.ggml.tokens": (GGUFValueType.ARRAY, (GGUFValueType.STRING, ["<s>", "a", "b"])),
+            "tokenizer.ggml.token_type": (GGUFValueType.ARRAY, (GGUFValueType.INT32, [3, 1, 1])),
+        }, {"output.weight": ([3, 2], GGMLType.F32, weight.tobytes())})
+
+        with GGUFReader(path) as reader:
+            assert reader.version == 3
+            assert reader.metadata["general.architecture"] == "llama"
+            assert reader.metadata["llama.context_length"] == 4096
+            assert reader.metadata["tokenizer.ggml.tokens"] == ["<s>", "a", "b"]
+            assert reader.metadata["tokenizer.ggml.token_type"] == [3, 1, 1]
+
+            info = reader.tensors["output.weight"]
+            assert info.shape == (2, 3)
+            assert info.type_name == "F32"
+            assert info.offset % 32 == 0
+            np.testing.assert_array_equal(reader.raw("output.weight"), weight)
+
+            summary = reader.summary()
+            assert summary["architecture"] == "llama"
+            assert summary["parameter_count"] == 6
+
+    def test_rejects_non_gguf(self, tmp_path):
+        """Files without the GGUF magic are rejected."""
+        path = tmp_path / "model.gguf"
+        path.write_bytes(b"NOPE" + b"\0" * 32)
+        with pytest.raises(GGUFError, match="not a GGUF file"):
+            GGUFReader(path)
+
+
+class TestDequantization:
+    """Tests for vectorized block dequantizers against scalar references."""
+
+    def test_q8_0(self):
+        """Q8_0 values are the int8 quants times the block scale."""
+        blocks = _random_blocks(np.random.default_rng(0), 4, 34, [0])
+        expected = [
+            float(block[0:2].view(np.float16)[0]) * q
+            for block in blocks for q in block[2:].view(np.int8)
+        ]
+        np.testing.assert_allclose(dequantize(blocks, GGMLType.Q8_0), expected, rtol=1e-6)
+
+    def test_q4_0(self):
+        """Q4_0 low nibbles fill the first half of each block, high nibbles the second."""
+        blocks = _random_blocks(np.random.default_rng(1), 4, 18, [0])
+        expected = []
+        for block in blocks:
+            d = float(block[0:2].view(np.float16)[0])
+            expected += [d * ((q & 0xF) - 8) for q in block[2:].astype(int)]
+            expected += [d * ((q >> 4) - 8) for q in block[2:].astype(int)]
+        np.testing.assert_allclose(dequantize(blocks, GGMLType.Q4_0), expected, rtol=1e-6)
+
+    def test_q4_k(self):
+        """Q4_K matches ggml's scalar super-block decoding, including packed 6-bit scales."""
+        blocks = _random_blocks(np.random.default_rng(2), 3, 144, [0, 2])
+        expected = [v for block in blocks for v in _reference_q4_k(block)]
+        np.testing.assert_allclose(dequantize(blocks, GGMLType.Q4_K), expected, rtol=1e-5, atol=1e-6)
+
+    def test_unsupported_type(self):
+        """Block formats without a dequantizer raise a clear error."""
+        with pytest.raises(GGUFError, match="Q6_K"):
+            dequantize(np.zeros((1, 210), dtype=np.uint8), GGMLType.Q6_K)
+
+
+class TestMmapLoaderGGUF:
+    """Tests for GGUF loading through the memory-mapped loader."""
+
+    def test_quantized_tensors_are_lazy(self, tmp_path):
+        """GGUF tensors load as lazy handles that dequantize on access."""
+        blocks = _random_blocks(np.random.default_rng(3), 2, 34, [0])
+        _write_gguf(tmp_path / "model.gguf", {
+            "general.architecture": (GGUFValueType.STRING, "llama"),
+        }, {
+            "blk.0.attn_q.weight": ([32, 2], GGMLType.Q8_0, blocks.tobytes()),
+            "token_embd.weight": ([4], GGMLType.F16, np.ones(4, dtype=np.float16).tobytes()),
+        })
+
+        loader = MemoryMappedLoader()
+        try:
+            weights = loader.load_model_mmap(tmp_path)
+            quantized = weights["blk.0.attn_q.weight"]
+
+            assert isinstance(quantized, QuantizedLazyTensor)
+            assert not quantized.is_materialized
+            assert quantized.raw().shape == (2, 34)
+            assert quantized.numpy().shape == (2, 32)
+            np.testing.assert_allclose(quantized.numpy().reshape(-1), dequantize(blocks, GGMLType.Q8_0))
+            np.testing.assert_array_equal(weights["token_embd.weight"].numpy(), np.ones(4))
+            assert loader.get_memory_usage()["file_count"] == 1
+        finally:
+            loader.close_all()
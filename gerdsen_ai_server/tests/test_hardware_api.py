@@ -317,6 +317,29 @@ class TestComputeCapabilities:
         assert "memory" in data
 
 
+class TestComputeBenchmark:
+    """Tests for POST /api/hardware/compute/benchmark"""
+
+    @pytest.fixture
+    def app(self):
+        app = Flask(__name__)
+        app.config["TESTING"] = True
+        app.register_blueprint(hardware_bp, url_prefix="/api/hardware")
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        return app.test_client()
+
+    @pytest.mark.parametrize("body", [{"iterations": "many"}, {"iterations": None}, {"texts": "hello"}])
+    def test_invalid_body_is_rejected(self, client, body):
+        """Malformed parameters give a 400 instead of a server error."""
+        with patch("src.services.benchmark_service.benchmark_service") as mock_service:
+            response = client.post("/api/hardware/compute/benchmark", json=body)
+        assert response.status_code == 400
+        mock_service.benchmark_embedding_model.assert_not_called()
+
+
 class TestGpuMetrics:
     """Tests for GET /api/hardware/gpu/metrics"""
 
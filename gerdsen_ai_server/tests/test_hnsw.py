@@ -0,0 +1,234 @@
+"""
+Tests for the HNSW index (services/vector_backends/hnsw.py) and its use by native collections.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+import src.services.vector_backends.native as native
+from src.services.vector_backends.hnsw import HNSWConfig, HNSWGraph, HNSWIndex
+from src.services.vector_backends.native import NativeVectorBackend
+
+
+def _clustered(n: int, dims: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dims))
+    vectors = (centers[rng.integers(0, 20, n)] + 0.5 * rng.standard_normal((n, dims))).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _recall(index: HNSWIndex, vectors: np.ndarray, k: int = 10, queries: int = 50) -> float:
+    alive = np.ones(len(vectors), dtype=bool)
+    hits = 0
+    for query in vectors[:queries]:
+        exact = set(np.argsort(-(vectors @ query))[:k].tolist())
+        rows, _ = index.search(vectors, query, k, alive)
+        hits += len(exact & set(rows.tolist()))
+    return hits / (k * queries)
+
+
+def _wait_indexed(collection) -> None:
+    while (indexer := collection._indexer) is not None:
+        indexer.join()
+
+
+class TestHNSWIndex:
+
+    def test_recall_against_brute_force(self):
+        vectors = _clustered(1500)
+        index = HNSWIndex(HNSWConfig(m=8, ef_construction=64, ef_search=32))
+        index.add(vectors, len(vectors))
+
+        assert index.rows == 1500
+        assert _recall(index, vectors) >= 0.95
+
+    def test_scores_are_cosine_similarity(self):
+        vectors = _clustered(300)
+        index = HNSWIndex(HNSWConfig(m=8))
+        index.add(vectors, len(vectors))
+
+        rows, scores = index.search(vectors, vectors[5], 3, np.ones(300, dtype=bool))
+
+        assert rows[0] == 5
+        np.testing.assert_allclose(scores, vectors[rows] @ vectors[5], rtol=1e-5)
+        assert list(scores) == sorted(scores, reverse=True)
+
+    def test_tombstoned_rows_are_skipped(self):
+        vectors = _clustered(500)
+        index = HNSWIndex(HNSWConfig(m=8))
+        index.add(vectors, len(vectors))
+        alive = np.ones(500, dtype=bool)
+        nearest = np.argsort(-(vectors @ vectors[0]))[:20]
+        alive[nearest[:10]] = False
+
+        rows, _ = index.search(vectors, vectors[0], 10, alive)
+
+        assert len(rows) == 10
+        assert alive[rows].all()
+
+    def test_incremental_inserts_fill_segments(self):
+        vectors = _clustered(700)
+        index = HNSWIndex(HNSWConfig(m=8, segment_size=300))
+
+        index.add(vectors, 250)
+        index.add(vectors, 700)
+
+        assert [(s.start, s.count) for s in index.segments] == [(0, 300), (300, 300), (600, 100)]
+        rows, _ = index.search(vectors, vectors[650], 1, np.ones(700, dtype=bool))
+        assert rows.tolist() == [650]
+
+    def test_search_during_concurrent_inserts(self):
+        vectors = _clustered(3000)
+        index = HNSWIndex(HNSWConfig(m=8, ef_construction=32, segment_size=1200))
+        index.add(vectors, 100)
+        alive = np.ones(3000, dtype=bool)
+
+        def insert():
+            for rows in range(100, 3000, 7):
+                index.add(vectors, rows)
+            index.add(vectors, 3000)
+
+        inserter = threading.Thread(target=insert)
+        inserter.start()
+        searches = 0
+        while inserter.is_alive() or searches == 0:
+            rows, _ = index.search(vectors, vectors[searches % 3000], 5, alive)
+            assert len(rows) == 5
+            searches += 1
+        inserter.join()
+
+        assert index.rows == 3000
+        assert index.search(vectors, vectors[2999], 1, alive)[0].tolist() == [2999]
+
+    def test_save_and_mmap_reload(self, tmp_path):
+        vectors = _clustered(600)
+        config = HNSWConfig(m=8, segment_size=400)
+        index = HNSWIndex(config)
+        index.add(vectors, 500)
+        index.save(tmp_path)
+
+        loaded = HNSWIndex.load(tmp_path, config)
+
+        assert loaded.rows == 500
+        assert loaded.saved_rows == 500
+        assert isinstance(loaded.segments[0].links0, np.memmap)
+        alive = np.ones(600, dtype=bool)
+        for query in vectors[:20]:
+            assert loaded.search(vectors, query, 5, alive)[0].tolist() == index.search(vectors, query, 5, alive)[0].tolist()
+
+        # The mapped tail is copied into memory on the first insert; the file is untouched
+        loaded.add(vectors, 600)
+        assert loaded.rows == 600
+        assert not isinstance(loaded.segments[1].links0, np.memmap)
+        assert HNSWGraph.load(tmp_path / "segment-0001").count == 100
+
+    def test_load_rejects_other_parameters(self, tmp_path):
+        index = HNSWIndex(HNSWConfig(m=8))
+        index.add(_clustered(50), 50)
+        index.save(tmp_path)
+
+        with pytest.raises(ValueError, match="m=8"):
+            HNSWIndex.load(tmp_path, HNSWConfig(m=16))
+
+    def test_parallel_build_matches_segments(self, tmp_path):
+        vectors = _clustered(900)
+        vector_file = tmp_path / "vectors.f32"
+        vector_file.write_bytes(vectors.tobytes())
+        config = HNSWConfig(m=8, ef_construction=64, segment_size=300, build_workers=2)
+
+        index = HNSWIndex.build(config, vector_file, 900, 32, tmp_path / "index")
+
+        assert [(s.start, s.count) for s in index.segments] == [(0, 300), (300, 300), (600, 300)]
+        assert HNSWIndex.load(tmp_path / "index", config).rows == 900
+        assert _recall(index, vectors) >= 0.95
+
+
+class TestNativeCollectionHNSW:
+
+    @pytest.fixture
+    def config(self):
+        return HNSWConfig(m=8, ef_construction=64, ef_search=64, min_vectors=200, build_workers=1)
+
+    def _fill(self, collection, vectors: np.ndarray, offset: int = 0) -> None:
+        n = len(vectors)
+        collection.add(
+            ids=[f"c{offset + i}" for i in range(n)],
+            documents=[f"doc {offset + i}" for i in range(n)],
+            metadatas=[{"source": f"s{(offset + i) % 3}"} for i in range(n)],
+            embeddings=vectors,
+        )
+
+    def test_small_collections_stay_exact(self, tmp_path, config):
+        collection = NativeVectorBackend(tmp_path, hnsw=config).get_or_create_collection("docs")
+        self._fill(collection, _clustered(100))
+
+        assert collection._indexer is None
+        assert collection._index is None
+
+    def test_index_built_and_used_past_threshold(self, tmp_path, config):
+        collection = NativeVectorBackend(tmp_path, hnsw=config).get_or_create_collection("docs")
+        vectors = _clustered(400)
+        self._fill(collection, vectors)
+        _wait_indexed(collection)
+
+        assert collection._index is not None
+        assert collection._index.rows == 400
+        result = collection.query(vectors[42], n_results=3)
+        assert result["ids"][0] == "c42"
+        assert result["distances"][0] == pytest.approx(0.0, abs=1e-5)
+
+    def test_rows_not_yet_indexed_are_scanned(self, tmp_path, config):
+        collection = NativeVectorBackend(tmp_path, hnsw=config).get_or_create_collection("docs")
+        vectors = _clustered(500)
+        self._fill(collection, vectors[:400])
+        _wait_indexed(collection)
+
+        index = collection._index
+        collection._schedule_indexing = lambda: None  # keep the indexer from catching up
+        self._fill(collection, vectors[400:], offset=400)
+
+        assert index.rows == 400
+        assert collection.query(vectors[450], n_results=1)["ids"] == ["c450"]
+
+    def test_deletes_and_filters(self, tmp_path, config):
+        collection = NativeVectorBackend(tmp_path, hnsw=config).get_or_create_collection("docs")
+        vectors = _clustered(400)
+        self._fill(collection, vectors)
+        _wait_indexed(collection)
+
+        collection.delete(ids=["c7"])
+        assert "c7" not in collection.query(vectors[7], n_results=5)["ids"]
+        filtered = collection.query(vectors[7], n_results=5, where={"source": "s2"})
+        assert {m["source"] for m in filtered["metadatas"]} == {"s2"}
+
+    def test_index_persists_across_reopen(self, tmp_path, config):
+        backend = NativeVectorBackend(tmp_path, hnsw=config)
+        collection = backend.get_or_create_collection("docs")
+        vectors = _clustered(300)
+        self._fill(collection, vectors)
+        _wait_indexed(collection)
+        collection.close()
+
+        reopened = NativeVectorBackend(tmp_path, hnsw=config).get_collection("docs")
+
+        assert reopened._index is not None
+        assert reopened._index.rows == 300
+        assert isinstance(reopened._index.segments[0].links0, np.memmap)
+        assert reopened.query(vectors[9], n_results=1)["ids"] == ["c9"]
+
+    def test_compaction_rebuilds_index(self, tmp_path, config, monkeypatch):
+        monkeypatch.setattr(native, "COMPACT_MIN_DEAD_ROWS", 10)
+        collection = NativeVectorBackend(tmp_path, hnsw=config).get_or_create_collection("docs")
+        vectors = _clustered(600)
+        self._fill(collection, vectors)
+        _wait_indexed(collection)
+
+        collection.delete(ids=[f"c{i}" for i in range(350)])
+        _wait_indexed(collection)
+
+        assert collection._rows == 250
+        assert collection._index is not None
+        assert collection._index.rows == 250
+        assert [p.name for p in tmp_path.glob("docs/hnsw.*")] == ["hnsw.1"]
+        assert collection.query(vectors[500], n_results=1)["ids"] == ["c500"]
@@ -242,10 +242,19 @@ class TestIntegration:
         response = client.post('/api/models/mmap/benchmark', json={
             'model_path': '/path/to/model'
         })
-        assert response.status_code == 200
-        data = json.loads(response.data)
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['job_id']
+
+        # The benchmark runs in the background; poll until it finishes
+        for _ in range(100):
+            data = json.loads(client.get(f'/api/models/mmap/benchmark/{job_id}').data)
+            if data['status'] in ('completed', 'failed'):
+                break
+            time.sleep(0.02)
+        assert data['status'] == 'completed'
         assert data['results']['speedup'] == 5.0
-        assert data['recommendation'] == 'Use mmap'
+        assert data['results']['recommendation'] == 'Use mmap'
+        assert client.get('/api/models/mmap/benchmark/missing').status_code == 404
 
     def test_kv_cache_conversation_flow(self, app, client):
         """Test KV cache with multi-turn conversation"""
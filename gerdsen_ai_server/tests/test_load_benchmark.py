@@ -0,0 +1,106 @@
+"""
+Tests for the end-to-end model load benchmark (utils/load_benchmark.py).
+"""
+
+import json
+import struct
+from dataclasses import asdict
+from unittest.mock import patch
+
+import pytest
+from src.services.benchmark_service import BenchmarkService
+from src.utils.load_benchmark import run_load_benchmark, write_synthetic_checkpoint
+from src.utils.mmap_loader import MemoryMappedLoader
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    write_synthetic_checkpoint(tmp_path / "model", size_mb=2, shards=2, hidden_size=256)
+    return tmp_path / "model"
+
+
+class TestSyntheticCheckpoint:
+    """Tests for the synthetic safetensors fixtures."""
+
+    def test_shards_have_requested_size(self, checkpoint):
+        """Shards add up to roughly the requested size with page-aligned data."""
+        shards = sorted(checkpoint.glob("*.safetensors"))
+        assert len(shards) == 2
+
+        total = sum(p.stat().st_size for p in shards)
+        assert 1.5 * 1024 ** 2 < total < 2.5 * 1024 ** 2
+
+        data = shards[0].read_bytes()
+        header_size = struct.unpack("<Q", data[:8])[0]
+        assert (8 + header_size) % 4096 == 0
+        assert all(info["dtype"] == "F16" for info in json.loads(data[8:8 + header_size]).values())
+
+
+class TestLoadBenchmark:
+    """Tests for strategy runs and persistence."""
+
+    def test_runs_every_strategy_and_cache_state(self, checkpoint):
+        """Each strategy reports first-tensor and full-load timings for cold and warm caches."""
+        runs = run_load_benchmark(checkpoint, io_concurrency=2)
+
+        assert [(r.strategy, r.cache_state) for r in runs] == [
+            ("regular", "cold"), ("regular", "warm"),
+            ("mmap", "cold"), ("mmap", "warm"),
+            ("parallel", "cold"), ("parallel", "warm"),
+        ]
+        tensor_counts = {r.tensor_count for r in runs}
+        assert len(tensor_counts) == 1
+        for run in runs:
+            assert 0 < run.time_to_first_tensor_ms <= run.full_materialization_ms
+            assert run.throughput_gbps > 0
+            assert run.peak_rss_mb >= 0
+            assert run.file_count == 2
+
+    def test_unknown_strategy(self, checkpoint):
+        """Strategies are validated before anything is loaded."""
+        with pytest.raises(ValueError, match="Unknown load strategies"):
+            run_load_benchmark(checkpoint, strategies=("turbo",))
+
+    def test_results_persist_to_benchmarks_db(self, checkpoint, tmp_path):
+        """Runs round-trip through the load_benchmarks table."""
+        runs = run_load_benchmark(checkpoint, strategies=("mmap",), cache_states=("warm",))
+
+        with patch("src.services.benchmark_service.settings") as mock_settings:
+            mock_settings.model.cache_dir = tmp_path
+            service = BenchmarkService()
+        service.store_load_results([asdict(r) for r in runs])
+
+        history = service.get_load_history(str(checkpoint))
+        assert len(history) == 1
+        assert history[0]["strategy"] == "mmap"
+        assert history[0]["tensor_count"] == runs[0].tensor_count
+
+    def test_background_job_records_runs_and_failures(self, checkpoint, tmp_path):
+        """Load benchmark jobs store their runs on success and keep the error on failure."""
+        runs = run_load_benchmark(checkpoint, strategies=("mmap",), cache_states=("warm",))
+        with patch("src.services.benchmark_service.settings") as mock_settings:
+            mock_settings.model.cache_dir = tmp_path
+            service = BenchmarkService()
+
+        ok = service.create_load_job(str(checkpoint))
+        service.run_load_job(ok.job_id, lambda: {"runs": [asdict(r) for r in runs], "speedup": 2.0})
+        assert service.get_load_job(ok.job_id).to_dict()["status"] == "completed"
+        assert len(service.get_load_history(str(checkpoint))) == 1
+
+        def broken():
+            raise OSError("disk gone")
+
+        failed = service.create_load_job(str(checkpoint))
+        service.run_load_job(failed.job_id, broken)
+        assert failed.status == "failed"
+        assert failed.error == "disk gone"
+        assert failed.completed_at is not None
+
+    def test_loader_summary(self, checkpoint):
+        """benchmark_load_time compares regular and mmap time to first tensor."""
+        summary = MemoryMappedLoader().benchmark_load_time(checkpoint)
+
+        assert summary["regular_load_ms"] > 0
+        assert summary["mmap_load_ms"] > 0
+        assert summary["speedup"] == pytest.approx(summary["regular_load_ms"] / summary["mmap_load_ms"])
+        assert len(summary["runs"]) == 6
@@ -0,0 +1,175 @@
+"""
+Tests for windowed long-input embedding (model_loaders/long_input.py).
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from src.model_loaders.base import BaseEmbeddingModel, EmbeddingError
+from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.model_loaders.long_input import embed_windows, pool_windows, split_windows, tokenize_windows
+from test_compute_dispatcher import _make_settings, _WordModel
+
+
+class _WordTokenizer:
+    """Fake tokenizer: one token per word, id = word length, BERT-style specials."""
+
+    cls_token_id = 101
+    sep_token_id = 102
+    pad_token_id = 0
+
+    def encode(self, text, add_special_tokens=True, truncation=False, max_length=None):
+        ids = [len(word) for word in text.split()]
+        if add_special_tokens:
+            ids = [self.cls_token_id, *ids, self.sep_token_id]
+        return ids
+
+
+class _WindowModel(BaseEmbeddingModel):
+    """Fake long-input model whose token states are one-hot on the token id."""
+
+    def __init__(self):
+        super().__init__("all-MiniLM-L6-v2", "fake", 8, 256, "cpu")
+        self._loaded = True
+        self.tokenizer = _WordTokenizer()
+        self.window_batches: list[int] = []
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+    def embed(self, texts):
+        return [[1.0] + [0.0] * 7 for _ in texts]
+
+    def embed_long_array(self, texts, window_tokens, overlap_tokens, max_batch_size=32):
+        input_ids, mask, owners = tokenize_windows(self.tokenizer, texts, window_tokens, overlap_tokens)
+        return embed_windows(self._forward, input_ids, mask, owners, len(texts), max_batch_size)
+
+    def _forward(self, input_ids, mask):
+        self.window_batches.append(input_ids.shape[0])
+        return np.eye(8, dtype=np.float32)[np.minimum(input_ids, 7)]
+
+
+class TestSplitWindows:
+
+    def test_short_input_is_one_window(self):
+        windows = split_windows(np.arange(3), 8, 2, [101], [102])
+        assert [w.tolist() for w in windows] == [[101, 0, 1, 2, 102]]
+
+    def test_windows_overlap_and_cover_everything(self):
+        ids = np.arange(10)
+        windows = split_windows(ids, 6, 1, [101], [102])
+
+        bodies = [w[1:-1].tolist() for w in windows]
+        assert bodies == [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]]
+        assert all(len(w) <= 6 and w[0] == 101 and w[-1] == 102 for w in windows)
+
+    def test_overlap_never_stalls(self):
+        """An overlap as large as the window still advances one token per window."""
+        windows = split_windows(np.arange(5), 4, 10, [], [])
+        assert [w.tolist() for w in windows] == [[0, 1, 2, 3], [1, 2, 3, 4]]
+
+    def test_window_must_fit_special_tokens(self):
+        with pytest.raises(ValueError, match="no room"):
+            split_windows(np.arange(5), 2, 0, [101], [102])
+
+
+class TestPooling:
+
+    def test_all_windows_share_one_padded_batch(self):
+        input_ids, mask, owners = tokenize_windows(_WordTokenizer(), ["a bb ccc dddd eeeee", "z"], 4, 0)
+
+        assert input_ids.shape == (4, 4)
+        assert owners.tolist() == [0, 0, 0, 1]
+        assert mask.sum(axis=1).tolist() == [4, 4, 3, 3]
+        assert input_ids[2].tolist() == [101, 5, 102, 0]
+
+    def test_windows_are_weighted_by_token_count(self):
+        hidden = np.zeros((2, 3, 2), dtype=np.float32)
+        hidden[0, :, 0] = 1.0  # three tokens pointing along x
+        hidden[1, 0, 1] = 1.0  # one token pointing along y
+        mask = np.array([[1, 1, 1], [1, 0, 0]])
+
+        pooled = pool_windows(hidden, mask, np.array([0, 0]), 1)
+
+        expected = np.array([3.0, 1.0]) / np.sqrt(10.0)
+        np.testing.assert_allclose(pooled[0], expected, rtol=1e-6)
+
+    def test_padding_does_not_contribute(self):
+        hidden = np.ones((1, 4, 2), dtype=np.float32)
+        hidden[0, 2:] = [100.0, -100.0]
+        pooled = pool_windows(hidden, np.array([[1, 1, 0, 0]]), np.array([0]), 1)
+        np.testing.assert_allclose(pooled[0], [np.sqrt(0.5), np.sqrt(0.5)], rtol=1e-6)
+
+    def test_batched_windows_match_one_pass(self):
+        input_ids, mask, owners = tokenize_windows(_WordTokenizer(), ["a bb ccc dddd eeeee", "z", "yy x"], 4, 1)
+        seen = []
+
+        def forward(ids, batch_mask):
+            seen.append(ids.shape)
+            return np.eye(8, dtype=np.float32)[np.minimum(ids, 7)]
+
+        batched = embed_windows(forward, input_ids, mask, owners, 3, max_batch_size=2)
+
+        assert [rows for rows, _ in seen] == [2, 2, 2]
+        expected = pool_windows(np.eye(8, dtype=np.float32)[np.minimum(input_ids, 7)], mask, owners, 3)
+        np.testing.assert_allclose(batched, expected, rtol=1e-6)
+
+
+class TestDispatcherLongInput:
+
+    def _dispatcher(self, tmp_path, model, **settings):
+        loader = MagicMock()
+        loader.get_loaded_model.return_value = model
+        settings.setdefault("embedding_micro_batching", False)
+        return ComputeDispatcher(_make_settings(tmp_path, **settings), embedding_loader=loader)
+
+    def test_long_input_windows_share_one_pass(self, tmp_path):
+        model = _WindowModel()
+        dispatcher = self._dispatcher(tmp_path, model, embedding_long_window_tokens=6,
+                                      embedding_long_overlap_tokens=1, max_batch_size_embedding=32)
+        texts = [" ".join(["aaa"] * 30), "b", " ".join(["cc"] * 9)]
+
+        matrix = dispatcher.embed_array(texts, long_input=True)
+
+        assert matrix.shape == (3, 8)
+        assert model.window_batches == [10 + 1 + 3]
+        np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-6)
+
+    def test_long_vectors_are_cached_separately(self, tmp_path):
+        model = _WindowModel()
+        dispatcher = self._dispatcher(tmp_path, model)
+
+        short = dispatcher.embed_array(["aaa bb"])
+        long = dispatcher.embed_array(["aaa bb"], long_input=True)
+        dispatcher.embed_array(["aaa bb"], long_input=True)
+
+        assert not np.allclose(short, long)
+        assert model.window_batches == [1]
+
+    def test_windows_are_split_by_max_batch_size(self, tmp_path):
+        model = _WindowModel()
+        dispatcher = self._dispatcher(tmp_path, model, embedding_long_window_tokens=6,
+                                      embedding_long_overlap_tokens=1, max_batch_size_embedding=4)
+
+        dispatcher.embed_array([" ".join(["aaa"] * 30), "b"], long_input=True)
+
+        assert model.window_batches == [4, 4, 3]
+
+    def test_clearing_a_model_drops_its_long_vectors(self, tmp_path):
+        model = _WindowModel()
+        dispatcher = self._dispatcher(tmp_path, model)
+        dispatcher.embed_array(["aaa bb"], long_input=True)
+
+        dispatcher.clear_embedding_cache("all-MiniLM-L6-v2")
+        dispatcher.embed_array(["aaa bb"], long_input=True)
+
+        assert model.window_batches == [1, 1]
+
+    def test_model_without_long_support_is_rejected(self, tmp_path):
+        dispatcher = self._dispatcher(tmp_path, _WordModel())
+        with pytest.raises(EmbeddingError, match="does not support long inputs"):
+            dispatcher.embed_array(["a b"], long_input=True)
@@ -0,0 +1,254 @@
+"""
+Unit tests for per-request LoRA adapters (inference/lora_adapters.py).
+"""
+
+import json
+import struct
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from src.inference.batch_generation import generate_batch
+from src.inference.lora_adapters import (
+    AdapterCache,
+    LoRAAdapter,
+    MultiLoRALinear,
+    MultiLoRAState,
+    apply_lora_delta,
+    attach_adapter_layers,
+    load_lora_adapter,
+)
+from src.model_loaders.base import ModelNotFoundError
+
+
+def _write_adapter(root, name, layers, rank=2, scale=2.0, seed=0):
+    """Write an mlx_lm-style adapter directory with random float32 weights."""
+    rng = np.random.default_rng(seed)
+    path = root / name
+    path.mkdir(parents=True)
+    (path / "adapter_config.json").write_text(json.dumps({"lora_parameters": {"rank": rank, "scale": scale}}))
+
+    tensors = {}
+    for key, (in_dim, out_dim) in layers.items():
+        tensors[f"{key}.lora_a"] = rng.standard_normal((in_dim, rank)).astype(np.float32)
+        tensors[f"{key}.lora_b"] = rng.standard_normal((rank, out_dim)).astype(np.float32)
+
+    header, offset, blobs = {}, 0, []
+    for key, array in tensors.items():
+        data = array.tobytes()
+        header[key] = {"dtype": "F32", "shape": list(array.shape), "data_offsets": [offset, offset + len(data)]}
+        offset += len(data)
+        blobs.append(data)
+    header_bytes = json.dumps(header).encode()
+    (path / "adapters.safetensors").write_bytes(struct.pack("<Q", len(header_bytes)) + header_bytes + b"".join(blobs))
+    return path
+
+
+def _adapter(name, in_dim=4, out_dim=3, rank=2, scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    lora_a = rng.standard_normal((in_dim, rank)).astype(np.float32)
+    lora_b = rng.standard_normal((rank, out_dim)).astype(np.float32)
+    return LoRAAdapter(name=name, path=None, rank=rank, scale=scale, weights={"proj": (lora_a, lora_b)})
+
+
+class TestAdapterLoading:
+    """Tests for adapter loading and the LRU adapter cache."""
+
+    def test_load_adapter(self, tmp_path):
+        """Adapter weights are keyed by module path with rank and scale from the config."""
+        path = _write_adapter(tmp_path, "support-bot", {"model.layers.0.self_attn.q_proj": (8, 8)}, scale=4.0)
+        adapter = load_lora_adapter("support-bot", path)
+
+        assert list(adapter.weights) == ["model.layers.0.self_attn.q_proj"]
+        assert adapter.scale == 4.0
+        lora_a, lora_b = adapter.weights["model.layers.0.self_attn.q_proj"]
+        assert lora_a.shape == (8, 2)
+        assert lora_b.shape == (2, 8)
+        assert adapter.nbytes == lora_a.nbytes + lora_b.nbytes
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        """The cache stays within max_adapters and evicts the oldest entry."""
+        for name in ("a", "b", "c"):
+            _write_adapter(tmp_path, name, {"proj": (4, 4)})
+        cache = AdapterCache(adapters_dir=tmp_path, max_adapters=2)
+
+        first = cache.get("a")
+        cache.get("b")
+        assert cache.get("a") is first  # hit refreshes recency
+        cache.get("c")
+
+        stats = cache.get_stats()
+        assert stats["cached_adapters"] == ["a", "c"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 3
+        assert stats["evictions"] == 1
+
+    def test_unknown_adapter(self, tmp_path):
+        """Unknown or path-like adapter names are rejected."""
+        cache = AdapterCache(adapters_dir=tmp_path, max_adapters=2)
+        with pytest.raises(ModelNotFoundError):
+            cache.get("missing")
+        assert cache.resolve_path("../etc") is None
+
+    def test_concurrent_gets_load_once(self, tmp_path):
+        """Threads asking for the same uncached adapter share a single load."""
+        _write_adapter(tmp_path, "a", {"proj": (4, 4)})
+        cache = AdapterCache(adapters_dir=tmp_path, max_adapters=2)
+        loads = []
+
+        def slow_load(name, path):
+            loads.append(name)
+            time.sleep(0.05)
+            return load_lora_adapter(name, path)
+
+        results = []
+        with patch("src.inference.lora_adapters.load_lora_adapter", side_effect=slow_load):
+            threads = [threading.Thread(target=lambda: results.append(cache.get("a"))) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert loads == ["a"]
+        assert all(r is results[0] for r in results)
+        assert cache.get_stats()["misses"] == 1
+
+
+class TestApplyLoraDelta:
+    """Tests for per-sequence low-rank deltas."""
+
+    def test_uniform_adapter(self):
+        """A single adapter row applies the same delta to every sequence."""
+        adapter = _adapter("a", scale=2.0)
+        state = MultiLoRAState()
+        state.set_rows([adapter])
+        x = np.ones((3, 5, 4), dtype=np.float32)
+        y = np.zeros((3, 5, 3), dtype=np.float32)
+
+        out = apply_lora_delta(x, y, "proj", state)
+
+        lora_a, lora_b = adapter.weights["proj"]
+        np.testing.assert_allclose(out, 2.0 * (x @ lora_a) @ lora_b, rtol=1e-5)
+
+    def test_mixed_batch_matches_per_sequence(self):
+        """Each row of a mixed batch gets its own adapter's delta; None rows are untouched."""
+        first = _adapter("first", rank=2, scale=1.0, seed=1)
+        second = _adapter("second", rank=4, scale=0.5, seed=2)
+        state = MultiLoRAState()
+        state.set_rows([first, None, second])
+        rng = np.random.default_rng(3)
+        x = rng.standard_normal((3, 2, 4)).astype(np.float32)
+        y = rng.standard_normal((3, 2, 3)).astype(np.float32)
+
+        out = apply_lora_delta(x, y, "proj", state)
+
+        for row, adapter in enumerate([first, None, second]):
+            expected = y[row]
+            if adapter is not None:
+                lora_a, lora_b = adapter.weights["proj"]
+                expected = y[row] + adapter.scale * (x[row] @ lora_a) @ lora_b
+            np.testing.assert_allclose(out[row], expected, rtol=1e-5, atol=1e-5)
+
+    def test_untargeted_layer_passthrough(self):
+        """Layers no active adapter targets return the base output unchanged."""
+        state = MultiLoRAState()
+        state.set_rows([_adapter("a")])
+        y = np.ones((1, 1, 3), dtype=np.float32)
+        assert apply_lora_delta(np.ones((1, 1, 4)), y, "other", state) is y
+
+    def test_row_mismatch_raises(self):
+        """Mixed rows must match the batch size."""
+        state = MultiLoRAState()
+        state.set_rows([_adapter("a", seed=1), _adapter("b", seed=2)])
+        with pytest.raises(ValueError, match="do not match batch size"):
+            apply_lora_delta(np.ones((3, 1, 4)), np.ones((3, 1, 3)), "proj", state)
+
+    def test_rows_are_per_thread(self):
+        """Rows set on one thread are invisible to generations on other threads."""
+        state = MultiLoRAState()
+        adapter = _adapter("a")
+        state.set_rows([adapter])
+        seen = []
+
+        thread = threading.Thread(target=lambda: seen.append(list(state.rows)))
+        thread.start()
+        thread.join()
+
+        assert seen == [[]]
+        assert state.rows == [adapter]
+
+    def test_attach_wraps_once(self):
+        """Target layers are wrapped once and keep calling the base layer."""
+        class Block:
+            def __init__(self):
+                self.proj = lambda x: np.zeros((*x.shape[:-1], 3), dtype=np.float32)
+
+        model = MagicMock(spec=[])
+        model.layers = [Block()]
+        adapter = LoRAAdapter(name="a", path=None, rank=2, scale=1.0,
+                              weights={"layers.0.proj": _adapter("a").weights["proj"]})
+        state = MultiLoRAState()
+
+        assert attach_adapter_layers(model, adapter, state) == 1
+        assert attach_adapter_layers(model, adapter, state) == 0
+        assert isinstance(model.layers[0].proj, MultiLoRALinear)
+
+        state.set_rows([adapter])
+        out = model.layers[0].proj(np.ones((1, 1, 4), dtype=np.float32))
+        assert out.shape == (1, 1, 3)
+        assert np.abs(out).sum() > 0
+
+
+class TestAdapterBatching:
+    """Tests for adapter-aware grouping in generate_batch."""
+
+    @staticmethod
+    def _tokenizer():
+        tokenizer = MagicMock()
+        tokenizer.encode.side_effect = lambda text, **kwargs: list(range(len(text.split())))
+        return tokenizer
+
+    @patch("src.inference.batch_generation.make_sampler", None)
+    @patch("src.inference.batch_generation.MLX_AVAILABLE", True)
+    def test_mixed_adapters_share_fixed_row_batch(self):
+        """Mixed adapters decode in one row-stable batch with per-row assignments."""
+        first, second = _adapter("first"), _adapter("second")
+        state = MultiLoRAState()
+        seen_rows = []
+
+        def fake_decode(model, tokenizer, group_tokens, max_tokens, sampler):
+            seen_rows.append([a.name if a else None for a in state.rows])
+            return [f"out{len(t)}" for t in group_tokens]
+
+        with patch("src.inference.batch_generation.BatchKVCache", object), \
+                patch("src.inference.batch_generation._decode_fixed_batch", side_effect=fake_decode):
+            results = generate_batch(
+                MagicMock(), self._tokenizer(), ["a b", "a", "a b c"],
+                adapters=[first, None, second], lora_state=state,
+            )
+
+        assert seen_rows == [[None, "first", "second"]]
+        assert [r.text for r in results] == ["out2", "out1", "out3"]
+        assert state.rows == []
+
+    @patch("src.inference.batch_generation.make_sampler", None)
+    @patch("src.inference.batch_generation.batch_generate", None)
+    @patch("src.inference.batch_generation.BatchKVCache", None)
+    @patch("src.inference.batch_generation.MLX_AVAILABLE", True)
+    def test_mixed_adapters_split_without_batch_cache(self):
+        """Without a row-stable cache, prompts are grouped per adapter."""
+        first, second = _adapter("first"), _adapter("second")
+        state = MultiLoRAState()
+        seen_rows = []
+
+        def fake_generate(model, tokenizer, prompt, **kwargs):
+            seen_rows.append(state.rows[0].name)
+            return "x"
+
+        with patch("src.inference.batch_generation.generate", side_effect=fake_generate):
+            generate_batch(MagicMock(), self._tokenizer(), ["a", "b", "c"],
+                           adapters=[first, second, first], lora_state=state)
+
+        assert seen_rows == ["first", "first", "second"]
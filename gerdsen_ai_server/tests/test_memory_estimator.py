@@ -0,0 +1,148 @@
+"""
+Tests for header-based model memory estimation (services/memory_estimator.py).
+"""
+
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from flask import Flask
+from src.routes.models import bp as models_bp
+from src.services.memory_estimator import GB, MIN_OVERHEAD_BYTES, MemoryEstimator
+from src.services.model_index import ModelIndex, scan_model_dir
+from test_mmap_loader import _write_safetensors
+
+LLAMA_CONFIG = {
+    "model_type": "llama",
+    "num_hidden_layers": 32,
+    "num_attention_heads": 32,
+    "num_key_value_heads": 8,
+    "hidden_size": 4096,
+    "max_position_embeddings": 8192,
+}
+
+
+@pytest.fixture
+def estimator(tmp_path):
+    return MemoryEstimator(profile_path=tmp_path / "memory_profile.json")
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = tmp_path / "llama"
+    path.mkdir()
+    (path / "config.json").write_text(json.dumps(LLAMA_CONFIG))
+    (path / "tokenizer.json").write_bytes(b"\x00" * 4096)
+    _write_safetensors(path / "model.safetensors", {
+        "embed.weight": np.zeros((64, 32), dtype=np.float16),
+        "norm.weight": np.zeros(32, dtype=np.float32),
+    })
+    return path
+
+
+class TestEstimate:
+    """Tests for weight, KV-cache and overhead projection."""
+
+    def test_weights_come_from_headers(self, estimator, model_dir):
+        """Only tensor bytes count, not tokenizer files or the header itself."""
+        estimate = estimator.estimate("llama", scan_model_dir(model_dir), context_length=1, concurrency=1)
+
+        assert estimate.source == "headers"
+        assert estimate.weights_bytes == 64 * 32 * 2 + 32 * 4
+        assert estimate.bytes_by_dtype == {"F16": 4096, "F32": 128}
+
+    def test_kv_cache_projection(self, estimator, model_dir):
+        """KV cache scales with layers, KV heads, head dim, context and concurrency."""
+        entry = scan_model_dir(model_dir)
+        estimate = estimator.estimate("llama", entry, context_length=4096, concurrency=2)
+
+        per_token = 2 * 32 * 8 * 128 * 2
+        assert estimate.kv_bytes_per_token == per_token
+        assert estimate.kv_cache_bytes == per_token * 4096 * 2
+        assert estimate.total_bytes == estimate.weights_bytes + estimate.kv_cache_bytes + estimate.overhead_bytes
+
+    def test_context_capped_at_model_maximum(self, estimator, model_dir):
+        """Context beyond max_position_embeddings isn't reserved."""
+        estimate = estimator.estimate("llama", scan_model_dir(model_dir), context_length=100_000, concurrency=1)
+        assert estimate.context_length == 8192
+
+    def test_consolidated_duplicate_not_counted(self, estimator, model_dir):
+        """Safetensors files outside the shard index don't add to the weights."""
+        (model_dir / "model.safetensors.index.json").write_text(
+            json.dumps({"weight_map": {"embed.weight": "model.safetensors", "norm.weight": "model.safetensors"}}))
+        _write_safetensors(model_dir / "consolidated.safetensors", {"w": np.zeros(1024, dtype=np.float32)})
+
+        estimate = estimator.estimate("llama", scan_model_dir(model_dir))
+        assert estimate.weights_bytes == 64 * 32 * 2 + 32 * 4
+
+    def test_unknown_model_uses_default(self, estimator):
+        """Models that aren't on disk get the conservative default."""
+        estimate = estimator.estimate("org/remote-model", None)
+        assert estimate.source == "default"
+        assert estimate.required_gb == pytest.approx(4.0)
+
+
+class TestAdmissionAndOverhead:
+    """Tests for admission decisions and learned overhead."""
+
+    def test_admit_respects_headroom(self, estimator, model_dir):
+        """Loads are admitted only when the estimate fits after the headroom."""
+        estimate = estimator.estimate("llama", scan_model_dir(model_dir), context_length=1, concurrency=1)
+
+        assert estimator.admit(estimate, estimate.total_bytes + 2 * GB)
+        assert not estimator.admit(estimate, estimate.total_bytes + GB // 2)
+
+    def test_measured_overhead_is_reused(self, estimator, model_dir):
+        """RSS growth beyond the weights becomes that model's overhead and persists."""
+        entry = scan_model_dir(model_dir)
+        first = estimator.estimate("llama", entry, context_length=1, concurrency=1)
+        assert first.overhead_bytes == MIN_OVERHEAD_BYTES
+        assert not first.overhead_measured
+
+        estimator.record_load(first, first.weights_bytes + 300 * 1024 ** 2)
+
+        reopened = MemoryEstimator(profile_path=estimator.profile_path)
+        second = reopened.estimate("llama", entry, context_length=1, concurrency=1)
+        assert second.overhead_measured
+        assert second.overhead_bytes == 300 * 1024 ** 2
+
+    def test_partial_residency_is_not_learned(self, estimator, model_dir):
+        """A lazy load that grew RSS by less than the weights leaves the estimate alone."""
+        entry = scan_model_dir(model_dir)
+        estimate = estimator.estimate("llama", entry, context_length=1, concurrency=1)
+
+        estimator.record_load(estimate, estimate.weights_bytes // 10)
+
+        again = estimator.estimate("llama", entry, context_length=1, concurrency=1)
+        assert not again.overhead_measured
+        assert again.overhead_bytes == MIN_OVERHEAD_BYTES
+
+
+class TestEstimateEndpoint:
+    """Tests for GET /api/models/memory-estimate/<model_id>."""
+
+    @pytest.fixture
+    def client(self, estimator, model_dir, tmp_path):
+        app = Flask(__name__)
+        app.config["TESTING"] = True
+        app.register_blueprint(models_bp, url_prefix="/api/models")
+        index = ModelIndex(index_path=tmp_path / "cache" / "model_index.json")
+        with patch("src.routes.models.settings") as mock_settings, \
+                patch("src.routes.models.model_index", index), \
+                patch("src.routes.models.memory_estimator", estimator):
+            mock_settings.model.models_dir = tmp_path
+            yield app.test_client()
+
+    def test_hub_id_resolves_to_download_directory(self, client, model_dir):
+        """org/name IDs are looked up in org_name, where downloads are stored."""
+        model_dir.rename(model_dir.parent / "org_llama")
+
+        response = client.get("/api/models/memory-estimate/org/llama")
+        assert response.status_code == 200
+        assert response.get_json()["estimate"]["source"] == "headers"
+
+    def test_rejects_path_traversal(self, client):
+        """IDs that would escape the models directory are rejected."""
+        response = client.get("/api/models/memory-estimate/..")
+        assert response.status_code == 400
@@ -3,8 +3,10 @@ Unit tests for MLX model loader
 """
 
 import json
+import sys
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from src.model_loaders.base import InferenceError, ModelLoadError, ModelNotFoundError
 from src.model_loaders.mlx_loader import MLXModel, MLXModelLoader
@@ -118,6 +120,31 @@ class TestMLXModel:
             lazy=False
         )
 
+    @patch('src.model_loaders.mlx_loader.MLX_AVAILABLE', True)
+    @patch('src.model_loaders.mlx_loader.load')
+    def test_mapped_weights_build_the_model(self, mock_load, mlx_model, monkeypatch):
+        """Test that memory-mapped weights are loaded into the model instead of re-read by mlx_lm"""
+        model = MagicMock()
+        model.sanitize.side_effect = lambda weights: {f"model.{k}": v for k, v in weights.items()}
+        tokenizer = MagicMock()
+        utils = MagicMock()
+        utils.load_model.return_value = (model, {})
+        utils.load_tokenizer.return_value = tokenizer
+        monkeypatch.setitem(sys.modules, "mlx_lm", MagicMock(utils=utils))
+        monkeypatch.setitem(sys.modules, "mlx_lm.utils", utils)
+        weight = np.ones((2, 2), dtype=np.float32)
+
+        with patch('src.model_loaders.mlx_loader.mmap_loader.load_model_mmap', return_value={"w": weight}):
+            mlx_model.load(use_mmap=True)
+
+        mock_load.assert_not_called()
+        assert mlx_model.model_instance is model
+        assert mlx_model.tokenizer_instance is tokenizer
+        utils.load_model.assert_called_once_with(mlx_model.model_path, lazy=True, model_config={})
+        (items,), _ = model.load_weights.call_args
+        assert [name for name, _ in items] == ["model.w"]
+        assert items[0][1] is weight
+
     @patch('src.model_loaders.mlx_loader.MLX_AVAILABLE', True)
     @patch('src.model_loaders.mlx_loader.mx.metal.clear_cache')
     def test_unload(self, mock_clear_cache, mlx_model):
@@ -166,14 +193,13 @@ class TestMLXModel:
 
         assert response == "Generated response"
 
-        # Verify generate was called correctly
-        mock_generate.assert_called_once_with(
-            mlx_model.model_instance,
-            mlx_model.tokenizer_instance,
-            prompt="Test prompt",
-            max_tokens=50,
-            verbose=False
-        )
+        # Verify generate was called with the pre-tokenized prompt
+        args, kwargs = mock_generate.call_args
+        assert args == (mlx_model.model_instance, mlx_model.tokenizer_instance)
+        assert kwargs["prompt"].dtype == np.int32
+        assert kwargs["prompt"].tolist() == [1, 2, 3]
+        assert kwargs["max_tokens"] == 50
+        assert kwargs["verbose"] is False
 
     @patch('src.model_loaders.mlx_loader.MLX_AVAILABLE', True)
     def test_generate_context_limit(self, mlx_model):
@@ -0,0 +1,168 @@
+"""
+Unit tests for the memory-mapped weight loader (utils/mmap_loader.py).
+"""
+
+import json
+import struct
+import threading
+
+import numpy as np
+import pytest
+from src.utils.mmap_loader import LazyTensor, MemoryMappedLoader
+
+
+def _write_safetensors(path, tensors, dtypes=None, align=0):
+    """Write a safetensors file; align pads the header so data starts on that boundary."""
+    dtypes = dtypes or {}
+    header, offset, blobs = {}, 0, []
+    for name, array in tensors.items():
+        data = array.tobytes()
+        dtype = dtypes.get(name) or {np.float32: "F32", np.float16: "F16", np.int32: "I32"}[array.dtype.type]
+        header[name] = {"dtype": dtype, "shape": list(array.shape), "data_offsets": [offset, offset + len(data)]}
+        offset += len(data)
+        blobs.append(data)
+
+    header_bytes = json.dumps(header).encode()
+    if align:
+        header_bytes += b" " * (-(8 + len(header_bytes)) % align)
+    path.write_bytes(struct.pack("<Q", len(header_bytes)) + header_bytes + b"".join(blobs))
+    return path
+
+
+@pytest.fixture
+def loader():
+    loader = MemoryMappedLoader()
+    yield loader
+    loader.close_all()
+
+
+class TestLazySafetensors:
+    """Tests for zero-copy lazy tensor handles."""
+
+    def test_handles_are_lazy_views(self, loader, tmp_path):
+        """Tensors are returned unmaterialized and numpy() shares the mapping."""
+        weight = np.arange(12, dtype=np.float32).reshape(3, 4)
+        path = _write_safetensors(tmp_path / "model.safetensors", {"w": weight}, align=8)
+
+        weights = loader.load_model_mmap(path)
+        tensor = weights["w"]
+
+        assert isinstance(tensor, LazyTensor)
+        assert not tensor.is_materialized
+        view = tensor.numpy()
+        assert view.base is not None
+        assert not view.flags.owndata
+        np.testing.assert_array_equal(view, weight)
+
+    def test_materialize_once(self, loader, tmp_path):
+        """materialize() converts on first access and caches the result."""
+        weight = np.linspace(-1, 1, 16, dtype=np.float16).reshape(4, 4)
+        path = _write_safetensors(tmp_path / "model.safetensors", {"w": weight})
+        tensor = loader.load_model_mmap(path)["w"]
+
+        first = tensor.materialize()
+        assert tensor.is_materialized
+        assert tensor.materialize() is first
+        np.testing.assert_array_equal(np.asarray(first), weight)
+
+    def test_misaligned_offset_copies(self, loader, tmp_path):
+        """Tensors not aligned to their itemsize are copied into an aligned buffer."""
+        tensors = {"a": np.ones(3, dtype=np.float16), "b": np.arange(5, dtype=np.float32)}
+        path = _write_safetensors(tmp_path / "model.safetensors", tensors)
+        weights = loader.load_model_mmap(path)
+
+        b = weights["b"].numpy()
+        np.testing.assert_array_equal(b, tensors["b"])
+        assert b.ctypes.data % 4 == 0
+
+    def test_page_aligned_tensors(self, loader, tmp_path):
+        """Data starting on a page boundary is flagged for the aligned fast path."""
+        tensors = {"w": np.zeros(loader.page_size // 4, dtype=np.float32)}
+        path = _write_safetensors(tmp_path / "model.safetensors", tensors, align=loader.page_size)
+        tensor = loader.load_model_mmap(path)["w"]
+
+        assert tensor.page_aligned
+        assert loader.get_memory_usage()["page_aligned_tensor_count"] == 1
+
+    def test_eager_loading(self, loader, tmp_path):
+        """lazy=False returns materialized arrays."""
+        path = _write_safetensors(tmp_path / "model.safetensors", {"w": np.ones(4, dtype=np.float32)})
+        weights = loader.load_model_mmap(path, lazy=False)
+        assert not isinstance(weights["w"], LazyTensor)
+
+
+class TestMemoryUsage:
+    """Tests for mapped versus resident reporting."""
+
+    def test_reports_mapped_and_materialized(self, loader, tmp_path):
+        """Usage separates mapped file bytes from materialized tensor bytes."""
+        tensors = {"a": np.ones(1024, dtype=np.float32), "b": np.ones(1024, dtype=np.float32)}
+        path = _write_safetensors(tmp_path / "model.safetensors", tensors)
+        weights = loader.load_model_mmap(path)
+        weights["a"].materialize()
+
+        usage = loader.get_memory_usage()
+        assert usage["total_mapped_gb"] == pytest.approx(path.stat().st_size / 1024 ** 3)
+        assert usage["materialized_gb"] == pytest.approx(4096 / 1024 ** 3)
+        assert usage["tensor_count"] == 2
+        assert usage["materialized_tensor_count"] == 1
+        if usage["resident_gb"] is not None:
+            assert usage["resident_gb"] <= usage["total_mapped_gb"]
+
+    def test_close_all_releases_mappings(self, loader, tmp_path):
+        """close_all unmaps every file without deadlocking."""
+        path = _write_safetensors(tmp_path / "model.safetensors", {"w": np.ones(4, dtype=np.float32)})
+        tensor = loader.load_model_mmap(path)["w"]
+
+        loader.close_all()
+
+        assert loader.get_memory_usage()["file_count"] == 0
+        with pytest.raises(ValueError, match="released"):
+            tensor.numpy()
+
+
+class TestParallelShards:
+    """Tests for concurrent shard mapping and prefetch."""
+
+    @staticmethod
+    def _write_shards(root, count):
+        expected = {}
+        for i in range(count):
+            tensors = {f"layers.{i}.weight": np.full((64, 64), i, dtype=np.float32)}
+            _write_safetensors(root / f"model-{i:05d}-of-{count:05d}.safetensors", tensors, align=8)
+            expected.update(tensors)
+        return expected
+
+    def test_shards_loaded_on_bounded_pool(self, tmp_path):
+        """Shards are mapped on worker threads and every tensor is returned."""
+        expected = self._write_shards(tmp_path, 4)
+        loader = MemoryMappedLoader(io_concurrency=2)
+        threads = set()
+        original = loader._load_single_file
+
+        def record(file_path, read_only):
+            threads.add(threading.current_thread().name)
+            return original(file_path, read_only)
+
+        loader._load_single_file = record
+        try:
+            weights = loader.load_model_mmap(tmp_path, lazy=False)
+        finally:
+            loader.close_all()
+
+        assert set(weights) == set(expected)
+        for name, array in expected.items():
+            np.testing.assert_array_equal(np.asarray(weights[name]), array)
+        assert threads
+        assert all(name.startswith("shard-load") for name in threads)
+        assert len(threads) <= 2
+
+    def test_prefetch_reads_whole_mapping(self, loader, tmp_path):
+        """prefetch_mapping walks the file in readahead windows and reports its size."""
+        self._write_shards(tmp_path, 2)
+        loader.readahead_bytes = loader.page_size
+        loader.load_model_mmap(tmp_path, prefetch=True)
+
+        for info in loader.mmaps.values():
+            assert loader.prefetch_mapping(info) == info.file_size
+        assert loader.get_memory_usage()["file_count"] == 2
@@ -0,0 +1,171 @@
+"""
+Tests for the persistent model-directory index (services/model_index.py).
+"""
+
+import json
+import os
+import struct
+import time
+
+import numpy as np
+import pytest
+from src.services.model_index import ModelIndex, scan_model_dir
+
+
+def _write_model(root, model_id, config=None, tensors=None):
+    model_dir = root / model_id
+    model_dir.mkdir()
+    if config is not None:
+        (model_dir / "config.json").write_text(json.dumps(config))
+    if tensors:
+        header, blobs, offset = {}, [], 0
+        for name, array in tensors.items():
+            data = array.tobytes()
+            header[name] = {"dtype": {np.float16: "F16", np.float32: "F32"}[array.dtype.type],
+                            "shape": list(array.shape), "data_offsets": [offset, offset + len(data)]}
+            blobs.append(data)
+            offset += len(data)
+        header_bytes = json.dumps(header).encode()
+        (model_dir / "model.safetensors").write_bytes(
+            struct.pack("<Q", len(header_bytes)) + header_bytes + b"".join(blobs))
+    return model_dir
+
+
+def _bump_mtime(path):
+    """Advance the mtime explicitly; coarse filesystem clocks can hide quick rewrites."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ModelIndex(index_path=tmp_path / "cache" / "model_index.json")
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    path = tmp_path / "models"
+    path.mkdir()
+    return path
+
+
+class TestScanModelDir:
+    """Tests for summarizing a single model directory."""
+
+    def test_safetensors_header_summary(self, models_dir):
+        """Tensor counts, parameters and bytes per dtype come from the header only."""
+        model_dir = _write_model(models_dir, "tiny", {"model_type": "llama", "name": "Tiny"}, {
+            "embed.weight": np.zeros((4, 8), dtype=np.float16),
+            "norm.weight": np.zeros(8, dtype=np.float32),
+        })
+
+        entry = scan_model_dir(model_dir)
+
+        assert entry.format == "mlx"
+        assert entry.name == "Tiny"
+        assert entry.tensor_count == 2
+        assert entry.parameter_count == 40
+        assert entry.bytes_by_dtype == {"F16": 64, "F32": 32}
+        assert entry.file_count == 2
+        assert entry.size_bytes == sum(p.stat().st_size for p in model_dir.iterdir())
+        assert entry.weight_files == ["model.safetensors"]
+
+    def test_invalid_weights_are_tolerated(self, models_dir):
+        """Placeholder or partial weight files are indexed without a tensor summary."""
+        model_dir = _write_model(models_dir, "broken")
+        (model_dir / "model.gguf").write_bytes(b"\x00" * 64)
+        (model_dir / "model.safetensors").write_text("dummy")
+
+        entry = scan_model_dir(model_dir)
+
+        assert entry.format == "gguf"
+        assert entry.gguf_size_bytes == 64
+        assert entry.tensor_count == 0
+
+
+class TestModelIndex:
+    """Tests for incremental refresh and persistence."""
+
+    def test_unchanged_models_are_not_rescanned(self, index, models_dir):
+        """A second listing only stats directories."""
+        _write_model(models_dir, "a", {})
+        _write_model(models_dir, "b", {})
+
+        assert [e.model_id for e in index.entries(models_dir)] == ["a", "b"]
+        assert index.stats["scans"] == 2
+
+        index.entries(models_dir)
+        assert index.stats["scans"] == 2
+
+    def test_changed_model_is_rescanned(self, index, models_dir):
+        """Adding a file changes the directory mtime and rescans that model only."""
+        model_dir = _write_model(models_dir, "a", {})
+        _write_model(models_dir, "b", {})
+        index.entries(models_dir)
+
+        (model_dir / "extra.bin").write_bytes(b"\x00" * 100)
+        _bump_mtime(model_dir)
+        entries = {e.model_id: e for e in index.entries(models_dir)}
+
+        assert index.stats["scans"] == 3
+        assert entries["a"].file_count == 2
+
+    def test_added_and_removed_models(self, index, models_dir):
+        """New directories appear and deleted ones drop out of the index."""
+        _write_model(models_dir, "a", {})
+        index.entries(models_dir)
+
+        (models_dir / "a" / "config.json").unlink()
+        (models_dir / "a").rmdir()
+        _write_model(models_dir, "b", {})
+
+        assert [e.model_id for e in index.entries(models_dir)] == ["b"]
+
+    def test_index_persists_across_instances(self, index, models_dir):
+        """A fresh process reuses the on-disk index instead of rescanning."""
+        _write_model(models_dir, "a", {"name": "A"}, {"w": np.zeros(4, dtype=np.float32)})
+        index.entries(models_dir)
+
+        reopened = ModelIndex(index_path=index.index_path)
+        entries = reopened.entries(models_dir)
+
+        assert reopened.stats["scans"] == 0
+        assert entries[0].name == "A"
+        assert entries[0].tensor_count == 1
+
+    def test_get_and_invalidate(self, index, models_dir):
+        """get() returns None for missing models and rescans after invalidate()."""
+        _write_model(models_dir, "a", {})
+
+        assert index.get(models_dir, "missing") is None
+        assert index.get(models_dir, "a").model_id == "a"
+
+        index.invalidate("a", models_dir=models_dir)
+        index.get(models_dir, "a")
+        assert index.stats["scans"] == 2
+
+    def test_watcher_marks_models_dirty(self, index, models_dir):
+        """With inotify, listings skip stat validation and pick up changes from events."""
+        model_dir = _write_model(models_dir, "a", {})
+        if not index.start_watcher(models_dir):
+            pytest.skip("inotify not available")
+        try:
+            index.entries(models_dir)
+            validations = index.stats["validations"]
+            index.entries(models_dir)
+            assert index.stats["validations"] == validations
+
+            (model_dir / "weights.bin").write_bytes(b"\x00" * 10)
+            _write_model(models_dir, "b", {})
+            deadline = time.time() + 5
+            ids = []
+            while time.time() < deadline:
+                entries = {e.model_id: e for e in index.entries(models_dir)}
+                ids = sorted(entries)
+                if ids == ["a", "b"] and entries["a"].file_count == 2:
+                    break
+                time.sleep(0.05)
+            assert ids == ["a", "b"]
+            assert entries["a"].file_count == 2
+        finally:
+            index.stop_watcher()
@@ -0,0 +1,193 @@
+"""
+Tests for the group quantization pipeline (services/model_optimizer.py).
+"""
+
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from flask import Flask
+from src.routes.models import bp as models_bp
+from src.services.model_index import read_safetensors_header
+from src.services.model_optimizer import (
+    ModelOptimizer,
+    OptimizationError,
+    OptimizationStatus,
+    dequantize_weight,
+    quantize_weight,
+)
+from src.utils.mmap_loader import MemoryMappedLoader
+from test_mmap_loader import _write_safetensors
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    model_dir = tmp_path / "models" / "tiny"
+    model_dir.mkdir(parents=True)
+    (model_dir / "config.json").write_text(json.dumps({"model_type": "llama", "hidden_size": 128}))
+    (model_dir / "tokenizer.json").write_text("{}")
+    _write_safetensors(model_dir / "model.safetensors", {
+        "layers.0.mlp.weight": rng.standard_normal((64, 128)).astype(np.float16),
+        "layers.0.attn.weight": rng.standard_normal((32, 128)).astype(np.float16),
+        "layers.0.norm.weight": np.ones(128, dtype=np.float16),
+    })
+    return tmp_path / "models"
+
+
+@pytest.fixture
+def optimizer(models_dir, tmp_path):
+    with patch("src.services.model_optimizer.settings") as mock_settings:
+        mock_settings.model.cache_dir = tmp_path / "cache"
+        # Tiny shards so the output is split across files
+        yield ModelOptimizer(models_dir=models_dir, workers=2, shard_bytes=4 * 1024)
+
+
+class TestGroupQuantization:
+    """Tests for the affine group quantizer."""
+
+    @pytest.mark.parametrize(("bits", "tolerance"), [(4, 0.12), (8, 0.01)])
+    def test_round_trip_error(self, bits, tolerance):
+        """Dequantized weights stay within a fraction of the original norm."""
+        weight = np.random.default_rng(1).standard_normal((16, 256)).astype(np.float32)
+        packed, scales, biases = quantize_weight(weight, bits, 64)
+
+        assert packed.dtype == np.uint32
+        assert packed.shape == (16, 256 * bits // 32)
+        assert scales.shape == biases.shape == (16, 4)
+        restored = dequantize_weight(packed, scales, biases, bits, 64)
+        assert np.linalg.norm(restored - weight) / np.linalg.norm(weight) < tolerance
+
+    def test_packing_is_low_bits_first(self):
+        """The first value of a group lands in the lowest bits of the word, as MLX expects."""
+        weight = np.tile(np.arange(8, dtype=np.float32), (1, 4))  # levels 0..7 repeated
+        packed, _, _ = quantize_weight(weight, 4, 32)
+        values = np.round(np.arange(8) * 15 / 7).astype(np.uint32)
+        assert packed[0, 0] == sum(int(v) << (4 * i) for i, v in enumerate(values))
+
+
+class TestOptimizationJob:
+    """Tests for end-to-end quantization jobs."""
+
+    def test_job_writes_sharded_mlx_checkpoint(self, optimizer, models_dir):
+        """The output has sharded weights, scales/biases, an index and a quantized config."""
+        job_id = optimizer.create_job("tiny", bits=4, group_size=64)
+        updates = []
+        optimizer.register_progress_callback(job_id, lambda job: updates.append(job.progress))
+
+        assert optimizer.run_job(job_id)
+
+        job = optimizer.get_job(job_id)
+        output = models_dir / "tiny-4bit"
+        assert job.status == OptimizationStatus.COMPLETED
+        assert updates[-1] == 1.0
+        shards = sorted(output.glob("*.safetensors"))
+        assert len(shards) == job.report["shards"] > 1
+
+        index = json.loads((output / "model.safetensors.index.json").read_text())
+        assert index["weight_map"]["layers.0.mlp.scales"].startswith("model-")
+        config = json.loads((output / "config.json").read_text())
+        assert config["quantization"] == {"group_size": 64, "bits": 4}
+        assert (output / "tokenizer.json").exists()
+
+        header = read_safetensors_header(output / index["weight_map"]["layers.0.mlp.weight"])
+        assert header["layers.0.mlp.weight"]["dtype"] == "U32"
+        assert header["layers.0.mlp.weight"]["shape"] == [64, 16]
+
+        report = job.report
+        assert report["quantized_tensors"] == 2
+        assert report["passthrough_tensors"] == 1
+        assert report["compression_ratio"] > 3
+        assert 0 < report["mean_relative_error"] < 0.12
+
+    def test_quantized_weights_load_and_dequantize(self, optimizer, models_dir):
+        """Stored quants reconstruct the source weights."""
+        job_id = optimizer.create_job("tiny", bits=8, group_size=32)
+        assert optimizer.run_job(job_id)
+
+        source = MemoryMappedLoader()
+        output = MemoryMappedLoader()
+        try:
+            original = source.load_model_mmap(models_dir / "tiny")["layers.0.attn.weight"].numpy()
+            weights = output.load_model_mmap(models_dir / "tiny-8bit")
+            restored = dequantize_weight(
+                weights["layers.0.attn.weight"].numpy(), weights["layers.0.attn.scales"].numpy(),
+                weights["layers.0.attn.biases"].numpy(), 8, 32,
+            )
+            np.testing.assert_allclose(restored, original.astype(np.float32), atol=0.05)
+            np.testing.assert_array_equal(weights["layers.0.norm.weight"].numpy(), np.ones(128))
+        finally:
+            source.close_all()
+            output.close_all()
+
+    def test_invalid_requests(self, optimizer):
+        """Unsupported widths, group sizes and missing models are rejected up front."""
+        with pytest.raises(OptimizationError, match="bits"):
+            optimizer.create_job("tiny", bits=3)
+        with pytest.raises(OptimizationError, match="group_size"):
+            optimizer.create_job("tiny", bits=4, group_size=12)
+        with pytest.raises(OptimizationError, match="no local safetensors"):
+            optimizer.create_job("missing")
+
+    def test_hub_id_resolves_to_download_directory(self, optimizer, models_dir):
+        """org/name IDs read from org_name, where downloads are stored."""
+        (models_dir / "tiny").rename(models_dir / "org_tiny")
+        job_id = optimizer.create_job("org/tiny", bits=8)
+
+        assert optimizer.get_job(job_id).output_id == "tiny-8bit"
+        assert optimizer.run_job(job_id)
+        assert (models_dir / "tiny-8bit" / "model.safetensors.index.json").exists()
+
+    def test_rejects_ids_outside_models_dir(self, optimizer):
+        """Source and output IDs can't escape the models directory."""
+        with pytest.raises(OptimizationError, match="Invalid model id"):
+            optimizer.create_job("..")
+        with pytest.raises(OptimizationError, match="Invalid model id"):
+            optimizer.create_job("tiny", output_id="../escaped")
+
+    @pytest.mark.parametrize("key", ["quantization", "quantization_config"])
+    def test_rejects_quantized_source(self, optimizer, models_dir, key):
+        """Already-quantized checkpoints can't be quantized again."""
+        config_path = models_dir / "tiny" / "config.json"
+        config_path.write_text(json.dumps({"model_type": "llama", key: {"bits": 4, "group_size": 64}}))
+        with pytest.raises(OptimizationError, match="already quantized"):
+            optimizer.create_job("tiny")
+
+
+class TestOptimizeEndpoint:
+    """Tests for POST /api/models/optimize."""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.config["TESTING"] = True
+        app.register_blueprint(models_bp, url_prefix="/api/models")
+        app.config["app_state"] = {"loaded_models": {}, "socketio": None}
+        return app.test_client()
+
+    def test_starts_background_job(self, client, optimizer):
+        """A valid request returns 202 with a job id that can be polled."""
+        with patch("src.routes.models.model_optimizer", optimizer), patch("threading.Thread") as thread:
+            response = client.post("/api/models/optimize", json={"model_id": "tiny", "bits": 8})
+            assert response.status_code == 202
+            job_id = response.get_json()["job_id"]
+            assert thread.call_args.kwargs["args"] == (job_id,)
+            thread.return_value.start.assert_called_once()
+
+            status = client.get(f"/api/models/optimize/{job_id}")
+            assert status.get_json()["bits"] == 8
+
+    def test_rejects_invalid_bits(self, client, optimizer):
+        """Bad parameters return 400 instead of starting a job."""
+        with patch("src.routes.models.model_optimizer", optimizer):
+            response = client.post("/api/models/optimize", json={"model_id": "tiny", "bits": 2})
+        assert response.status_code == 400
+
+    def test_rejects_quantized_source(self, client, optimizer, models_dir):
+        """A source that is already quantized returns 400."""
+        (models_dir / "tiny" / "config.json").write_text(json.dumps({"quantization": {"bits": 4}}))
+        with patch("src.routes.models.model_optimizer", optimizer):
+            response = client.post("/api/models/optimize", json={"model_id": "tiny"})
+        assert response.status_code == 400
+        assert "already quantized" in response.get_json()["message"]
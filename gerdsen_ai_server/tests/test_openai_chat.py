@@ -7,6 +7,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from flask import Flask
+from src.inference.batch_generation import BatchCompletion
 from src.routes.openai_api import bp, convert_messages_to_prompt
 from src.schemas.openai_schemas import ChatMessage
 
@@ -383,6 +384,155 @@ class TestChatCompletions:
         assert "Use this context" in prompt
 
 
+# ---------------------------------------------------------------------------
+# TestBatchedCompletions
+# ---------------------------------------------------------------------------
+
+
+class TestBatchedCompletions:
+    """Tests for list prompts on the POST /v1/completions endpoint."""
+
+    @pytest.fixture
+    def app(self):
+        """Create test Flask app."""
+        app = Flask(__name__)
+        app.config["TESTING"] = True
+        app.register_blueprint(bp, url_prefix="/v1")
+        app.config["app_state"] = {
+            "loaded_models": {},
+            "metrics": {},
+            "model_inference_counts": {},
+        }
+        return app
+
+    @pytest.fixture
+    def client(self, app):
+        """Create test client."""
+        return app.test_client()
+
+    @pytest.fixture(autouse=True)
+    def disable_auth(self):
+        """Bypass authentication for completion tests."""
+        with patch("src.routes.openai_api.verify_api_key", return_value=True):
+            yield
+
+    def test_one_choice_per_prompt(self, app, client):
+        """A list prompt returns one choice per prompt with matching indices and summed usage."""
+        mock_model = _make_mock_model()
+        mock_model.generate_batch.return_value = [
+            BatchCompletion(index=1, text=" two", prompt_tokens=3, completion_tokens=1, finish_reason="stop"),
+            BatchCompletion(index=0, text=" one", prompt_tokens=2, completion_tokens=4, finish_reason="length"),
+        ]
+        app.config["app_state"]["loaded_models"]["test-model"] = mock_model
+
+        response = client.post(
+            "/v1/completions",
+            json={"model": "test-model", "prompt": ["first", "second"], "max_tokens": 4},
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["object"] == "text_completion"
+        assert [c["index"] for c in data["choices"]] == [0, 1]
+        assert data["choices"][0]["text"] == " one"
+        assert data["choices"][0]["finish_reason"] == "length"
+        assert data["choices"][1]["text"] == " two"
+        assert data["usage"] == {"prompt_tokens": 5, "completion_tokens": 5, "total_tokens": 10}
+
+        # All prompts go to the model in a single batched call
+        mock_model.generate_batch.assert_called_once()
+        assert mock_model.generate_batch.call_args[0][0] == ["first", "second"]
+        mock_model.generate.assert_not_called()
+
+    def test_echo_prepends_prompt(self, app, client):
+        """echo=True returns the prompt followed by the completion."""
+        mock_model = _make_mock_model()
+        mock_model.generate_batch.return_value = [
+            BatchCompletion(index=0, text=" done", prompt_tokens=1, completion_tokens=1, finish_reason="stop"),
+        ]
+        app.config["app_state"]["loaded_models"]["test-model"] = mock_model
+
+        response = client.post(
+            "/v1/completions",
+            json={"model": "test-model", "prompt": ["start"], "echo": True},
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["choices"][0]["text"] == "start done"
+
+    def test_too_many_prompts_rejected(self, app, client):
+        """More than 20 prompts must return a validation error."""
+        app.config["app_state"]["loaded_models"]["test-model"] = _make_mock_model()
+
+        response = client.post(
+            "/v1/completions",
+            json={"model": "test-model", "prompt": ["p"] * 21},
+        )
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["type"] == "validation_error"
+
+    def test_streaming_batch_rejected(self, app, client):
+        """Streaming is not supported for list prompts."""
+        app.config["app_state"]["loaded_models"]["test-model"] = _make_mock_model()
+
+        response = client.post(
+            "/v1/completions",
+            json={"model": "test-model", "prompt": ["a", "b"], "stream": True},
+        )
+
+        assert response.status_code == 400
+
+    def test_fallback_without_generate_batch(self, app, client):
+        """Models without generate_batch are driven prompt by prompt."""
+        mock_model = MagicMock(spec=["model_id", "generate", "tokenize"])
+        mock_model.model_id = "test-model"
+        mock_model.generate.side_effect = ["first alpha", "beta"]
+        mock_model.tokenize.return_value = [1, 2]
+        app.config["app_state"]["loaded_models"]["test-model"] = mock_model
+
+        response = client.post(
+            "/v1/completions",
+            json={"model": "test-model", "prompt": ["first", "second"]},
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        # Echoed prompt text is stripped from the generated output
+        assert [c["text"] for c in data["choices"]] == [" alpha", "beta"]
+        assert mock_model.generate.call_count == 2
+
+    def test_per_prompt_adapters_forwarded(self, app, client):
+        """A list of adapters is passed through to the batched generation call."""
+        mock_model = _make_mock_model()
+        mock_model.generate_batch.return_value = [
+            BatchCompletion(index=0, text=" a", prompt_tokens=1, completion_tokens=1, finish_reason="stop"),
+            BatchCompletion(index=1, text=" b", prompt_tokens=1, completion_tokens=1, finish_reason="stop"),
+        ]
+        app.config["app_state"]["loaded_models"]["test-model"] = mock_model
+
+        with patch("src.routes.openai_api.find_missing_adapters", return_value=[]):
+            response = client.post(
+                "/v1/completions",
+                json={"model": "test-model", "prompt": ["first", "second"], "adapter": ["support", None]},
+            )
+
+        assert response.status_code == 200
+        assert mock_model.generate_batch.call_args[1]["adapters"] == ["support", None]
+
+    def test_unknown_adapter_rejected(self, app, client):
+        """Requests naming an adapter that is not on disk return 404."""
+        app.config["app_state"]["loaded_models"]["test-model"] = _make_mock_model()
+
+        response = client.post(
+            "/v1/completions",
+            json={"model": "test-model", "prompt": ["first"], "adapter": "does-not-exist"},
+        )
+
+        assert response.status_code == 404
+        assert json.loads(response.data)["error"] == "Adapter not found"
+
+
 # ---------------------------------------------------------------------------
 # TestConvertMessages
 # ---------------------------------------------------------------------------
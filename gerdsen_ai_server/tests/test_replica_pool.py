@@ -0,0 +1,170 @@
+"""
+Tests for embedding model replicas (model_loaders/replica_pool.py).
+"""
+
+import threading
+import time
+from typing import Any
+
+import pytest
+from src.model_loaders.base import BaseEmbeddingModel, BaseEmbeddingModelLoader
+from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.model_loaders.embedding_batcher import EmbeddingBatcher
+from src.model_loaders.replica_pool import ReplicatedEmbeddingModel, choose_replica_count
+from test_compute_dispatcher import _make_settings
+
+GB = 1024 ** 3
+
+
+class _SleepyModel(BaseEmbeddingModel):
+    """Fake model that records which threads overlap inside a forward pass."""
+
+    active = 0
+    peak = 0
+    _lock = threading.Lock()
+
+    def __init__(self, index: int = 0, seconds: float = 0.02):
+        super().__init__("all-MiniLM-L6-v2", "fake", 2, 256, "cpu")
+        self.index = index
+        self.seconds = seconds
+        self.calls = 0
+        self._loaded = True
+
+    def load(self):
+        self._loaded = True
+
+    def unload(self):
+        self._loaded = False
+
+    def embed(self, texts):
+        with _SleepyModel._lock:
+            self.calls += 1
+            _SleepyModel.active += 1
+            _SleepyModel.peak = max(_SleepyModel.peak, _SleepyModel.active)
+        time.sleep(self.seconds)
+        with _SleepyModel._lock:
+            _SleepyModel.active -= 1
+        return [[float(len(t)), float(self.index)] for t in texts]
+
+
+class _ReplicaLoader(BaseEmbeddingModelLoader):
+    def __init__(self):
+        super().__init__()
+        self.replica_requests: list[int] = []
+
+    def load_model(self, name: str) -> BaseEmbeddingModel:
+        if name not in self._loaded_models:
+            self._loaded_models[name] = _SleepyModel(0)
+        return self._loaded_models[name]
+
+    def unload_model(self, name: str) -> None:
+        self._loaded_models.pop(name, None)
+
+    def list_available_models(self) -> list[dict[str, Any]]:
+        return []
+
+    def create_replicas(self, name: str, count: int) -> list[BaseEmbeddingModel]:
+        self.replica_requests.append(count)
+        return [_SleepyModel(i + 1) for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def _reset_overlap():
+    _SleepyModel.active = _SleepyModel.peak = 0
+
+
+class TestReplicaCount:
+
+    def test_limited_by_cores(self):
+        assert choose_replica_count(22, cpu_cores=16, available_bytes=64 * GB) == 8
+        assert choose_replica_count(22, cpu_cores=6, available_bytes=64 * GB) == 3
+        assert choose_replica_count(22, cpu_cores=1, available_bytes=64 * GB) == 1
+
+    def test_limited_by_model_size(self):
+        # 137M fp32 params is ~0.55 GB; a quarter of 4 GB fits one copy
+        assert choose_replica_count(137, cpu_cores=16, available_bytes=4 * GB) == 1
+        assert choose_replica_count(137, bytes_per_param=1, cpu_cores=16, available_bytes=4 * GB) == 7
+
+
+class TestReplicatedModel:
+
+    def test_concurrent_calls_spread_across_replicas(self):
+        replicas = [_SleepyModel(i) for i in range(3)]
+        model = ReplicatedEmbeddingModel(replicas)
+        barrier = threading.Barrier(3)
+
+        def call():
+            barrier.wait()
+            return model.embed_array(["abc"])
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert [r.calls for r in replicas] == [1, 1, 1]
+        assert _SleepyModel.peak == 3
+        assert model.get_stats()["in_flight_texts"] == [0, 0, 0]
+
+    def test_idle_pool_prefers_first_replica(self):
+        replicas = [_SleepyModel(i, seconds=0) for i in range(2)]
+        model = ReplicatedEmbeddingModel(replicas)
+
+        model.embed(["a"])
+        model.embed(["b"])
+
+        assert model.get_stats()["calls"] == [2, 0]
+
+    def test_unload_leaves_primary_to_its_loader(self):
+        replicas = [_SleepyModel(i) for i in range(3)]
+        ReplicatedEmbeddingModel(replicas).unload()
+        assert [r.is_loaded for r in replicas] == [True, False, False]
+
+
+class TestDispatcherReplicas:
+
+    def test_batches_run_in_parallel_across_replicas(self, tmp_path):
+        loader = _ReplicaLoader()
+        dispatcher = ComputeDispatcher(
+            _make_settings(tmp_path, embedding_replicas=4, embedding_micro_batching=False,
+                           embedding_vector_cache=False, embedding_length_bucketing=False),
+            embedding_loader=loader,
+        )
+
+        vectors = dispatcher.embed_array([f"text {i}" for i in range(16)])
+
+        assert loader.replica_requests == [3]
+        assert vectors.shape == (16, 2)
+        assert _SleepyModel.peak == 4
+        stats = dispatcher.get_replica_stats()["models"]["all-MiniLM-L6-v2"]
+        assert stats["calls"] == [1, 1, 1, 1]
+
+    def test_single_replica_setting_skips_pool(self, tmp_path):
+        loader = _ReplicaLoader()
+        dispatcher = ComputeDispatcher(_make_settings(tmp_path, embedding_replicas=1), embedding_loader=loader)
+
+        assert isinstance(dispatcher.load_embedding_model("all-MiniLM-L6-v2"), _SleepyModel)
+        assert loader.replica_requests == []
+
+    def test_unload_drops_replicas(self, tmp_path):
+        loader = _ReplicaLoader()
+        dispatcher = ComputeDispatcher(_make_settings(tmp_path, embedding_replicas=2), embedding_loader=loader)
+        dispatcher.load_embedding_model("all-MiniLM-L6-v2")
+
+        dispatcher.unload_embedding_model("all-MiniLM-L6-v2")
+
+        assert dispatcher.get_replica_stats()["models"] == {}
+
+
+class TestBatcherWorkers:
+
+    def test_one_worker_per_replica_runs_passes_concurrently(self):
+        batcher = EmbeddingBatcher(max_batch_size=1, max_wait_ms=0)
+        model = ReplicatedEmbeddingModel([_SleepyModel(i) for i in range(3)])
+        try:
+            futures = [batcher.submit("m", [str(i)], model.embed, workers=3) for i in range(6)]
+            assert [len(f.result(timeout=5)) for f in futures] == [1] * 6
+        finally:
+            batcher.stop()
+        assert _SleepyModel.peak == 3
@@ -0,0 +1,118 @@
+"""
+Unit tests for the shared tokenizer pool (utils/tokenizer_pool.py).
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from src.utils.tokenizer_pool import TokenizerPool
+
+
+class FakeFastTokenizer:
+    """Minimal stand-in for a HuggingFace fast tokenizer."""
+
+    is_fast = True
+    pad_token_id = 0
+
+    def __init__(self, name="fake-tokenizer"):
+        self.name_or_path = name
+        self.batches = []
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None, **kwargs):
+        self.batches.append(list(texts))
+        input_ids = []
+        for text in texts:
+            ids = [len(word) for word in text.split()]
+            if add_special_tokens:
+                ids = [101, *ids, 102]
+            if truncation and max_length is not None:
+                ids = ids[:max_length]
+            input_ids.append(ids)
+        return {"input_ids": input_ids}
+
+
+@pytest.fixture
+def pool():
+    pool = TokenizerPool(max_workers=2, cache_size=8, chunk_size=2)
+    yield pool
+    pool.shutdown()
+
+
+class TestTokenizerPool:
+    """Tests for batched encoding and the encoding cache."""
+
+    def test_encode_batch_returns_int32_arrays(self, pool):
+        """Encodings are read-only int32 arrays in input order."""
+        tokenizer = FakeFastTokenizer()
+        result = pool.encode_batch(tokenizer, ["a bb", "ccc"])
+
+        assert [r.tolist() for r in result] == [[101, 1, 2, 102], [101, 3, 102]]
+        assert all(r.dtype == np.int32 for r in result)
+        assert not result[0].flags.writeable
+
+    def test_repeated_strings_served_from_cache(self, pool):
+        """Duplicates within and across calls are encoded once."""
+        tokenizer = FakeFastTokenizer()
+        pool.encode_batch(tokenizer, ["system prompt", "hello", "system prompt"])
+        pool.encode_batch(tokenizer, ["system prompt"])
+
+        encoded = [text for batch in tokenizer.batches for text in batch]
+        assert sorted(encoded) == ["hello", "system prompt"]
+        stats = pool.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 3
+
+    def test_misses_split_into_chunks(self, pool):
+        """Uncached strings are split into chunk_size batches for the workers."""
+        tokenizer = FakeFastTokenizer()
+        result = pool.encode_batch(tokenizer, ["a", "b b", "c c c", "d d d d", "e"])
+
+        assert sorted(len(batch) for batch in tokenizer.batches) == [1, 2, 2]
+        assert [len(r) for r in result] == [3, 4, 5, 6, 3]
+
+    def test_cache_is_bounded(self, pool):
+        """The cache never exceeds cache_size entries."""
+        tokenizer = FakeFastTokenizer()
+        pool.encode_batch(tokenizer, [f"text {i}" for i in range(20)])
+        assert pool.get_stats()["cached_entries"] == 8
+
+    def test_truncation_and_padding(self, pool):
+        """encode_padded truncates to max_length and right-pads with an attention mask."""
+        tokenizer = FakeFastTokenizer()
+        encoded = pool.encode_padded(tokenizer, ["a b c d e", "a"], max_length=4)
+
+        assert encoded["input_ids"].dtype == np.int32
+        assert encoded["input_ids"].tolist() == [[101, 1, 1, 1], [101, 1, 102, 0]]
+        assert encoded["attention_mask"].tolist() == [[1, 1, 1, 1], [1, 1, 1, 0]]
+
+        fixed = pool.encode_padded(tokenizer, ["a"], max_length=6, pad_to_max_length=True)
+        assert fixed["input_ids"].shape == (1, 6)
+
+    def test_slow_tokenizer_fallback(self, pool):
+        """Tokenizers without a fast batch API are driven through encode()."""
+        tokenizer = MagicMock()
+        tokenizer.encode.return_value = [5, 6, 7]
+
+        result = pool.encode(tokenizer, "hello", max_length=2)
+
+        assert result.tolist() == [5, 6]
+        tokenizer.encode.assert_called_once_with("hello")
+
+    def test_mlx_wrapper_uses_inner_tokenizer(self, pool):
+        """mlx_lm's TokenizerWrapper is unwrapped to reach the fast batch API."""
+        inner = FakeFastTokenizer()
+        wrapper = MagicMock()
+        wrapper._tokenizer = inner
+
+        assert pool.encode(wrapper, "ab").tolist() == [101, 2, 102]
+        assert inner.batches == [["ab"]]
+
+    def test_templated_prompts_get_no_second_bos(self, pool):
+        """Prompts that already start with the BOS text are encoded without special tokens."""
+        tokenizer = FakeFastTokenizer()
+        tokenizer.bos_token = "<s>"
+
+        result = pool.encode_prompts(tokenizer, ["hi there", "<s> hi", "yo"])
+
+        assert [r.tolist() for r in result] == [[101, 2, 5, 102], [3, 2], [101, 2, 102]]
@@ -0,0 +1,160 @@
+"""
+Tests for the native vector store backend (services/vector_backends/native.py).
+"""
+
+import numpy as np
+import pytest
+import src.services.vector_backends.native as native
+from src.services.vector_backends.native import NativeVectorBackend, where_to_sql
+from src.services.vector_store import VectorStoreService
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return NativeVectorBackend(tmp_path / "native")
+
+
+def _fill(collection, n: int, dims: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dims)).astype(np.float32)
+    collection.add(
+        ids=[f"c{i}" for i in range(n)],
+        documents=[f"doc {i}" for i in range(n)],
+        metadatas=[{"source": f"s{i % 3}", "chunk_index": i} for i in range(n)],
+        embeddings=vectors,
+    )
+    return vectors
+
+
+class TestNativeCollection:
+
+    def test_query_matches_brute_force(self, backend):
+        collection = backend.get_or_create_collection("docs")
+        vectors = _fill(collection, 200)
+        query = np.random.default_rng(1).standard_normal(16).astype(np.float32)
+
+        result = collection.query(query, n_results=5)
+
+        similarity = _unit(vectors) @ (query / np.linalg.norm(query))
+        expected = np.argsort(-similarity)[:5]
+        assert result["ids"] == [f"c{i}" for i in expected]
+        np.testing.assert_allclose(result["distances"], 1 - similarity[expected], rtol=1e-5, atol=1e-6)
+        assert result["documents"][0] == f"doc {expected[0]}"
+        assert result["metadatas"][0]["chunk_index"] == expected[0]
+
+    def test_where_filter_restricts_candidates(self, backend):
+        collection = backend.get_or_create_collection("docs")
+        _fill(collection, 60)
+
+        result = collection.query(np.ones(16, dtype=np.float32), n_results=100, where={"source": "s1"})
+
+        assert len(result["ids"]) == 20
+        assert {m["source"] for m in result["metadatas"]} == {"s1"}
+        assert collection.get(where={"$and": [{"source": "s2"}, {"chunk_index": {"$lt": 10}}]})["ids"] == [
+            "c2", "c5", "c8",
+        ]
+
+    def test_persists_across_reopen(self, tmp_path):
+        collection = NativeVectorBackend(tmp_path).get_or_create_collection("docs")
+        vectors = _fill(collection, 50)
+        collection.delete(ids=["c0"])
+
+        reopened = NativeVectorBackend(tmp_path).get_collection("docs")
+
+        assert reopened.count() == 49
+        assert reopened.query(vectors[7], n_results=1)["ids"] == ["c7"]
+        assert reopened.get(ids=["c0"])["ids"] == []
+
+    def test_delete_tombstones_rows(self, backend):
+        collection = backend.get_or_create_collection("docs")
+        vectors = _fill(collection, 30)
+
+        collection.delete(where={"source": "s0"})
+
+        assert collection.count() == 20
+        result = collection.query(vectors[3], n_results=30)
+        assert "c3" not in result["ids"]
+        assert len(result["ids"]) == 20
+
+    def test_add_replaces_existing_ids(self, backend):
+        collection = backend.get_or_create_collection("docs")
+        _fill(collection, 10)
+        new_vector = np.zeros((1, 16), dtype=np.float32)
+        new_vector[0, 0] = 1.0
+
+        collection.add(["c4"], ["updated"], [{"source": "new"}], new_vector)
+
+        assert collection.count() == 10
+        assert collection.get(ids=["c4"])["documents"] == ["updated"]
+        assert collection.query(new_vector[0], n_results=1)["ids"] == ["c4"]
+
+    def test_update_metadata_keeps_vectors(self, backend):
+        collection = backend.get_or_create_collection("docs")
+        vectors = _fill(collection, 10)
+
+        collection.update_metadata(["c2", "c5"], [{"source": "moved"}, {"source": "moved", "chunk_index": 0}])
+
+        assert collection.count() == 10
+        assert collection.get(where={"source": "moved"})["ids"] == ["c2", "c5"]
+        assert collection.get(ids=["c2"])["documents"] == ["doc 2"]
+        assert collection.query(vectors[5], n_results=1)["ids"] == ["c5"]
+
+    def test_compaction_keeps_live_rows(self, backend, monkeypatch):
+        monkeypatch.setattr(native, "COMPACT_MIN_DEAD_ROWS", 4)
+        collection = backend.get_or_create_collection("docs")
+        vectors = _fill(collection, 12)
+
+        collection.delete(ids=[f"c{i}" for i in range(8)])
+
+        assert len(list(collection.path.glob("vectors.*.f32"))) == 1
+        assert collection._rows == 4
+        assert collection.query(vectors[10], n_results=1)["ids"] == ["c10"]
+
+    def test_dimension_mismatch_is_rejected(self, backend):
+        collection = backend.get_or_create_collection("docs")
+        _fill(collection, 3)
+        with pytest.raises(ValueError, match="16-dim"):
+            collection.add(["x"], ["x"], [{}], np.ones((1, 8), dtype=np.float32))
+
+
+class TestNativeBackend:
+
+    def test_collection_lifecycle(self, backend):
+        backend.get_or_create_collection("a")
+        backend.get_or_create_collection("b")
+        assert [c.name for c in backend.list_collections()] == ["a", "b"]
+
+        backend.delete_collection("a")
+
+        assert [c.name for c in backend.list_collections()] == ["b"]
+        with pytest.raises(ValueError, match="does not exist"):
+            backend.get_collection("a")
+
+    def test_rejects_unsafe_names(self, backend):
+        with pytest.raises(ValueError, match="Invalid collection name"):
+            backend.get_or_create_collection("../escape")
+
+    def test_where_to_sql(self):
+        sql, params = where_to_sql({"$or": [{"source": "a"}, {"page": {"$in": [1, 2]}}]})
+        assert sql == "(json_extract(metadata, ?) = ? OR json_extract(metadata, ?) IN (?,?))"
+        assert params == ['$."source"', "a", '$."page"', 1, 2]
+
+
+class TestVectorStoreServiceNative:
+
+    def test_ingest_search_delete(self, tmp_path):
+        service = VectorStoreService(persist_dir=str(tmp_path), backend="native")
+        service._embedding_fn = lambda texts: [[float("vector" in t), float("cake" in t), 1.0] for t in texts]
+
+        service.ingest_text("Vector databases index embeddings.", source="a.txt", collection_name="kb")
+        service.ingest_text("A recipe for chocolate cake.", source="b.txt", collection_name="kb")
+
+        result = service.search("vector search", n_results=1, collection_name="kb")
+        assert result["metadatas"][0]["source"] == "a.txt"
+        assert service.get_collection_info("kb")["count"] == 2
+
+        service.delete_documents(where={"source": "a.txt"}, collection_name="kb")
+        assert service.search("vector search", collection_name="kb")["metadatas"][0]["source"] == "b.txt"
@@ -5,6 +5,9 @@ Uses a lightweight test embedding function so tests run
 without MLX or coremltools.
 """
 
+import contextlib
+from collections.abc import Iterator
+
 import chromadb
 import pytest
 from chromadb.api.types import (
@@ -30,6 +33,17 @@ class _TestEmbeddingFunction(EmbeddingFunction[Documents]):
         return result
 
 
+class _CountingEmbeddingFunction(_TestEmbeddingFunction):
+    """Test embedding function that records the texts it embeds."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def __call__(self, input: Documents) -> Embeddings:  # noqa: A002
+        self.calls.extend(input)
+        return super().__call__(input)
+
+
 @pytest.fixture
 def vector_store(tmp_path: object) -> VectorStoreService:
     """Create a VectorStoreService backed by an ephemeral client."""
@@ -148,3 +162,104 @@ class TestVectorStoreService:
         )
         collection = vector_store.get_or_create_collection("delete_test")
         assert collection.count() == 0
+
+
+class TestIncrementalIngest:
+
+    @pytest.fixture
+    def embedded(self, vector_store: VectorStoreService) -> Iterator[list[str]]:
+        """Texts passed to the embedding function, in call order."""
+        embedding_fn = _CountingEmbeddingFunction()
+        vector_store._embedding_fn = embedding_fn
+        yield embedding_fn.calls
+        # The ephemeral client is shared by every test in the process
+        with contextlib.suppress(Exception):
+            vector_store.delete_collection("wiki")
+
+    PARAGRAPHS = [f"Paragraph {i} talks about topic {i} at some length." for i in range(4)]
+
+    def _ingest(self, vector_store: VectorStoreService, paragraphs: list[str], **kwargs) -> dict:
+        return vector_store.ingest_text(
+            "\n\n".join(paragraphs), source="wiki/page.md", collection_name="wiki",
+            chunk_size=60, chunk_overlap=1, **kwargs,
+        )
+
+    def test_chunk_ids_are_content_hashes(
+        self, vector_store: VectorStoreService,
+    ) -> None:
+        ids, _, _ = vector_store.chunk_records("same\n\nother\n\nsame", "a.md", chunk_size=5, chunk_overlap=0)
+
+        assert ids == vector_store.chunk_records("same\n\nother\n\nsame", "a.md", chunk_size=5, chunk_overlap=0)[0]
+        assert ids[2] == f"{ids[0]}_1"
+        assert ids[0].startswith("a.md_")
+
+    def test_unchanged_document_is_skipped(
+        self, vector_store: VectorStoreService, embedded: list[str],
+    ) -> None:
+        first = self._ingest(vector_store, self.PARAGRAPHS)
+        embedded.clear()
+
+        second = self._ingest(vector_store, self.PARAGRAPHS)
+
+        assert first["chunks_stored"] == 4
+        assert second["status"] == "unchanged"
+        assert second["chunks_stored"] == 0
+        assert second["chunks_unchanged"] == 4
+        assert second["document_ids"] == first["document_ids"]
+        assert embedded == []
+        assert vector_store.get_or_create_collection("wiki").count() == 4
+
+    def test_only_changed_chunks_are_embedded(
+        self, vector_store: VectorStoreService, embedded: list[str],
+    ) -> None:
+        self._ingest(vector_store, self.PARAGRAPHS)
+        embedded.clear()
+        edited = ["A new opening paragraph.", *self.PARAGRAPHS[:2], "Paragraph 2 was rewritten.", self.PARAGRAPHS[3]]
+
+        result = self._ingest(vector_store, edited)
+
+        assert result["status"] == "success"
+        assert embedded == ["A new opening paragraph.", "Paragraph 2 was rewritten."]
+        assert result["chunks_stored"] == 2
+        assert result["chunks_deleted"] == 1
+        # Every kept chunk moved down one place, so only its metadata is rewritten
+        assert result["chunks_updated"] == 3
+        stored = vector_store.get_or_create_collection("wiki").get()
+        assert sorted(stored["documents"]) == sorted(edited)
+        positions = {d: m["chunk_index"] for d, m in zip(stored["documents"], stored["metadatas"], strict=True)}
+        assert [positions[p] for p in edited] == [0, 1, 2, 3, 4]
+
+    def test_metadata_change_rewrites_without_embedding(
+        self, vector_store: VectorStoreService, embedded: list[str],
+    ) -> None:
+        self._ingest(vector_store, self.PARAGRAPHS)
+        embedded.clear()
+
+        result = self._ingest(vector_store, self.PARAGRAPHS, metadata={"team": "docs"})
+
+        assert embedded == []
+        assert result["chunks_updated"] == 4
+        metadatas = vector_store.get_or_create_collection("wiki").get()["metadatas"]
+        assert {m["team"] for m in metadatas} == {"docs"}
+
+    def test_chunks_deleted_elsewhere_are_restored(
+        self, vector_store: VectorStoreService, embedded: list[str],
+    ) -> None:
+        ids = self._ingest(vector_store, self.PARAGRAPHS)["document_ids"]
+        vector_store.delete_documents(ids=ids[1:2], collection_name="wiki")
+        embedded.clear()
+
+        result = self._ingest(vector_store, self.PARAGRAPHS)
+
+        assert result["chunks_stored"] == 1
+        assert embedded == [self.PARAGRAPHS[1]]
+        assert vector_store.get_or_create_collection("wiki").count() == 4
+
+    def test_deleting_collection_forgets_its_sources(
+        self, vector_store: VectorStoreService, embedded: list[str],
+    ) -> None:
+        self._ingest(vector_store, self.PARAGRAPHS)
+        vector_store.delete_collection("wiki")
+
+        assert vector_store.manifest.get("wiki", "wiki/page.md") is None
+        assert self._ingest(vector_store, self.PARAGRAPHS)["chunks_stored"] == 4
@@ -0,0 +1,198 @@
+"""
+Tests for the shared page-aligned weight store (utils/weight_store.py).
+"""
+
+import subprocess
+import sys
+import textwrap
+from unittest.mock import patch
+
+import numpy as np
+import psutil
+import pytest
+from flask import Flask
+from src.routes.models import bp as models_bp
+from src.utils import weight_store as weight_store_module
+from src.utils.dtype_decode import bf16_to_float32
+from src.utils.gguf_reader import GGMLType, GGUFValueType
+from src.utils.mmap_loader import MemoryMappedLoader
+from src.utils.weight_store import STORE_ALIGNMENT, WeightStore, WeightStoreError
+from test_gguf_reader import _random_blocks, _write_gguf
+from test_mmap_loader import _write_safetensors
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = WeightStore(root=tmp_path / "store")
+    # The loader resolves shared stores through the module-level instance
+    monkeypatch.setattr(weight_store_module, "weight_store", store)
+    return store
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = tmp_path / "model"
+    path.mkdir()
+    bf16_words = np.array([0x3F80, 0x4000, 0xC040], dtype=np.uint16)  # 1.0, 2.0, -3.0
+    _write_safetensors(path / "model.safetensors", {
+        "embed.weight": np.arange(12, dtype=np.float16).reshape(3, 4),
+        "norm.weight": bf16_words,
+    }, dtypes={"norm.weight": "BF16"})
+    return path
+
+
+class TestWeightStoreConversion:
+    """Tests for converting models into the store."""
+
+    def test_tensors_are_page_aligned_native_dtype(self, store, model_dir):
+        """Every tensor starts on a store page boundary and keeps its stored dtype."""
+        manifest = store.ensure(model_dir)
+
+        assert [t.name for t in manifest.tensors] == ["embed.weight", "norm.weight"]
+        assert all(t.offset % STORE_ALIGNMENT == 0 for t in manifest.tensors)
+        assert {t.name: t.dtype for t in manifest.tensors} == {"embed.weight": "F16", "norm.weight": "BF16"}
+        assert manifest.tensors[1].nbytes == 6
+        assert store.blob_path(manifest).stat().st_size == manifest.total_bytes
+
+    def test_remove_keeps_lock_file(self, store, model_dir):
+        """remove() deletes the store's files but leaves the conversion lock in place."""
+        manifest = store.ensure(model_dir)
+
+        assert store.remove(manifest.store_id)
+
+        assert store.lookup(model_dir) is None
+        assert [p.name for p in store.store_dir(manifest.store_id).iterdir()] == [".lock"]
+        assert store.list_stores() == []
+        assert store.ensure(model_dir).total_bytes == manifest.total_bytes
+
+    def test_existing_store_is_reused(self, store, model_dir):
+        """A second ensure() reuses the blob; changing the source rebuilds it."""
+        manifest = store.ensure(model_dir)
+        inode = store.blob_path(manifest).stat().st_ino
+
+        assert store.ensure(model_dir).created_at == manifest.created_at
+        assert store.blob_path(manifest).stat().st_ino == inode
+
+        _write_safetensors(model_dir / "model.safetensors", {"embed.weight": np.ones(8, dtype=np.float32)})
+        rebuilt = store.ensure(model_dir)
+        assert [t.name for t in rebuilt.tensors] == ["embed.weight"]
+        assert len(store.list_stores()) == 1
+
+    def test_empty_model_dir(self, store, tmp_path):
+        """Directories without weights can't be converted."""
+        (tmp_path / "empty").mkdir()
+        with pytest.raises(WeightStoreError, match="No safetensors"):
+            store.ensure(tmp_path / "empty")
+
+    def test_gguf_blocks_are_copied_as_is(self, store, tmp_path):
+        """Quantized GGUF tensors keep their blocks and dequantize from the store."""
+        blocks = _random_blocks(np.random.default_rng(0), 2, 34, [0])
+        path = _write_gguf(tmp_path / "model.gguf", {"general.architecture": (GGUFValueType.STRING, "llama")},
+                           {"blk.0.weight": ([32, 2], GGMLType.Q8_0, blocks.tobytes())})
+        manifest = store.ensure(path)
+
+        loader = MemoryMappedLoader()
+        try:
+            weights = loader.load_model_mmap(path, shared=True)
+            np.testing.assert_array_equal(weights["blk.0.weight"].raw(), blocks)
+            assert manifest.tensors[0].ggml_type == GGMLType.Q8_0
+        finally:
+            loader.close_all()
+
+
+class TestStoreEndpoint:
+    """Tests for POST /api/models/mmap/store/<model_id> and its job status route."""
+
+    @pytest.fixture
+    def client(self, store, tmp_path):
+        app = Flask(__name__)
+        app.config["TESTING"] = True
+        app.register_blueprint(models_bp, url_prefix="/api/models")
+        app.config["app_state"] = {"loaded_models": {}, "socketio": None}
+        with patch("src.routes.models.settings") as mock_settings, \
+                patch("src.routes.models.weight_store", store):
+            mock_settings.model.models_dir = tmp_path
+            yield app.test_client()
+
+    def test_conversion_runs_as_background_job(self, client, store, model_dir):
+        """Hub IDs resolve to their org_name download directory and convert off the request thread."""
+        model_dir.rename(model_dir.parent / "org_model")
+        with patch("threading.Thread") as thread:
+            response = client.post("/api/models/mmap/store/org/model")
+            assert response.status_code == 202
+            job_id = response.get_json()["job_id"]
+            assert store.lookup(model_dir.parent / "org_model") is None
+
+            thread.call_args.kwargs["target"]()
+
+        status = client.get(f"/api/models/mmap/store/jobs/{job_id}").get_json()
+        assert status["status"] == "completed"
+        assert status["store"]["tensor_count"] == 2
+        assert client.get("/api/models/mmap/store/jobs/missing").status_code == 404
+
+    def test_failed_conversion_is_reported(self, client, tmp_path):
+        """Conversion errors end up on the job instead of the request."""
+        (tmp_path / "empty").mkdir()
+        with patch("threading.Thread") as thread:
+            job_id = client.post("/api/models/mmap/store/empty").get_json()["job_id"]
+            thread.call_args.kwargs["target"]()
+
+        status = client.get(f"/api/models/mmap/store/jobs/{job_id}").get_json()
+        assert status["status"] == "failed"
+        assert "No safetensors" in status["error"]
+
+    def test_rejects_ids_outside_models_dir(self, client):
+        """IDs like '..' are rejected instead of being joined onto the models directory."""
+        assert client.post("/api/models/mmap/store/..").status_code == 400
+        assert client.post("/api/models/mmap/store/missing").status_code == 404
+
+
+class TestSharedLoading:
+    """Tests for mapping the store through the loader."""
+
+    def test_shared_load_matches_source(self, store, model_dir):
+        """Tensors mapped from the store equal the source, bf16 decoded as usual."""
+        loader = MemoryMappedLoader()
+        try:
+            weights = loader.load_model_mmap(model_dir, shared=True)
+
+            np.testing.assert_array_equal(weights["embed.weight"].numpy(), np.arange(12).reshape(3, 4))
+            np.testing.assert_array_equal(weights["norm.weight"].numpy(),
+                                          bf16_to_float32(np.array([0x3F80, 0x4000, 0xC040], dtype=np.uint16)))
+            assert all(t.page_aligned for t in weights.values())
+
+            usage = loader.get_memory_usage()
+            assert usage["file_count"] == 1
+            sharing = loader.get_sharing_stats()
+            assert sharing["process"]["rss_mb"] > 0
+            assert sharing["mappings"][0]["path"].endswith("weights.bin")
+        finally:
+            loader.close_all()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc smaps accounting")
+    def test_pages_are_shared_across_processes(self, store, tmp_path):
+        """A second process mapping the same blob sees its pages as shared, not private."""
+        (tmp_path / "big").mkdir()
+        _write_safetensors(tmp_path / "big" / "model.safetensors", {"w": np.ones((256, 1024), dtype=np.float32)})
+        loader = MemoryMappedLoader()
+        try:
+            weights = loader.load_model_mmap(tmp_path / "big", shared=True, prefetch=True)
+            int(weights["w"].raw().sum())
+            blob = loader.get_sharing_stats()["mappings"][0]["path"]
+
+            child = textwrap.dedent(f"""
+                import mmap, psutil
+                with open({blob!r}, 'rb') as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                sum(mm[i] for i in range(0, len(mm), 4096))
+                m = [m for m in psutil.Process().memory_maps(grouped=True) if m.path == {blob!r}][0]
+                print(m.shared_clean, m.private_clean)
+            """)
+            if not hasattr(psutil.Process().memory_maps(grouped=True)[0], "shared_clean"):
+                pytest.skip("platform doesn't report shared mappings")
+            shared, private = map(int, subprocess.check_output([sys.executable, "-c", child], text=True).split())
+
+            assert shared >= 1024 * 1024
+            assert private < shared
+        finally:
+            loader.close_all()
@@ -0,0 +1,163 @@
+"""
+Tests for multi-backend work-stealing execution (model_loaders/work_stealing.py).
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from src.model_loaders.base import EmbeddingError
+from src.model_loaders.compute_dispatcher import ComputeDispatcher
+from src.model_loaders.work_stealing import WorkStealingExecutor
+from test_compute_dispatcher import _make_settings, _WordModel
+
+
+class _FakeBackend:
+    """Fake backend: fixed time per text; vectors encode the text so order can be checked."""
+
+    def __init__(self, seconds_per_text: float = 0.0, fail_after: int | None = None):
+        self.seconds_per_text = seconds_per_text
+        self.fail_after = fail_after
+        self.texts = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        with self._lock:
+            self.calls += 1
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise RuntimeError("device lost")
+        time.sleep(self.seconds_per_text * len(texts))
+        with self._lock:
+            self.texts += len(texts)
+        return np.array([[float(t), 1.0] for t in texts], dtype=np.float32)
+
+
+class _SlowWordModel(_WordModel):
+    def embed(self, texts):
+        time.sleep(0.005)
+        return super().embed(texts)
+
+
+def _texts(n: int) -> list[str]:
+    return [str(i) for i in range(n)]
+
+
+class TestWorkStealing:
+
+    def test_results_are_merged_in_input_order(self):
+        executor = WorkStealingExecutor(chunk_size=4)
+        backends = {"ane": _FakeBackend(0.0005), "gpu": _FakeBackend(), "cpu": _FakeBackend(0.001)}
+
+        vectors = executor.run(_texts(50), backends)
+
+        np.testing.assert_array_equal(vectors[:, 0], np.arange(50))
+        assert sum(b.texts for b in backends.values()) == 50
+
+    def test_faster_backend_does_more_work(self):
+        executor = WorkStealingExecutor(chunk_size=4)
+        fast, slow = _FakeBackend(0.0002), _FakeBackend(0.002)
+
+        executor.run(_texts(80), {"gpu": fast, "cpu": slow})
+
+        assert fast.texts > slow.texts
+        stats = executor.get_stats()["backends"]
+        assert stats["gpu"]["throughput_texts_per_s"] > stats["cpu"]["throughput_texts_per_s"]
+        assert stats["gpu"]["steals"] > 0
+
+    def test_plan_follows_measured_throughput(self):
+        executor = WorkStealingExecutor(chunk_size=4)
+        executor._throughput = {"gpu": 300.0, "cpu": 100.0}
+
+        assert executor.plan(["gpu", "cpu"], 10) == {"gpu": 8, "cpu": 2}
+        # An unmeasured backend is assumed to be average
+        assert executor.plan(["gpu", "cpu", "ane"], 12) == {"gpu": 6, "cpu": 2, "ane": 4}
+
+    def test_failing_backend_hands_work_to_the_others(self):
+        executor = WorkStealingExecutor(chunk_size=2)
+        flaky = _FakeBackend(fail_after=1)
+
+        vectors = executor.run(_texts(20), {"ane": flaky, "cpu": _FakeBackend(0.001)})
+
+        np.testing.assert_array_equal(vectors[:, 0], np.arange(20))
+        stats = executor.get_stats()["backends"]
+        assert stats["ane"]["errors"] == 1
+        assert stats["ane"]["cooling_down"] is True
+
+    def test_failed_backend_sits_out_later_jobs(self):
+        executor = WorkStealingExecutor(chunk_size=2, retry_after_s=60)
+        flaky = _FakeBackend(fail_after=0)
+        executor.run(_texts(6), {"ane": flaky, "cpu": _FakeBackend()})
+        calls = flaky.calls
+
+        executor.run(_texts(6), {"ane": flaky, "cpu": _FakeBackend()})
+
+        assert flaky.calls == calls
+
+    def test_all_backends_failing_raises(self):
+        executor = WorkStealingExecutor(chunk_size=2)
+        with pytest.raises(EmbeddingError, match="All embedding backends failed"):
+            executor.run(_texts(6), {"ane": _FakeBackend(fail_after=0), "cpu": _FakeBackend(fail_after=0)})
+
+
+class TestDispatcherMultiBackend:
+
+    def _dispatcher(self, tmp_path, primary, secondary, **settings):
+        loader = MagicMock()
+        loader.get_loaded_model.return_value = primary
+        defaults = {
+            "embedding_micro_batching": False,
+            "embedding_vector_cache": False,
+            "embedding_multi_backend": True,
+            "embedding_multi_backend_min_texts": 8,
+        }
+        defaults.update(settings)
+        return ComputeDispatcher(_make_settings(tmp_path, **defaults), embedding_loader=loader,
+                                 secondary_loaders=secondary)
+
+    def test_large_jobs_use_every_backend(self, tmp_path):
+        primary, other = _SlowWordModel(), _SlowWordModel()
+        gpu = MagicMock()
+        gpu.is_model_loaded.return_value = False
+        gpu.load_model.return_value = other
+        dispatcher = self._dispatcher(tmp_path, primary, {"gpu": gpu})
+        texts = [" ".join(["w"] * (i % 7 + 1)) for i in range(40)]
+
+        vectors = dispatcher.embed_array(texts)
+
+        np.testing.assert_array_equal(vectors[:, 0], [i % 7 + 1 for i in range(40)])
+        assert primary.batches
+        assert other.batches
+        stats = dispatcher.get_multi_backend_stats()
+        assert stats["devices"] == ["cpu", "gpu"]
+        assert set(stats["backends"]) == {"cpu", "gpu"}
+
+    def test_backend_with_other_truncation_is_left_out(self, tmp_path):
+        primary, other = _SlowWordModel(), _SlowWordModel()
+        other.max_seq_length = primary.max_seq_length * 4
+        gpu = MagicMock()
+        gpu.is_model_loaded.return_value = True
+        gpu.get_loaded_model.return_value = other
+        dispatcher = self._dispatcher(tmp_path, primary, {"gpu": gpu})
+        texts = [" ".join(["w"] * (i % 7 + 1)) for i in range(40)]
+
+        vectors = dispatcher.embed_array(texts)
+
+        np.testing.assert_array_equal(vectors[:, 0], [i % 7 + 1 for i in range(40)])
+        assert not other.batches
+        assert sum(len(batch) for batch in primary.batches) == 40
+
+    def test_small_jobs_stay_on_primary(self, tmp_path):
+        primary = _WordModel()
+        gpu = MagicMock()
+        dispatcher = self._dispatcher(tmp_path, primary, {"gpu": gpu})
+
+        dispatcher.embed_array(["a", "b c"])
+
+        gpu.load_model.assert_not_called()
+
+    def test_disabled_by_default(self, tmp_path):
+        dispatcher = self._dispatcher(tmp_path, _WordModel(), {"gpu": MagicMock()}, embedding_multi_backend=False)
+        assert dispatcher.get_multi_backend_stats() == {"enabled": False, "devices": ["cpu"]}